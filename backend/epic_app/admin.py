@@ -1,5 +1,6 @@
 from django.contrib import admin
 
+from epic_app.admin_models.domain_entity_admin import DomainEntityAdmin
 from epic_app.admin_models.generate_entity_admin import EpicOrganizationAdmin, LnkAdmin
 from epic_app.admin_models.import_entity_admin import (
     AgencyAdmin,
@@ -19,6 +20,7 @@ from epic_app.models.epic_questions import (
     LinkagesQuestion,
     NationalFrameworkQuestion,
 )
+from epic_app.models.epic_reports import EpicReportJob
 from epic_app.models.epic_user import EpicOrganization, EpicUser
 from epic_app.models.models import Agency, Area, Group, Program
 
@@ -27,8 +29,8 @@ admin.site.register(EpicUser)
 admin.site.register(EpicOrganization, EpicOrganizationAdmin)
 admin.site.register(Area, AreaAdmin)
 admin.site.register(Agency, AgencyAdmin)
-admin.site.register(Group)
-admin.site.register(Program)
+admin.site.register(Group, DomainEntityAdmin)
+admin.site.register(Program, DomainEntityAdmin)
 admin.site.register(NationalFrameworkQuestion, NfqAdmin)
 admin.site.register(KeyAgencyActionsQuestion, KaaAdmin)
 admin.site.register(EvolutionQuestion, EvoAdmin)
@@ -36,3 +38,4 @@ admin.site.register(LinkagesQuestion, LnkAdmin)
 admin.site.register(YesNoAnswer)
 admin.site.register(SingleChoiceAnswer)
 admin.site.register(MultipleChoiceAnswer)
+admin.site.register(EpicReportJob)
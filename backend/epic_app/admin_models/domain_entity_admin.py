@@ -0,0 +1,25 @@
+from django.contrib import admin
+
+from epic_app.models.models import DomainRevision
+
+
+class DomainEntityAdmin(admin.ModelAdmin):
+    """
+    Admin page for the EPIC domain entities, any change done through it bumps the `DomainRevision`.
+    """
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        DomainRevision.bump()
+
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        DomainRevision.bump()
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        DomainRevision.bump()
+
+    def delete_queryset(self, request, queryset):
+        super().delete_queryset(request, queryset)
+        DomainRevision.bump()
@@ -6,10 +6,11 @@ from django import forms
 from django.contrib import admin
 from django.contrib.admin.helpers import ACTION_CHECKBOX_NAME
 from django.db.models import QuerySet
-from django.http import HttpRequest
+from django.http import HttpRequest, HttpResponse
 from django.shortcuts import redirect, render
 from django.urls import path
 
+from epic_app.admin_models.domain_entity_admin import DomainEntityAdmin
 from epic_app.models.epic_questions import LinkagesQuestion
 from epic_app.models.epic_user import EpicOrganization, EpicUser
 
@@ -36,7 +37,7 @@ class GenerateEntityAdmin(admin.ModelAdmin):
         raise NotImplementedError("Implement in concrete classes.")
 
 
-class LnkAdmin(admin.ModelAdmin):
+class LnkAdmin(DomainEntityAdmin):
     actions = ["generate_entities"]
 
     @admin.action(description="Regenerate all Linkages Questions")
@@ -73,10 +74,18 @@ class EpicOrganizationAdmin(GenerateEntityAdmin):
     class EpicUserGenerateForm(forms.Form):
         selected_org = forms.ModelChoiceField(queryset=EpicOrganization.objects.all())
         n_epic_users = forms.IntegerField(required=True, label="Number of users")
+        export_format = forms.ChoiceField(
+            choices=[("", "None"), ("csv", "CSV"), ("json", "JSON")],
+            required=False,
+            label="Export credentials",
+        )
+
+    _export_content_types = {"csv": "text/csv", "json": "application/json"}
 
     def generate_entities(self, request: WSGIRequestHandler):
         """
-        Generates all `LinkagesQuestion` entries based on the existing `Programs`.
+        Generates the requested number of `EpicUser` for the selected `EpicOrganization`.
+        Their credentials can be downloaded as a CSV or JSON file.
 
         Args:
             request (HTTPRequest): HTML request.
@@ -88,10 +97,18 @@ class EpicOrganizationAdmin(GenerateEntityAdmin):
             epic_org: EpicOrganization = EpicOrganization.objects.filter(
                 pk=request.POST["selected_org"]
             ).first()
-            gen_users: List[EpicUser] = epic_org.generate_users(
-                int(request.POST["n_epic_users"])
-            )
-            user_list = ", ".join([g_user.username for g_user in gen_users])
+            credentials = epic_org.provision_users(int(request.POST["n_epic_users"]))
+            export_format = request.POST.get("export_format", "")
+            if export_format in self._export_content_types:
+                response = HttpResponse(
+                    EpicOrganization.export_credentials(credentials, export_format),
+                    content_type=self._export_content_types[export_format],
+                )
+                response[
+                    "Content-Disposition"
+                ] = f'attachment; filename="{epic_org.name}_credentials.{export_format}"'
+                return response
+            user_list = ", ".join([g_user.username for g_user, _ in credentials])
             self.message_user(
                 request,
                 f"Generated the following Epic Users with matching lowercase password for {epic_org.name}: \n {user_list}",
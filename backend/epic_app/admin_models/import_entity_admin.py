@@ -1,10 +1,11 @@
 import abc
 
 from django import forms
-from django.contrib import admin
+from django.contrib import messages
 from django.shortcuts import redirect, render
 from django.urls import path
 
+from epic_app.admin_models.domain_entity_admin import DomainEntityAdmin
 from epic_app.importers.xlsx import (
     BaseEpicImporter,
     EpicAgencyImporter,
@@ -26,7 +27,7 @@ class XlsxImportForm(forms.Form):
     xlsx_file = forms.FileField()
 
 
-class ImportEntityAdmin(admin.ModelAdmin):
+class ImportEntityAdmin(DomainEntityAdmin):
     """
     Overriding of the Area list in the admin page so that we can add our custom import for all the data.
     """
@@ -58,9 +59,19 @@ class ImportEntityAdmin(admin.ModelAdmin):
             HTTPRequest: HTML response.
         """
         if request.method == "POST":
+            if "check_only" in request.POST:
+                return self._check_xlsx(request)
             try:
                 self.get_importer().import_file(request.FILES["xlsx_file"])
                 self.message_user(request, "Your xlsx file has been imported")
+            except forms.ValidationError as v_error:
+                self.message_user(
+                    request,
+                    "The requested xlsx file was not imported:",
+                    level=messages.ERROR,
+                )
+                for v_message in v_error.messages:
+                    self.message_user(request, v_message.strip(), level=messages.ERROR)
             except:
                 self.message_user(
                     request, "It was not possible to import the requested xlsx file."
@@ -71,6 +82,28 @@ class ImportEntityAdmin(admin.ModelAdmin):
         payload = {"form": form}
         return render(request, "admin/xlsx_form.html", payload)
 
+    def _check_xlsx(self, request):
+        """
+        Validates the posted xlsx file without importing it and shows its line errors and duplicates.
+
+        Args:
+            request (HTTPRequest): HTML request.
+
+        Returns:
+            HTTPRequest: HTML response.
+        """
+        try:
+            import_check = self.get_importer().check_file(request.FILES["xlsx_file"])
+        except:
+            self.message_user(
+                request,
+                "It was not possible to read the requested xlsx file.",
+                level=messages.ERROR,
+            )
+            return redirect("..")
+        payload = {"form": XlsxImportForm(), "import_check": import_check}
+        return render(request, "admin/xlsx_form.html", payload)
+
     @abc.abstractmethod
     def get_importer(self) -> BaseEpicImporter:
         raise NotImplementedError("Should be implemented in concrete class.")
@@ -7,3 +7,13 @@ class EpicAppConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "epic_app"
     verbose_name = "An Epic App"
+
+    def ready(self) -> None:
+        # Registers the signal receivers which keep the answer summary counters up to date
+        # and the ones configuring (and measuring) new database connections.
+        from epic_app import epic_database, epic_metrics  # noqa: F401
+        from epic_app.models import epic_summaries  # noqa: F401
+        from epic_app.serializers.answer_serializer import answer_type_registry
+
+        # Question -> Answer -> serializer types do not change at runtime, resolve them once.
+        answer_type_registry.build()
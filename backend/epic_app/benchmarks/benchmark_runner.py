@@ -0,0 +1,208 @@
+import statistics
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from epic_app.benchmarks.load_comparison import ServingLoadComparison
+from epic_app.benchmarks.synthetic_dataset import SyntheticDataset
+from epic_app.importers.xlsx.agency_importer import EpicAgencyImporter
+from epic_app.importers.xlsx.base_importer import BaseEpicImporter
+from epic_app.importers.xlsx.domain_importer import EpicDomainImporter
+from epic_app.importers.xlsx.question_importer import (
+    EvolutionQuestionImporter,
+    KeyAgencyActionsQuestionImporter,
+    NationalFrameworkQuestionImporter,
+)
+from epic_app.models.epic_questions import LinkagesQuestion
+from epic_app.models.epic_user import EpicUser
+from epic_app.models.models import Program
+
+# Importers in the order they depend on each other.
+_importers: Dict[str, BaseEpicImporter] = {
+    "domain": EpicDomainImporter(),
+    "agency": EpicAgencyImporter(),
+    "nationalframework": NationalFrameworkQuestionImporter(),
+    "keyagencyactions": KeyAgencyActionsQuestionImporter(),
+    "evolution": EvolutionQuestionImporter(),
+}
+
+
+def measure(benchmark: Callable[[], Any], repeat: int) -> Dict[str, Any]:
+    """
+    Measures a benchmark: its duration over `repeat` runs, plus the queries and peak (Python) memory of one extra traced run.
+
+    Args:
+        benchmark (Callable[[], Any]): Code to measure, it needs to be repeatable.
+        repeat (int): Number of timed runs.
+
+    Returns:
+        Dict[str, Any]: Dictionary with the `seconds` (`min`, `median` and `max`), the `queries` and the `peak_memory_kib`.
+    """
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        benchmark()
+        durations.append(time.perf_counter() - start)
+
+    # Tracing slows the code down, so it is not timed.
+    tracemalloc.start()
+    try:
+        with CaptureQueriesContext(connection) as captured_queries:
+            benchmark()
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "seconds": {
+            "min": min(durations),
+            "median": statistics.median(durations),
+            "max": max(durations),
+        },
+        "queries": len(captured_queries),
+        "peak_memory_kib": round(peak_memory / 1024, 1),
+    }
+
+
+class EpicBenchmarkRunner:
+    """
+    Times the report, progress, answers and import hot paths on a `SyntheticDataset`.
+    It writes to the current database, so it is meant to run on a disposable (test) database.
+    """
+
+    def __init__(
+        self, dataset: SyntheticDataset, repeat: int = 3, load_requests: int = 0
+    ) -> None:
+        """
+        Args:
+            dataset (SyntheticDataset): Dataset to build and measure.
+            repeat (int, optional): Number of timed runs of each benchmark. Defaults to 3.
+            load_requests (int, optional): Lightweight requests of the WSGI / ASGI load comparison. Defaults to 0 (not compared).
+        """
+        self.dataset = dataset
+        self.repeat = repeat
+        self.load_requests = load_requests
+
+    def _get_client(self, user: User) -> APIClient:
+        api_client = APIClient()
+        api_client.force_authenticate(user=user)
+        return api_client
+
+    @staticmethod
+    def _get(api_client: APIClient, url: str) -> Callable[[], Any]:
+        def get_response():
+            response = api_client.get(url)
+            if response.status_code != 200:
+                raise RuntimeError(f"GET {url} returned {response.status_code}.")
+            if response.streaming:
+                return b"".join(response.streaming_content)
+            return response.content
+
+        return get_response
+
+    def _run_importers(self, results: Dict[str, Any]):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            import_files = self.dataset.write_import_files(Path(tmp_dir))
+            for i_name, i_importer in _importers.items():
+                results[f"import_{i_name}"] = measure(
+                    lambda: i_importer.import_file(import_files[i_name]), self.repeat
+                )
+
+    def _run_endpoints(self, results: Dict[str, Any]):
+        admin_user = User.objects.create(
+            username="benchmark_admin", is_staff=True, is_superuser=True
+        )
+        epic_user: EpicUser = EpicUser.objects.order_by("pk").first()
+        program: Program = Program.objects.order_by("pk").first()
+        question: LinkagesQuestion = LinkagesQuestion.objects.order_by("pk").first()
+        admin_client = self._get_client(admin_user)
+        benchmarks = {
+            "answers_report": self._get(admin_client, "/api/epicorganization/report/"),
+            "answers_pdf_report": self._get(
+                admin_client, "/api/epicorganization/report-pdf/"
+            ),
+            "program_progress": self._get(
+                self._get_client(epic_user), f"/api/program/{program.pk}/progress/"
+            ),
+            "question_answers": self._get(
+                admin_client, f"/api/question/{question.pk}/answers/?page_size=500"
+            ),
+        }
+        for b_name, b_function in benchmarks.items():
+            results[b_name] = measure(b_function, self.repeat)
+
+    def _run_load_comparison(self) -> Dict[str, Any]:
+        question: LinkagesQuestion = LinkagesQuestion.objects.order_by("pk").first()
+        return ServingLoadComparison(
+            heavy_user=User.objects.get(username="benchmark_admin"),
+            light_user=EpicUser.objects.order_by("pk").first(),
+            light_url=f"/api/question/{question.pk}/",
+            n_light=self.load_requests,
+        ).run()
+
+    def run(self) -> Dict[str, Any]:
+        """
+        Imports the dataset domain (measuring each importer), creates its users and answers and measures the endpoints.
+        When `load_requests` are given, the WSGI and ASGI serving modes are compared too.
+
+        Returns:
+            Dict[str, Any]: JSON serializable results, with the dataset parameters, the measures per benchmark and the `load` comparison.
+        """
+        results: Dict[str, Any] = {}
+        self._run_importers(results)
+        self.dataset.create_answers(self.dataset.create_users())
+        self._run_endpoints(results)
+        run_results = {
+            "created_on": timezone.now().isoformat(),
+            "dataset": self.dataset.get_parameters(),
+            "repeat": self.repeat,
+            "benchmarks": results,
+        }
+        if self.load_requests:
+            run_results["load"] = self._run_load_comparison()
+        return run_results
+
+
+def compare_results(
+    baseline: Dict[str, Any], current: Dict[str, Any], threshold: float
+) -> List[str]:
+    """
+    Compares two benchmark runs (as written by `EpicBenchmarkRunner.run`).
+    A benchmark regresses when its minimum duration grows over the threshold ratio or it requires more queries.
+
+    Args:
+        baseline (Dict[str, Any]): Reference results.
+        current (Dict[str, Any]): New results.
+        threshold (float): Allowed ratio between the current and baseline durations (e.g. 1.2).
+
+    Returns:
+        List[str]: Description of each regression found.
+    """
+    regressions = []
+    if baseline.get("dataset") != current.get("dataset"):
+        regressions.append(
+            f"Datasets differ: {baseline.get('dataset')} vs {current.get('dataset')}."
+        )
+        return regressions
+    for b_name, b_current in current["benchmarks"].items():
+        b_baseline: Optional[Dict[str, Any]] = baseline["benchmarks"].get(b_name, None)
+        if not b_baseline:
+            continue
+        baseline_seconds = b_baseline["seconds"]["min"]
+        current_seconds = b_current["seconds"]["min"]
+        if current_seconds > baseline_seconds * threshold:
+            regressions.append(
+                f"{b_name}: {current_seconds:.4f}s, baseline {baseline_seconds:.4f}s."
+            )
+        if b_current["queries"] > b_baseline["queries"]:
+            regressions.append(
+                f"{b_name}: {b_current['queries']} queries, baseline {b_baseline['queries']}."
+            )
+    return regressions
@@ -0,0 +1,174 @@
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Tuple
+
+from django.contrib.auth.models import User
+from django.test import Client
+from rest_framework.authtoken.models import Token
+
+from epic_app.epic_async import EpicASGIHandler
+
+# (url, `Authorization` header) of a request.
+_Request = Tuple[str, str]
+
+
+def _get_auth_header(user: User) -> str:
+    token, _ = Token.objects.get_or_create(user=user)
+    return f"Token {token.key}"
+
+
+def _get_latencies(latencies: List[float]) -> Dict[str, float]:
+    if not latencies:
+        return {}
+    sorted_latencies = sorted(latencies)
+    return {
+        "median": statistics.median(sorted_latencies),
+        "p95": sorted_latencies[int(0.95 * (len(sorted_latencies) - 1))],
+        "max": sorted_latencies[-1],
+    }
+
+
+class ServingLoadComparison:
+    """
+    Compares the WSGI and ASGI serving modes under a mixed load: lightweight questionnaire requests arriving (at a steady rate) while PDF reports are rendered.
+    The latency of each request is measured since its arrival.
+    Both modes are run in-process: the WSGI one with a number of synchronous workers (gunicorn runs one by default), the ASGI one with the `EpicASGIHandler` of `epic_core.asgi`.
+    Requests are served by other threads, so the measured data needs to be committed.
+    """
+
+    def __init__(
+        self,
+        heavy_user: User,
+        light_user: User,
+        light_url: str,
+        n_light: int = 100,
+        n_heavy: int = 1,
+        wsgi_workers: int = 1,
+        arrival_interval: float = 0.02,
+    ) -> None:
+        """
+        Args:
+            heavy_user (User): User requesting the PDF reports.
+            light_user (User): User requesting the lightweight url.
+            light_url (str): Lightweight url, such as a question of the questionnaire.
+            n_light (int, optional): Number of lightweight requests. Defaults to 100.
+            n_heavy (int, optional): Number of PDF report requests. Defaults to 1.
+            wsgi_workers (int, optional): Synchronous workers of the WSGI mode. Defaults to 1.
+            arrival_interval (float, optional): Seconds between the arrival of two lightweight requests. Defaults to 0.02.
+        """
+        heavy_request = (
+            "/api/epicorganization/report-pdf/",
+            _get_auth_header(heavy_user),
+        )
+        light_request = (light_url, _get_auth_header(light_user))
+        # The reports arrive first, so the lightweight requests compete with them.
+        self.requests: List[_Request] = [heavy_request] * n_heavy + [
+            light_request
+        ] * n_light
+        self.arrivals = [0.0] * n_heavy + [
+            (i + 1) * arrival_interval for i in range(n_light)
+        ]
+        self.n_heavy = n_heavy
+        self.wsgi_workers = wsgi_workers
+        self.arrival_interval = arrival_interval
+
+    @staticmethod
+    def _check_status(request: _Request, status: int):
+        if status != 200:
+            raise RuntimeError(f"GET {request[0]} returned {status}.")
+
+    def _get_results(self, latencies: List[float], total: float) -> Dict[str, Any]:
+        return {
+            "heavy_seconds": _get_latencies(latencies[: self.n_heavy]),
+            "light_seconds": _get_latencies(latencies[self.n_heavy :]),
+            "total_seconds": total,
+        }
+
+    def _run_wsgi(self) -> Dict[str, Any]:
+        def get_latency(request: _Request, arrival: float) -> float:
+            url, auth_header = request
+            response = Client(HTTP_AUTHORIZATION=auth_header).get(url)
+            self._check_status(request, response.status_code)
+            if response.streaming:
+                b"".join(response.streaming_content)
+            return time.perf_counter() - arrival
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.wsgi_workers) as executor:
+            # Requests queue up (as in the server backlog) until a worker is free.
+            latencies = []
+            for request, arrival in zip(self.requests, self.arrivals):
+                time.sleep(max(start + arrival - time.perf_counter(), 0))
+                latencies.append(
+                    executor.submit(get_latency, request, time.perf_counter())
+                )
+            latencies = [f_latency.result() for f_latency in latencies]
+        return self._get_results(latencies, time.perf_counter() - start)
+
+    async def _get_asgi_latency(
+        self, application: EpicASGIHandler, request: _Request, arrival: float
+    ) -> float:
+        await asyncio.sleep(arrival)
+        arrival_time = time.perf_counter()
+        url, auth_header = request
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": url,
+            "root_path": "",
+            "query_string": b"",
+            "headers": [
+                (b"host", b"testserver"),
+                (b"authorization", auth_header.encode("latin1")),
+            ],
+            "server": ("testserver", 80),
+            "client": ("127.0.0.1", 0),
+        }
+        messages = []
+
+        async def receive() -> Dict[str, Any]:
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        async def send(message: Dict[str, Any]):
+            messages.append(message)
+
+        await application(scope, receive, send)
+        self._check_status(request, messages[0]["status"])
+        return time.perf_counter() - arrival_time
+
+    async def _run_asgi_requests(self) -> Dict[str, Any]:
+        application = EpicASGIHandler()
+        start = time.perf_counter()
+        latencies = await asyncio.gather(
+            *[
+                self._get_asgi_latency(application, request, arrival)
+                for request, arrival in zip(self.requests, self.arrivals)
+            ]
+        )
+        return self._get_results(list(latencies), time.perf_counter() - start)
+
+    def _run_asgi(self) -> Dict[str, Any]:
+        return asyncio.run(self._run_asgi_requests())
+
+    def run(self) -> Dict[str, Any]:
+        """
+        Serves the same load in both modes.
+
+        Returns:
+            Dict[str, Any]: Per mode (`wsgi` and `asgi`), the latencies (`median`, `p95` and `max` seconds since their arrival) of the `heavy_seconds` and `light_seconds` requests, and the `total_seconds`.
+        """
+        return {
+            "requests": {
+                "heavy": self.n_heavy,
+                "light": len(self.requests) - self.n_heavy,
+                "wsgi_workers": self.wsgi_workers,
+                "arrival_interval": self.arrival_interval,
+            },
+            "wsgi": self._run_wsgi(),
+            "asgi": self._run_asgi(),
+        }
@@ -0,0 +1,233 @@
+import itertools
+from pathlib import Path
+from typing import Dict, List
+
+from django.contrib.auth.hashers import make_password
+from openpyxl import Workbook
+
+from epic_app.models.epic_answers import (
+    MultipleChoiceAnswer,
+    SingleChoiceAnswer,
+    YesNoAnswer,
+    YesNoAnswerType,
+)
+from epic_app.models.epic_questions import (
+    EvolutionChoiceType,
+    EvolutionQuestion,
+    KeyAgencyActionsQuestion,
+    LinkagesQuestion,
+    NationalFrameworkQuestion,
+)
+from epic_app.models.epic_summaries import AnswerSummary
+from epic_app.models.epic_user import EpicOrganization, EpicUser
+from epic_app.models.models import Program
+from epic_app.utils import bulk_create_submodel_instances
+
+_lorem = "Ullamco sunt dolore in nulla laborum id consectetur ipsum."
+
+
+class SyntheticDataset:
+    """
+    Parameterized EPIC dataset of N organizations x M users (per organization) x P programs, where every user answers every question.
+    The domain is written as XLSX files, so it is loaded through the same importers the administrators use.
+    """
+
+    programs_per_group = 5
+    groups_per_area = 4
+    agencies = 10
+    # Number of programs selected on each linkages answer (max 3).
+    linkages_per_answer = 3
+
+    def __init__(self, n_organizations: int, n_users: int, n_programs: int) -> None:
+        """
+        Args:
+            n_organizations (int): Number of `EpicOrganizations`.
+            n_users (int): Number of `EpicUsers` per organization.
+            n_programs (int): Number of `Programs`, each of them with one question of each type.
+        """
+        self.n_organizations = n_organizations
+        self.n_users = n_users
+        self.n_programs = n_programs
+
+    def get_parameters(self) -> Dict[str, int]:
+        return {
+            "organizations": self.n_organizations,
+            "users": self.n_users,
+            "programs": self.n_programs,
+        }
+
+    def _get_program_names(self) -> List[str]:
+        return [f"Program {n_program}" for n_program in range(self.n_programs)]
+
+    def _get_group_name(self, n_program: int) -> str:
+        return f"Group {n_program // self.programs_per_group}"
+
+    def _get_area_name(self, n_program: int) -> str:
+        return f"Area {n_program // (self.programs_per_group * self.groups_per_area)}"
+
+    @staticmethod
+    def _write_xlsx(xlsx_file: Path, headers: List[str], rows: List[List[str]]):
+        workbook = Workbook(write_only=True)
+        worksheet = workbook.create_sheet()
+        for row in itertools.chain([headers], rows):
+            worksheet.append(row)
+        workbook.save(xlsx_file)
+
+    def write_import_files(self, output_dir: Path) -> Dict[str, Path]:
+        """
+        Writes the files expected by each of the XLSX importers.
+
+        Args:
+            output_dir (Path): Existing directory where the files are written.
+
+        Returns:
+            Dict[str, Path]: File per importer (`domain`, `agency`, `nationalframework`, `keyagencyactions` and `evolution`).
+        """
+        program_names = self._get_program_names()
+        import_files = {
+            "domain": output_dir / "domain.xlsx",
+            "agency": output_dir / "agency.xlsx",
+            "nationalframework": output_dir / "nationalframework.xlsx",
+            "keyagencyactions": output_dir / "keyagencyactions.xlsx",
+            "evolution": output_dir / "evolution.xlsx",
+        }
+        self._write_xlsx(
+            import_files["domain"],
+            ["Area", "Group", "Program", "Description", "Reference", "Link"],
+            [
+                [
+                    self._get_area_name(n_program),
+                    self._get_group_name(n_program),
+                    p_name,
+                    _lorem,
+                    _lorem,
+                    "https://www.deltares.nl",
+                ]
+                for n_program, p_name in enumerate(program_names)
+            ],
+        )
+        self._write_xlsx(
+            import_files["agency"],
+            ["Agency", "Program"],
+            [
+                [f"Agency {n_program % self.agencies}", p_name]
+                for n_program, p_name in enumerate(program_names)
+            ],
+        )
+        for q_key in ["nationalframework", "keyagencyactions"]:
+            self._write_xlsx(
+                import_files[q_key],
+                ["Group", "Program", "Description", "Title"],
+                [
+                    [
+                        self._get_group_name(n_program),
+                        p_name,
+                        _lorem,
+                        f"{q_key} question",
+                    ]
+                    for n_program, p_name in enumerate(program_names)
+                ],
+            )
+        self._write_xlsx(
+            import_files["evolution"],
+            [
+                "Group",
+                "Program",
+                "Dimension",
+                "Nascent",
+                "Engaged",
+                "Capable",
+                "Effective",
+            ],
+            [
+                [self._get_group_name(n_program), p_name, "Dimension"] + [_lorem] * 4
+                for n_program, p_name in enumerate(program_names)
+            ],
+        )
+        return import_files
+
+    def create_users(self) -> List[EpicUser]:
+        """
+        Creates the organizations and their users (without usable passwords, benchmarks authenticate them directly).
+
+        Returns:
+            List[EpicUser]: Created users, the first one of each organization is an advisor.
+        """
+        organizations = EpicOrganization.objects.bulk_create(
+            [
+                EpicOrganization(name=f"Organization {n_org}")
+                for n_org in range(self.n_organizations)
+            ]
+        )
+        epic_users = [
+            EpicUser(
+                username=f"{organization.name} user {n_user}",
+                password=make_password(None),
+                organization=organization,
+                is_advisor=n_user == 0,
+            )
+            for organization in organizations
+            for n_user in range(self.n_users)
+        ]
+        return bulk_create_submodel_instances(EpicUser, epic_users)
+
+    def create_answers(self, epic_users: List[EpicUser]):
+        """
+        Answers all the questions for all the given users and rebuilds the answer summaries.
+        Linkages questions are generated first when missing.
+
+        Args:
+            epic_users (List[EpicUser]): Answering users.
+        """
+        if not LinkagesQuestion.objects.exists():
+            LinkagesQuestion.generate_linkages()
+        yes_no_choices = itertools.cycle(YesNoAnswerType.values)
+        evolution_choices = itertools.cycle(EvolutionChoiceType.values)
+        for yn_type in [NationalFrameworkQuestion, KeyAgencyActionsQuestion]:
+            bulk_create_submodel_instances(
+                YesNoAnswer,
+                [
+                    YesNoAnswer(
+                        user=e_user,
+                        question=question,
+                        short_answer=next(yes_no_choices),
+                        justify_answer=_lorem,
+                    )
+                    for question in yn_type.objects.all()
+                    for e_user in epic_users
+                ],
+            )
+        bulk_create_submodel_instances(
+            SingleChoiceAnswer,
+            [
+                SingleChoiceAnswer(
+                    user=e_user,
+                    question=question,
+                    selected_choice=next(evolution_choices),
+                    justify_answer=_lorem,
+                )
+                for question in EvolutionQuestion.objects.all()
+                for e_user in epic_users
+            ],
+        )
+        linkages_answers = bulk_create_submodel_instances(
+            MultipleChoiceAnswer,
+            [
+                MultipleChoiceAnswer(user=e_user, question=question)
+                for question in LinkagesQuestion.objects.all()
+                for e_user in epic_users
+            ],
+        )
+        program_pks = itertools.cycle(Program.objects.values_list("pk", flat=True))
+        selected_programs = MultipleChoiceAnswer.selected_programs.through
+        selected_programs.objects.bulk_create(
+            [
+                selected_programs(multiplechoiceanswer_id=l_answer.pk, program_id=p_pk)
+                for l_answer in linkages_answers
+                for p_pk in dict.fromkeys(
+                    next(program_pks) for _ in range(self.linkages_per_answer)
+                )
+            ]
+        )
+        # Bulk inserts do not send signals.
+        AnswerSummary.rebuild()
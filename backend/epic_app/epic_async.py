@@ -0,0 +1,146 @@
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.base import BaseHandler
+from django.db import close_old_connections
+from django.http import HttpRequest, HttpResponse
+from django.urls import Resolver404, resolve
+
+# Number of streamed parts produced per thread hop.
+_STREAMED_PARTS_BATCH = 256
+
+_executors: Dict[str, ThreadPoolExecutor] = {}
+_executors_lock = threading.Lock()
+
+
+def get_executor(pool_name: str) -> ThreadPoolExecutor:
+    """
+    Gets the (bounded) thread pool with the given name, its size is set in `EPIC_ASYNC_THREAD_POOLS`.
+
+    Args:
+        pool_name (str): Name of the pool, such as `read` or `render`.
+
+    Returns:
+        ThreadPoolExecutor: Thread pool shared by all the requests of this process.
+    """
+    with _executors_lock:
+        if pool_name not in _executors:
+            _executors[pool_name] = ThreadPoolExecutor(
+                max_workers=settings.EPIC_ASYNC_THREAD_POOLS[pool_name],
+                thread_name_prefix=f"epic-{pool_name}",
+            )
+        return _executors[pool_name]
+
+
+def _with_db_connections(func: Callable) -> Callable:
+    @functools.wraps(func)
+    def run_with_db_connections(*args, **kwargs):
+        # Pool threads keep their own database connections, they are recycled as Django does at the start and end of every request.
+        close_old_connections()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            close_old_connections()
+
+    return run_with_db_connections
+
+
+async def run_in_pool(pool_name: str, func: Callable, *args, **kwargs) -> Any:
+    """
+    Runs blocking code (ORM queries, report rendering) in the given thread pool without blocking the event loop.
+
+    Args:
+        pool_name (str): Name of the thread pool.
+        func (Callable): Synchronous function to run.
+
+    Returns:
+        Any: Result of the function.
+    """
+    return await sync_to_async(
+        _with_db_connections(func),
+        thread_sensitive=False,
+        executor=get_executor(pool_name),
+    )(*args, **kwargs)
+
+
+class EpicASGIHandler(ASGIHandler):
+    """
+    ASGI handler of the async serving mode. The routes in `epic_app.urls.async_routes` (report, PDF, progress and domain reads) are handled in their bounded thread pool:
+    a burst of reports cannot take more than the `render` threads, and each request pays a single thread hop instead of one per (synchronous) middleware.
+    Streaming responses (such as the CSV and XLSX reports, which query the database while streaming) are drained by a single `render` thread instead of the event loop, and closed afterwards so `request_finished` releases their connections.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        from epic_app.urls import async_routes
+
+        self.async_routes: Dict[str, str] = async_routes
+        # Synchronous middlewares and views of the pooled routes, awaited with a single thread hop.
+        self._sync_handler = BaseHandler()
+        self._sync_handler.load_middleware(is_async=False)
+
+    def _get_pool_name(self, request: HttpRequest) -> Optional[str]:
+        try:
+            resolver_match = resolve(request.path_info)
+        except Resolver404:
+            return None
+        return self.async_routes.get(resolver_match.view_name, None)
+
+    async def get_response_async(self, request: HttpRequest) -> HttpResponse:
+        pool_name = self._get_pool_name(request)
+        if pool_name is None:
+            return await super().get_response_async(request)
+        return await run_in_pool(pool_name, self._sync_handler.get_response, request)
+
+    async def send_response(self, response: HttpResponse, send: Callable):
+        if not response.streaming:
+            return await super().send_response(response, send)
+        # Same messages as `ASGIHandler.send_response` (Django 4.2 already supports asynchronous iterators).
+        response_headers = [
+            (
+                header.encode("ascii") if isinstance(header, str) else bytes(header),
+                value.encode("latin1") if isinstance(value, str) else bytes(value),
+            )
+            for header, value in response.items()
+        ]
+        response_headers.extend(
+            (b"Set-Cookie", c.output(header="").encode("ascii").strip())
+            for c in response.cookies.values()
+        )
+        await send(
+            {
+                "type": "http.response.start",
+                "status": response.status_code,
+                "headers": response_headers,
+            }
+        )
+        try:
+            # The iterator (and the queries it runs) is drained by a single render thread, each batch of parts is sent from the event loop.
+            await run_in_pool("render", self._stream_parts, response, send)
+        finally:
+            # Fires `request_finished`, as `ASGIHandler.send_response` does.
+            await sync_to_async(response.close, thread_sensitive=True)()
+        await send({"type": "http.response.body"})
+
+    def _stream_parts(self, response: HttpResponse, send: Callable):
+        send_parts = async_to_sync(self._send_parts)
+        parts_batch = []
+        for part in response:
+            parts_batch.append(part)
+            if len(parts_batch) == _STREAMED_PARTS_BATCH:
+                send_parts(parts_batch, send)
+                parts_batch = []
+        if parts_batch:
+            send_parts(parts_batch, send)
+
+    async def _send_parts(self, parts: List[Any], send: Callable):
+        for part in parts:
+            for chunk, _ in self.chunk_bytes(part):
+                await send(
+                    {"type": "http.response.body", "body": chunk, "more_body": True}
+                )
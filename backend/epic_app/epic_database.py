@@ -0,0 +1,83 @@
+import functools
+import random
+import time
+from typing import Any, Callable, Optional
+
+import django
+from django.conf import settings
+from django.core.signals import request_started
+from django.db import OperationalError, connections, transaction
+from django.db.backends.base.base import BaseDatabaseWrapper
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+_lock_errors = ("database is locked", "database table is locked")
+
+
+@receiver(connection_created)
+def configure_sqlite_connection(
+    sender, connection: BaseDatabaseWrapper, **kwargs
+) -> None:
+    """
+    Runs the `EPIC_SQLITE_PRAGMAS` on every new SQLite connection, other database vendors are not changed.
+    """
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        for p_name, p_value in settings.EPIC_SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {p_name} = {p_value}")
+
+
+@receiver(request_started)
+def check_persistent_connections(**kwargs) -> None:
+    """
+    Closes the persistent connections (`CONN_MAX_AGE`) which are no longer usable, such as after a database restart, so the request opens a new one.
+    Only for the databases with `CONN_HEALTH_CHECKS`, which Django itself supports from version 4.1.
+    """
+    if django.VERSION >= (4, 1):
+        return
+    for db_connection in connections.all():
+        if (
+            db_connection.connection is not None
+            and db_connection.settings_dict.get("CONN_HEALTH_CHECKS", False)
+            and not db_connection.is_usable()
+        ):
+            db_connection.close()
+
+
+def is_database_lock_error(error: Exception) -> bool:
+    return isinstance(error, OperationalError) and any(
+        l_error in str(error) for l_error in _lock_errors
+    )
+
+
+def retry_on_database_lock(func: Optional[Callable] = None, *, using: str = None):
+    """
+    Retries the decorated write when it fails because the database is locked (by another writer), up to `EPIC_DB_LOCK_RETRIES` times.
+    The delay between attempts starts at `EPIC_DB_LOCK_RETRY_DELAY` seconds and doubles on each retry (with jitter, so writers do not retry at once).
+    A failure inside an outer transaction is never retried, as the whole transaction needs to be rolled back.
+
+    Args:
+        func (Optional[Callable], optional): Decorated function, it needs to be safe to run again after a rollback.
+        using (str, optional): Database alias. Defaults to None (default database).
+    """
+    if func is None:
+        return functools.partial(retry_on_database_lock, using=using)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs) -> Any:
+        n_retries = settings.EPIC_DB_LOCK_RETRIES
+        for n_attempt in range(n_retries + 1):
+            try:
+                return func(*args, **kwargs)
+            except OperationalError as e_info:
+                if (
+                    n_attempt == n_retries
+                    or not is_database_lock_error(e_info)
+                    or transaction.get_connection(using).in_atomic_block
+                ):
+                    raise
+            retry_delay = settings.EPIC_DB_LOCK_RETRY_DELAY * 2**n_attempt
+            time.sleep(retry_delay * random.uniform(0.5, 1.5))
+
+    return wrapper
@@ -0,0 +1,358 @@
+import bisect
+import json
+import sqlite3
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db.backends.base.base import BaseDatabaseWrapper
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import HttpRequest, HttpResponse
+
+# Upper bounds (in seconds) of the request latency histogram buckets.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_metric_help = {
+    "epic_http_requests_total": ("counter", "Number of handled requests."),
+    "epic_http_request_duration_seconds": ("histogram", "Request latency."),
+    "epic_db_queries_total": ("counter", "Number of SQL queries run by requests."),
+    "epic_db_query_duration_seconds_total": (
+        "counter",
+        "Time spent by requests on SQL queries.",
+    ),
+    "epic_http_response_size_bytes_total": ("counter", "Size of the response bodies."),
+}
+
+# A metric sample is identified by its name and its (sorted) labels.
+_SampleKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+# Queries of the request being handled. As a context variable it follows the request into the threads running its views.
+_request_queries: ContextVar[Optional[Dict[str, float]]] = ContextVar(
+    "epic_request_queries", default=None
+)
+
+
+class MetricsStore:
+    """
+    Request metrics aggregated across processes (such as gunicorn workers) through a shared SQLite file.
+    Each process keeps its samples in memory and adds them to the file at most every `EPIC_METRICS_FLUSH_SECONDS`, and whenever the metrics are read.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._pending: Counter = Counter()
+        self._last_flush = time.monotonic()
+
+    @staticmethod
+    def _get_db_file() -> Path:
+        return Path(settings.EPIC_METRICS_FILE)
+
+    def _connect(self) -> sqlite3.Connection:
+        db_file = self._get_db_file()
+        db_file.parent.mkdir(parents=True, exist_ok=True)
+        db_connection = sqlite3.connect(db_file, timeout=5)
+        db_connection.execute(
+            "CREATE TABLE IF NOT EXISTS epic_metrics (name TEXT NOT NULL, labels TEXT NOT NULL, value REAL NOT NULL, PRIMARY KEY (name, labels))"
+        )
+        return db_connection
+
+    def add(self, samples: Dict[_SampleKey, float]):
+        """
+        Adds the given values to the (pending) samples, flushing them when the flush interval elapsed.
+
+        Args:
+            samples (Dict[_SampleKey, float]): Value to add per metric sample.
+        """
+        if self._add_pending(samples):
+            self.flush()
+
+    async def aadd(self, samples: Dict[_SampleKey, float]):
+        """
+        Same as `add`, but the (blocking) flush to the shared file runs in a thread instead of the event loop.
+
+        Args:
+            samples (Dict[_SampleKey, float]): Value to add per metric sample.
+        """
+        if self._add_pending(samples):
+            await sync_to_async(self.flush, thread_sensitive=False)()
+
+    def _add_pending(self, samples: Dict[_SampleKey, float]) -> bool:
+        # Returns whether the pending samples are due to be flushed.
+        with self._lock:
+            self._pending.update(samples)
+            return (
+                time.monotonic() - self._last_flush
+                >= settings.EPIC_METRICS_FLUSH_SECONDS
+            )
+
+    def flush(self):
+        """
+        Adds the pending samples of this process to the shared file with a single transaction.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+            self._last_flush = time.monotonic()
+        if not pending:
+            return
+        db_connection = self._connect()
+        try:
+            with db_connection:
+                db_connection.executemany(
+                    "INSERT INTO epic_metrics (name, labels, value) VALUES (?, ?, ?) ON CONFLICT (name, labels) DO UPDATE SET value = value + excluded.value",
+                    [
+                        (name, json.dumps(labels), value)
+                        for (name, labels), value in pending.items()
+                    ],
+                )
+        finally:
+            db_connection.close()
+
+    def get_samples(self) -> Dict[_SampleKey, float]:
+        """
+        Gets all the samples of all processes, after flushing the ones of this process.
+
+        Returns:
+            Dict[_SampleKey, float]: Value per metric sample.
+        """
+        self.flush()
+        db_connection = self._connect()
+        try:
+            return {
+                (name, tuple(tuple(label) for label in json.loads(labels))): value
+                for name, labels, value in db_connection.execute(
+                    "SELECT name, labels, value FROM epic_metrics ORDER BY name, labels"
+                )
+            }
+        finally:
+            db_connection.close()
+
+    def reset(self):
+        """
+        Removes all the stored (and pending) samples.
+        """
+        with self._lock:
+            self._pending = Counter()
+        db_connection = self._connect()
+        try:
+            with db_connection:
+                db_connection.execute("DELETE FROM epic_metrics")
+        finally:
+            db_connection.close()
+
+
+metrics_store = MetricsStore()
+
+
+def _get_labels(**labels: str) -> Tuple[Tuple[str, str], ...]:
+    return tuple(sorted(labels.items()))
+
+
+def get_request_samples(
+    route: str,
+    method: str,
+    status: int,
+    duration: float,
+    n_queries: int,
+    queries_duration: float,
+    response_size: int,
+) -> Dict[_SampleKey, float]:
+    """
+    Gets the metric samples of one handled request.
+
+    Args:
+        route (str): Route label, the name of the resolved url.
+        method (str): HTTP method.
+        status (int): Response status code.
+        duration (float): Request latency in seconds.
+        n_queries (int): Number of SQL queries run.
+        queries_duration (float): Time spent on SQL queries in seconds.
+        response_size (int): Size of the response body in bytes.
+
+    Returns:
+        Dict[_SampleKey, float]: Value to add per metric sample.
+    """
+    route_labels = dict(route=route, method=method)
+    samples = {
+        (
+            "epic_http_requests_total",
+            _get_labels(status=str(status), **route_labels),
+        ): 1,
+        (
+            "epic_http_request_duration_seconds_sum",
+            _get_labels(**route_labels),
+        ): duration,
+        ("epic_http_request_duration_seconds_count", _get_labels(**route_labels)): 1,
+        ("epic_db_queries_total", _get_labels(**route_labels)): n_queries,
+        (
+            "epic_db_query_duration_seconds_total",
+            _get_labels(**route_labels),
+        ): queries_duration,
+        (
+            "epic_http_response_size_bytes_total",
+            _get_labels(**route_labels),
+        ): response_size,
+    }
+    # Buckets are cumulative, only the ones from the first matching bound are increased.
+    n_bucket = bisect.bisect_left(LATENCY_BUCKETS, duration)
+    for le_bound in [str(b) for b in LATENCY_BUCKETS[n_bucket:]] + ["+Inf"]:
+        samples[
+            (
+                "epic_http_request_duration_seconds_bucket",
+                _get_labels(le=le_bound, **route_labels),
+            )
+        ] = 1
+    return samples
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _format_labels(labels: Tuple[Tuple[str, str], ...]) -> str:
+    escaped_labels = (
+        (l_name, l_value.replace("\\", "\\\\").replace('"', '\\"'))
+        for l_name, l_value in labels
+    )
+    return ",".join(f'{l_name}="{l_value}"' for l_name, l_value in escaped_labels)
+
+
+def _get_sample_order(s_key: _SampleKey) -> Tuple:
+    # Histogram samples are grouped by their labels: buckets sorted by bound (`+Inf` last), then the sum and count.
+    s_name, s_labels = s_key
+    other_labels = tuple(label for label in s_labels if label[0] != "le")
+    le_bound = float(dict(s_labels).get("le", "inf"))
+    suffix_order = ["_bucket", "_sum", "_count"]
+    s_suffix = next(
+        (suffix_order.index(sf) for sf in suffix_order if s_name.endswith(sf)), 0
+    )
+    return (other_labels, s_suffix, le_bound)
+
+
+def render_prometheus_text(samples: Dict[_SampleKey, float]) -> str:
+    """
+    Renders the given samples in the Prometheus text exposition format (version 0.0.4).
+
+    Args:
+        samples (Dict[_SampleKey, float]): Value per metric sample.
+
+    Returns:
+        str: Exposition text.
+    """
+    lines: List[str] = []
+    for metric_name, (metric_type, metric_help) in _metric_help.items():
+        lines.append(f"# HELP {metric_name} {metric_help}")
+        lines.append(f"# TYPE {metric_name} {metric_type}")
+        sample_names = (
+            [f"{metric_name}_bucket", f"{metric_name}_sum", f"{metric_name}_count"]
+            if metric_type == "histogram"
+            else [metric_name]
+        )
+        metric_samples = [s_key for s_key in samples if s_key[0] in sample_names]
+        for s_key in sorted(metric_samples, key=_get_sample_order):
+            s_name, s_labels = s_key
+            lines.append(
+                f"{s_name}{{{_format_labels(s_labels)}}} {_format_value(samples[s_key])}"
+            )
+    return "\n".join(lines) + "\n"
+
+
+def _get_route(request: HttpRequest) -> str:
+    resolver_match = getattr(request, "resolver_match", None)
+    if resolver_match is None:
+        return "unmatched"
+    return resolver_match.view_name or resolver_match.route
+
+
+def _get_response_size(response: HttpResponse) -> int:
+    if response.streaming:
+        return int(response.get("Content-Length", 0))
+    return len(response.content)
+
+
+def _count_request_queries(execute, sql, params, many, context):
+    queries_stats = _request_queries.get()
+    if queries_stats is None:
+        return execute(sql, params, many, context)
+    query_start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        queries_stats["count"] += 1
+        queries_stats["duration"] += time.perf_counter() - query_start
+
+
+@receiver(connection_created)
+def count_connection_queries(sender, connection: BaseDatabaseWrapper, **kwargs) -> None:
+    """
+    Counts the queries of every new connection, whichever thread opens it, into the metrics of the request being handled.
+    """
+    if _count_request_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_count_request_queries)
+
+
+class EpicMetricsMiddleware:
+    """
+    Records the latency, SQL queries and response size of each request, labelled by its route (url name) and method.
+    Routes such as the report, PDF report, progress and (bulk) answers ones get their own url name, so they are told apart.
+    It supports both the synchronous (WSGI) and the asynchronous (ASGI) request handling.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response: Callable[[HttpRequest], HttpResponse]) -> None:
+        self.get_response = get_response
+        self._is_async = iscoroutinefunction(get_response)
+        if self._is_async:
+            markcoroutinefunction(self)
+
+    def _get_samples(
+        self,
+        request: HttpRequest,
+        response: HttpResponse,
+        request_start: float,
+        queries_stats: Dict[str, float],
+    ) -> Dict[_SampleKey, float]:
+        return get_request_samples(
+            route=_get_route(request),
+            method=request.method,
+            status=response.status_code,
+            duration=time.perf_counter() - request_start,
+            n_queries=queries_stats["count"],
+            queries_duration=queries_stats["duration"],
+            response_size=_get_response_size(response),
+        )
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        if self._is_async:
+            return self.__acall__(request)
+        queries_stats = {"count": 0, "duration": 0.0}
+        queries_token = _request_queries.set(queries_stats)
+        request_start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_queries.reset(queries_token)
+        metrics_store.add(
+            self._get_samples(request, response, request_start, queries_stats)
+        )
+        return response
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        queries_stats = {"count": 0, "duration": 0.0}
+        queries_token = _request_queries.set(queries_stats)
+        request_start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _request_queries.reset(queries_token)
+        await metrics_store.aadd(
+            self._get_samples(request, response, request_start, queries_stats)
+        )
+        return response
@@ -0,0 +1,34 @@
+from django.conf import settings
+from rest_framework import pagination
+from rest_framework.request import Request
+
+
+class EpicCursorPagination(pagination.CursorPagination):
+    """
+    Keyset pagination ordered by primary key, so pages stay stable (and equally fast) while rows are added.
+    The page size defaults to `EPIC_PAGE_SIZE` and can be changed with the query parameter `page_size`.
+    """
+
+    ordering = "pk"
+    page_size_query_param = "page_size"
+    max_page_size = 1000
+
+    def get_page_size(self, request: Request) -> int:
+        self.page_size = settings.EPIC_PAGE_SIZE
+        return super().get_page_size(request)
+
+    @classmethod
+    def is_requested(cls, request: Request) -> bool:
+        """
+        Whether the request explicitly asks for a page, used by endpoints where paging is optional.
+
+        Args:
+            request (Request): API Request.
+
+        Returns:
+            bool: Whether a cursor or a page size were given.
+        """
+        return any(
+            q_param in request.query_params
+            for q_param in (cls.cursor_query_param, cls.page_size_query_param)
+        )
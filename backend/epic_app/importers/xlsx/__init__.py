@@ -1,5 +1,10 @@
 from epic_app.importers.xlsx.agency_importer import EpicAgencyImporter
-from epic_app.importers.xlsx.base_importer import BaseEpicImporter
+from epic_app.importers.xlsx.base_importer import (
+    BaseEpicImporter,
+    ImportCheck,
+    ImportDiff,
+    ImportLineError,
+)
 from epic_app.importers.xlsx.domain_importer import EpicDomainImporter
 from epic_app.importers.xlsx.question_importer import (
     EvolutionQuestionImporter,
@@ -1,12 +1,17 @@
 import csv
 from pathlib import Path
-from typing import Dict, List, Union
+from typing import Callable, Dict, Hashable, List, Optional, Set, Tuple, Union
 
+from django.conf import settings
 from django.core.files.uploadedfile import InMemoryUploadedFile
-from django.forms import ValidationError
+from django.db import transaction
 
-from epic_app.importers.xlsx.base_importer import BaseEpicImporter
-from epic_app.models.models import Agency, Program
+from epic_app.importers.xlsx.base_importer import (
+    BaseEpicImporter,
+    ImportDiff,
+    ImportLineError,
+)
+from epic_app.models.models import Agency, DomainRevision, Program
 
 
 class EpicAgencyImporter(BaseEpicImporter):
@@ -21,41 +26,148 @@ class EpicAgencyImporter(BaseEpicImporter):
             new_line.program = cls.get_valid_cell(xlsx_row, 1)
             return new_line
 
-    def _validate(
+    def _validate_line(
         self,
-        xlsx_line_objects: List[XlsxLineObject],
-    ) -> List[str]:
-        errors_found = []
-        n_line_addition = 2  # Excluded header + start enumerate is 0.
-        for n_line, xlsx_line in enumerate(xlsx_line_objects):
-            if not Program.objects.filter(name__iexact=xlsx_line.program).exists():
-                error_line = n_line + n_line_addition
-                errors_found.append(
-                    f"  - Line {error_line}. Program: '{xlsx_line.program}' does not exist."
-                )
-        return errors_found
+        n_line: int,
+        xlsx_line: XlsxLineObject,
+        programs_index: Dict[str, Tuple[int, str]],
+    ) -> Optional[str]:
+        if xlsx_line.program.lower() not in programs_index:
+            return f"  - Line {n_line}. Program: '{xlsx_line.program}' does not exist."
+        return None
+
+    def _get_line_checker(
+        self,
+    ) -> Callable[[int, XlsxLineObject], Optional[ImportLineError]]:
+        programs_index = self._get_programs_index()
+        return lambda n_line, xlsx_line: ImportLineError.from_message(
+            n_line,
+            ImportLineError.unknown_reference,
+            self._validate_line(n_line, xlsx_line, programs_index),
+        )
 
-    def _import_agencies(self, agencies_dictionary: Dict[str, List[XlsxLineObject]]):
+    def _get_line_key(self, xlsx_line: XlsxLineObject) -> Hashable:
+        return (xlsx_line.agency, xlsx_line.program.lower())
+
+    def _import_agencies(
+        self,
+        agencies_dictionary: Dict[str, List[XlsxLineObject]],
+        programs_index: Dict[str, Tuple[int, str]],
+    ):
         # Remove all previous agency objects.
         Agency.objects.all().delete()
-        for agency_name, agency_csvobj in agencies_dictionary.items():
-            c_agency = Agency(name=agency_name)
-            c_agency.save()
-            for csvobj in agency_csvobj:
-                existing_program: Program = Program.get_program_by_name(csvobj.program)
-                existing_program.agencies.add(c_agency)
+        new_agencies = Agency.objects.bulk_create(
+            [Agency(name=agency_name) for agency_name in agencies_dictionary.keys()]
+        )
+        agency_programs = Program.agencies.through
+        agency_programs.objects.bulk_create(
+            [
+                agency_programs(agency_id=c_agency.pk, program_id=program_id)
+                for c_agency, agency_csvobj in zip(
+                    new_agencies, agencies_dictionary.values()
+                )
+                for program_id in dict.fromkeys(
+                    programs_index[csvobj.program.lower()][0]
+                    for csvobj in agency_csvobj
+                )
+            ]
+        )
 
     def import_file(self, input_file: Union[InMemoryUploadedFile, Path]):
         """
         Imports saved Agencies into the database and adds the relationships to existent Programs.
+        The file is read in a single pass and all the agencies (and relationships) are stored at once.
 
         Args:
             input_file (Union[InMemoryUploadedFile, Path]): File containing EPIC Agencies.
         """
-        Agency.objects.all().delete()
-        line_objects = self._get_xlsx_line_objects(input_file)
-        _headers = line_objects.pop(0)
-        errors_found = self._validate(line_objects)
-        if any(errors_found):
-            raise ValidationError(errors_found)
-        self._import_agencies(self.group_entity("agency", line_objects))
+        programs_index = self._get_programs_index()
+        line_objects = self._get_validated_instances(
+            input_file,
+            lambda n_line, xlsx_line: self._validate_line(
+                n_line, xlsx_line, programs_index
+            ),
+            lambda xlsx_line: xlsx_line,
+        )
+        with transaction.atomic():
+            self._import_agencies(
+                self.group_entity("agency", line_objects), programs_index
+            )
+            DomainRevision.bump()
+
+    def _get_agencies_diff(self, agency_programs: Dict[str, Set[int]]) -> ImportDiff:
+        """
+        Compares the existing agencies (and their programs) with the imported ones, matched by name.
+        """
+        existing_programs: Dict[int, Set[int]] = {}
+        for a_pk, p_pk in Program.agencies.through.objects.values_list(
+            "agency_id", "program_id"
+        ):
+            existing_programs.setdefault(a_pk, set()).add(p_pk)
+        agencies_diff = ImportDiff.from_instances(
+            Agency,
+            [],
+            Agency.objects.order_by("pk"),
+            [Agency(name=agency_name) for agency_name in agency_programs.keys()],
+            get_key=lambda agency: agency.name,
+        )
+        for e_agency in agencies_diff.kept:
+            if (
+                existing_programs.get(e_agency.pk, set())
+                != agency_programs[e_agency.name]
+            ):
+                agencies_diff.mark_updated(e_agency.name, e_agency)
+        return agencies_diff
+
+    def upsert_file(
+        self, input_file: Union[InMemoryUploadedFile, Path], dry_run: bool = False
+    ) -> List[ImportDiff]:
+        """
+        Imports the agencies of the file by only inserting, updating (their programs) and removing the agencies which differ from the existing ones, matched by name.
+
+        Args:
+            input_file (Union[InMemoryUploadedFile, Path]): File containing EPIC Agencies.
+            dry_run (bool, optional): Only compute the differences, nothing is written. Defaults to False.
+
+        Returns:
+            List[ImportDiff]: Differences found (and applied) for the agencies.
+        """
+        programs_index = self._get_programs_index()
+        line_objects = self._get_validated_instances(
+            input_file,
+            lambda n_line, xlsx_line: self._validate_line(
+                n_line, xlsx_line, programs_index
+            ),
+            lambda xlsx_line: xlsx_line,
+        )
+        agency_programs = {
+            agency_name: {
+                programs_index[csvobj.program.lower()][0] for csvobj in agency_csvobj
+            }
+            for agency_name, agency_csvobj in self.group_entity(
+                "agency", line_objects
+            ).items()
+        }
+        agencies_diff = self._get_agencies_diff(agency_programs)
+        if dry_run or not agencies_diff.has_changes:
+            return [agencies_diff]
+
+        through_model = Program.agencies.through
+        with transaction.atomic():
+            agencies_diff.apply()
+            changed_agencies = [
+                agency for _, agency in agencies_diff.updated + agencies_diff.inserted
+            ]
+            through_model.objects.filter(
+                agency_id__in=[agency.pk for agency in changed_agencies]
+            ).delete()
+            through_model.objects.bulk_create(
+                [
+                    through_model(agency_id=agency.pk, program_id=program_id)
+                    for agency in changed_agencies
+                    for program_id in sorted(agency_programs[agency.name])
+                ],
+                batch_size=settings.EPIC_IMPORT_BATCH_SIZE,
+            )
+            DomainRevision.bump()
+        return [agencies_diff]
@@ -1,12 +1,32 @@
+from __future__ import annotations
+
 import io
 from pathlib import Path
-from typing import Any, Callable, Dict, List, Protocol, Tuple, Union, runtime_checkable
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Hashable,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Protocol,
+    Tuple,
+    Type,
+    Union,
+    runtime_checkable,
+)
 
 import openpyxl
+from django.conf import settings
 from django.core.files.uploadedfile import InMemoryUploadedFile
+from django.db import models
+from django.forms import ValidationError
 from openpyxl.cell import Cell
 
 from epic_app.models.models import Program
+from epic_app.utils import bulk_create_submodel_instances
 
 
 @runtime_checkable
@@ -18,7 +38,211 @@ class ProtocolEpicImporter(Protocol):
         pass
 
 
+class ImportLineError:
+    """
+    Issue found in one line of an imported file.
+    """
+
+    unknown_reference = "unknown_reference"
+    duplicate = "duplicate"
+
+    def __init__(self, n_line: int, kind: str, message: str) -> None:
+        """
+        Args:
+            n_line (int): Line number (as shown in the file).
+            kind (str): Type of issue, `unknown_reference` or `duplicate`.
+            message (str): Description of the issue.
+        """
+        self.n_line = n_line
+        self.kind = kind
+        self.message = message.lstrip(" -")
+
+    @classmethod
+    def from_message(
+        cls, n_line: int, kind: str, message: Optional[str]
+    ) -> Optional[ImportLineError]:
+        return cls(n_line, kind, message) if message else None
+
+    def __str__(self) -> str:
+        return f"  - {self.message}"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(line=self.n_line, kind=self.kind, message=self.message)
+
+
+class ImportCheck:
+    """
+    Result of checking a file without importing it. The errors prevent the file from being imported, the warnings do not.
+    """
+
+    def __init__(self) -> None:
+        self.n_lines = 0
+        self.errors: List[ImportLineError] = []
+        self.warnings: List[ImportLineError] = []
+
+    @property
+    def is_valid(self) -> bool:
+        return not self.errors
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(
+            lines=self.n_lines,
+            is_valid=self.is_valid,
+            errors=[line_error.to_dict() for line_error in self.errors],
+            warnings=[line_error.to_dict() for line_error in self.warnings],
+        )
+
+
+class ImportDiff:
+    """
+    Changes required to turn the existing entities of one type into the imported ones, matched by their natural key.
+    """
+
+    def __init__(self, model_type: Type[models.Model], fields: List[str]) -> None:
+        """
+        Args:
+            model_type (Type[models.Model]): Type of the compared entities.
+            fields (List[str]): Fields (not part of the natural key) copied to the updated entities.
+        """
+        self.model_type = model_type
+        self.fields = fields
+        self.inserted: List[Tuple[str, models.Model]] = []
+        self.updated: List[Tuple[str, models.Model]] = []
+        self.removed: List[Tuple[str, models.Model]] = []
+        self.kept: List[models.Model] = []
+        self.n_unchanged = 0
+
+    @classmethod
+    def from_instances(
+        cls,
+        model_type: Type[models.Model],
+        fields: List[str],
+        existing: Iterable[models.Model],
+        imported: Iterable[models.Model],
+        get_key: Callable[[models.Model], Hashable],
+        get_label: Callable[[models.Model], str] = str,
+    ) -> ImportDiff:
+        """
+        Compares the existing entities with the imported ones. Entities sharing a natural key are paired in order of appearance.
+        The updated entities are the existing instances with the imported values already set.
+
+        Args:
+            model_type (Type[models.Model]): Type of the compared entities.
+            fields (List[str]): Fields (not part of the natural key) to compare.
+            existing (Iterable[models.Model]): Entities currently stored.
+            imported (Iterable[models.Model]): Entities read from the file, not yet stored.
+            get_key (Callable[[models.Model], Hashable]): Gets the natural key of an entity.
+            get_label (Callable[[models.Model], str], optional): Gets the text describing an entity. Defaults to str.
+
+        Returns:
+            ImportDiff: Resulting changes.
+        """
+        import_diff = cls(model_type, fields)
+        existing_by_key: Dict[Hashable, List[models.Model]] = {}
+        for e_instance in existing:
+            existing_by_key.setdefault(get_key(e_instance), []).append(e_instance)
+        for i_instance in imported:
+            key_matches = existing_by_key.get(get_key(i_instance), [])
+            if not key_matches:
+                import_diff.inserted.append((get_label(i_instance), i_instance))
+                continue
+            e_instance = key_matches.pop(0)
+            import_diff.kept.append(e_instance)
+            if import_diff._copy_changed_fields(i_instance, e_instance):
+                import_diff.updated.append((get_label(e_instance), e_instance))
+            else:
+                import_diff.n_unchanged += 1
+        import_diff.removed = [
+            (get_label(e_instance), e_instance)
+            for key_matches in existing_by_key.values()
+            for e_instance in key_matches
+        ]
+        return import_diff
+
+    def _copy_changed_fields(self, source: models.Model, target: models.Model) -> bool:
+        changed = False
+        for f_name in self.fields:
+            f_attname = self.model_type._meta.get_field(f_name).attname
+            if getattr(source, f_attname) != getattr(target, f_attname):
+                setattr(target, f_attname, getattr(source, f_attname))
+                changed = True
+        return changed
+
+    def mark_updated(self, label: str, instance: models.Model):
+        """
+        Moves an unchanged entity to the updated ones, for changes not covered by `fields` (such as relationships).
+        """
+        self.n_unchanged -= 1
+        self.updated.append((label, instance))
+
+    @property
+    def has_changes(self) -> bool:
+        return any(self.inserted) or any(self.updated) or any(self.removed)
+
+    def get_stored_instances(self) -> List[models.Model]:
+        """
+        Gets the entities stored once the changes are applied: the kept existing ones followed by the inserted ones.
+        """
+        return self.kept + [instance for _, instance in self.inserted]
+
+    def save(self):
+        """
+        Stores the inserted and updated entities in batches of `EPIC_IMPORT_BATCH_SIZE` rows.
+        """
+        batch_size = settings.EPIC_IMPORT_BATCH_SIZE
+        if self.updated and self.fields:
+            self.model_type.objects.bulk_update(
+                [instance for _, instance in self.updated],
+                self.fields,
+                batch_size=batch_size,
+            )
+        inserted = [instance for _, instance in self.inserted]
+        if self.model_type._meta.get_parent_list():
+            bulk_create_submodel_instances(self.model_type, inserted)
+        else:
+            self.model_type.objects.bulk_create(inserted, batch_size=batch_size)
+
+    def delete_removed(self):
+        """
+        Deletes the removed entities in batches of `EPIC_IMPORT_BATCH_SIZE` rows.
+        """
+        batch_size = settings.EPIC_IMPORT_BATCH_SIZE
+        removed_pks = [instance.pk for _, instance in self.removed]
+        for batch_start in range(0, len(removed_pks), batch_size):
+            self.model_type.objects.filter(
+                pk__in=removed_pks[batch_start : batch_start + batch_size]
+            ).delete()
+
+    def apply(self):
+        """
+        Applies all the changes, it is meant to run within a transaction.
+        """
+        self.delete_removed()
+        self.save()
+
+    def get_summary(self) -> List[str]:
+        """
+        Describes the changes, one line per changed entity after a line with the totals.
+
+        Returns:
+            List[str]: Lines describing the changes.
+        """
+        summary = [
+            f"{self.model_type.__name__}: {len(self.inserted)} inserted, {len(self.updated)} updated, {len(self.removed)} removed, {self.n_unchanged} unchanged."
+        ]
+        for symbol, changes in [
+            ("+", self.inserted),
+            ("~", self.updated),
+            ("-", self.removed),
+        ]:
+            summary.extend(f"  {symbol} {label}" for label, _ in changes)
+        return summary
+
+
 class BaseEpicImporter:
+    # Whether lines with the same key (see `_get_line_key`) can be imported, otherwise they are reported as errors.
+    allow_duplicated_lines = True
+
     class XlsxLineObject:
         @staticmethod
         def get_valid_cell(xlsx_row: List[Cell], cell_pos: int) -> str:
@@ -31,6 +255,29 @@ class BaseEpicImporter:
         def from_xlsx_row(cls, xlsx_row: Any):
             raise NotImplementedError("Implement in concrete class.")
 
+    def _iter_xlsx_line_objects(
+        self, input_file: Union[InMemoryUploadedFile, Path]
+    ) -> Iterator[XlsxLineObject]:
+        """
+        Streams the Xlsx lines into our custom `XlsxLineObject`.
+        The workbook is opened in read-only mode, so rows are parsed one by one instead of loading the whole sheet in memory.
+
+        Args:
+            input_file (Union[InMemoryUploadedFile, Path]): File to parse.
+
+        Yields:
+            Iterator[XlsxLineObject]: Parsed objects, in the same order as in the file.
+        """
+        loaded_workbook: openpyxl.Workbook = openpyxl.load_workbook(
+            input_file, read_only=True, data_only=True
+        )
+        try:
+            for row in loaded_workbook.active.iter_rows():
+                if row and row[0].value:
+                    yield self.XlsxLineObject.from_xlsx_row(row)
+        finally:
+            loaded_workbook.close()
+
     def _get_xlsx_line_objects(
         self, input_file: Union[InMemoryUploadedFile, Path]
     ) -> List[XlsxLineObject]:
@@ -43,15 +290,141 @@ class BaseEpicImporter:
         Returns:
             List[XlsxLineObject]: Resulting list of parsed objects.
         """
-        loaded_workbook: openpyxl.Workbook = openpyxl.load_workbook(input_file)
-        loaded_sheet = loaded_workbook.active
+        return list(self._iter_xlsx_line_objects(input_file))
+
+    def _iter_xlsx_data_lines(
+        self, input_file: Union[InMemoryUploadedFile, Path]
+    ) -> Iterator[Tuple[int, XlsxLineObject]]:
+        """
+        Streams the Xlsx lines after the headers together with their line number (as shown in the file).
 
-        def _get_valid_rows():
-            for row in loaded_sheet.rows:
-                if row[0].value:
-                    yield row
+        Args:
+            input_file (Union[InMemoryUploadedFile, Path]): File to parse.
 
-        return list(map(self.XlsxLineObject.from_xlsx_row, _get_valid_rows()))
+        Yields:
+            Iterator[Tuple[int, XlsxLineObject]]: Line number and parsed object.
+        """
+        n_line_addition = 2  # Excluded header + start enumerate is 0.
+        line_objects = self._iter_xlsx_line_objects(input_file)
+        _headers = next(line_objects, None)
+        for n_line, xlsx_line in enumerate(line_objects):
+            yield n_line + n_line_addition, xlsx_line
+
+    def _get_validated_instances(
+        self,
+        input_file: Union[InMemoryUploadedFile, Path],
+        validate_line: Callable[[int, XlsxLineObject], Optional[str]],
+        to_instance: Callable[[XlsxLineObject], Any],
+    ) -> List[Any]:
+        """
+        Validates and converts all the Xlsx lines (after the headers) in a single pass over the file.
+
+        Args:
+            input_file (Union[InMemoryUploadedFile, Path]): File to parse.
+            validate_line (Callable[[int, XlsxLineObject], Optional[str]]): Returns the error found in a line (if any).
+            to_instance (Callable[[XlsxLineObject], Any]): Converts a valid line into the object to import.
+
+        Raises:
+            ValidationError: When errors were found, it contains all of them.
+
+        Returns:
+            List[Any]: Objects to import, in the same order as in the file.
+        """
+        errors_found = []
+        instances = []
+        check_duplicated_line = self._get_duplicated_line_checker()
+        for n_line, xlsx_line in self._iter_xlsx_data_lines(input_file):
+            error_found = validate_line(n_line, xlsx_line)
+            if not error_found and not self.allow_duplicated_lines:
+                error_found = check_duplicated_line(n_line, xlsx_line)
+            if error_found:
+                errors_found.append(str(error_found))
+            elif not errors_found:
+                instances.append(to_instance(xlsx_line))
+        if any(errors_found):
+            raise ValidationError(errors_found)
+        return instances
+
+    def _get_line_checker(
+        self,
+    ) -> Callable[[int, XlsxLineObject], Optional[ImportLineError]]:
+        """
+        Gets the function validating each line as `import_file` does, its references are loaded at once (at most one query).
+        """
+        raise NotImplementedError("Implement in concrete class.")
+
+    def _get_line_key(self, xlsx_line: XlsxLineObject) -> Optional[Hashable]:
+        """
+        Gets the key identifying the entry of a line, lines with the same key are reported as duplicated. Defaults to None (not checked).
+        """
+        return None
+
+    def _get_duplicated_line_checker(
+        self,
+    ) -> Callable[[int, XlsxLineObject], Optional[ImportLineError]]:
+        key_lines: Dict[Hashable, int] = {}
+
+        def check_duplicated_line(
+            n_line: int, xlsx_line: BaseEpicImporter.XlsxLineObject
+        ) -> Optional[ImportLineError]:
+            line_key = self._get_line_key(xlsx_line)
+            if line_key is None:
+                return None
+            if line_key not in key_lines:
+                key_lines[line_key] = n_line
+                return None
+            return ImportLineError(
+                n_line,
+                ImportLineError.duplicate,
+                f"Line {n_line}. Same entry as line {key_lines[line_key]}.",
+            )
+
+        return check_duplicated_line
+
+    def check_file(self, input_file: Union[InMemoryUploadedFile, Path]) -> ImportCheck:
+        """
+        Validates an xlsx file in a single pass without importing it, nothing is written to the database.
+        All the referenced programs (and groups) are checked with a single query.
+
+        Args:
+            input_file (Union[InMemoryUploadedFile, Path]): File containing EPIC data.
+
+        Returns:
+            ImportCheck: Errors (as raised by `import_file`) and duplicated lines found, which are errors unless `allow_duplicated_lines`.
+        """
+        import_check = ImportCheck()
+        check_line = self._get_line_checker()
+        check_duplicated_line = self._get_duplicated_line_checker()
+        for n_line, xlsx_line in self._iter_xlsx_data_lines(input_file):
+            import_check.n_lines += 1
+            line_error = check_line(n_line, xlsx_line)
+            if line_error:
+                import_check.errors.append(line_error)
+                continue
+            duplicated_error = check_duplicated_line(n_line, xlsx_line)
+            if not duplicated_error:
+                continue
+            if self.allow_duplicated_lines:
+                import_check.warnings.append(duplicated_error)
+            else:
+                import_check.errors.append(duplicated_error)
+        return import_check
+
+    @staticmethod
+    def _get_programs_index() -> Dict[str, Tuple[int, str]]:
+        """
+        Gets the `Program` id and (lowercase) `Group` name of all programs indexed by their lowercase name.
+        It requires one query, so lines can be validated without querying the database for each of them.
+
+        Returns:
+            Dict[str, Tuple[int, str]]: Program id and group name per program name.
+        """
+        return {
+            Program.get_name_key(p_name): (p_pk, g_name.lower())
+            for p_pk, p_name, g_name in Program.objects.values_list(
+                "pk", "name", "group__name"
+            )
+        }
 
     def import_file(self, input_file: Union[InMemoryUploadedFile, Path]):
         """
@@ -62,6 +435,22 @@ class BaseEpicImporter:
         """
         raise NotImplementedError("Implement in concrete class.")
 
+    def upsert_file(
+        self, input_file: Union[InMemoryUploadedFile, Path], dry_run: bool = False
+    ) -> List[ImportDiff]:
+        """
+        Imports an xlsx file by only applying its differences with the existing entities (matched by their natural key), instead of replacing all of them.
+        Entities which did not change are kept, and so are their related entities (such as the answers of a question).
+
+        Args:
+            input_file (Union[InMemoryUploadedFile, Path]): File containing EPIC data.
+            dry_run (bool, optional): Only compute the differences, nothing is written. Defaults to False.
+
+        Returns:
+            List[ImportDiff]: Differences found (and applied) per entity type.
+        """
+        raise NotImplementedError("Implement in concrete class.")
+
     def tuple_to_dict(
         self, tup_lines: List[Tuple[str, List[Any]]]
     ) -> Dict[str, List[Any]]:
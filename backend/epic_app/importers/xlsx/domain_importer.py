@@ -1,12 +1,24 @@
+from __future__ import annotations
+
 import csv
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 
 from django.core.files.uploadedfile import InMemoryUploadedFile
+from django.db import transaction
 from openpyxl import Workbook
 
-from epic_app.importers.xlsx.base_importer import BaseEpicImporter
-from epic_app.models.models import Area, Group, Program
+from epic_app.importers.xlsx.base_importer import (
+    BaseEpicImporter,
+    ImportDiff,
+    ImportLineError,
+)
+from epic_app.models.epic_answers import MultipleChoiceAnswer
+from epic_app.models.epic_summaries import (
+    AnswerSummaryChange,
+    suspended_summary_tracking,
+)
+from epic_app.models.models import Area, DomainRevision, Group, Program
 
 
 class EpicDomainImporter(BaseEpicImporter):
@@ -42,26 +54,210 @@ class EpicDomainImporter(BaseEpicImporter):
             epic_group, _ = Group.objects.get_or_create(
                 name=self.group.strip(), area=epic_area
             )
+            return self._get_program(epic_group)
+
+        def _get_program(self, epic_group: Group) -> Program:
+            program_name = self.program.strip()
             return Program(
-                name=self.program.strip(),
+                name=program_name,
+                # Programs are bulk created, which does not go through `Program.save`.
+                name_key=Program.get_name_key(program_name),
                 description=self.description.strip(),
                 reference_description=self.reference.strip(),
                 reference_link=self.reference_link,
                 group=epic_group,
             )
 
+    class _DomainIndex:
+        """
+        In-memory index of the areas, groups and programs read from the file, so they can be created at once.
+        """
+
+        def __init__(self) -> None:
+            self.areas: Dict[str, Area] = {}
+            self.groups: Dict[Tuple[str, str], Group] = {}
+            self.programs: Dict[str, Program] = {}
+
+        def add_line(self, xlsx_line: EpicDomainImporter.XlsxLineObject) -> Program:
+            area_name = xlsx_line.area.strip()
+            epic_area = self.areas.setdefault(area_name, Area(name=area_name))
+            group_name = xlsx_line.group.strip()
+            epic_group = self.groups.setdefault(
+                (area_name, group_name), Group(name=group_name, area=epic_area)
+            )
+            epic_program = xlsx_line._get_program(epic_group)
+            self.programs[epic_program.name_key] = epic_program
+            return epic_program
+
+        def save(self):
+            # Related instances are saved first, so their ids are set on bulk creation.
+            Area.objects.bulk_create(self.areas.values())
+            Group.objects.bulk_create(self.groups.values())
+            Program.objects.bulk_create(self.programs.values())
+
     def _cleanup_epic_domain(self):
         """
         Dumps the database for the entities to import.
         """
-        Area.objects.all().delete()
-        Group.objects.all().delete()
-        Program.objects.all().delete()
+        # All the questions (and so all the answers and their summaries) are removed as well.
+        with suspended_summary_tracking():
+            Area.objects.all().delete()
+            Group.objects.all().delete()
+            Program.objects.all().delete()
+
+    def _validate_line(
+        self, n_line: int, xlsx_line: XlsxLineObject, domain_index: _DomainIndex
+    ) -> Optional[str]:
+        existing_program = domain_index.programs.get(
+            xlsx_line.program.strip().lower(), None
+        )
+        if existing_program:
+            return f"  - Line {n_line}. There's already a Program with the name: {existing_program.name}."
+        return None
+
+    def _get_line_checker(
+        self,
+    ) -> Callable[[int, XlsxLineObject], Optional[ImportLineError]]:
+        # Programs are only checked against the previous lines, they replace the existing ones.
+        domain_index = self._DomainIndex()
+
+        def check_line(
+            n_line: int, xlsx_line: EpicDomainImporter.XlsxLineObject
+        ) -> Optional[ImportLineError]:
+            line_error = self._validate_line(n_line, xlsx_line, domain_index)
+            if not line_error:
+                domain_index.add_line(xlsx_line)
+            return ImportLineError.from_message(
+                n_line, ImportLineError.duplicate, line_error
+            )
+
+        return check_line
 
     def import_file(self, input_file: Union[InMemoryUploadedFile, Path]):
-        self._cleanup_epic_domain()
-        line_objects: List[self.XlsxLineObject] = self._get_xlsx_line_objects(
-            input_file
+        """
+        Imports the areas, groups and programs of the file in a single pass, replacing the existing ones.
+
+        Args:
+            input_file (Union[InMemoryUploadedFile, Path]): File containing the EPIC domain.
+        """
+        domain_index = self._DomainIndex()
+        self._get_validated_instances(
+            input_file,
+            lambda n_line, xlsx_line: self._validate_line(
+                n_line, xlsx_line, domain_index
+            ),
+            domain_index.add_line,
+        )
+        with transaction.atomic():
+            self._cleanup_epic_domain()
+            domain_index.save()
+            DomainRevision.bump()
+
+    def _get_domain_diffs(
+        self, domain_index: _DomainIndex, dry_run: bool
+    ) -> List[ImportDiff]:
+        """
+        Compares (and unless `dry_run` stores) the areas, groups and programs of the file with the existing ones.
+        Areas are matched by name, groups by area and name and programs by (lowercase) name.
+        The removed entities are not deleted yet, as the kept programs might still belong to them.
+        """
+        areas_diff = ImportDiff.from_instances(
+            Area,
+            [],
+            Area.objects.order_by("pk"),
+            domain_index.areas.values(),
+            get_key=lambda area: area.name,
+        )
+        if not dry_run:
+            areas_diff.save()
+        stored_areas = {area.name: area for area in areas_diff.get_stored_instances()}
+        for epic_group in domain_index.groups.values():
+            epic_group.area = stored_areas[epic_group.area.name]
+
+        groups_diff = ImportDiff.from_instances(
+            Group,
+            [],
+            Group.objects.select_related("area").order_by("pk"),
+            domain_index.groups.values(),
+            get_key=lambda group: (group.area.name, group.name),
+            get_label=lambda group: f"{group.area.name}: {group.name}",
+        )
+        if not dry_run:
+            groups_diff.save()
+        stored_groups = {
+            (group.area.name, group.name): group
+            for group in groups_diff.get_stored_instances()
+        }
+        for epic_program in domain_index.programs.values():
+            epic_program.group = stored_groups[
+                (epic_program.group.area.name, epic_program.group.name)
+            ]
+
+        programs_diff = ImportDiff.from_instances(
+            Program,
+            # The name is compared too, as a change of case keeps the same key.
+            ["name", "description", "reference_description", "reference_link", "group"],
+            Program.objects.order_by("pk"),
+            domain_index.programs.values(),
+            get_key=lambda program: Program.get_name_key(program.name),
+            get_label=lambda program: program.name,
+        )
+        if not dry_run:
+            programs_diff.save()
+        return [areas_diff, groups_diff, programs_diff]
+
+    @staticmethod
+    def _delete_removed(domain_diffs: List[ImportDiff]):
+        """
+        Deletes the removed areas, groups and programs.
+        The questions (and so the answers and their summaries) of the removed programs are removed as well, without tracking them.
+        The kept linkage answers which selected a removed program lose it, so their summaries are updated explicitly.
+        """
+        removed_programs = [
+            program.pk
+            for domain_diff in domain_diffs
+            if domain_diff.model_type is Program
+            for _, program in domain_diff.removed
+        ]
+        kept_answers = list(
+            MultipleChoiceAnswer.objects.filter(selected_programs__in=removed_programs)
+            .exclude(question__program__in=removed_programs)
+            .values_list("pk", flat=True)
+            .distinct()
+        )
+        summary_change = AnswerSummaryChange(MultipleChoiceAnswer, kept_answers)
+        with suspended_summary_tracking():
+            for domain_diff in reversed(domain_diffs):
+                domain_diff.delete_removed()
+        summary_change.apply(kept_answers)
+
+    def upsert_file(
+        self, input_file: Union[InMemoryUploadedFile, Path], dry_run: bool = False
+    ) -> List[ImportDiff]:
+        """
+        Imports the areas, groups and programs of the file by only inserting, updating and removing the ones which differ from the existing ones.
+        The questions (and answers) of the kept programs are kept as well.
+
+        Args:
+            input_file (Union[InMemoryUploadedFile, Path]): File containing the EPIC domain.
+            dry_run (bool, optional): Only compute the differences, nothing is written. Defaults to False.
+
+        Returns:
+            List[ImportDiff]: Differences found (and applied) for the areas, groups and programs.
+        """
+        domain_index = self._DomainIndex()
+        self._get_validated_instances(
+            input_file,
+            lambda n_line, xlsx_line: self._validate_line(
+                n_line, xlsx_line, domain_index
+            ),
+            domain_index.add_line,
         )
-        _headers = line_objects.pop(0)
-        list(map(lambda x: x.to_epic_program().save(), line_objects))
+        if dry_run:
+            return self._get_domain_diffs(domain_index, dry_run)
+        with transaction.atomic():
+            domain_diffs = self._get_domain_diffs(domain_index, dry_run)
+            self._delete_removed(domain_diffs)
+            if any(domain_diff.has_changes for domain_diff in domain_diffs):
+                DomainRevision.bump()
+        return domain_diffs
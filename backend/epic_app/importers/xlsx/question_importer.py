@@ -1,22 +1,59 @@
 import csv
 from pathlib import Path
-from typing import List, Type, Union
+from typing import Callable, Dict, Hashable, List, Optional, Tuple, Type, Union
 
 from django.core.files.uploadedfile import InMemoryUploadedFile
-from django.forms import ValidationError
+from django.db import transaction
 from openpyxl.cell import Cell
 
-from epic_app.importers.xlsx.base_importer import BaseEpicImporter
+from epic_app.importers.xlsx.base_importer import (
+    BaseEpicImporter,
+    ImportDiff,
+    ImportLineError,
+)
 from epic_app.models.epic_questions import (
     EvolutionQuestion,
     KeyAgencyActionsQuestion,
     NationalFrameworkQuestion,
     Question,
 )
-from epic_app.models.models import Program
+from epic_app.models.epic_summaries import suspended_summary_tracking
+from epic_app.models.models import DomainRevision, Program
+from epic_app.utils import bulk_create_submodel_instances
+
+
+def _upsert_questions(
+    question_type: Type[Question],
+    fields: List[str],
+    imported_questions: List[Question],
+    dry_run: bool,
+) -> List[ImportDiff]:
+    """
+    Applies the differences between the existing questions of the given type and the imported ones, matched by program and title.
+    """
+    program_names = dict(Program.objects.values_list("pk", "name"))
+    question_diff = ImportDiff.from_instances(
+        question_type,
+        fields,
+        question_type.objects.order_by("pk"),
+        imported_questions,
+        get_key=lambda question: (question.program_id, question.title),
+        get_label=lambda question: f"{program_names[question.program_id]}: {question.title}",
+    )
+    if dry_run or not question_diff.has_changes:
+        return [question_diff]
+    with transaction.atomic():
+        # The answers summaries are removed together with their questions.
+        with suspended_summary_tracking():
+            question_diff.apply()
+        DomainRevision.bump()
+    return [question_diff]
 
 
 class _YesNoJustifyQuestionImporter(BaseEpicImporter):
+    # Questions are unique per program and title.
+    allow_duplicated_lines = False
+
     class XlsxLineObject(BaseEpicImporter.XlsxLineObject):
         group: str
         program: str
@@ -35,54 +72,94 @@ class _YesNoJustifyQuestionImporter(BaseEpicImporter):
     def import_file(self, input_file: Union[InMemoryUploadedFile, Path]):
         """
         Imports a 'XLSX file', because we only support one importer we can embed it here.
+        The file is read in a single pass and the questions are stored at once, replacing the existing ones.
 
         Args:
             input_file (Union[InMemoryUploadedFile, Path]): File to be imported as a YNJustify question.
         """
-        line_objects = self._get_xlsx_line_objects(input_file)
-        # Skip the first line as it's the columns names
-        _headers = line_objects.pop(0)
-        self._cleanup_questions()
-        errors_found = self._validate(line_objects)
-        if any(errors_found):
-            raise ValidationError(errors_found)
+        programs_index = self._get_programs_index()
+        new_questions = self._get_validated_instances(
+            input_file,
+            lambda n_line, xlsx_line: self._validate_line(
+                n_line, xlsx_line, programs_index
+            ),
+            lambda xlsx_line: self._get_question(xlsx_line, programs_index),
+        )
+
+        with transaction.atomic():
+            self._cleanup_questions()
+            self._import_questions(new_questions)
+            DomainRevision.bump()
+
+    def upsert_file(
+        self, input_file: Union[InMemoryUploadedFile, Path], dry_run: bool = False
+    ) -> List[ImportDiff]:
+        """
+        Imports a 'XLSX file' by only inserting, updating (their description) and removing the questions which differ from the existing ones.
+        Questions are matched by program and title, so the answers of the unchanged questions are kept.
+
+        Args:
+            input_file (Union[InMemoryUploadedFile, Path]): File to be imported as a YNJustify question.
+            dry_run (bool, optional): Only compute the differences, nothing is written. Defaults to False.
 
-        self._import_questions(line_objects)
+        Returns:
+            List[ImportDiff]: Differences found (and applied) for the questions.
+        """
+        programs_index = self._get_programs_index()
+        imported_questions = self._get_validated_instances(
+            input_file,
+            lambda n_line, xlsx_line: self._validate_line(
+                n_line, xlsx_line, programs_index
+            ),
+            lambda xlsx_line: self._get_question(xlsx_line, programs_index),
+        )
+        return _upsert_questions(
+            self._get_type(), ["description"], imported_questions, dry_run
+        )
 
     def _get_type(self) -> Type[Question]:
         pass
 
+    def _get_line_checker(
+        self,
+    ) -> Callable[[int, XlsxLineObject], Optional[ImportLineError]]:
+        programs_index = self._get_programs_index()
+        return lambda n_line, xlsx_line: ImportLineError.from_message(
+            n_line,
+            ImportLineError.unknown_reference,
+            self._validate_line(n_line, xlsx_line, programs_index),
+        )
+
+    def _get_line_key(self, xlsx_line: XlsxLineObject) -> Hashable:
+        return (xlsx_line.program.lower(), xlsx_line.title)
+
     def _cleanup_questions(self):
-        self._get_type().objects.all().delete()
+        # The answers summaries are removed together with their questions.
+        with suspended_summary_tracking():
+            self._get_type().objects.all().delete()
 
-    def _validate(
+    def _validate_line(
         self,
-        xlsx_line_objects: List[XlsxLineObject],
-    ) -> List[str]:
-        errors_found = []
-        n_line_addition = 2  # Excluded header + start enumerate is 0.
-        for n_line, xlsx_line in enumerate(xlsx_line_objects):
-            if not Program.objects.filter(
-                name__iexact=xlsx_line.program, group__name__iexact=xlsx_line.group
-            ).exists():
-                error_line = n_line + n_line_addition
-                errors_found.append(
-                    f"  - Line {error_line}. Program: '{xlsx_line.program}', Group: '{xlsx_line.group}' does not exist."
-                )
-        return errors_found
-
-    def _import_questions(self, imported_questions: List[XlsxLineObject]):
-        for q_question in imported_questions:
-            # Create new question
-            f_program_query = Program.objects.get(
-                name__iexact=q_question.program, group__name__iexact=q_question.group
-            )
-            c_question: Question = self._get_type()(
-                title=q_question.title,
-                description=q_question.description,
-                program=f_program_query,
-            )
-            c_question.save()
+        n_line: int,
+        xlsx_line: XlsxLineObject,
+        programs_index: Dict[str, Tuple[int, str]],
+    ) -> Optional[str]:
+        program_found = programs_index.get(xlsx_line.program.lower(), None)
+        if not program_found or program_found[1] != xlsx_line.group.lower():
+            return f"  - Line {n_line}. Program: '{xlsx_line.program}', Group: '{xlsx_line.group}' does not exist."
+        return None
+
+    def _get_question(
+        self, xlsx_line: XlsxLineObject, programs_index: Dict[str, Tuple[int, str]]
+    ) -> Question:
+        return self._get_type()(
+            title=xlsx_line.title,
+            description=xlsx_line.description,
+            program_id=programs_index[xlsx_line.program.lower()][0],
+        )
+
+    def _import_questions(self, imported_questions: List[Question]):
+        bulk_create_submodel_instances(self._get_type(), imported_questions)
 
 
 class NationalFrameworkQuestionImporter(_YesNoJustifyQuestionImporter):
@@ -96,6 +173,9 @@ class KeyAgencyActionsQuestionImporter(_YesNoJustifyQuestionImporter):
 
 
 class EvolutionQuestionImporter(BaseEpicImporter):
+    # Questions are unique per program and title (dimension).
+    allow_duplicated_lines = False
+
     class XlsxLineObject(BaseEpicImporter.XlsxLineObject):
         program: str
         dimension: str
@@ -118,43 +198,99 @@ class EvolutionQuestionImporter(BaseEpicImporter):
             new_line.effective_description = cls.get_valid_cell(xlsx_row, 6)
             return new_line
 
-    def _validate(
+    def _validate_line(
         self,
-        xlsx_line_objects: List[XlsxLineObject],
-    ) -> List[str]:
-        errors_found = []
-        n_line_addition = 2  # Excluded header + start enumerate is 0.
-        for n_line, xlsx_line in enumerate(xlsx_line_objects):
-            if not Program.objects.filter(name__iexact=xlsx_line.program).exists():
-                error_line = n_line + n_line_addition
-                errors_found.append(
-                    f"  - Line {error_line}. Program: '{xlsx_line.program}' does not exist."
-                )
-        return errors_found
+        n_line: int,
+        xlsx_line: XlsxLineObject,
+        programs_index: Dict[str, Tuple[int, str]],
+    ) -> Optional[str]:
+        if xlsx_line.program.lower() not in programs_index:
+            return f"  - Line {n_line}. Program: '{xlsx_line.program}' does not exist."
+        return None
 
     def import_file(self, input_file: Union[InMemoryUploadedFile, Path]):
-        line_objects = self._get_xlsx_line_objects(input_file)
-        self._cleanup_questions()
-        _headers = line_objects.pop(0)
-        errors_found = self._validate(line_objects)
-        if any(errors_found):
-            raise ValidationError(errors_found)
+        """
+        Imports a 'XLSX file' with evolution questions in a single pass, replacing the existing ones.
+
+        Args:
+            input_file (Union[InMemoryUploadedFile, Path]): File to be imported as evolution questions.
+        """
+        programs_index = self._get_programs_index()
+        new_questions = self._get_validated_instances(
+            input_file,
+            lambda n_line, xlsx_line: self._validate_line(
+                n_line, xlsx_line, programs_index
+            ),
+            lambda xlsx_line: self._get_question(xlsx_line, programs_index),
+        )
+
+        with transaction.atomic():
+            self._cleanup_questions()
+            self._import_questions(new_questions)
+            DomainRevision.bump()
+
+    def upsert_file(
+        self, input_file: Union[InMemoryUploadedFile, Path], dry_run: bool = False
+    ) -> List[ImportDiff]:
+        """
+        Imports a 'XLSX file' with evolution questions by only inserting, updating (their descriptions) and removing the questions which differ from the existing ones.
+        Questions are matched by program and dimension, so the answers of the unchanged questions are kept.
 
-        self._import_questions(line_objects)
+        Args:
+            input_file (Union[InMemoryUploadedFile, Path]): File to be imported as evolution questions.
+            dry_run (bool, optional): Only compute the differences, nothing is written. Defaults to False.
+
+        Returns:
+            List[ImportDiff]: Differences found (and applied) for the questions.
+        """
+        programs_index = self._get_programs_index()
+        imported_questions = self._get_validated_instances(
+            input_file,
+            lambda n_line, xlsx_line: self._validate_line(
+                n_line, xlsx_line, programs_index
+            ),
+            lambda xlsx_line: self._get_question(xlsx_line, programs_index),
+        )
+        return _upsert_questions(
+            EvolutionQuestion,
+            [
+                "nascent_description",
+                "engaged_description",
+                "capable_description",
+                "effective_description",
+            ],
+            imported_questions,
+            dry_run,
+        )
+
+    def _get_line_checker(
+        self,
+    ) -> Callable[[int, XlsxLineObject], Optional[ImportLineError]]:
+        programs_index = self._get_programs_index()
+        return lambda n_line, xlsx_line: ImportLineError.from_message(
+            n_line,
+            ImportLineError.unknown_reference,
+            self._validate_line(n_line, xlsx_line, programs_index),
+        )
+
+    def _get_line_key(self, xlsx_line: XlsxLineObject) -> Hashable:
+        return (xlsx_line.program.lower(), xlsx_line.dimension)
 
     def _cleanup_questions(self):
-        EvolutionQuestion.objects.all().delete()
-
-    def _import_questions(self, imported_questions: List[XlsxLineObject]):
-        for q_question in imported_questions:
-            # Create new question
-            p_found = Program.objects.get(name__iexact=q_question.program)
-            c_question = EvolutionQuestion(
-                title=q_question.dimension,
-                nascent_description=q_question.nascent_description,
-                engaged_description=q_question.engaged_description,
-                capable_description=q_question.capable_description,
-                effective_description=q_question.effective_description,
-                program=p_found,
-            )
-            c_question.save()
+        with suspended_summary_tracking():
+            EvolutionQuestion.objects.all().delete()
+
+    def _get_question(
+        self, xlsx_line: XlsxLineObject, programs_index: Dict[str, Tuple[int, str]]
+    ) -> EvolutionQuestion:
+        return EvolutionQuestion(
+            title=xlsx_line.dimension,
+            nascent_description=xlsx_line.nascent_description,
+            engaged_description=xlsx_line.engaged_description,
+            capable_description=xlsx_line.capable_description,
+            effective_description=xlsx_line.effective_description,
+            program_id=programs_index[xlsx_line.program.lower()][0],
+        )
+
+    def _import_questions(self, imported_questions: List[EvolutionQuestion]):
+        bulk_create_submodel_instances(EvolutionQuestion, imported_questions)
@@ -0,0 +1,15 @@
+from typing import Any, Optional
+
+from django.core.management.base import BaseCommand
+
+from epic_app.models.models import Program
+
+
+class Command(BaseCommand):
+    help = "Stores the case insensitive name key of all the existing `Program` entries which do not have it yet. Run it after migrating a database created with a previous version."
+
+    def handle(self, *args: Any, **options: Any) -> Optional[str]:
+        updated = Program.backfill_name_keys()
+        self.stdout.write(
+            self.style.SUCCESS(f"Backfilled name key of {updated} `Program` entries.")
+        )
@@ -0,0 +1,20 @@
+from typing import Any, Optional
+
+from django.core.management.base import BaseCommand
+
+from epic_app.models.epic_answers import Answer
+from epic_app.models.epic_questions import Question
+from epic_app.utils import backfill_submodel_types
+
+
+class Command(BaseCommand):
+    help = "Stores the concrete subtype of all the existing `Question` and `Answer` entries which do not have it yet. Run it after migrating a database created with a previous version."
+
+    def handle(self, *args: Any, **options: Any) -> Optional[str]:
+        for base_model in [Question, Answer]:
+            updated = backfill_submodel_types(base_model)
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Backfilled subtype of {updated} `{base_model.__name__}` entries."
+                )
+            )
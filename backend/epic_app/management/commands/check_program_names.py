@@ -0,0 +1,21 @@
+from typing import Any, Optional
+
+from django.core.management.base import BaseCommand, CommandError
+
+from epic_app.models.models import Program
+
+
+class Command(BaseCommand):
+    help = "Verifies no `Program` names differ only in their case, otherwise the case insensitive unique constraint cannot be migrated. Run it before migrating a database created with a previous version."
+
+    def handle(self, *args: Any, **options: Any) -> Optional[str]:
+        collisions = Program.get_name_collisions()
+        if collisions:
+            colliding_names = "\n".join(
+                "  - " + ", ".join(f"'{name}'" for name in names)
+                for names in collisions.values()
+            )
+            raise CommandError(
+                f"Found programs whose names only differ in their case, rename them before migrating:\n{colliding_names}"
+            )
+        self.stdout.write(self.style.SUCCESS("No colliding `Program` names found."))
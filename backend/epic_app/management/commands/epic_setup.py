@@ -4,12 +4,13 @@ from typing import Any, List, Optional
 from django.contrib.auth.models import User
 from django.core.management import call_command
 from django.core.management.base import BaseCommand
+from django.db import connection
 
 from epic_app.tests import test_data_dir
 
 
 class Command(BaseCommand):
-    help = "Sets the default EPIC database. If the database already exists then it removes it (and its migrations) and creates one from zero. Use flag --test to generate dummy EpicUsers and an admin."
+    help = "Sets the default EPIC database. If the database already exists then it removes it (and its migrations) and creates one from zero, a server database (PostgreSQL) is migrated and emptied instead. Use flag --test to generate dummy EpicUsers and an admin."
     # epic_setup.py -> commands -> management -> epic_app
     epic_app_dir: Path = Path(__file__).parent.parent.parent
     root_dir: Path = epic_app_dir.parent
@@ -39,14 +40,25 @@ class Command(BaseCommand):
 
     def _cleanup_db(self):
         """
-        Removes the current database.
+        Removes the current SQLite database file (and the migrations), other databases are emptied after migrating them.
         """
-        db_path = self.root_dir / "db.sqlite3"
+        if connection.vendor != "sqlite":
+            self.stdout.write(
+                self.style.WARNING(
+                    f"Using {connection.vendor} database, its data will be removed after migrating it."
+                )
+            )
+            return
+        db_path = Path(connection.settings_dict["NAME"])
+        connection.close()
         if db_path.is_file():
             self.stdout.write(
                 self.style.WARNING(f"Removing database file at {db_path}")
             )
             db_path.unlink()
+        # A leftover write-ahead log would be applied to the new database.
+        for wal_path in [Path(f"{db_path}-wal"), Path(f"{db_path}-shm")]:
+            wal_path.unlink(missing_ok=True)
         self._remove_migrations()
         self.stdout.write(
             self.style.SUCCESS("Successfully cleaned up previous database structure.")
@@ -54,10 +66,12 @@ class Command(BaseCommand):
 
     def _migrate_db(self, domain_dir: Path, is_test: bool):
         """
-        Creates the current database structure as sqlite3 file.
+        Creates the current database structure and imports the EPIC domain.
         """
         call_command("makemigrations")
         call_command("migrate")
+        if connection.vendor != "sqlite":
+            call_command("flush", interactive=False)
         call_command("import_epic_domain", domain_dir)
         if is_test:
             call_command("create_dummy_users")
@@ -3,6 +3,7 @@ from typing import Any, Optional, Type
 
 from django.core.management import call_command
 from django.core.management.base import BaseCommand
+from django.forms import ValidationError
 
 from epic_app.importers.xlsx import (
     BaseEpicImporter,
@@ -20,13 +21,54 @@ class Command(BaseCommand):
 
     def add_arguments(self, parser):
         parser.add_argument("domain_files", type=Path, nargs="?")
+        parser.add_argument(
+            "--upsert",
+            action="store_true",
+            help="Only inserts, updates and removes the entities which differ from the existing ones, so the answers of unchanged questions are kept.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Prints the differences an upsert import would apply without writing anything.",
+        )
+        parser.add_argument(
+            "--validate-only",
+            action="store_true",
+            help="Only checks the files, printing their line errors and duplicated lines, without writing anything. Agencies and questions are checked against the stored programs.",
+        )
+
+    def _upsert_file(
+        self, import_file: Path, epic_importer: BaseEpicImporter, dry_run: bool
+    ):
+        for import_diff in epic_importer.upsert_file(import_file, dry_run=dry_run):
+            self.stdout.write("\n".join(import_diff.get_summary()))
+
+    def _check_file(self, import_file: Path, epic_importer: BaseEpicImporter):
+        import_check = epic_importer.check_file(import_file)
+        for line_error in import_check.errors:
+            self.stdout.write(self.style.ERROR_OUTPUT(str(line_error)))
+        for line_error in import_check.warnings:
+            self.stdout.write(self.style.WARNING(str(line_error)))
+        if not import_check.is_valid:
+            raise ValidationError(
+                f"{len(import_check.errors)} invalid lines out of {import_check.n_lines}."
+            )
 
-    def _import_files(self, import_files_dir: Path):
+    def _import_files(
+        self,
+        import_files_dir: Path,
+        upsert: bool = False,
+        dry_run: bool = False,
+        validate_only: bool = False,
+    ):
         """
         Imports all the available files to create a reliable test environment.
 
         Args:
             import_files_dir (Path): Path to the test directory.
+            upsert (bool, optional): Only apply the differences with the existing entities. Defaults to False.
+            dry_run (bool, optional): Only print the differences, it implies `upsert`. Defaults to False.
+            validate_only (bool, optional): Only check the files, nothing is written. Defaults to False.
         """
 
         def import_and_log(filepath: Path, epic_importer: Type[BaseEpicImporter]):
@@ -38,10 +80,25 @@ class Command(BaseCommand):
                     )
                 )
                 try:
-                    epic_importer().import_file(import_file)
-                    self.stdout.write(self.style.SUCCESS("Import successful."))
+                    if validate_only:
+                        self._check_file(import_file, epic_importer())
+                    elif upsert or dry_run:
+                        self._upsert_file(import_file, epic_importer(), dry_run)
+                    else:
+                        epic_importer().import_file(import_file)
+                    self.stdout.write(
+                        self.style.SUCCESS(
+                            "Validation successful."
+                            if validate_only
+                            else "Import successful."
+                        )
+                    )
                 except Exception as err_info:
-                    self.stdout.write(self.style.ERROR(f"Failed to import {filepath}."))
+                    self.stdout.write(
+                        self.style.ERROR(
+                            f"Failed to {'validate' if validate_only else 'import'} {filepath}."
+                        )
+                    )
                     self.stdout.write(
                         self.style.ERROR_OUTPUT("\n".join(err_info.messages))
                     )
@@ -59,12 +116,16 @@ class Command(BaseCommand):
             "keyagencyactionsquestions.xlsx", KeyAgencyActionsQuestionImporter
         )
         import_and_log("evolutionquestions.xlsx", EvolutionQuestionImporter)
-        LinkagesQuestion.generate_linkages()
+        if dry_run or validate_only:
+            return
+        LinkagesQuestion.generate_linkages(only_missing=upsert)
         self.stdout.write(
             self.style.SUCCESS("Generated one linkage question per loaded program.")
         )
 
-    def _import_epic_db(self, data_dir: Path):
+    def _import_epic_db(
+        self, data_dir: Path, upsert: bool, dry_run: bool, validate_only: bool
+    ):
         if not data_dir.is_dir():
             self.stdout.write(
                 self.style.ERROR(
@@ -72,9 +133,12 @@ class Command(BaseCommand):
                 )
             )
         try:
-            self._import_files(data_dir)
+            self._import_files(data_dir, upsert, dry_run, validate_only)
         except Exception as e_info:
-            call_command("flush")
+            if upsert or dry_run or validate_only:
+                # The existing data is kept when only its differences are imported.
+                raise
+            call_command("flush", interactive=False)
             self.stdout.write(
                 self.style.ERROR(
                     f"Could not correctly import data, database will be empty on start. Detail error: {str(e_info)}."
@@ -83,7 +147,12 @@ class Command(BaseCommand):
 
     def handle(self, *args: Any, **options: Any) -> Optional[str]:
         try:
-            self._import_epic_db(options["domain_files"])
+            self._import_epic_db(
+                options["domain_files"],
+                options["upsert"],
+                options["dry_run"],
+                options["validate_only"],
+            )
         except Exception as e_info:
             self.stdout.write(
                 self.style.ERROR(
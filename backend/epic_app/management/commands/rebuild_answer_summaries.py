@@ -0,0 +1,37 @@
+from typing import Any, Optional
+
+from django.core.management.base import BaseCommand, CommandError
+
+from epic_app.models.epic_summaries import AnswerSummary
+
+
+class Command(BaseCommand):
+    help = "Recomputes the `AnswerSummary` counters from the stored answers. With the flag --verify the counters are only checked and it fails when they differ."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--verify",
+            action="store_true",
+            help="Only compares the stored counters with the stored answers.",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> Optional[str]:
+        if not options["verify"]:
+            n_summaries = AnswerSummary.rebuild()
+            self.stdout.write(
+                self.style.SUCCESS(f"Rebuilt {n_summaries} `AnswerSummary` entries.")
+            )
+            return
+        mismatches = AnswerSummary.verify()
+        if mismatches:
+            mismatch_lines = "\n".join(
+                f"  - Question {question_id}, organization {organization_id}, choice '{choice}': stored {stored}, expected {expected}."
+                for (question_id, organization_id, choice), (
+                    stored,
+                    expected,
+                ) in sorted(mismatches.items(), key=lambda m: str(m[0]))
+            )
+            raise CommandError(
+                f"Found outdated answer summaries, rebuild them:\n{mismatch_lines}"
+            )
+        self.stdout.write(self.style.SUCCESS("All `AnswerSummary` entries are valid."))
@@ -0,0 +1,91 @@
+import json
+from pathlib import Path
+from typing import Any, Optional
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import (
+    setup_databases,
+    setup_test_environment,
+    teardown_databases,
+    teardown_test_environment,
+)
+
+from epic_app.benchmarks.benchmark_runner import EpicBenchmarkRunner, compare_results
+from epic_app.benchmarks.synthetic_dataset import SyntheticDataset
+
+
+class Command(BaseCommand):
+    help = "Measures the report, progress, answers and import hot paths on a synthetic dataset built in a temporary test database. Results are written as JSON and can be compared with a previous run."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--organizations", type=int, default=5, help="Number of organizations."
+        )
+        parser.add_argument(
+            "--users", type=int, default=10, help="Number of users per organization."
+        )
+        parser.add_argument(
+            "--programs", type=int, default=50, help="Number of programs."
+        )
+        parser.add_argument(
+            "--repeat", type=int, default=3, help="Timed runs of each benchmark."
+        )
+        parser.add_argument(
+            "--load-requests",
+            type=int,
+            default=100,
+            help="Lightweight requests served while a PDF report renders, to compare the WSGI and ASGI modes. 0 skips the comparison.",
+        )
+        parser.add_argument(
+            "--output", type=Path, help="JSON file to write the results to."
+        )
+        parser.add_argument(
+            "--baseline",
+            type=Path,
+            help="JSON file of a previous run, the command fails when a benchmark regressed.",
+        )
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=1.2,
+            help="Allowed ratio between the current and the baseline durations.",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> Optional[str]:
+        runner = EpicBenchmarkRunner(
+            SyntheticDataset(
+                options["organizations"], options["users"], options["programs"]
+            ),
+            options["repeat"],
+            options["load_requests"],
+        )
+        # Never write the synthetic dataset into the configured database.
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            results = runner.run()
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+
+        json_results = json.dumps(results, indent=2)
+        if options["output"]:
+            options["output"].write_text(json_results)
+            self.stdout.write(
+                self.style.SUCCESS(f"Benchmark results written to {options['output']}.")
+            )
+        else:
+            self.stdout.write(json_results)
+
+        if options["baseline"]:
+            regressions = compare_results(
+                json.loads(options["baseline"].read_text()),
+                results,
+                options["threshold"],
+            )
+            if regressions:
+                raise CommandError(
+                    "Found benchmark regressions:\n"
+                    + "\n".join(f"  - {regression}" for regression in regressions)
+                )
+            self.stdout.write(self.style.SUCCESS("No benchmark regressions found."))
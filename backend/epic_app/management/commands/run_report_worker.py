@@ -0,0 +1,110 @@
+import os
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from epic_app.models.epic_reports import EpicReportJob, ReportJobStatus
+from epic_app.serializers.report_pdf import EpicPdfReport
+from epic_app.serializers.report_serializer import (
+    get_programs_report,
+    get_report_signature,
+)
+
+
+class Command(BaseCommand):
+    help = "Renders the pending PDF report jobs into the EPIC_REPORTS_DIR directory. Keeps polling for new jobs unless the flag --once is given."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Renders the currently pending jobs and exits.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=5.0,
+            help="Seconds to wait between checks for new jobs.",
+        )
+
+    def _render_job(self, report_job: EpicReportJob):
+        """
+        Renders the report of the given job, unless an artifact with the same content already exists.
+
+        Args:
+            report_job (EpicReportJob): Job claimed by this worker.
+        """
+        report_subtitle = report_job.get_report_subtitle()
+        report_author = report_job.requested_by.username
+        report_data = get_programs_report(report_job.get_report_users())
+        report_job.signature = get_report_signature(
+            report_data, report_subtitle, report_author
+        )
+        report_file: Path = report_job.get_report_file()
+        if report_file.is_file():
+            self.stdout.write(
+                self.style.SUCCESS(f"Reusing existing report at {report_file}.")
+            )
+            return
+
+        pdf_report = EpicPdfReport()
+        pdf_report.report_subtitle = report_subtitle
+        pdf_report.report_author = report_author
+        pdf_report.rendering_workers = (
+            settings.EPIC_REPORT_RENDERING_WORKERS or os.cpu_count() or 1
+        )
+        report_job.total_programs = len(pdf_report.get_reported_programs(report_data))
+        report_job.rendered_programs = []
+        report_job.save()
+
+        # Write to a temporary file so an unfinished report is never served.
+        report_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = report_file.with_suffix(f".{report_job.pk}.tmp")
+        try:
+            with open(tmp_file, "wb") as report_buffer:
+                pdf_report.generate_report(
+                    report_buffer, report_data, report_job.add_rendered_program
+                )
+            tmp_file.replace(report_file)
+        finally:
+            # Only left behind when rendering failed.
+            if tmp_file.is_file():
+                tmp_file.unlink()
+        self.stdout.write(self.style.SUCCESS(f"Generated report at {report_file}."))
+
+    def _process_job(self, report_job: EpicReportJob):
+        self.stdout.write(
+            self.style.MIGRATE_HEADING(f"Processing report job {report_job.pk}.")
+        )
+        try:
+            self._render_job(report_job)
+            report_job.status = ReportJobStatus.FINISHED
+        except Exception as e_info:
+            report_job.status = ReportJobStatus.FAILED
+            report_job.error_message = str(e_info)
+            self.stdout.write(
+                self.style.ERROR(
+                    f"Failed to render report job {report_job.pk}. Detailed info: {str(e_info)}"
+                )
+            )
+        report_job.finished_on = timezone.now()
+        report_job.save()
+
+    def handle(self, *args: Any, **options: Any) -> Optional[str]:
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Report worker started, reports are stored at {settings.EPIC_REPORTS_DIR}."
+            )
+        )
+        while True:
+            report_job = EpicReportJob.claim_next_pending()
+            if report_job:
+                self._process_job(report_job)
+            elif options["once"]:
+                return
+            else:
+                time.sleep(options["interval"])
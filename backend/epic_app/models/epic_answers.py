@@ -2,9 +2,9 @@ from __future__ import annotations
 
 import itertools
 from collections import Counter
-from typing import Any, Dict, List, Union
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Type, Union
 
-from django.db import IntegrityError, models
+from django.db import IntegrityError, models, transaction
 
 from epic_app.models import models as base_models
 from epic_app.models.epic_questions import (
@@ -16,6 +16,18 @@ from epic_app.models.epic_questions import (
     Question,
 )
 from epic_app.models.epic_user import EpicUser
+from epic_app.utils import (
+    SUBMODEL_FIELD,
+    get_submodel_name,
+    get_submodel_type,
+    get_submodel_type_by_name,
+    get_submodel_type_list,
+)
+
+# Key of the materialized answer counters: `Question` id, `EpicOrganization` id and summary choice.
+SummaryKey = Tuple[int, Optional[int], str]
+# Summary choice of the answers without a valid response.
+NO_VALID_CHOICE = ""
 
 
 class YesNoAnswerType(models.TextChoices):
@@ -37,6 +49,8 @@ class Answer(models.Model):
     question = models.ForeignKey(
         to=Question, on_delete=models.CASCADE, related_name="question_answers"
     )
+    # Concrete `Answer` subtype, it allows resolving it without probing all tables.
+    subtype: str = models.CharField(max_length=50, blank=True, editable=False)
 
     class Meta:
         unique_together = ["user", "question"]
@@ -44,20 +58,94 @@ class Answer(models.Model):
     def __str__(self) -> str:
         return f"[{self.user}] {self.question}"
 
-    def _check_question_integrity(self) -> bool:
+    def _get_loaded_question_type(self) -> Optional[Type[Question]]:
+        """
+        Gets the concrete type of the assigned `question` from the already loaded instance (no queries).
+        It is `None` when the question was assigned by id or was never backfilled.
+        """
+        if not type(self).question.is_cached(self) or self.question is None:
+            return None
+        if type(self.question) is not Question:
+            return type(self.question)
+        return get_submodel_type_by_name(Question, self.question.subtype)
+
+    def _get_question_type(self) -> Optional[Type[Question]]:
+        q_type = self._get_loaded_question_type()
+        if q_type:
+            return q_type
+        return Answer.get_question_types([self.question_id]).get(self.question_id, None)
+
+    @staticmethod
+    def get_question_types(question_pks: Iterable[int]) -> Dict[int, Type[Question]]:
+        """
+        Gets the concrete type of each of the given `Question` pks by reading their discriminators (one query).
+        Questions which were never backfilled are resolved by probing the `Question` subtype tables.
+
+        Args:
+            question_pks (Iterable[int]): Primary keys of the questions.
+
+        Returns:
+            Dict[int, Type[Question]]: Concrete type by question pk, unknown questions are not included.
         """
-        Auxiliar method to be defined in concrete classes which verify the assigned `question` is suitable for this `answer`.
+        question_types = {}
+        for q_pk, q_subtype in Question.objects.filter(
+            pk__in=set(question_pks)
+        ).values_list("pk", SUBMODEL_FIELD):
+            q_type = get_submodel_type_by_name(Question, q_subtype)
+            question_types[q_pk] = q_type or get_submodel_type(Question, q_pk)
+        return question_types
+
+    def _check_question_integrity(
+        self, question_type: Optional[Type[Question]] = None
+    ) -> bool:
+        """
+        Auxiliar method which verifies the assigned `question` is suitable for this `answer`.
         Base class `Answer` should not support any `Question`.
+
+        Args:
+            question_type (Optional[Type[Question]], optional): Already resolved concrete type of the `question`. Defaults to None (resolve it).
+
         Returns:
             bool: Whether the given `Question` type can be assigned to this `Answer` type.
         """
-        return any(
-            [
-                sq.objects.filter(id=self.question.id).exists()
-                for sq in self._get_supported_questions()
-            ]
+        if question_type is None:
+            question_type = self._get_question_type()
+        return question_type in self._get_supported_questions()
+
+    def _get_question_integrity_error(self) -> IntegrityError:
+        return IntegrityError(
+            "Question type `{}` not allowed. Supported types: [{}].".format(
+                type(self.question).__name__,
+                ", ".join(
+                    [f"`{sq.__name__}`" for sq in self._get_supported_questions()]
+                ),
+            )
         )
 
+    @staticmethod
+    def check_questions_integrity(answers: Iterable[Answer]) -> None:
+        """
+        Verifies all the given answers (of any subtype) have a supported `question` assigned.
+        The types of the questions not already loaded are read at once (at most one query).
+
+        Args:
+            answers (Iterable[Answer]): Answers to verify, usually not yet stored.
+
+        Raises:
+            IntegrityError: When the `question` of any answer is not supported by its `Answer` subtype.
+        """
+        answers_question_type = [(a, a._get_loaded_question_type()) for a in answers]
+        unresolved_pks = [
+            a.question_id for a, q_type in answers_question_type if not q_type
+        ]
+        question_types = (
+            Answer.get_question_types(unresolved_pks) if unresolved_pks else {}
+        )
+        for answer, q_type in answers_question_type:
+            q_type = q_type or question_types.get(answer.question_id, None)
+            if q_type not in answer._get_supported_questions():
+                raise answer._get_question_integrity_error()
+
     @staticmethod
     def _get_supported_questions() -> List[Question]:
         """
@@ -72,33 +160,195 @@ class Answer(models.Model):
         """
         Overriding of the save method to ensure only supported questions are assigned to related answers.
         This is just a way to preserve the question as a base field property to answer without explicitely defining its concrete question.
+        It also persists the concrete `Answer` subtype.
 
         Raises:
             IntegrityError: When the `question` field is not supported for this `answer` subtype.
         """
         if not self._check_question_integrity():
-            raise IntegrityError(
-                "Question type `{}` not allowed. Supported types: [{}].".format(
-                    type(self.question).__name__,
-                    ", ".join(
-                        [f"`{sq.__name__}`" for sq in self._get_supported_questions()]
-                    ),
-                )
-            )
+            raise self._get_question_integrity_error()
 
-        return super(Answer, self).save(*args, **kwargs)
+        # Saving through the base model keeps the stored subtype.
+        if type(self) in get_submodel_type_list(Answer):
+            self.subtype = get_submodel_name(type(self))
+        # Atomic so the answer summary counters are updated together with the answer.
+        with transaction.atomic():
+            return super(Answer, self).save(*args, **kwargs)
 
     def is_valid_answer(self) -> bool:
         raise NotImplementedError(
             "Validation only supported on inherited Answer classes."
         )
 
+    @staticmethod
+    def get_valid_answers(answers_list: models.QuerySet) -> models.QuerySet:
+        """
+        Filters `answers_list` (of the concrete type) with the same criteria as `is_valid_answer`, so that it can be evaluated in one query.
+
+        Args:
+            answers_list (models.QuerySet): Answers (of the concrete type) to filter.
+
+        Returns:
+            models.QuerySet: Valid answers.
+        """
+        raise NotImplementedError(
+            "Validation only supported on inherited Answer classes."
+        )
+
     @staticmethod
     def get_detailed_summary(answers_list: List[Answer]) -> Dict[str, Any]:
         raise NotImplementedError(
             "Detailed summary only supported on inherited Answer classes."
         )
 
+    @staticmethod
+    def get_summary_counts(answers_list: models.QuerySet) -> Dict[SummaryKey, int]:
+        """
+        Counts the answers in `answers_list` per question, organization (of the answering user) and summary choice with grouped SQL aggregations.
+        The summary choice is the selected value, or empty for answers without a valid response.
+
+        Args:
+            answers_list (models.QuerySet): Answers (of the concrete type) to count.
+
+        Returns:
+            Dict[SummaryKey, int]: Number of answers per (`Question` id, `EpicOrganization` id, choice).
+        """
+        raise NotImplementedError(
+            "Summary counts only supported on inherited Answer classes."
+        )
+
+    @staticmethod
+    def get_summary_from_counts(
+        choice_counts: Dict[str, int], answers_list: List[Answer]
+    ) -> Dict[str, Any]:
+        """
+        Builds the detailed summary (as in `get_detailed_summary`) of one question from its (materialized) choice counts.
+        The answers are only used for the fields which cannot be counted, such as the justifications.
+
+        Args:
+            choice_counts (Dict[str, int]): Number of answers per summary choice.
+            answers_list (List[Answer]): Answers of the question sorted by id.
+
+        Returns:
+            Dict[str, Any]: Detailed summary.
+        """
+        raise NotImplementedError(
+            "Detailed summary only supported on inherited Answer classes."
+        )
+
+    @staticmethod
+    def get_summaries_by_question(
+        answers_list: models.QuerySet,
+    ) -> Dict[int, Dict[str, Any]]:
+        """
+        Computes the detailed summary of all the questions present in `answers_list` with grouped SQL aggregations.
+        The number of queries does not depend on the number of questions or answers.
+
+        Args:
+            answers_list (models.QuerySet): Answers (of the concrete type) to summarize.
+
+        Returns:
+            Dict[int, Dict[str, Any]]: Detailed summary (as in `get_detailed_summary`) per `Question` id.
+        """
+        raise NotImplementedError(
+            "Detailed summary only supported on inherited Answer classes."
+        )
+
+
+def _get_choice_summaries_by_question(
+    answers_list: models.QuerySet,
+    choice_field: str,
+    choice_types: List[models.TextChoices],
+) -> Dict[int, Dict[str, Any]]:
+    """
+    Auxiliar method to summarize answers which select one of the given choices and provide a justification.
+    It requires one query to count the choices and one query to gather the justifications.
+    """
+    choice_labels = {str(c_t): str(c_t.label) for c_t in choice_types}
+
+    def _empty_summary() -> Dict[str, Any]:
+        summary = {}
+        for label in choice_labels.values():
+            summary[label] = 0
+            summary[f"{label}_justify"] = []
+        summary["no_valid_response"] = 0
+        return summary
+
+    summaries: Dict[int, Dict[str, Any]] = {}
+    choice_counts = (
+        answers_list.order_by()
+        .values("question_id", choice_field)
+        .annotate(n_answers=models.Count("pk"))
+    )
+    for c_count in choice_counts:
+        summary = summaries.setdefault(c_count["question_id"], _empty_summary())
+        label = choice_labels.get(c_count[choice_field], "no_valid_response")
+        summary[label] += c_count["n_answers"]
+
+    justifications = (
+        answers_list.filter(**{f"{choice_field}__in": list(choice_labels.keys())})
+        .exclude(justify_answer="")
+        .order_by("pk")
+        .values_list("question_id", choice_field, "justify_answer")
+    )
+    for question_id, choice, justify_answer in justifications:
+        label = choice_labels[choice]
+        summaries[question_id][f"{label}_justify"].append(justify_answer)
+    return summaries
+
+
+def _get_choice_summary_counts(
+    answers_list: models.QuerySet, choice_field: str, choice_values: List[str]
+) -> Dict[SummaryKey, int]:
+    """
+    Auxiliar method to count answers which select one of the given choices, any other value is counted as no valid response.
+    """
+    choice_counts = (
+        answers_list.order_by()
+        .annotate(
+            summary_choice=models.Case(
+                models.When(
+                    **{f"{choice_field}__in": choice_values},
+                    then=models.F(choice_field),
+                ),
+                default=models.Value(NO_VALID_CHOICE),
+                output_field=models.CharField(),
+            )
+        )
+        .values("question_id", "user__organization_id", "summary_choice")
+        .annotate(n_answers=models.Count("pk"))
+    )
+    return {
+        (
+            c_count["question_id"],
+            c_count["user__organization_id"],
+            c_count["summary_choice"],
+        ): c_count["n_answers"]
+        for c_count in choice_counts
+    }
+
+
+def _get_choice_summary_from_counts(
+    choice_counts: Dict[str, int],
+    answers_list: List[Answer],
+    choice_field: str,
+    choice_types: List[models.TextChoices],
+) -> Dict[str, Any]:
+    """
+    Auxiliar method to build the summary of answers which select one of the given choices and provide a justification.
+    """
+    summary = {}
+    for c_type in choice_types:
+        label = str(c_type.label)
+        summary[label] = choice_counts.get(str(c_type), 0)
+        summary[f"{label}_justify"] = [
+            answer.justify_answer
+            for answer in answers_list
+            if getattr(answer, choice_field) == str(c_type) and answer.justify_answer
+        ]
+    summary["no_valid_response"] = choice_counts.get(NO_VALID_CHOICE, 0)
+    return summary
+
 
 class YesNoAnswer(Answer):
     short_answer: str = models.CharField(
@@ -113,6 +363,10 @@ class YesNoAnswer(Answer):
     def is_valid_answer(self) -> bool:
         return self.short_answer in YesNoAnswerType
 
+    @staticmethod
+    def get_valid_answers(answers_list: models.QuerySet) -> models.QuerySet:
+        return answers_list.filter(short_answer__in=YesNoAnswerType.values)
+
     @staticmethod
     def get_detailed_summary(answers_list: List[YesNoAnswer]) -> Dict[str, Any]:
         def _yesno_type_summary(filter_type: YesNoAnswerType) -> Dict[str, Any]:
@@ -134,6 +388,31 @@ class YesNoAnswer(Answer):
             ),
         }
 
+    @staticmethod
+    def get_summaries_by_question(
+        answers_list: models.QuerySet,
+    ) -> Dict[int, Dict[str, Any]]:
+        return _get_choice_summaries_by_question(
+            answers_list, "short_answer", [YesNoAnswerType.YES, YesNoAnswerType.NO]
+        )
+
+    @staticmethod
+    def get_summary_counts(answers_list: models.QuerySet) -> Dict[SummaryKey, int]:
+        return _get_choice_summary_counts(
+            answers_list, "short_answer", YesNoAnswerType.values
+        )
+
+    @staticmethod
+    def get_summary_from_counts(
+        choice_counts: Dict[str, int], answers_list: List[YesNoAnswer]
+    ) -> Dict[str, Any]:
+        return _get_choice_summary_from_counts(
+            choice_counts,
+            answers_list,
+            "short_answer",
+            [YesNoAnswerType.YES, YesNoAnswerType.NO],
+        )
+
 
 class SingleChoiceAnswer(Answer):
     selected_choice: str = models.CharField(
@@ -155,6 +434,10 @@ class SingleChoiceAnswer(Answer):
     def is_valid_answer(self) -> bool:
         return self.selected_choice in EvolutionChoiceType
 
+    @staticmethod
+    def get_valid_answers(answers_list: models.QuerySet) -> models.QuerySet:
+        return answers_list.filter(selected_choice__in=EvolutionChoiceType.values)
+
     @staticmethod
     def get_detailed_summary(
         answers_list: Union[models.QuerySet, List[YesNoAnswer]]
@@ -181,6 +464,43 @@ class SingleChoiceAnswer(Answer):
             ),
         }
 
+    @staticmethod
+    def get_summaries_by_question(
+        answers_list: models.QuerySet,
+    ) -> Dict[int, Dict[str, Any]]:
+        return _get_choice_summaries_by_question(
+            answers_list,
+            "selected_choice",
+            [
+                EvolutionChoiceType.CAPABLE,
+                EvolutionChoiceType.EFFECTIVE,
+                EvolutionChoiceType.ENGAGED,
+                EvolutionChoiceType.NASCENT,
+            ],
+        )
+
+    @staticmethod
+    def get_summary_counts(answers_list: models.QuerySet) -> Dict[SummaryKey, int]:
+        return _get_choice_summary_counts(
+            answers_list, "selected_choice", EvolutionChoiceType.values
+        )
+
+    @staticmethod
+    def get_summary_from_counts(
+        choice_counts: Dict[str, int], answers_list: List[SingleChoiceAnswer]
+    ) -> Dict[str, Any]:
+        return _get_choice_summary_from_counts(
+            choice_counts,
+            answers_list,
+            "selected_choice",
+            [
+                EvolutionChoiceType.CAPABLE,
+                EvolutionChoiceType.EFFECTIVE,
+                EvolutionChoiceType.ENGAGED,
+                EvolutionChoiceType.NASCENT,
+            ],
+        )
+
 
 class MultipleChoiceAnswer(Answer):
     selected_programs = models.ManyToManyField(
@@ -192,25 +512,175 @@ class MultipleChoiceAnswer(Answer):
         return [LinkagesQuestion]
 
     def is_valid_answer(self) -> bool:
-        return any(self.selected_programs.all())
+        if "selected_programs" in getattr(self, "_prefetched_objects_cache", {}):
+            return any(self.selected_programs.all())
+        return self.selected_programs.exists()
 
     @staticmethod
-    def get_detailed_summary(answers_list: List[YesNoAnswer]) -> Dict[str, Any]:
-        all_sp = {
-            p.name: p_count
-            for p, p_count in dict(
-                Counter(
-                    itertools.chain.from_iterable(
-                        [a.selected_programs.all() for a in answers_list]
-                    )
-                )
-            ).items()
-        }
+    def get_valid_answers(answers_list: models.QuerySet) -> models.QuerySet:
+        return answers_list.filter(
+            pk__in=MultipleChoiceAnswer.selected_programs.through.objects.values(
+                "multiplechoiceanswer_id"
+            )
+        )
+
+    @staticmethod
+    def _get_answers_queryset(
+        answers_list: Union[models.QuerySet, List[MultipleChoiceAnswer]]
+    ) -> models.QuerySet:
+        if isinstance(answers_list, models.QuerySet):
+            return answers_list.order_by()
+        return MultipleChoiceAnswer.objects.filter(pk__in=[a.pk for a in answers_list])
+
+    @staticmethod
+    def get_detailed_summary(
+        answers_list: Union[models.QuerySet, List[MultipleChoiceAnswer]]
+    ) -> Dict[str, Any]:
+        answers_list = MultipleChoiceAnswer._get_answers_queryset(answers_list)
+        # Programs are listed in order of first appearance, counted with one grouped query over the linkages.
+        linkages = (
+            MultipleChoiceAnswer.selected_programs.through.objects.filter(
+                multiplechoiceanswer__in=answers_list.values("pk")
+            )
+            .values("program_id", "program__name")
+            .annotate(
+                n_answers=models.Count("multiplechoiceanswer_id"),
+                first_answer=models.Min("multiplechoiceanswer_id"),
+            )
+            .order_by("first_answer", "program_id")
+        )
+        answer_counts = answers_list.aggregate(
+            n_answers=models.Count("pk", distinct=True),
+            n_valid=models.Count(
+                "pk",
+                distinct=True,
+                filter=models.Q(selected_programs__isnull=False),
+            ),
+        )
         return {
-            **all_sp,
+            **{linkage["program__name"]: linkage["n_answers"] for linkage in linkages},
             **dict(
-                no_valid_response=len(
-                    [al for al in answers_list.all() if not al.is_valid_answer()]
-                )
+                no_valid_response=answer_counts["n_answers"] - answer_counts["n_valid"]
             ),
         }
+
+    @staticmethod
+    def get_linkage_counts(
+        answers_list: Union[models.QuerySet, List[MultipleChoiceAnswer]]
+    ) -> Dict[Tuple[int, int], int]:
+        """
+        Counts the answers linking the program of their (linkages) question to each selected program with one grouped query over the linkages.
+
+        Args:
+            answers_list (Union[models.QuerySet, List[MultipleChoiceAnswer]]): Answers to count.
+
+        Returns:
+            Dict[Tuple[int, int], int]: Number of answers per (question `Program` id, selected `Program` id), pairs without answers are not included.
+        """
+        answers_list = MultipleChoiceAnswer._get_answers_queryset(answers_list)
+        linkages = (
+            MultipleChoiceAnswer.selected_programs.through.objects.filter(
+                multiplechoiceanswer__in=answers_list.values("pk")
+            )
+            .values("multiplechoiceanswer__question__program_id", "program_id")
+            .annotate(n_answers=models.Count("multiplechoiceanswer_id"))
+            .order_by()
+        )
+        return {
+            (
+                linkage["multiplechoiceanswer__question__program_id"],
+                linkage["program_id"],
+            ): linkage["n_answers"]
+            for linkage in linkages
+        }
+
+    @staticmethod
+    def get_summaries_by_question(
+        answers_list: models.QuerySet,
+    ) -> Dict[int, Dict[str, Any]]:
+        answers_list = answers_list.order_by()
+        # Programs are listed in order of first appearance (as in `get_detailed_summary`).
+        linkages = (
+            MultipleChoiceAnswer.selected_programs.through.objects.filter(
+                multiplechoiceanswer__in=answers_list.values("pk")
+            )
+            .values("multiplechoiceanswer__question_id", "program__name")
+            .annotate(
+                n_answers=models.Count("multiplechoiceanswer_id"),
+                first_answer=models.Min("multiplechoiceanswer_id"),
+            )
+            .order_by("first_answer", "program_id")
+        )
+        answer_counts = answers_list.values("question_id").annotate(
+            n_answers=models.Count("pk", distinct=True),
+            n_valid=models.Count(
+                "pk",
+                distinct=True,
+                filter=models.Q(selected_programs__isnull=False),
+            ),
+        )
+        summaries: Dict[int, Dict[str, Any]] = {}
+        for linkage in linkages:
+            summaries.setdefault(linkage["multiplechoiceanswer__question_id"], {})[
+                linkage["program__name"]
+            ] = linkage["n_answers"]
+        for a_count in answer_counts:
+            summaries.setdefault(a_count["question_id"], {})["no_valid_response"] = (
+                a_count["n_answers"] - a_count["n_valid"]
+            )
+        return summaries
+
+    @staticmethod
+    def get_summary_counts(answers_list: models.QuerySet) -> Dict[SummaryKey, int]:
+        answers_list = answers_list.order_by()
+        # One choice per selected program, answers without selected programs are not valid.
+        program_counts = (
+            MultipleChoiceAnswer.selected_programs.through.objects.filter(
+                multiplechoiceanswer__in=answers_list.values("pk")
+            )
+            .values(
+                "multiplechoiceanswer__question_id",
+                "multiplechoiceanswer__user__organization_id",
+                "program_id",
+            )
+            .annotate(n_answers=models.Count("multiplechoiceanswer_id"))
+        )
+        empty_counts = (
+            answers_list.filter(selected_programs__isnull=True)
+            .values("question_id", "user__organization_id")
+            .annotate(n_answers=models.Count("pk"))
+        )
+        summary_counts = {
+            (
+                p_count["multiplechoiceanswer__question_id"],
+                p_count["multiplechoiceanswer__user__organization_id"],
+                str(p_count["program_id"]),
+            ): p_count["n_answers"]
+            for p_count in program_counts
+        }
+        for e_count in empty_counts:
+            summary_counts[
+                (
+                    e_count["question_id"],
+                    e_count["user__organization_id"],
+                    NO_VALID_CHOICE,
+                )
+            ] = e_count["n_answers"]
+        return summary_counts
+
+    @staticmethod
+    def get_summary_from_counts(
+        choice_counts: Dict[str, int], answers_list: List[MultipleChoiceAnswer]
+    ) -> Dict[str, Any]:
+        # Programs are listed in order of first appearance (as in `get_detailed_summary`).
+        selected_programs: Dict[int, base_models.Program] = {}
+        for answer in answers_list:
+            for program in sorted(answer.selected_programs.all(), key=lambda p: p.pk):
+                selected_programs.setdefault(program.pk, program)
+        summary = {
+            program.name: choice_counts[str(p_pk)]
+            for p_pk, program in selected_programs.items()
+            if choice_counts.get(str(p_pk), 0)
+        }
+        summary["no_valid_response"] = choice_counts.get(NO_VALID_CHOICE, 0)
+        return summary
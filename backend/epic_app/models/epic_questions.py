@@ -4,6 +4,7 @@ from django.db import IntegrityError, models
 from django.utils.translation import gettext_lazy as _
 
 from epic_app.models import models as base_models
+from epic_app.utils import get_submodel_name, get_submodel_type_list
 
 
 class Question(models.Model):
@@ -12,6 +13,8 @@ class Question(models.Model):
     program: base_models.Program = models.ForeignKey(
         to=base_models.Program, on_delete=models.CASCADE, related_name="questions"
     )
+    # Concrete `Question` subtype, it allows resolving it without probing all tables.
+    subtype: str = models.CharField(max_length=50, blank=True, editable=False)
 
     class Meta:
         unique_together = ["title", "program"]
@@ -19,6 +22,15 @@ class Question(models.Model):
     def __str__(self) -> str:
         return self.title[0:15]
 
+    def save(self, *args, **kwargs) -> None:
+        """
+        Overriding of the save method to persist the concrete `Question` subtype.
+        """
+        # Saving through the base model keeps the stored subtype.
+        if type(self) in get_submodel_type_list(Question):
+            self.subtype = get_submodel_name(type(self))
+        return super(Question, self).save(*args, **kwargs)
+
 
 class YesNoQuestion(Question):
     description: str = models.TextField(null=False, blank=False)
@@ -97,11 +109,20 @@ class LinkagesQuestion(Question):
         return super(LinkagesQuestion, self).save(*args, **kwargs)
 
     @staticmethod
-    def generate_linkages():
+    def generate_linkages(only_missing: bool = False):
         """
         Generates linkages questions for all the available programs
+
+        Args:
+            only_missing (bool, optional): Skip the programs which already have one. Defaults to False.
         """
-        for p_obj in base_models.Program.objects.all():
+        programs = base_models.Program.objects.all()
+        if only_missing:
+            programs = programs.exclude(
+                pk__in=LinkagesQuestion.objects.values("program_id")
+            )
+        for p_obj in programs:
             LinkagesQuestion(
                 title=LinkagesQuestion._linkages_title, program=p_obj
             ).save()
+        base_models.DomainRevision.bump()
@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import List, Optional, Union
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+from epic_app.models.epic_user import EpicOrganization, EpicUser
+
+
+class ReportJobStatus(models.TextChoices):
+    PENDING = "PENDING", _("Pending")
+    RUNNING = "RUNNING", _("Running")
+    FINISHED = "FINISHED", _("Finished")
+    FAILED = "FAILED", _("Failed")
+
+
+class EpicReportJob(models.Model):
+    """
+    Request of a PDF answers report to be rendered by a (local) report worker.
+    Jobs requested by an advisor only report their own `EpicOrganization`, jobs requested by staff report all of them.
+
+    Args:
+        models (models.Model): Derives directly from base class Model.
+    """
+
+    requested_by = models.ForeignKey(
+        to=User, on_delete=models.CASCADE, related_name="report_jobs"
+    )
+    organization = models.ForeignKey(
+        to=EpicOrganization,
+        on_delete=models.CASCADE,
+        related_name="report_jobs",
+        blank=True,
+        null=True,
+    )
+    status: str = models.CharField(
+        choices=ReportJobStatus.choices,
+        max_length=10,
+        default=ReportJobStatus.PENDING,
+    )
+    # Hash of the reported data, equal signatures share the same artifact.
+    signature: str = models.CharField(max_length=64, blank=True)
+    total_programs: int = models.PositiveIntegerField(default=0)
+    rendered_programs: List[str] = models.JSONField(default=list, blank=True)
+    error_message: str = models.TextField(blank=True)
+    created_on = models.DateTimeField(auto_now_add=True)
+    finished_on = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self) -> str:
+        return f"[{self.requested_by}] Report job {self.pk} ({self.status})"
+
+    def get_report_users(self) -> Union[models.QuerySet, List[EpicUser]]:
+        """
+        Gets the `EpicUsers` whose answers are included in the report.
+
+        Returns:
+            Union[models.QuerySet, List[EpicUser]]: Reported users.
+        """
+        if self.organization:
+            return self.organization.organization_users.all()
+        return EpicUser.objects.all()
+
+    def get_report_subtitle(self) -> str:
+        """
+        Gets the report subtitle listing the reported organizations.
+
+        Returns:
+            str: Report subtitle.
+        """
+        if self.organization:
+            org_names = [self.organization.name]
+        else:
+            org_names = [eo.name for eo in EpicOrganization.objects.all()]
+        return "EPIC report for {}".format((", ").join(org_names))
+
+    def get_report_file(self) -> Optional[Path]:
+        """
+        Gets the location of the artifact matching the current `signature`.
+
+        Returns:
+            Optional[Path]: Path to the (expected) PDF file, `None` when there is no signature yet.
+        """
+        if not self.signature:
+            return None
+        return Path(settings.EPIC_REPORTS_DIR) / f"answers_report_{self.signature}.pdf"
+
+    def has_report_file(self) -> bool:
+        report_file = self.get_report_file()
+        return report_file is not None and report_file.is_file()
+
+    def get_progress(self) -> float:
+        """
+        Gets the ratio of programs already rendered.
+
+        Returns:
+            float: Value between 0 and 1.
+        """
+        if self.status == ReportJobStatus.FINISHED:
+            return 1.0
+        if not self.total_programs:
+            return 0.0
+        return len(self.rendered_programs) / self.total_programs
+
+    def add_rendered_program(self, program_name: str):
+        """
+        Registers the given program as rendered and stores it in the database.
+
+        Args:
+            program_name (str): Name of the rendered program.
+        """
+        if program_name in self.rendered_programs:
+            return
+        self.rendered_programs.append(program_name)
+        EpicReportJob.objects.filter(pk=self.pk).update(
+            rendered_programs=self.rendered_programs
+        )
+
+    @classmethod
+    def claim_next_pending(cls) -> Optional[EpicReportJob]:
+        """
+        Marks the oldest pending job as running and returns it.
+        The status update is conditional so concurrent workers never claim the same job.
+
+        Returns:
+            Optional[EpicReportJob]: Claimed job, `None` when there are no pending jobs.
+        """
+        pending_jobs = (
+            cls.objects.filter(status=ReportJobStatus.PENDING)
+            .order_by("pk")
+            .values_list("pk", flat=True)
+        )
+        for job_pk in pending_jobs:
+            if cls.objects.filter(pk=job_pk, status=ReportJobStatus.PENDING).update(
+                status=ReportJobStatus.RUNNING
+            ):
+                return cls.objects.get(pk=job_pk)
+        return None
@@ -0,0 +1,379 @@
+from __future__ import annotations
+
+import contextlib
+import contextvars
+from collections import Counter
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Type
+
+from django.db import models, transaction
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.dispatch import receiver
+
+from epic_app.models import models as base_models
+from epic_app.models.epic_answers import (
+    NO_VALID_CHOICE,
+    Answer,
+    MultipleChoiceAnswer,
+    SummaryKey,
+)
+from epic_app.models.epic_questions import Question
+from epic_app.models.epic_user import EpicOrganization, EpicUser
+from epic_app.utils import get_submodel_type_list
+
+_tracking_suspended = contextvars.ContextVar("_tracking_suspended", default=False)
+
+
+class AnswerSummary(models.Model):
+    """
+    Materialized number of `Answers` given to a `Question` by the users of an `EpicOrganization`, per summary choice.
+    The choice is the selected value (`YesNoAnswer`, `SingleChoiceAnswer`), the selected program id (`MultipleChoiceAnswer`) or empty for answers without a valid response.
+    The counters are updated in the same transaction as the answers, `manage.py rebuild_answer_summaries` recomputes (or verifies) them from scratch.
+
+    Args:
+        models (models.Model): Derives directly from the base class Model.
+    """
+
+    question: Question = models.ForeignKey(
+        to=Question, on_delete=models.CASCADE, related_name="answer_summaries"
+    )
+    organization: EpicOrganization = models.ForeignKey(
+        to=EpicOrganization,
+        on_delete=models.CASCADE,
+        related_name="answer_summaries",
+        blank=True,
+        null=True,
+    )
+    choice: str = models.CharField(max_length=50, blank=True)
+    n_answers: int = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name_plural = "Answer summaries"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["question", "organization", "choice"],
+                name="unique_answer_summary",
+            ),
+            models.UniqueConstraint(
+                fields=["question", "choice"],
+                condition=models.Q(organization__isnull=True),
+                name="unique_answer_summary_without_organization",
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"[{self.organization}] {self.question}: {self.choice or 'no valid response'} ({self.n_answers})"
+
+    def get_key(self) -> SummaryKey:
+        return (self.question_id, self.organization_id, self.choice)
+
+    @staticmethod
+    def _get_locked_summaries(
+        s_keys: Iterable[SummaryKey],
+    ) -> Dict[SummaryKey, AnswerSummary]:
+        # Only the counters of the given keys are locked, writers of other choices or organizations are not blocked.
+        keys_filter = models.Q()
+        for question_id, organization_id, choice in s_keys:
+            keys_filter |= models.Q(
+                question_id=question_id, organization_id=organization_id, choice=choice
+            )
+        if not keys_filter:
+            return {}
+        return {
+            a_summary.get_key(): a_summary
+            for a_summary in AnswerSummary.objects.select_for_update().filter(
+                keys_filter
+            )
+        }
+
+    @staticmethod
+    def apply_deltas(deltas: Dict[SummaryKey, int]):
+        """
+        Adds the given deltas to the stored counters (creating the missing ones) with a fixed number of queries.
+        The affected counters are locked until the end of the transaction. Missing counters are inserted ignoring conflicts and selected again,
+        so concurrent first answers to the same counter do not fail on its unique constraint.
+
+        Args:
+            deltas (Dict[SummaryKey, int]): Difference of answers per (`Question` id, `EpicOrganization` id, choice).
+        """
+        deltas = {s_key: delta for s_key, delta in deltas.items() if delta}
+        if not deltas:
+            return
+        with transaction.atomic():
+            stored_summaries = AnswerSummary._get_locked_summaries(deltas.keys())
+            # Negative deltas of missing counters can only come from inconsistent counters, see `verify`.
+            missing_keys = [
+                s_key
+                for s_key, delta in deltas.items()
+                if delta > 0 and s_key not in stored_summaries
+            ]
+            if missing_keys:
+                AnswerSummary.objects.bulk_create(
+                    [
+                        AnswerSummary(
+                            question_id=question_id,
+                            organization_id=organization_id,
+                            choice=choice,
+                            n_answers=0,
+                        )
+                        for question_id, organization_id, choice in missing_keys
+                    ],
+                    ignore_conflicts=True,
+                )
+                stored_summaries.update(
+                    AnswerSummary._get_locked_summaries(missing_keys)
+                )
+            updated_summaries = []
+            for s_key, delta in deltas.items():
+                a_summary = stored_summaries.get(s_key, None)
+                if a_summary:
+                    a_summary.n_answers = max(a_summary.n_answers + delta, 0)
+                    updated_summaries.append(a_summary)
+            AnswerSummary.objects.bulk_update(updated_summaries, ["n_answers"])
+
+    @staticmethod
+    def get_choice_counts(
+        questions: models.QuerySet, organizations: Optional[List[Optional[int]]]
+    ) -> Dict[int, Dict[str, int]]:
+        """
+        Gets the (stored) number of answers per question and choice, added up over the given organizations.
+
+        Args:
+            questions (models.QuerySet): Summarized questions.
+            organizations (Optional[List[Optional[int]]]): `EpicOrganization` ids (`None` for users without organization). When not given all organizations are added up.
+
+        Returns:
+            Dict[int, Dict[str, int]]: Number of answers per choice, per `Question` id.
+        """
+        summaries = AnswerSummary.objects.filter(question__in=questions)
+        if organizations is not None:
+            organizations_filter = models.Q(
+                organization_id__in=[o_id for o_id in organizations if o_id is not None]
+            )
+            if None in organizations:
+                organizations_filter |= models.Q(organization__isnull=True)
+            summaries = summaries.filter(organizations_filter)
+        choice_counts: Dict[int, Dict[str, int]] = {}
+        for question_id, choice, n_answers in (
+            summaries.order_by()
+            .values("question_id", "choice")
+            .annotate(total=models.Sum("n_answers"))
+            .values_list("question_id", "choice", "total")
+        ):
+            choice_counts.setdefault(question_id, {})[choice] = n_answers
+        return choice_counts
+
+    @staticmethod
+    def get_expected_counts() -> Dict[SummaryKey, int]:
+        """
+        Counts all the stored answers, which is what the counters should contain.
+
+        Returns:
+            Dict[SummaryKey, int]: Number of answers per (`Question` id, `EpicOrganization` id, choice).
+        """
+        expected_counts: Dict[SummaryKey, int] = {}
+        for a_subtype in get_submodel_type_list(Answer):
+            expected_counts.update(
+                a_subtype.get_summary_counts(a_subtype.objects.all())
+            )
+        return expected_counts
+
+    @staticmethod
+    def rebuild() -> int:
+        """
+        Replaces all the counters with the ones computed from the stored answers.
+
+        Returns:
+            int: Number of stored counters.
+        """
+        with transaction.atomic():
+            AnswerSummary.objects.all().delete()
+            new_summaries = AnswerSummary.objects.bulk_create(
+                [
+                    AnswerSummary(
+                        question_id=question_id,
+                        organization_id=organization_id,
+                        choice=choice,
+                        n_answers=n_answers,
+                    )
+                    for (
+                        question_id,
+                        organization_id,
+                        choice,
+                    ), n_answers in AnswerSummary.get_expected_counts().items()
+                ]
+            )
+        return len(new_summaries)
+
+    @staticmethod
+    def verify() -> Dict[SummaryKey, Tuple[int, int]]:
+        """
+        Compares the counters with the ones computed from the stored answers.
+
+        Returns:
+            Dict[SummaryKey, Tuple[int, int]]: Stored and expected number of answers of the counters which differ.
+        """
+        stored_counts = {
+            a_summary.get_key(): a_summary.n_answers
+            for a_summary in AnswerSummary.objects.filter(n_answers__gt=0)
+        }
+        expected_counts = AnswerSummary.get_expected_counts()
+        return {
+            s_key: (stored_counts.get(s_key, 0), expected_counts.get(s_key, 0))
+            for s_key in stored_counts.keys() | expected_counts.keys()
+            if stored_counts.get(s_key, 0) != expected_counts.get(s_key, 0)
+        }
+
+
+class AnswerSummaryChange:
+    """
+    Keeps the `AnswerSummary` counters in sync with a change on a set of answers of the same subtype.
+    The answers are counted before and after the change and only the difference is applied.
+    """
+
+    def __init__(self, answer_type: Type[Answer], answer_pks: List[int]) -> None:
+        """
+        Args:
+            answer_type (Type[Answer]): Concrete `Answer` subtype of the changed answers.
+            answer_pks (List[int]): Ids of the (already stored) answers about to change.
+        """
+        self.answer_type = answer_type
+        self._counts_before = self._get_counts(answer_pks)
+
+    def _get_counts(self, answer_pks: List[int]) -> Counter:
+        if not answer_pks:
+            return Counter()
+        return Counter(
+            self.answer_type.get_summary_counts(
+                self.answer_type.objects.filter(pk__in=answer_pks)
+            )
+        )
+
+    def apply(self, answer_pks: List[int]):
+        """
+        Applies the difference between the current counts of the given answers and the ones taken before the change.
+
+        Args:
+            answer_pks (List[int]): Ids of the changed answers which still exist (including the created ones).
+        """
+        counts_after = self._get_counts(answer_pks)
+        counts_after.subtract(self._counts_before)
+        AnswerSummary.apply_deltas(counts_after)
+
+
+@contextlib.contextmanager
+def suspended_summary_tracking() -> Iterator[None]:
+    """
+    Stops tracking answer changes, meant for bulk deletions whose counters are removed as well (such as removing all questions).
+    """
+    token = _tracking_suspended.set(True)
+    try:
+        yield
+    finally:
+        _tracking_suspended.reset(token)
+
+
+def _track_answer_save(sender, instance: Answer, raw: bool = False, **kwargs):
+    if raw or _tracking_suspended.get():
+        return
+    stored_pks = [] if instance._state.adding or instance.pk is None else [instance.pk]
+    instance._summary_change = AnswerSummaryChange(sender, stored_pks)
+
+
+def _apply_answer_save(sender, instance: Answer, raw: bool = False, **kwargs):
+    summary_change = instance.__dict__.pop("_summary_change", None)
+    if summary_change:
+        summary_change.apply([instance.pk])
+
+
+def _track_answer_delete(sender, instance: Answer, **kwargs):
+    if _tracking_suspended.get():
+        return
+    # The answer is removed, so all its counts are subtracted.
+    AnswerSummaryChange(sender, [instance.pk]).apply([])
+
+
+# Connected per concrete subtype, so deletions of other models can still be done without signals.
+for _a_subtype in get_submodel_type_list(Answer):
+    pre_save.connect(_track_answer_save, sender=_a_subtype)
+    post_save.connect(_apply_answer_save, sender=_a_subtype)
+    pre_delete.connect(_track_answer_delete, sender=_a_subtype)
+
+
+@receiver(m2m_changed, sender=MultipleChoiceAnswer.selected_programs.through)
+def _track_selected_programs(
+    sender, instance: models.Model, action: str, reverse: bool, pk_set, **kwargs
+):
+    if _tracking_suspended.get():
+        return
+    if action.startswith("pre_"):
+        if not reverse:
+            answer_pks = [instance.pk]
+        elif pk_set is not None:
+            answer_pks = list(pk_set)
+        else:
+            answer_pks = list(instance.selected_answers.values_list("pk", flat=True))
+        instance._selected_programs_change = (
+            answer_pks,
+            AnswerSummaryChange(MultipleChoiceAnswer, answer_pks),
+        )
+    elif action.startswith("post_"):
+        answer_pks, summary_change = instance.__dict__.pop(
+            "_selected_programs_change", ([], None)
+        )
+        if summary_change:
+            summary_change.apply(answer_pks)
+
+
+@receiver(pre_delete, sender=base_models.Program)
+def _track_program_delete(sender, instance: base_models.Program, **kwargs):
+    # Deleting a program silently removes it from the answers which selected it.
+    if _tracking_suspended.get():
+        return
+    answer_pks = list(instance.selected_answers.values_list("pk", flat=True))
+    instance._selected_programs_change = (
+        answer_pks,
+        AnswerSummaryChange(MultipleChoiceAnswer, answer_pks),
+    )
+
+
+@receiver(post_delete, sender=base_models.Program)
+def _apply_program_delete(sender, instance: base_models.Program, **kwargs):
+    answer_pks, summary_change = instance.__dict__.pop(
+        "_selected_programs_change", ([], None)
+    )
+    if summary_change:
+        summary_change.apply(answer_pks)
+
+
+@receiver(pre_save, sender=EpicUser)
+def _track_organization_change(sender, instance: EpicUser, raw: bool = False, **kwargs):
+    # The answers of a user moved to another organization are counted for the new one.
+    if raw or _tracking_suspended.get() or instance._state.adding:
+        return
+    stored_organization = (
+        EpicUser.objects.filter(pk=instance.pk)
+        .values_list("organization_id", flat=True)
+        .first()
+    )
+    if stored_organization == instance.organization_id:
+        return
+    instance._summary_changes = []
+    for a_subtype in get_submodel_type_list(Answer):
+        answer_pks = list(
+            a_subtype.objects.filter(user=instance).values_list("pk", flat=True)
+        )
+        instance._summary_changes.append(
+            (answer_pks, AnswerSummaryChange(a_subtype, answer_pks))
+        )
+
+
+@receiver(post_save, sender=EpicUser)
+def _apply_organization_change(sender, instance: EpicUser, **kwargs):
+    for answer_pks, summary_change in instance.__dict__.pop("_summary_changes", []):
+        summary_change.apply(answer_pks)
@@ -1,12 +1,86 @@
 from __future__ import annotations
 
-from typing import List
-
+import csv
+import io
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Tuple
+
+import django
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
 from django.contrib.auth.models import User
-from django.db import models
+from django.db import models, transaction
 from django.utils.crypto import get_random_string
 from rest_framework.authtoken.models import Token
 
+from epic_app.utils import bulk_create_submodel_instances
+
+# Below this amount of passwords starting a process pool costs more than hashing them serially.
+_MIN_PARALLEL_PASSWORDS = 8
+
+
+def _generate_usernames(n_users: int) -> List[str]:
+    """
+    Generates unique usernames (a random string followed by a sequence number) without reading the existing users.
+    Collisions are checked (and regenerated) with one query per round, usually only one is needed.
+
+    Args:
+        n_users (int): Number of usernames to generate.
+
+    Returns:
+        List[str]: Unique usernames.
+    """
+    n_existing = User.objects.count()
+    usernames = [
+        f"{get_random_string(length=7)}{n_existing + n_user}"
+        for n_user in range(n_users)
+    ]
+    taken = set(
+        User.objects.filter(username__in=usernames).values_list("username", flat=True)
+    )
+    while taken:
+        usernames = [
+            f"{get_random_string(length=7)}{u_name[7:]}" if u_name in taken else u_name
+            for u_name in usernames
+        ]
+        taken = set(
+            User.objects.filter(username__in=usernames).values_list(
+                "username", flat=True
+            )
+        )
+    return usernames
+
+
+def _hash_passwords(raw_passwords: List[str]) -> List[str]:
+    """
+    Hashes the given passwords. Password hashers are CPU bound by design, so they are fanned out over a process pool (`EPIC_PASSWORD_HASHING_WORKERS` processes, all cpus by default).
+    The processes are spawned rather than forked, as this runs within (multi-threaded) web server workers.
+
+    Args:
+        raw_passwords (List[str]): Passwords to hash.
+
+    Returns:
+        List[str]: Hashed passwords, in the same order.
+    """
+    n_workers = settings.EPIC_PASSWORD_HASHING_WORKERS or os.cpu_count() or 1
+    if n_workers <= 1 or len(raw_passwords) < _MIN_PARALLEL_PASSWORDS:
+        return list(map(make_password, raw_passwords))
+    with ProcessPoolExecutor(
+        max_workers=n_workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=django.setup,
+    ) as executor:
+        return list(
+            executor.map(
+                make_password,
+                raw_passwords,
+                chunksize=max(len(raw_passwords) // (n_workers * 4), 1),
+            )
+        )
+
 
 class EpicOrganization(models.Model):
     name: str = models.CharField(max_length=50)
@@ -25,22 +99,68 @@ class EpicOrganization(models.Model):
             List[EpicUser]: List of created `EpicUsers`
         """
 
-        def create_epic_user() -> EpicUser:
-            """
-            Creates an epic user with a random unique username and a matching (lowercase) password.
+        return [epic_user for epic_user, _ in self.provision_users(n_users)]
 
-            Returns:
-                EpicUser: Generated `EpicUser`.
-            """
-            epic_username: str = (
-                f"{get_random_string(length=7)}{len(EpicUser.objects.all())}"
+    def provision_users(self, n_users: int) -> List[Tuple[EpicUser, str]]:
+        """
+        Creates 'n' `EpicUser` objects (and their tokens) that belong to this `EpicOrganization` with a fixed number of queries.
+        Each user gets a random unique username and a matching (lowercase) password.
+
+        Args:
+            n_users (int): Number of users to create.
+
+        Returns:
+            List[Tuple[EpicUser, str]]: List of created `EpicUsers` and their (raw) passwords.
+        """
+        usernames = _generate_usernames(n_users)
+        raw_passwords = [u_name.lower() for u_name in usernames]
+        epic_users = [
+            EpicUser(username=u_name, password=u_password, organization=self)
+            for u_name, u_password in zip(usernames, _hash_passwords(raw_passwords))
+        ]
+        with transaction.atomic():
+            bulk_create_submodel_instances(EpicUser, epic_users)
+            Token.objects.bulk_create(
+                [Token(key=Token.generate_key(), user=e_user) for e_user in epic_users]
             )
-            epic_user = EpicUser(username=epic_username, organization=self)
-            epic_user.set_password(epic_username.lower())
-            epic_user.save()
-            return epic_user
+        return list(zip(epic_users, raw_passwords))
 
-        return [create_epic_user() for n in range(0, n_users)]
+    @staticmethod
+    def export_credentials(
+        credentials: List[Tuple[EpicUser, str]], export_format: str
+    ) -> str:
+        """
+        Exports the credentials of provisioned users so they can be handed out.
+
+        Args:
+            credentials (List[Tuple[EpicUser, str]]): Users and their (raw) passwords, as given by `provision_users`.
+            export_format (str): Either `csv` or `json`.
+
+        Raises:
+            ValueError: When the export format is not supported.
+
+        Returns:
+            str: Exported credentials.
+        """
+        rows = [
+            dict(
+                organization=e_user.organization.name if e_user.organization else "",
+                username=e_user.username,
+                password=raw_password,
+            )
+            for e_user, raw_password in credentials
+        ]
+        if export_format == "json":
+            return json.dumps(rows, indent=4)
+        if export_format == "csv":
+            csv_buffer = io.StringIO()
+            csv_writer = csv.DictWriter(
+                csv_buffer, fieldnames=["organization", "username", "password"]
+            )
+            csv_writer.writeheader()
+            csv_writer.writerows(rows)
+            return csv_buffer.getvalue()
+        raise ValueError(f"Export format `{export_format}` not supported.")
 
 
 class EpicUser(User):
@@ -1,9 +1,10 @@
 from __future__ import annotations
 
-from typing import List, Optional
+from typing import Dict, Iterable, List, Optional
 
-from django.db import models
+from django.db import IntegrityError, models, transaction
 from django.forms import ValidationError
+from django.utils import timezone
 
 
 # region Default models
@@ -88,6 +89,9 @@ class Program(models.Model):
         max_length=50,
         unique=True,
     )
+    # Case insensitive key of `name`, normalized in Python so every database compares names the same way.
+    # `str.lower` can lengthen some characters, hence the longer column.
+    name_key: str = models.CharField(max_length=100, null=True, editable=False)
     description: str = models.TextField(
         max_length=250,
         blank=False,
@@ -102,6 +106,14 @@ class Program(models.Model):
     reference_description = models.TextField(max_length=258, blank=True, null=True)
     reference_link = models.URLField(max_length=128, blank=True)
 
+    class Meta:
+        constraints = [
+            # Names are unique regardless of their case, lookups by name use this index.
+            models.UniqueConstraint(
+                fields=["name_key"], name="unique_program_name_key"
+            ),
+        ]
+
     @staticmethod
     def check_unique_name(value: str):
         """
@@ -119,6 +131,19 @@ class Program(models.Model):
                 f"There's already a Program with the name: {existing_program.name}."
             )
 
+    @staticmethod
+    def get_name_key(name: str) -> str:
+        """
+        Gets the case insensitive key of the given program name, as stored in `name_key`.
+
+        Args:
+            name (str): Program name.
+
+        Returns:
+            str: Lowercase name.
+        """
+        return name.lower()
+
     @staticmethod
     def get_program_by_name(value: str) -> Optional[Program]:
         """
@@ -130,16 +155,129 @@ class Program(models.Model):
         Returns:
             Optional[Program]: Found program.
         """
-        return next(
-            (p for p in Program.objects.all() if p.name.lower() == value.lower()), None
-        )
+        return Program.objects.filter(name_key=Program.get_name_key(value)).first()
+
+    @staticmethod
+    def get_programs_by_names(values: Iterable[str]) -> Dict[str, Program]:
+        """
+        Gets the existing programs whose name (case insensitive) matches any of the given values, in one query.
+
+        Args:
+            values (Iterable[str]): Program names.
+
+        Returns:
+            Dict[str, Program]: Found programs by their name key.
+        """
+        name_keys = {Program.get_name_key(value) for value in values}
+        if not name_keys:
+            return {}
+        return {
+            program.name_key: program
+            for program in Program.objects.filter(name_key__in=name_keys)
+        }
+
+    @staticmethod
+    def get_name_collisions() -> Dict[str, List[str]]:
+        """
+        Gets the programs whose names only differ in their case, which prevent creating the `unique_program_name_key` constraint.
+        The names are read without their (maybe not yet migrated) key.
+
+        Returns:
+            Dict[str, List[str]]: Colliding program names by their name key.
+        """
+        names_by_key = {}
+        for name in Program.objects.order_by("pk").values_list("name", flat=True):
+            names_by_key.setdefault(Program.get_name_key(name), []).append(name)
+        return {
+            name_key: names
+            for name_key, names in names_by_key.items()
+            if len(names) > 1
+        }
+
+    @staticmethod
+    def backfill_name_keys() -> int:
+        """
+        Stores the `name_key` of every program which does not have it yet.
+
+        Returns:
+            int: Number of updated programs.
+        """
+        programs = list(Program.objects.filter(name_key__isnull=True))
+        for program in programs:
+            program.name_key = Program.get_name_key(program.name)
+        Program.objects.bulk_update(programs, ["name_key"])
+        return len(programs)
 
     def save(self, *args, **kwargs) -> None:
-        self.check_unique_name(self.name)
-        return super(Program, self).save(*args, **kwargs)
+        """
+        Overriding of the save method to report case insensitive name collisions (detected by the database constraint) as a `ValidationError`.
+
+        Raises:
+            ValidationError: When there is already a Program with the same case insensitive name.
+        """
+        self.name_key = Program.get_name_key(self.name)
+        try:
+            with transaction.atomic():
+                return super(Program, self).save(*args, **kwargs)
+        except IntegrityError as e_info:
+            existing_program = Program.get_program_by_name(self.name)
+            if existing_program and existing_program.pk != self.pk:
+                raise ValidationError(
+                    f"There's already a Program with the name: {existing_program.name}."
+                ) from e_info
+            raise
 
     def __str__(self) -> str:
         return self.name
 
 
+class DomainRevision(models.Model):
+    """
+    Single row counter of the changes done to the EPIC domain (areas, groups, programs, agencies and their questions).
+    It is bumped by every importer and generation action, so the domain endpoints can be cached per revision.
+
+    Args:
+        models (models.Model): Derives directly from the base class Model.
+    """
+
+    _singleton_pk = 1
+
+    revision: int = models.PositiveIntegerField(default=0)
+    updated_on = models.DateTimeField(default=timezone.now)
+
+    @classmethod
+    def get_current(cls) -> DomainRevision:
+        """
+        Gets the current domain revision, it is created the first time it is requested.
+
+        Returns:
+            DomainRevision: Current revision.
+        """
+        d_revision, _ = cls.objects.get_or_create(pk=cls._singleton_pk)
+        return d_revision
+
+    @classmethod
+    def bump(cls) -> None:
+        """
+        Increases the domain revision, invalidating the responses cached for the previous one.
+        When called within a transaction the new revision only becomes visible once it is committed.
+        """
+        if not cls.objects.filter(pk=cls._singleton_pk).update(
+            revision=models.F("revision") + 1, updated_on=timezone.now()
+        ):
+            cls.objects.get_or_create(pk=cls._singleton_pk, defaults={"revision": 1})
+
+    def get_etag(self) -> str:
+        """
+        Gets an entity tag unique for this revision (also across database resets).
+
+        Returns:
+            str: Revision tag, without quotes.
+        """
+        return f"{self.revision}-{int(self.updated_on.timestamp() * 1e6)}"
+
+    def __str__(self) -> str:
+        return f"Revision {self.revision} ({self.updated_on})"
+
+
 # endregion
@@ -1,6 +1,10 @@
 # Expose all neede serializers here.
 from epic_app.serializers.agency_serializer import AgencySerializer
-from epic_app.serializers.answer_serializer import AnswerSerializer
+from epic_app.serializers.answer_serializer import (
+    AnswerSerializer,
+    BulkAnswerUpsert,
+    answer_type_registry,
+)
 from epic_app.serializers.area_serializer import AreaSerializer
 from epic_app.serializers.epic_user_serializer import (
     EpicOrganizationSerializer,
@@ -16,4 +20,5 @@ from epic_app.serializers.question_serializer import (
     NationalFrameworkQuestionSerializer,
     QuestionSerializer,
 )
+from epic_app.serializers.report_job_serializer import EpicReportJobSerializer
 from epic_app.serializers.report_serializer import ProgramReportSerializer
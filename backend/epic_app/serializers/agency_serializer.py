@@ -1,10 +1,13 @@
-from rest_framework import serializers
+from typing import List, Union
 
-from epic_app.models.models import Agency
+from django.db import models
+
+from epic_app.models.models import Agency, Program
+from epic_app.serializers.base_serializer import EagerLoadingModelSerializer
 from epic_app.serializers.program_serializer import SimpleProgramSerializer
 
 
-class AgencySerializer(serializers.ModelSerializer):
+class AgencySerializer(EagerLoadingModelSerializer):
     """
     Serializer for 'Agency'
     """
@@ -14,6 +17,17 @@ class AgencySerializer(serializers.ModelSerializer):
         read_only=True,
     )
 
+    @classmethod
+    def get_prefetches(cls) -> List[Union[str, models.Prefetch]]:
+        return [
+            models.Prefetch(
+                "programs",
+                queryset=SimpleProgramSerializer.setup_eager_loading(
+                    Program.objects.all()
+                ),
+            )
+        ]
+
     class Meta:
         """
         Overriden meta class for serializing purposes.
@@ -1,5 +1,7 @@
-from typing import Type
+from typing import Any, Dict, List, Optional, Type
 
+from django.core.exceptions import ValidationError
+from django.db import transaction
 from rest_framework import serializers
 
 from epic_app.models.epic_answers import (
@@ -9,8 +11,15 @@ from epic_app.models.epic_answers import (
     YesNoAnswer,
     YesNoAnswerType,
 )
-from epic_app.models.epic_questions import EvolutionChoiceType
-from epic_app.utils import get_instance_as_submodel_type
+from epic_app.models.epic_questions import EvolutionChoiceType, Question
+from epic_app.models.epic_summaries import AnswerSummaryChange
+from epic_app.models.epic_user import EpicUser
+from epic_app.models.models import Program
+from epic_app.utils import (
+    bulk_create_submodel_instances,
+    get_instance_as_submodel_type,
+    get_submodel_type_list,
+)
 
 
 class _BaseAnswerSerializer(serializers.ModelSerializer):
@@ -45,7 +54,7 @@ class YesNoAnswerSerializer(_BaseAnswerSerializer):
 
     class Meta:
         model = YesNoAnswer
-        fields = "__all__"
+        exclude = ("subtype",)
 
 
 class SingleChoiceAnswerSerializer(_BaseAnswerSerializer):
@@ -55,13 +64,392 @@ class SingleChoiceAnswerSerializer(_BaseAnswerSerializer):
 
     class Meta:
         model = SingleChoiceAnswer
-        fields = "__all__"
+        exclude = ("subtype",)
 
 
 class MultipleChoiceAnswerSerializer(_BaseAnswerSerializer):
     class Meta:
         model = MultipleChoiceAnswer
-        fields = "__all__"
+        exclude = ("subtype",)
 
     def update(self, instance: Answer, validated_data):
         return super().update(instance, validated_data)
+
+
+def _get_bulk_serializer(
+    a_serializer: Type[serializers.ModelSerializer],
+) -> Type[serializers.ModelSerializer]:
+    """
+    Derives the serializer of the items of a `BulkAnswerUpsert` from the given `Answer` serializer.
+    The `user` and `question` are resolved for all the items at once, and the related pks (`selected_programs`) are checked with one query instead of one per pk.
+    """
+    a_model = a_serializer.Meta.model
+    bulk_meta = type(
+        "Meta",
+        (a_serializer.Meta,),
+        {"exclude": tuple(a_serializer.Meta.exclude) + ("user", "question")},
+    )
+    bulk_fields = {
+        m2m.name: serializers.ListField(
+            child=serializers.IntegerField(), required=False
+        )
+        for m2m in a_model._meta.many_to_many
+    }
+    return type(
+        f"Bulk{a_serializer.__name__}",
+        (a_serializer,),
+        {"Meta": bulk_meta, **bulk_fields},
+    )
+
+
+class AnswerTypeRegistry:
+    """
+    Static mapping of each `Question` subtype to the `Answer` subtype supporting it and its serializer.
+    It is built once (when the app is ready) from `Answer._get_supported_questions`, so resolving the answer type of a question only requires reading its discriminator.
+    """
+
+    def __init__(self) -> None:
+        self._answer_types: Dict[Type[Question], Type[Answer]] = {}
+        self._serializers: Dict[Type[Answer], Type[serializers.ModelSerializer]] = {}
+        self._bulk_serializers: Dict[
+            Type[Answer], Type[serializers.ModelSerializer]
+        ] = {}
+
+    def build(self) -> None:
+        """
+        (Re)computes the mapping from the currently defined `Answer` subtypes.
+        """
+        answer_types = {}
+        answer_serializers = {}
+        for a_type in get_submodel_type_list(Answer):
+            answer_serializers[a_type] = AnswerSerializer.get_concrete_serializer(
+                a_type
+            )
+            for q_type in a_type._get_supported_questions():
+                answer_types[q_type] = a_type
+        self._answer_types = answer_types
+        self._serializers = answer_serializers
+        self._bulk_serializers = {
+            a_type: _get_bulk_serializer(a_serializer)
+            for a_type, a_serializer in answer_serializers.items()
+        }
+
+    def _get_answer_types(self) -> Dict[Type[Question], Type[Answer]]:
+        if not self._answer_types:
+            self.build()
+        return self._answer_types
+
+    def get_answer_type(self, q_type: Type[Question]) -> Optional[Type[Answer]]:
+        """
+        Gets the `Answer` subtype supporting the given `Question` subtype.
+
+        Args:
+            q_type (Type[Question]): Concrete `Question` subtype.
+
+        Returns:
+            Optional[Type[Answer]]: Supporting `Answer` subtype, `None` when there is none.
+        """
+        return self._get_answer_types().get(q_type, None)
+
+    def get_serializer(self, a_type: Type[Answer]) -> Type[serializers.ModelSerializer]:
+        """
+        Gets the serializer of the given `Answer` subtype.
+
+        Args:
+            a_type (Type[Answer]): Concrete `Answer` subtype.
+
+        Raises:
+            ValueError: When the `Answer` subtype has no serializer.
+
+        Returns:
+            Type[serializers.ModelSerializer]: Serializer of the `Answer` subtype.
+        """
+        self._get_answer_types()
+        serializer = self._serializers.get(a_type, None)
+        if not serializer:
+            raise ValueError(f"Answer type {a_type} has no designated serializer.")
+        return serializer
+
+    def get_bulk_serializer(
+        self, a_type: Type[Answer]
+    ) -> Type[serializers.ModelSerializer]:
+        """
+        Gets the serializer validating the fields of the given `Answer` subtype in a `BulkAnswerUpsert`.
+
+        Args:
+            a_type (Type[Answer]): Concrete `Answer` subtype.
+
+        Raises:
+            ValueError: When the `Answer` subtype has no serializer.
+
+        Returns:
+            Type[serializers.ModelSerializer]: Bulk serializer of the `Answer` subtype.
+        """
+        self.get_serializer(a_type)
+        return self._bulk_serializers[a_type]
+
+    def get_question_answer_types(
+        self, question_pks: List[Any]
+    ) -> Dict[Any, Optional[Type[Answer]]]:
+        """
+        Gets the `Answer` subtype of each of the given `Question` pks by reading their discriminators (one query).
+        Only questions which were never backfilled are resolved by probing the `Question` subtype tables.
+
+        Args:
+            question_pks (List[Any]): Primary keys of the questions.
+
+        Returns:
+            Dict[Any, Optional[Type[Answer]]]: `Answer` subtype by question pk, unknown questions are not included.
+        """
+        return {
+            q_pk: self.get_answer_type(q_type)
+            for q_pk, q_type in Answer.get_question_types(question_pks).items()
+        }
+
+    def get_question_answer_type(self, question_pk: Any) -> Optional[Type[Answer]]:
+        """
+        Gets the `Answer` subtype of the given `Question` pk (one query).
+
+        Args:
+            question_pk (Any): Primary key of the question.
+
+        Returns:
+            Optional[Type[Answer]]: `Answer` subtype, `None` when the question does not exist.
+        """
+        try:
+            question_pk = Question._meta.pk.to_python(question_pk)
+        except ValidationError:
+            return None
+        return self.get_question_answer_types([question_pk]).get(question_pk, None)
+
+
+answer_type_registry = AnswerTypeRegistry()
+
+
+class _BulkAnswerItemSerializer(serializers.Serializer):
+    """
+    Identifies one item of a `BulkAnswerUpsert`, its other fields are validated by the bulk serializer of its `Answer` subtype.
+    """
+
+    question = serializers.IntegerField()
+    user = serializers.IntegerField(required=False)
+
+    def validate_user(self, value: int) -> int:
+        if value != self.context["epic_user"].pk:
+            raise serializers.ValidationError(
+                "Answers can only be stored for the requesting user."
+            )
+        return value
+
+
+class BulkAnswerUpsert:
+    """
+    Validates and stores (creates or updates) several `Answers` of one `EpicUser` at once.
+    Each item is identified by its `question` and contains the fields of the `Answer` subtype related to it.
+    The number of queries does not depend on the number of answers.
+    """
+
+    def __init__(self, epic_user: EpicUser, data: Any) -> None:
+        """
+        Args:
+            epic_user (EpicUser): Owner of all the stored answers.
+            data (Any): Request data, expected to be a list of answer dictionaries.
+        """
+        self.epic_user = epic_user
+        self.initial_data = data
+        self._validated_items: List[Dict[str, Any]] = []
+        self._errors: Any = None
+
+    @property
+    def errors(self) -> Any:
+        return self._errors
+
+    def _check_selected_programs(
+        self,
+        validated_items: List[Optional[Dict[str, Any]]],
+        items_errors: List[Dict[str, Any]],
+    ):
+        """
+        Checks all the requested `selected_programs` exist with a single query.
+        """
+        requested_programs = set(
+            p_pk
+            for item in validated_items
+            if item and item["selected_programs"]
+            for p_pk in item["selected_programs"]
+        )
+        if not requested_programs:
+            return
+        existing_programs = set(
+            Program.objects.filter(pk__in=requested_programs).values_list(
+                "pk", flat=True
+            )
+        )
+        for item, item_errors in zip(validated_items, items_errors):
+            missing_programs = [
+                p_pk
+                for p_pk in ((item and item["selected_programs"]) or [])
+                if p_pk not in existing_programs
+            ]
+            if missing_programs:
+                item_errors["selected_programs"] = [
+                    f'Invalid pk "{p_pk}" - object does not exist.'
+                    for p_pk in missing_programs
+                ]
+
+    def is_valid(self) -> bool:
+        """
+        Validates all the answers at once with the (bulk) serializer of each `Answer` subtype.
+        It requires (at most) one query for the questions and one for the selected programs.
+
+        Returns:
+            bool: Whether all the given answers are valid.
+        """
+        items_serializer = _BulkAnswerItemSerializer(
+            data=self.initial_data, many=True, context={"epic_user": self.epic_user}
+        )
+        if not items_serializer.is_valid():
+            self._errors = items_serializer.errors
+            return False
+
+        items_question = [item["question"] for item in items_serializer.validated_data]
+        question_answer_types = answer_type_registry.get_question_answer_types(
+            items_question
+        )
+        items_errors: List[Dict[str, Any]] = [{} for _ in items_question]
+        items_by_type: Dict[Type[Answer], List[int]] = {}
+        seen_questions = set()
+        for n_item, q_pk in enumerate(items_question):
+            a_type = question_answer_types.get(q_pk, None)
+            if q_pk in seen_questions:
+                items_errors[n_item]["question"] = [
+                    "Duplicated question in the request."
+                ]
+            elif not a_type:
+                items_errors[n_item]["question"] = [
+                    f'Invalid pk "{q_pk}" - object does not exist.'
+                ]
+            else:
+                items_by_type.setdefault(a_type, []).append(n_item)
+            seen_questions.add(q_pk)
+
+        validated_items: List[Optional[Dict[str, Any]]] = [None] * len(items_question)
+        for a_type, type_items in items_by_type.items():
+            a_serializer = answer_type_registry.get_bulk_serializer(a_type)(
+                data=[self.initial_data[n_item] for n_item in type_items],
+                many=True,
+                partial=True,
+            )
+            if not a_serializer.is_valid():
+                for n_item, item_errors in zip(type_items, a_serializer.errors):
+                    items_errors[n_item].update(item_errors)
+                continue
+            m2m_names = [m2m.name for m2m in a_type._meta.many_to_many]
+            for n_item, item_data in zip(type_items, a_serializer.validated_data):
+                validated_items[n_item] = dict(
+                    answer_type=a_type,
+                    question=items_question[n_item],
+                    fields={
+                        f_name: f_value
+                        for f_name, f_value in item_data.items()
+                        if f_name not in m2m_names
+                    },
+                    selected_programs=item_data.get("selected_programs", None),
+                )
+        self._check_selected_programs(validated_items, items_errors)
+
+        if any(items_errors):
+            self._errors = items_errors
+            return False
+        self._validated_items = validated_items
+        self._errors = []
+        return True
+
+    def _save_answer_type(
+        self, a_type: Type[Answer], items: List[Dict[str, Any]]
+    ) -> Dict[int, Dict[str, Any]]:
+        existing_answers: Dict[int, Answer] = {
+            a.question_id: a
+            for a in a_type.objects.filter(
+                user=self.epic_user, question_id__in=[i["question"] for i in items]
+            )
+        }
+        summary_change = AnswerSummaryChange(
+            a_type, [a.pk for a in existing_answers.values()]
+        )
+        new_answers: List[Answer] = []
+        updated_answers: List[Answer] = []
+        updated_fields = set()
+        for item in items:
+            a_instance = existing_answers.get(item["question"], None)
+            item["created"] = a_instance is None
+            if item["created"]:
+                a_instance = a_type(user=self.epic_user, question_id=item["question"])
+                new_answers.append(a_instance)
+            else:
+                updated_answers.append(a_instance)
+                updated_fields.update(item["fields"].keys())
+            for f_name, f_value in item["fields"].items():
+                setattr(a_instance, f_name, f_value)
+            item["instance"] = a_instance
+
+        if updated_answers and updated_fields:
+            a_type.objects.bulk_update(updated_answers, list(updated_fields))
+        bulk_create_submodel_instances(a_type, new_answers)
+
+        if a_type is MultipleChoiceAnswer:
+            self._save_selected_programs(
+                [i for i in items if i["selected_programs"] is not None]
+            )
+        # Bulk queries do not send signals, update the answer summaries explicitly.
+        summary_change.apply([item["instance"].pk for item in items])
+        return {
+            item["question"]: {
+                "id": item["instance"].pk,
+                "question": item["question"],
+                "created": item["created"],
+            }
+            for item in items
+        }
+
+    def _save_selected_programs(self, items: List[Dict[str, Any]]):
+        """
+        Replaces the `selected_programs` of the given items with one delete and one insert query.
+        """
+        if not items:
+            return
+        through_model = MultipleChoiceAnswer.selected_programs.through
+        through_model.objects.filter(
+            multiplechoiceanswer_id__in=[
+                i["instance"].pk for i in items if not i["created"]
+            ]
+        ).delete()
+        through_model.objects.bulk_create(
+            [
+                through_model(
+                    multiplechoiceanswer_id=item["instance"].pk, program_id=p_pk
+                )
+                for item in items
+                for p_pk in dict.fromkeys(item["selected_programs"])
+            ]
+        )
+
+    def save(self) -> List[Dict[str, Any]]:
+        """
+        Creates or updates all the validated answers in a single transaction.
+
+        Returns:
+            List[Dict[str, Any]]: Result of each answer (`id`, `question` and whether it was `created`) in the requested order.
+        """
+        if self._errors is None:
+            raise AssertionError(
+                "You must call `.is_valid()` before calling `.save()`."
+            )
+        items_by_type: Dict[Type[Answer], List[Dict[str, Any]]] = {}
+        for item in self._validated_items:
+            items_by_type.setdefault(item["answer_type"], []).append(item)
+        results = {}
+        with transaction.atomic():
+            for a_type, a_items in items_by_type.items():
+                results.update(self._save_answer_type(a_type, a_items))
+        return [results[item["question"]] for item in self._validated_items]
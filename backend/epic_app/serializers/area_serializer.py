@@ -1,10 +1,13 @@
-from rest_framework import serializers
+from typing import List, Union
 
-from epic_app.models.models import Area
+from django.db import models
+
+from epic_app.models.models import Area, Group
+from epic_app.serializers.base_serializer import EagerLoadingModelSerializer
 from epic_app.serializers.group_serializer import GroupSerializer
 
 
-class AreaSerializer(serializers.ModelSerializer):
+class AreaSerializer(EagerLoadingModelSerializer):
     """
     Serializer for 'Area'
     """
@@ -14,6 +17,15 @@ class AreaSerializer(serializers.ModelSerializer):
         read_only=True,
     )
 
+    @classmethod
+    def get_prefetches(cls) -> List[Union[str, models.Prefetch]]:
+        return [
+            models.Prefetch(
+                "groups",
+                queryset=GroupSerializer.setup_eager_loading(Group.objects.all()),
+            )
+        ]
+
     class Meta:
         """
         Overriden meta class for serializing purposes.
@@ -0,0 +1,72 @@
+from typing import Dict, List, Optional, Tuple, Union
+from urllib.parse import quote
+
+from django.db import models
+from rest_framework import serializers
+from rest_framework.request import Request
+
+
+class TemplatedHyperlinkedIdentityField(serializers.HyperlinkedIdentityField):
+    """
+    Hyperlinked identity field which only resolves (`reverse()`) its url once per view name and format.
+    The urls of the following objects are built by replacing the lookup value in the resolved url.
+    """
+
+    _lookup_placeholder = "epic-lookup-placeholder"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._url_templates: Dict[Tuple[str, Optional[str]], str] = {}
+
+    def get_url(
+        self, obj: models.Model, view_name: str, request: Request, format: str
+    ) -> Optional[str]:
+        # Unsaved objects will not yet have a valid URL.
+        if hasattr(obj, "pk") and obj.pk in (None, ""):
+            return None
+        url_template = self._url_templates.get((view_name, format), None)
+        if url_template is None:
+            url_template = self.reverse(
+                view_name,
+                kwargs={self.lookup_url_kwarg: self._lookup_placeholder},
+                request=request,
+                format=format,
+            )
+            self._url_templates[(view_name, format)] = url_template
+        lookup_value = quote(str(getattr(obj, self.lookup_field)), safe="")
+        return url_template.replace(self._lookup_placeholder, lookup_value)
+
+
+class EagerLoadingModelSerializer(serializers.ModelSerializer):
+    """
+    Model serializer which declares the relationships it needs prefetched, so a queryset of any size is serialized with a fixed number of queries.
+    Nested serializers should reuse the prefetch plan of their child serializer through `setup_eager_loading`.
+    """
+
+    serializer_url_field = TemplatedHyperlinkedIdentityField
+
+    @classmethod
+    def get_prefetches(cls) -> List[Union[str, models.Prefetch]]:
+        """
+        Gets the prefetch plan of this serializer, to be overriden in concrete serializers with related fields.
+
+        Returns:
+            List[Union[str, models.Prefetch]]: Lookups to pass to `prefetch_related`.
+        """
+        return []
+
+    @classmethod
+    def setup_eager_loading(cls, queryset: models.QuerySet) -> models.QuerySet:
+        """
+        Applies the prefetch plan of this serializer to the given queryset.
+
+        Args:
+            queryset (models.QuerySet): Queryset of the serialized model.
+
+        Returns:
+            models.QuerySet: Queryset with all the serialized relationships prefetched.
+        """
+        prefetches = cls.get_prefetches()
+        if not prefetches:
+            return queryset
+        return queryset.prefetch_related(*prefetches)
@@ -1,16 +1,30 @@
-from rest_framework import serializers
+from typing import List, Union
 
-from epic_app.models.models import Group
+from django.db import models
+
+from epic_app.models.models import Group, Program
+from epic_app.serializers.base_serializer import EagerLoadingModelSerializer
 from epic_app.serializers.program_serializer import SimpleProgramSerializer
 
 
-class GroupSerializer(serializers.ModelSerializer):
+class GroupSerializer(EagerLoadingModelSerializer):
     """
     Serializer for 'Group'
     """
 
     programs = SimpleProgramSerializer(many=True, read_only=True)
 
+    @classmethod
+    def get_prefetches(cls) -> List[Union[str, models.Prefetch]]:
+        return [
+            models.Prefetch(
+                "programs",
+                queryset=SimpleProgramSerializer.setup_eager_loading(
+                    Program.objects.all()
+                ),
+            )
+        ]
+
     class Meta:
         """
         Overriden meta class for serializing purposes.
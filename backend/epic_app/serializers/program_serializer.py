@@ -1,13 +1,20 @@
-from rest_framework import serializers
+from typing import List, Union
+
+from django.db import models
 
 from epic_app.models.models import Program
+from epic_app.serializers.base_serializer import EagerLoadingModelSerializer
 
 
-class ProgramSerializer(serializers.ModelSerializer):
+class ProgramSerializer(EagerLoadingModelSerializer):
     """
     Serializer for 'Program'
     """
 
+    @classmethod
+    def get_prefetches(cls) -> List[Union[str, models.Prefetch]]:
+        return ["agencies", "questions"]
+
     class Meta:
         """
         Overriden meta class for serializing purposes.
@@ -27,7 +34,7 @@ class ProgramSerializer(serializers.ModelSerializer):
         )
 
 
-class SimpleProgramSerializer(serializers.ModelSerializer):
+class SimpleProgramSerializer(EagerLoadingModelSerializer):
     """
     Serializer for 'Program' without embedded questions.
     """
@@ -1,12 +1,17 @@
-from typing import List, Optional, Tuple
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Union
 
+from django.db import models
 from rest_framework import serializers
 
 from epic_app.models.epic_answers import Answer
 from epic_app.models.epic_questions import Question
 from epic_app.models.epic_user import EpicUser
 from epic_app.models.models import Program
-from epic_app.utils import get_instance_as_submodel_type
+from epic_app.utils import (
+    SUBMODEL_FIELD,
+    get_submodel_type_by_name,
+    get_submodel_type_list,
+)
 
 _QuestionAnswer = Tuple[Question, Optional[Answer]]
 
@@ -19,40 +24,135 @@ class _QuestionAnswerSerializer(serializers.BaseSerializer):
         return {"question": question.id, "answer": answer.id if answer else None}
 
 
+class UsersProgress:
+    """
+    Set-based lookup of the (valid) `Answers` given by several `EpicUsers` to several `Questions`.
+    The number of queries is fixed, it does not depend on the number of users, questions or answers.
+    """
+
+    def __init__(
+        self,
+        questions: Iterable[Question],
+        users: Union[models.QuerySet, List[EpicUser]],
+    ) -> None:
+        """
+        Args:
+            questions (Iterable[Question]): `Questions` whose answers will be looked up.
+            users (Union[models.QuerySet, List[EpicUser]]): `EpicUsers` whose answers will be looked up.
+        """
+        question_pks = [q.pk for q in questions]
+        user_pks = [u.pk for u in users]
+        self._answers: Dict[Tuple[int, int], Answer] = {}
+        self._valid_answers: Set[int] = set()
+        if not question_pks or not user_pks:
+            return
+        answers = Answer.objects.filter(
+            user__in=user_pks, question__in=question_pks
+        ).only("pk", "user_id", "question_id", SUBMODEL_FIELD)
+        present_subtypes = set()
+        for answer in answers:
+            self._answers[(answer.user_id, answer.question_id)] = answer
+            present_subtypes.add(get_submodel_type_by_name(Answer, answer.subtype))
+        if None in present_subtypes:
+            # Legacy answers without discriminator, check all subtypes.
+            present_subtypes = set(get_submodel_type_list(Answer))
+        for a_subtype in present_subtypes:
+            self._valid_answers.update(
+                a_subtype.get_valid_answers(
+                    a_subtype.objects.filter(
+                        user__in=user_pks, question__in=question_pks
+                    )
+                ).values_list("pk", flat=True)
+            )
+
+    def get_answer(self, user: EpicUser, question: Question) -> Optional[Answer]:
+        return self._answers.get((user.pk, question.pk), None)
+
+    def is_valid_answer(self, answer: Optional[Answer]) -> bool:
+        return answer is not None and answer.pk in self._valid_answers
+
+
+class ProgressListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        """
+        Computes the progress of all the context `users` (or the context `EpicUser`) for all the given programs at once.
+        """
+        programs = data.all() if isinstance(data, models.Manager) else data
+        if isinstance(programs, models.QuerySet):
+            programs = programs.prefetch_related("questions")
+        programs = list(programs)
+        users = self.context.get("users", None)
+        if users is None:
+            users = [self.child._get_context_epic_user()]
+        users_progress = UsersProgress(
+            [q for p in programs for q in p.questions.all()], users
+        )
+        return [
+            {
+                "user": user.pk,
+                "program": program.pk,
+                **self.child.get_program_progress(program, user, users_progress),
+            }
+            for user in users
+            for program in programs
+        ]
+
+
 class ProgressSerializer(serializers.BaseSerializer):
     """
     Serializer to show the progress of the context `EpicUser`.
     Only meant for GET / FETCH endpoints.
+    When serializing many programs the context can contain the `users` whose progress is requested.
     """
 
+    class Meta:
+        list_serializer_class = ProgressListSerializer
+
     def _get_context_epic_user(self) -> EpicUser:
         try:
             return self.context["request"].user
         except:
             raise ValueError("No user found in context-request.")
 
-    def _get_question_answer(self, question: Question) -> _QuestionAnswer:
-        progress_user: EpicUser = self._get_context_epic_user()
-        answer = None
-        try:
-            answer = Answer.objects.get(user=progress_user, question=question)
-            answer = get_instance_as_submodel_type(answer)
-        finally:
-            return (question, answer)
-
-    def _get_total_progress(self, answer_list: List[_QuestionAnswer]) -> float:
-        valid_answers = sum(a.is_valid_answer() for _, a in answer_list if a)
+    def _get_total_progress(
+        self, answer_list: List[_QuestionAnswer], users_progress: UsersProgress
+    ) -> float:
+        if not answer_list:
+            return 0.0
+        valid_answers = sum(users_progress.is_valid_answer(a) for _, a in answer_list)
         return valid_answers / len(answer_list)
 
-    def to_representation(self, instance: Program):
-        if not isinstance(instance, Program):
-            raise ValueError(
-                f"Expected instance type {type(Program)}, got {type(instance)}"
-            )
-        qa_list = [self._get_question_answer(q) for q in instance.questions.all()]
+    def get_program_progress(
+        self,
+        program: Program,
+        progress_user: EpicUser,
+        users_progress: Optional[UsersProgress] = None,
+    ) -> Dict[str, Union[float, List[Dict[str, Optional[int]]]]]:
+        """
+        Gets the progress of the given `EpicUser` for the given `Program`.
+
+        Args:
+            program (Program): Program whose questions are checked.
+            progress_user (EpicUser): User whose answers are checked.
+            users_progress (Optional[UsersProgress], optional): Already looked up answers. Defaults to None (look up only this program).
+
+        Returns:
+            Dict[str, Union[float, List[Dict[str, Optional[int]]]]]: Dictionary with the `progress` and the `questions_answers`.
+        """
+        questions = list(program.questions.all())
+        if users_progress is None:
+            users_progress = UsersProgress(questions, [progress_user])
+        qa_list = [(q, users_progress.get_answer(progress_user, q)) for q in questions]
         return {
-            "progress": self._get_total_progress(qa_list),
+            "progress": self._get_total_progress(qa_list, users_progress),
             "questions_answers": [
                 _QuestionAnswerSerializer().to_representation(qa) for qa in qa_list
             ],
         }
+
+    def to_representation(self, instance: Program):
+        if not isinstance(instance, Program):
+            raise ValueError(
+                f"Expected instance type {type(Program)}, got {type(instance)}"
+            )
+        return self.get_program_progress(instance, self._get_context_epic_user())
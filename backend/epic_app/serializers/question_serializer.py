@@ -16,7 +16,7 @@ from epic_app.models.epic_questions import (
 class QuestionSerializer(serializers.ModelSerializer):
     class Meta:
         model = Question
-        fields = "__all__"
+        exclude = ("subtype",)
 
     @staticmethod
     def get_concrete_serializer(q_type: Type[Question]) -> serializers.ModelSerializer:
@@ -35,22 +35,22 @@ class QuestionSerializer(serializers.ModelSerializer):
 class NationalFrameworkQuestionSerializer(serializers.ModelSerializer):
     class Meta:
         model = NationalFrameworkQuestion
-        fields = "__all__"
+        exclude = ("subtype",)
 
 
 class KeyAgencyQuestionSerializer(serializers.ModelSerializer):
     class Meta:
         model = KeyAgencyActionsQuestion
-        fields = "__all__"
+        exclude = ("subtype",)
 
 
 class EvolutionQuestionSerializer(serializers.ModelSerializer):
     class Meta:
         model = EvolutionQuestion
-        fields = "__all__"
+        exclude = ("subtype",)
 
 
 class LinkagesQuestionSerializer(serializers.ModelSerializer):
     class Meta:
         model = LinkagesQuestion
-        fields = "__all__"
+        exclude = ("subtype",)
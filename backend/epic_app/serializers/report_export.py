@@ -0,0 +1,218 @@
+import csv
+import tempfile
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+from django.conf import settings
+from django.db import models
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+
+from epic_app.models.epic_answers import (
+    Answer,
+    MultipleChoiceAnswer,
+    SingleChoiceAnswer,
+    YesNoAnswer,
+    YesNoAnswerType,
+)
+from epic_app.models.epic_questions import EvolutionChoiceType
+from epic_app.models.epic_user import EpicUser
+from epic_app.utils import get_submodel_name, get_submodel_type_list
+
+REPORT_COLUMNS = [
+    "program",
+    "question_id",
+    "question",
+    "question_type",
+    "organization",
+    "user",
+    "answer_id",
+    "answer",
+    "justification",
+]
+
+# Size of the chunks of the streamed file.
+_file_chunk_size = 64 * 1024
+
+# Leading characters which make spreadsheet applications evaluate a cell as a formula.
+_formula_prefixes = ("=", "+", "-", "@", "\t", "\r")
+
+
+def _is_formula_like(value: Any) -> bool:
+    return isinstance(value, str) and value.startswith(_formula_prefixes)
+
+
+def _get_csv_value(value: Any) -> Any:
+    # Free text (such as justifications) is quoted so it is never run as a formula.
+    return f"'{value}" if _is_formula_like(value) else value
+
+
+def _get_xlsx_cell(worksheet: Any, value: Any) -> Any:
+    if not _is_formula_like(value):
+        return value
+    # Kept as plain text, openpyxl would otherwise store it as a formula.
+    xlsx_cell = WriteOnlyCell(worksheet, value=value)
+    xlsx_cell.data_type = "s"
+    return xlsx_cell
+
+
+class AnswersReportRows:
+    """
+    Iterates over the reported answers (one row per program, question, user and answer) with a constant memory footprint.
+    Answers are read in chunks of `EPIC_EXPORT_CHUNK_SIZE`, each of them with a fixed number of queries.
+    """
+
+    def __init__(self, users: Union[models.QuerySet, List[EpicUser]]) -> None:
+        """
+        Args:
+            users (Union[models.QuerySet, List[EpicUser]]): `EpicUsers` whose answers are reported.
+        """
+        self.users = users
+
+    def _get_answers(self) -> models.QuerySet:
+        return (
+            Answer.objects.filter(user__in=self.users.all().values("pk"))
+            .select_related(
+                "question__program",
+                "user__organization",
+                *[
+                    get_submodel_name(a_type)
+                    for a_type in get_submodel_type_list(Answer)
+                ],
+            )
+            .order_by("question__program_id", "question_id", "pk")
+        )
+
+    def _iter_chunks(self) -> Iterator[List[Answer]]:
+        # Keyset pagination over the report ordering, so each chunk is equally fast.
+        answers = self._get_answers()
+        chunk_size = settings.EPIC_EXPORT_CHUNK_SIZE
+        chunk = list(answers[:chunk_size])
+        while chunk:
+            yield chunk
+            last = chunk[-1]
+            chunk = list(
+                answers.filter(
+                    models.Q(question__program_id__gt=last.question.program_id)
+                    | models.Q(
+                        question__program_id=last.question.program_id,
+                        question_id__gt=last.question_id,
+                    )
+                    | models.Q(
+                        question__program_id=last.question.program_id,
+                        question_id=last.question_id,
+                        pk__gt=last.pk,
+                    )
+                )[:chunk_size]
+            )
+
+    @staticmethod
+    def _get_selected_programs(answers: List[Answer]) -> Dict[int, List[str]]:
+        mc_answer_pks = [
+            a.pk
+            for a in answers
+            if a.subtype == get_submodel_name(MultipleChoiceAnswer)
+        ]
+        selected_programs: Dict[int, List[str]] = {}
+        if not mc_answer_pks:
+            return selected_programs
+        for a_pk, p_name in (
+            MultipleChoiceAnswer.selected_programs.through.objects.filter(
+                multiplechoiceanswer_id__in=mc_answer_pks
+            )
+            .order_by("program_id")
+            .values_list("multiplechoiceanswer_id", "program__name")
+        ):
+            selected_programs.setdefault(a_pk, []).append(p_name)
+        return selected_programs
+
+    @staticmethod
+    def _get_answer_values(
+        answer: Answer, selected_programs: Dict[int, List[str]]
+    ) -> List[str]:
+        st_answer: Optional[Answer] = getattr(answer, answer.subtype or "", None)
+        if isinstance(st_answer, YesNoAnswer):
+            choices = dict(YesNoAnswerType.choices)
+            return [
+                str(choices.get(st_answer.short_answer, st_answer.short_answer)),
+                st_answer.justify_answer or "",
+            ]
+        if isinstance(st_answer, SingleChoiceAnswer):
+            choices = dict(EvolutionChoiceType.choices)
+            return [
+                str(choices.get(st_answer.selected_choice, st_answer.selected_choice)),
+                st_answer.justify_answer or "",
+            ]
+        if isinstance(st_answer, MultipleChoiceAnswer):
+            return ["; ".join(selected_programs.get(answer.pk, [])), ""]
+        return ["", ""]
+
+    def __iter__(self) -> Iterator[List[Any]]:
+        for chunk in self._iter_chunks():
+            selected_programs = self._get_selected_programs(chunk)
+            for answer in chunk:
+                organization = answer.user.organization
+                yield [
+                    answer.question.program.name,
+                    answer.question_id,
+                    answer.question.title,
+                    answer.question.subtype or "",
+                    organization.name if organization else "",
+                    answer.user.username,
+                    answer.pk,
+                    *self._get_answer_values(answer, selected_programs),
+                ]
+
+
+class _EchoBuffer:
+    """
+    Pseudo buffer returning what is written, so the csv writer produces the streamed lines.
+    """
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def stream_report_csv(users: Union[models.QuerySet, List[EpicUser]]) -> Iterator[str]:
+    """
+    Streams the answers report of the given users as CSV lines, starting with the `REPORT_COLUMNS` header.
+    Values starting like a formula (`=`, `+`, `-`, `@`) are prefixed with a quote.
+
+    Args:
+        users (Union[models.QuerySet, List[EpicUser]]): Reported users.
+
+    Yields:
+        Iterator[str]: CSV lines.
+    """
+    csv_writer = csv.writer(_EchoBuffer())
+    yield csv_writer.writerow(REPORT_COLUMNS)
+    for row in AnswersReportRows(users):
+        yield csv_writer.writerow([_get_csv_value(value) for value in row])
+
+
+def stream_report_xlsx(
+    users: Union[models.QuerySet, List[EpicUser]]
+) -> Iterator[bytes]:
+    """
+    Streams the answers report of the given users as an XLSX file.
+    The workbook is written in write-only mode to a temporary file (rows are not kept in memory), which is streamed in chunks once finished.
+    Values starting like a formula (`=`, `+`, `-`, `@`) are stored as text.
+
+    Args:
+        users (Union[models.QuerySet, List[EpicUser]]): Reported users.
+
+    Yields:
+        Iterator[bytes]: Chunks of the XLSX file.
+    """
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet("Answers report")
+    worksheet.append(REPORT_COLUMNS)
+    for row in AnswersReportRows(users):
+        worksheet.append([_get_xlsx_cell(worksheet, value) for value in row])
+    with tempfile.TemporaryFile() as xlsx_file:
+        workbook.save(xlsx_file)
+        xlsx_file.seek(0)
+        while True:
+            file_chunk = xlsx_file.read(_file_chunk_size)
+            if not file_chunk:
+                return
+            yield file_chunk
@@ -0,0 +1,35 @@
+from rest_framework import serializers
+
+from epic_app.models.epic_reports import EpicReportJob
+
+
+class EpicReportJobSerializer(serializers.ModelSerializer):
+    """
+    Serializer for 'EpicReportJob', all fields are set by the server.
+    """
+
+    progress = serializers.SerializerMethodField()
+
+    class Meta:
+        """
+        Overriden meta class for serializing purposes.
+        """
+
+        model = EpicReportJob
+        fields = (
+            "url",
+            "id",
+            "requested_by",
+            "organization",
+            "status",
+            "progress",
+            "total_programs",
+            "rendered_programs",
+            "error_message",
+            "created_on",
+            "finished_on",
+        )
+        read_only_fields = fields
+
+    def get_progress(self, instance: EpicReportJob) -> float:
+        return instance.get_progress()
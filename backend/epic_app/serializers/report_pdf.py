@@ -1,13 +1,19 @@
+import hashlib
+import json
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from io import BytesIO
-from typing import Any, List, Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
+from django.core.cache import cache
+from pypdf import PdfReader, PdfWriter
 from reportlab.graphics.charts.barcharts import VerticalBarChart
 from reportlab.graphics.shapes import Drawing, Rect
 from reportlab.lib import colors
 from reportlab.lib.styles import ParagraphStyle as PS
 from reportlab.lib.styles import getSampleStyleSheet
 from reportlab.lib.units import inch
+from reportlab.pdfgen.canvas import Canvas
 from reportlab.platypus import PageBreak, Paragraph, SimpleDocTemplate, Spacer
 from reportlab.platypus.paragraph import Paragraph
 from reportlab.platypus.tableofcontents import TableOfContents
@@ -16,6 +22,12 @@ from reportlab.rl_config import defaultPageSize
 PAGE_HEIGHT = defaultPageSize[1]
 PAGE_WIDTH = defaultPageSize[0]
 
+# Bump when the report layout changes, so the cached layouts are discarded.
+_LAYOUT_VERSION = 2
+_MIN_PARALLEL_SECTIONS = 4
+
+_TocEntry = Tuple[int, str, int]
+
 
 class EpicStyles:
     h1 = PS(
@@ -54,6 +66,14 @@ class EpicStyles:
 
 
 class EpicReportDocTemplate(SimpleDocTemplate):
+    def __init__(self, filename, **kw):
+        super().__init__(filename, **kw)
+        self.toc_entries: List[_TocEntry] = []
+        self.n_pages = 0
+
+    def afterPage(self):
+        self.n_pages = self.page
+
     def afterFlowable(self, flowable):
         """
         Registers TOC entries.
@@ -67,7 +87,28 @@ class EpicReportDocTemplate(SimpleDocTemplate):
             }
             level = indentation.get(flowable.style.name, None)
             if level:
-                self.notify("TOCEntry", (level, flowable.getPlainText(), self.page))
+                self.toc_entries.append((level, flowable.getPlainText(), self.page))
+
+
+class EpicTableOfContents(TableOfContents):
+    """
+    Table of contents whose entries (and page numbers) are known before building the document, so it is laid out in a single pass.
+    """
+
+    def __init__(self, entries: List[_TocEntry], **kwds):
+        super().__init__(**kwds)
+        self._lastEntries = [(level, text, page, None) for level, text, page in entries]
+
+    def isIndexing(self):
+        return 0
+
+    def notify(self, kind, stuff):
+        pass
+
+
+def _layout_section(section: Dict[str, Any]) -> Dict[str, Any]:
+    # Module level so it can be sent to the rendering processes.
+    return EpicPdfReport().get_section_layout(section)
 
 
 class EpicPdfReport:
@@ -75,6 +116,8 @@ class EpicPdfReport:
     report_title = "Epic Report"
     report_subtitle = ""
     report_author = ""
+    # Processes laying out the program sections, only the report worker uses more than one (the web process may be multi-threaded, so it never forks).
+    rendering_workers = 1
     report_description = "An automatic generated report containing all the questions and answers taken by the users of the organization."
 
     # Create the PDF object, using the buffer as its "file."
@@ -89,9 +132,9 @@ class EpicPdfReport:
         abs_story.extend(self._get_line(intro))
         return abs_story
 
-    def _get_toc(self) -> List[Any]:
+    def _get_toc(self, toc_entries: List[_TocEntry]) -> List[Any]:
         # TODO: clickable TOC https://www.reportlab.com/snippets/13/
-        self._toc = TableOfContents()
+        self._toc = EpicTableOfContents(toc_entries)
         self._toc.levelStyles = [
             EpicStyles.h1,
             EpicStyles.h2,
@@ -101,6 +144,31 @@ class EpicPdfReport:
 
         return [PageBreak(), self._toc, PageBreak()]
 
+    def _get_front_matter(self, toc_entries: List[_TocEntry]) -> List[Any]:
+        front_story = [Spacer(1, 2 * inch)]
+        front_story.extend(self._get_abstract())
+        front_story.extend(self._get_toc(toc_entries))
+        return front_story
+
+    def _get_front_layout(self, section_entries: List[_TocEntry]) -> Dict[str, Any]:
+        # The front matter entries (abstract) precede the TOC, so their pages do not depend on it.
+        front_entries = self._get_story_layout(
+            [Spacer(1, 2 * inch)] + self._get_abstract()
+        )["toc_entries"]
+        toc_entries = front_entries + section_entries
+        # The TOC size only depends on the text of its entries, not on their pages.
+        cache_key = self._get_layout_cache_key(
+            "epic_report_front",
+            [self.report_author, [(level, text) for level, text, _ in toc_entries]],
+        )
+        front_pages = cache.get(cache_key)
+        if front_pages is None:
+            front_pages = self._get_story_layout(self._get_front_matter(toc_entries))[
+                "pages"
+            ]
+            cache.set(cache_key, front_pages, timeout=None)
+        return {"pages": front_pages, "toc_entries": front_entries}
+
     def _first_page(self, canvas, doc):
         subject = (
             self.report_subtitle + "\n" + self.report_description
@@ -125,14 +193,25 @@ class EpicPdfReport:
         canvas.setSubject(subject)
         canvas.restoreState()
 
-    def _later_pages(self, canvas, doc):
+    def _draw_footer(self, canvas, page: int):
         canvas.saveState()
         canvas.setFont("Times-Roman", 9)
-        canvas.drawString(
-            inch, 0.75 * inch, "Page %d %s" % (doc.page, self.report_title)
-        )
+        canvas.drawString(inch, 0.75 * inch, "Page %d %s" % (page, self.report_title))
         canvas.restoreState()
 
+    def _later_pages(self, canvas, doc):
+        self._draw_footer(canvas, doc.page)
+
+    def _get_footers_pdf(self, first_page: int, n_pages: int) -> PdfReader:
+        # Section fragments do not know where they start, their page footers are stamped when the report is assembled.
+        footers_buffer = BytesIO()
+        footers_canvas = Canvas(footers_buffer, pagesize=defaultPageSize)
+        for page in range(first_page, first_page + n_pages):
+            self._draw_footer(footers_canvas, page)
+            footers_canvas.showPage()
+        footers_canvas.save()
+        return PdfReader(footers_buffer)
+
     def _get_charts(self, input_data: dict) -> List[Any]:
         id_keys = [id_k for id_k in input_data.keys() if not "_justify" in str(id_k)]
         if not id_keys:
@@ -190,36 +269,170 @@ class EpicPdfReport:
         story.extend(j_story)
         return story
 
-    def _get_questions(self, questions_data: dict) -> List[Any]:
+    def _get_questions(self, questions_data: List[Dict[str, Any]]) -> List[Any]:
         story = []
         for q_entry in questions_data:
-            if not q_entry["question_answers"]["answers"]:
-                continue
             story.extend(self._get_line(q_entry["title"], EpicStyles.h2))
-            story.extend(self._get_charts(q_entry["question_answers"]["summary"]))
-            story.extend(self._get_justifications(q_entry["question_answers"]))
+            story.extend(self._get_charts(q_entry["summary"]))
+            story.extend(self._get_justifications(q_entry))
         return story
 
-    def _get_programs(self, report_data: dict) -> List[Any]:
-        story = []
-        for p_entry in report_data:
-            program_name = p_entry["name"]
-            # Don't include empty chapters without questions.
-            q_stories = self._get_questions(p_entry["questions"])
-            if not q_stories:
-                continue
-            story.extend(self._get_line(f"Program: {program_name}", EpicStyles.h1))
-            story.extend(q_stories)
-            story.append(PageBreak())
+    def _get_section_story(self, section: Dict[str, Any]) -> List[Any]:
+        program_name = section["name"]
+        story = self._get_line(f"Program: {program_name}", EpicStyles.h1)
+        story.extend(self._get_questions(section["questions"]))
+        story.append(PageBreak())
         return story
 
-    def generate_report(self, buffer: BytesIO, report_data: dict):
-        report_story = [Spacer(1, 2 * inch)]
-        report_story.extend(self._get_abstract())
-        report_story.extend(self._get_toc())
-        report_story.extend(self._get_programs(report_data))
-        EpicReportDocTemplate(buffer).multiBuild(
-            report_story,
+    @staticmethod
+    def _get_section(p_entry: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        # Only the rendered data, so the section hash does not change with anything else (such as urls).
+        questions = [
+            {
+                "title": q_entry["title"],
+                "summary": q_entry["question_answers"]["summary"],
+            }
+            for q_entry in p_entry["questions"]
+            if q_entry["question_answers"]["answers"]
+        ]
+        if not questions:
+            # Don't include empty chapters without questions.
+            return None
+        return {"name": p_entry["name"], "questions": questions}
+
+    @staticmethod
+    def _get_layout_cache_key(prefix: str, layout_data: Any) -> str:
+        serialized = json.dumps([_LAYOUT_VERSION, layout_data], sort_keys=True)
+        digest = hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+        return f"{prefix}:{digest}"
+
+    def _get_story_layout(self, story: List[Any]) -> Dict[str, Any]:
+        layout_buffer = BytesIO()
+        # Invariant output, so the same story always renders the same bytes.
+        layout_doc = EpicReportDocTemplate(layout_buffer, invariant=1)
+        layout_doc.build(story)
+        return {
+            "pages": layout_doc.n_pages,
+            "toc_entries": layout_doc.toc_entries,
+            "pdf": layout_buffer.getvalue(),
+        }
+
+    def get_section_layout(self, section: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Renders the given program section on its own, sections always start on a new page so their layout does not depend on the rest of the report.
+
+        Args:
+            section (Dict[str, Any]): Program name and its answered questions.
+
+        Returns:
+            Dict[str, Any]: Dictionary with the number of `pages`, the `toc_entries` (level, text, page within the section) and the rendered `pdf` (without page footers).
+        """
+        return self._get_story_layout(self._get_section_story(section))
+
+    def get_section_layouts(
+        self, sections: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Gets the rendered program sections. They are cached by a hash of their data, the ones not cached yet are rendered over a process pool of `rendering_workers` processes (serially when there is only one).
+
+        Args:
+            sections (List[Dict[str, Any]]): Program sections of the report.
+
+        Returns:
+            List[Dict[str, Any]]: Layout of each section, in the same order.
+        """
+        cache_keys = [
+            self._get_layout_cache_key("epic_report_section", section)
+            for section in sections
+        ]
+        layouts = cache.get_many(cache_keys)
+        missing = [
+            (c_key, section)
+            for c_key, section in zip(cache_keys, sections)
+            if c_key not in layouts
+        ]
+        missing_sections = [section for _, section in missing]
+        n_workers = self.rendering_workers
+        if n_workers <= 1 or len(missing_sections) < _MIN_PARALLEL_SECTIONS:
+            missing_layouts = list(map(_layout_section, missing_sections))
+        else:
+            with ProcessPoolExecutor(
+                max_workers=min(n_workers, len(missing_sections))
+            ) as executor:
+                missing_layouts = list(executor.map(_layout_section, missing_sections))
+        new_layouts = {
+            c_key: layout for (c_key, _), layout in zip(missing, missing_layouts)
+        }
+        cache.set_many(new_layouts, timeout=None)
+        layouts.update(new_layouts)
+        return [layouts[c_key] for c_key in cache_keys]
+
+    def get_reported_programs(self, report_data: dict) -> List[str]:
+        """
+        Gets the names of the programs which will have a section in the report.
+
+        Args:
+            report_data (dict): Serialized answers report.
+
+        Returns:
+            List[str]: Names of the programs with at least one answered question.
+        """
+        return [
+            section["name"]
+            for section in map(self._get_section, report_data)
+            if section
+        ]
+
+    def generate_report(
+        self,
+        buffer: BytesIO,
+        report_data: dict,
+        on_program_rendered: Optional[Callable[[str], None]] = None,
+    ):
+        """
+        Generates the PDF report from the (cached) rendered program sections, only the front matter and the sections whose data changed are rendered.
+        The table of contents is built from the section layouts and the page footers are stamped on the assembled sections.
+
+        Args:
+            buffer (BytesIO): Output buffer.
+            report_data (dict): Serialized answers report.
+            on_program_rendered (Optional[Callable[[str], None]], optional): Callback invoked with the name of each rendered program. Defaults to None.
+        """
+        sections = [s for s in map(self._get_section, report_data) if s]
+        section_layouts = self.get_section_layouts(sections)
+
+        section_entries: List[_TocEntry] = []
+        sections_start = 0
+        for layout in section_layouts:
+            section_entries.extend(
+                (level, text, sections_start + page)
+                for level, text, page in layout["toc_entries"]
+            )
+            sections_start += layout["pages"]
+        front_layout = self._get_front_layout(section_entries)
+        toc_entries = front_layout["toc_entries"] + [
+            (level, text, front_layout["pages"] + page)
+            for level, text, page in section_entries
+        ]
+
+        front_buffer = BytesIO()
+        EpicReportDocTemplate(front_buffer).build(
+            self._get_front_matter(toc_entries),
             onFirstPage=self._first_page,
             onLaterPages=self._later_pages,
         )
+        front_pdf = PdfReader(front_buffer)
+        report_pdf = PdfWriter()
+        report_pdf.append_pages_from_reader(front_pdf)
+        if front_pdf.metadata:
+            report_pdf.add_metadata(front_pdf.metadata)
+
+        footers_pdf = self._get_footers_pdf(len(front_pdf.pages) + 1, sections_start)
+        footer_pages = iter(footers_pdf.pages)
+        for section, layout in zip(sections, section_layouts):
+            for section_page in PdfReader(BytesIO(layout["pdf"])).pages:
+                section_page.merge_page(next(footer_pages))
+                report_pdf.add_page(section_page)
+            if on_program_rendered:
+                on_program_rendered(section["name"])
+        report_pdf.write(buffer)
@@ -1,48 +1,123 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List, Type, Union
+import hashlib
+import json
+from typing import Any, Dict, List, Optional, Union
 
 from django.db import models
 from rest_framework import serializers
+from rest_framework.request import Request
 
-from epic_app.models.epic_answers import Answer
+from epic_app.models.epic_answers import Answer, MultipleChoiceAnswer
 from epic_app.models.epic_questions import Question
+from epic_app.models.epic_summaries import AnswerSummary
+from epic_app.models.epic_user import EpicUser
 from epic_app.models.models import Program
 from epic_app.serializers.answer_serializer import AnswerSerializer
-from epic_app.utils import get_instance_as_submodel_type
+from epic_app.utils import get_instance_as_submodel_type, get_submodel_type_list
+
+
+class AnswersReport:
+    """
+    Set-based computation of the reported answers (and their summaries) of several `Questions` for a subset of `EpicUsers`.
+    The number of queries is fixed, it does not depend on the number of programs, questions, users or answers.
+    When the users are whole organizations the summaries are read from the `AnswerSummary` counters instead of aggregating the answers.
+    """
+
+    def __init__(
+        self,
+        questions: models.QuerySet,
+        users: Union[models.QuerySet, List[EpicUser]],
+        context: Dict[str, Any],
+    ) -> None:
+        """
+        Args:
+            questions (models.QuerySet): `Questions` whose answers will be reported.
+            users (Union[models.QuerySet, List[EpicUser]]): `EpicUsers` whose answers will be reported.
+            context (Dict[str, Any]): Serializer context.
+        """
+        users_query = users.all().values("pk")
+        user_organizations = list(users.all().values_list("organization_id", flat=True))
+        self.expected_answers = len(user_organizations)
+        summary_counts = None
+        if self._is_whole_organizations(user_organizations):
+            summary_counts = AnswerSummary.get_choice_counts(
+                questions, list(set(user_organizations))
+            )
+        self._answers: Dict[int, List[Dict[str, Any]]] = {}
+        self._summaries: Dict[int, Dict[str, Any]] = {}
+        for a_subtype in get_submodel_type_list(Answer):
+            subtype_answers = (
+                a_subtype.objects.filter(
+                    question__in=questions.values("pk"), user__in=users_query
+                )
+                .order_by("pk")
+                .prefetch_related(*[m2m.name for m2m in a_subtype._meta.many_to_many])
+            )
+            st_serializer = AnswerSerializer.get_concrete_serializer(a_subtype)(
+                context=context
+            )
+            if summary_counts is None:
+                self._summaries.update(
+                    a_subtype.get_summaries_by_question(subtype_answers)
+                )
+            question_answers: Dict[int, List[Answer]] = {}
+            for st_answer in subtype_answers:
+                question_answers.setdefault(st_answer.question_id, []).append(st_answer)
+                self._answers.setdefault(st_answer.question_id, []).append(
+                    st_serializer.to_representation(st_answer)
+                )
+            if summary_counts is not None:
+                for question_id, q_answers in question_answers.items():
+                    self._summaries[question_id] = a_subtype.get_summary_from_counts(
+                        summary_counts.get(question_id, {}), q_answers
+                    )
+
+    @staticmethod
+    def _is_whole_organizations(user_organizations: List[Optional[int]]) -> bool:
+        # The counters are kept per organization, so they only apply when no user of the reported organizations is left out.
+        organizations = set(user_organizations)
+        organizations_filter = models.Q(
+            organization__in=[o_id for o_id in organizations if o_id is not None]
+        )
+        if None in organizations:
+            organizations_filter |= models.Q(organization__isnull=True)
+        return EpicUser.objects.filter(organizations_filter).count() == len(
+            user_organizations
+        )
+
+    def get_question_report(self, question_id: int) -> Dict[str, Any]:
+        """
+        Gets the serialized answers and the answers summary for the given `Question` id.
+
+        Args:
+            question_id (int): Reported `Question` id.
+
+        Returns:
+            Dict[str, Any]: Dictionary with the `answers` and `summary` of the question.
+        """
+        answers = self._answers.get(question_id, [])
+        if not answers:
+            return {"answers": [], "summary": {}}
+        summary = dict(self._summaries[question_id])
+        missing_answers = self.expected_answers - len(answers)
+        summary["no_valid_response"] = missing_answers + summary["no_valid_response"]
+        return {"answers": answers, "summary": summary}
 
 
 class AnswerListReportSerializer(serializers.ListSerializer):
-    def _get_answers_summary(
-        self, answers_list: Union[models.QuerySet, List[Answer]], expected_answers: int
-    ) -> Dict[str, Any]:
-        if not answers_list or len(answers_list) == 0:
-            return {}
-        subtype: Type[Answer] = type(
-            get_instance_as_submodel_type(answers_list.first())
-        )
-        subtype_answer_list = subtype.objects.filter(
-            id__in=[al.id for al in answers_list]
-        )
-        detailed_summary = subtype.get_detailed_summary(
-            subtype_answer_list,
+    def _get_answers_report(self, question: Question) -> AnswersReport:
+        answers_report = self.context.get("answers_report", None)
+        if answers_report:
+            return answers_report
+        # Not serialized through `ProgramReportSerializer`, report only this question.
+        return AnswersReport(
+            Question.objects.filter(pk=question.pk), self.context["users"], self.context
         )
-        missing_answers = expected_answers - len(answers_list)
-        detailed_summary["no_valid_response"] = (
-            missing_answers + detailed_summary["no_valid_response"]
-        )
-        return detailed_summary
 
     def to_representation(self, data):
-        organization_users = self.context["users"].all()
-        user_ids = [eu.id for eu in organization_users]
-        filtered_data = Answer.objects.filter(question=data.instance, user__in=user_ids)
-        answers_summary = self._get_answers_summary(filtered_data, len(user_ids))
-
-        serialized_answers = super(AnswerListReportSerializer, self).to_representation(
-            filtered_data
-        )
-        return {"answers": serialized_answers, "summary": answers_summary}
+        question: Question = data.instance
+        return self._get_answers_report(question).get_question_report(question.pk)
 
 
 class AnswerReportSerializer(serializers.BaseSerializer):
@@ -69,6 +144,24 @@ class QuestionReportSerializer(serializers.ModelSerializer):
         fields = ("url", "id", "title", "question_answers")
 
 
+class ProgramListReportSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        """
+        Computes the answers report of all the programs at once before serializing each of them.
+        """
+        programs = data.all() if isinstance(data, models.Manager) else data
+        if isinstance(programs, models.QuerySet):
+            programs = programs.prefetch_related("questions")
+            questions = Question.objects.filter(program__in=programs.values("pk"))
+        else:
+            models.prefetch_related_objects(programs, "questions")
+            questions = Question.objects.filter(program__in=[p.pk for p in programs])
+        self.context["answers_report"] = AnswersReport(
+            questions, self.context["users"], self.context
+        )
+        return super().to_representation(programs)
+
+
 class ProgramReportSerializer(serializers.ModelSerializer):
 
     questions = QuestionReportSerializer(many=True, read_only=True)
@@ -76,3 +169,84 @@ class ProgramReportSerializer(serializers.ModelSerializer):
     class Meta:
         model = Program
         fields = ("url", "id", "name", "questions")
+        list_serializer_class = ProgramListReportSerializer
+
+
+def get_programs_report(
+    users: Union[models.QuerySet, List[EpicUser]],
+    request: Optional[Request] = None,
+    programs: Optional[Union[models.QuerySet, List[Program]]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Gets the answers report of the given (or all) `Programs` for the given `EpicUsers`.
+
+    Args:
+        users (Union[models.QuerySet, List[EpicUser]]): Reported users.
+        request (Optional[Request], optional): Request used to build absolute urls. Defaults to None (relative urls).
+        programs (Optional[Union[models.QuerySet, List[Program]]], optional): Reported programs, such as a page of them. Defaults to None (all programs).
+
+    Returns:
+        List[Dict[str, Any]]: Serialized report.
+    """
+    if programs is None:
+        programs = Program.objects.all()
+    return ProgramReportSerializer(
+        programs,
+        many=True,
+        context={"request": request, "users": users},
+    ).data
+
+
+def get_report_signature(
+    report_data: List[Dict[str, Any]], report_subtitle: str, report_author: str
+) -> str:
+    """
+    Gets a hash of the report content, it only changes when the reported answers (or organizations) change.
+    The PDF names its author, so reports of different requesters never share a signature.
+
+    Args:
+        report_data (List[Dict[str, Any]]): Serialized report.
+        report_subtitle (str): Report subtitle.
+        report_author (str): Username of the requester, as printed in the report.
+
+    Returns:
+        str: Hexadecimal SHA-256 digest.
+    """
+    serialized = json.dumps(
+        [report_subtitle, report_author, report_data], sort_keys=True
+    )
+    return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+
+
+def get_linkages_matrix(
+    users: Union[models.QuerySet, List[EpicUser]],
+    programs: Optional[Union[models.QuerySet, List[Program]]] = None,
+) -> Dict[str, Any]:
+    """
+    Gets the program x program matrix with the number of answers of the given `EpicUsers` linking each program (through its linkages question) to each other program.
+    It requires two queries regardless of the number of programs, users or answers.
+
+    Args:
+        users (Union[models.QuerySet, List[EpicUser]]): Users whose linkages answers are counted.
+        programs (Optional[Union[models.QuerySet, List[Program]]], optional): Rows and columns of the matrix. Defaults to None (all programs).
+
+    Returns:
+        Dict[str, Any]: Dictionary with the `programs` (`id` and `name`) and the `linkages` matrix, where `linkages[i][j]` is the number of answers of `programs[i]` selecting `programs[j]`.
+    """
+    if programs is None:
+        programs = Program.objects.all()
+    programs = list(programs)
+    if isinstance(users, (models.QuerySet, models.Manager)):
+        users_query = users.all().values("pk")
+    else:
+        users_query = [e_user.pk for e_user in users]
+    linkage_counts = MultipleChoiceAnswer.get_linkage_counts(
+        MultipleChoiceAnswer.objects.filter(user__in=users_query)
+    )
+    return {
+        "programs": [dict(id=program.pk, name=program.name) for program in programs],
+        "linkages": [
+            [linkage_counts.get((row.pk, column.pk), 0) for column in programs]
+            for row in programs
+        ],
+    }
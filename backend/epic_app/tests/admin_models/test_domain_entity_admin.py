@@ -0,0 +1,52 @@
+import pytest
+from django.contrib import admin
+from rest_framework.test import APIClient
+
+from epic_app.admin_models.domain_entity_admin import DomainEntityAdmin
+from epic_app.models.models import Agency, Area, DomainRevision, Group, Program
+from epic_app.tests.epic_db_fixture import epic_test_db
+
+
+class TestDomainEntityAdmin:
+    @pytest.mark.parametrize("model_type", [Area, Agency, Group, Program])
+    def test_domain_admin_is_initialized(self, model_type):
+        assert isinstance(admin.site._registry[model_type], DomainEntityAdmin)
+
+    @pytest.fixture(autouse=False)
+    @pytest.mark.django_db
+    def api_client(self, epic_test_db) -> APIClient:
+        api_client = APIClient()
+        api_client.login(username="admin", password="admin")
+        return api_client
+
+    @pytest.mark.django_db
+    def test_POST_change_bumps_revision(self, api_client: APIClient):
+        # Define test data
+        a_group = Group.objects.get(name="first")
+        req_url = f"/admin/epic_app/group/{a_group.pk}/change/"
+        previous_revision = DomainRevision.get_current().revision
+
+        # Run test
+        r_result = api_client.post(
+            req_url, {"name": "renamed", "area": a_group.area_id}
+        )
+
+        # Verify expectations
+        assert r_result.status_code == 302
+        assert Group.objects.get(pk=a_group.pk).name == "renamed"
+        assert DomainRevision.get_current().revision > previous_revision
+
+    @pytest.mark.django_db
+    def test_POST_delete_bumps_revision(self, api_client: APIClient):
+        # Define test data
+        a_program = Program.objects.get(name="a")
+        req_url = f"/admin/epic_app/program/{a_program.pk}/delete/"
+        previous_revision = DomainRevision.get_current().revision
+
+        # Run test
+        r_result = api_client.post(req_url, {"post": "yes"})
+
+        # Verify expectations
+        assert r_result.status_code == 302
+        assert not Program.objects.filter(pk=a_program.pk).exists()
+        assert DomainRevision.get_current().revision == previous_revision + 1
@@ -5,7 +5,7 @@ from rest_framework.test import APIClient
 from epic_app.admin_models.generate_entity_admin import EpicOrganizationAdmin, LnkAdmin
 from epic_app.models.epic_questions import LinkagesQuestion
 from epic_app.models.epic_user import EpicOrganization, EpicUser
-from epic_app.models.models import Program
+from epic_app.models.models import DomainRevision, Program
 from epic_app.tests.epic_db_fixture import epic_test_db
 from epic_app.tests.request_helper import _create_get_request, _create_post_request
 
@@ -42,6 +42,7 @@ class TestLinkagesQuestionAdmin:
         # Verify initial expectations
         assert len(Program.objects.all()) > 0
         previous_lq_ids = [lq.pk for lq in LinkagesQuestion.objects.all()]
+        previous_revision = DomainRevision.get_current().revision
 
         # Run test
         r_result = api_client.post(
@@ -58,6 +59,7 @@ class TestLinkagesQuestionAdmin:
         assert not any(
             lq.pk in previous_lq_ids for lq in LinkagesQuestion.objects.all()
         )
+        assert DomainRevision.get_current().revision > previous_revision
 
 
 class TestEpicOrganizationAdmin:
@@ -125,3 +127,34 @@ class TestEpicOrganizationAdmin:
         assert r_result.status_code == 302  # Redirection
         assert r_result.url == ".."
         assert len(EpicUser.objects.all()) == generate_n_users
+
+    @pytest.mark.django_db
+    @pytest.mark.parametrize(
+        "export_format, content_type",
+        [("csv", "text/csv"), ("json", "application/json")],
+    )
+    def test_POST_generate_entities_exports_credentials(
+        self, export_format: str, content_type: str, epic_test_db
+    ):
+        # Define test data
+        eo_admin: EpicOrganizationAdmin = admin.site._registry[EpicOrganization]
+        epic_org: EpicOrganization = EpicOrganization.objects.first()
+        n_users = len(EpicUser.objects.all())
+        post_request = _create_post_request(
+            "generate/",
+            dict(selected_org=epic_org.pk, n_epic_users=3, export_format=export_format),
+        )
+
+        # Run test
+        r_result = eo_admin.generate_entities(post_request)
+
+        # Verify expectations
+        assert r_result.status_code == 200
+        assert r_result["Content-Type"] == content_type
+        assert (
+            r_result["Content-Disposition"]
+            == f'attachment; filename="{epic_org.name}_credentials.{export_format}"'
+        )
+        assert len(EpicUser.objects.all()) == n_users + 3
+        new_users = EpicUser.objects.order_by("-pk")[:3]
+        assert all(n_user.username in r_result.content.decode() for n_user in new_users)
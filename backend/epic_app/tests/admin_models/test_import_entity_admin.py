@@ -169,3 +169,22 @@ class TestImportEntityAdmin:
         # Status code is redirected.
         assert r_result.status_code == 302
         assert r_result.url == ".."
+
+    @pytest.mark.django_db
+    def test_post_check_xlsx_renders_check_without_importing(
+        self, full_epic_domain_data
+    ):
+        # Define request.
+        xlsx_file = _get_xlsx_inmemoryfile("nationalframeworkquestions.xlsx")
+        admin_site = _get_model_admin_site(NationalFrameworkQuestion)
+        post_request = _create_post_request("import-xlsx/", {"check_only": ""})
+        post_request.FILES["xlsx_file"] = xlsx_file
+        n_questions = len(NationalFrameworkQuestion.objects.all())
+
+        # Run test
+        r_result = admin_site.import_xlsx(post_request)
+
+        # Verify final expectations
+        assert r_result.status_code == 200
+        assert b"The file can be imported" in r_result.content
+        assert len(NationalFrameworkQuestion.objects.all()) == n_questions
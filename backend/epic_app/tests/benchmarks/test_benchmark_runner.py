@@ -0,0 +1,92 @@
+import copy
+import json
+
+import pytest
+
+from epic_app.benchmarks.benchmark_runner import (
+    EpicBenchmarkRunner,
+    compare_results,
+    measure,
+)
+from epic_app.benchmarks.synthetic_dataset import SyntheticDataset
+from epic_app.models.epic_answers import Answer
+from epic_app.models.epic_summaries import AnswerSummary
+from epic_app.models.epic_user import EpicUser
+from epic_app.models.models import Program
+
+
+@pytest.mark.django_db
+def test_measure_times_repeated_runs_and_traces_one_more():
+    calls = []
+
+    def benchmark():
+        calls.append(len(Program.objects.all()))
+
+    measured = measure(benchmark, 3)
+    assert len(calls) == 4
+    assert measured["queries"] == 1
+    assert 0 <= measured["seconds"]["min"] <= measured["seconds"]["median"]
+    assert measured["seconds"]["median"] <= measured["seconds"]["max"]
+
+
+@pytest.mark.django_db
+class TestEpicBenchmarkRunner:
+    def test_run_builds_dataset_and_measures_benchmarks(self):
+        dataset = SyntheticDataset(n_organizations=2, n_users=2, n_programs=3)
+        results = EpicBenchmarkRunner(dataset, repeat=1).run()
+
+        # Every user answered the four questions of every program.
+        assert EpicUser.objects.count() == 4
+        assert Program.objects.count() == 3
+        assert Answer.objects.count() == 4 * 3 * 4
+        assert AnswerSummary.verify() == {}
+
+        assert results["dataset"] == {"organizations": 2, "users": 2, "programs": 3}
+        assert list(results["benchmarks"].keys()) == [
+            "import_domain",
+            "import_agency",
+            "import_nationalframework",
+            "import_keyagencyactions",
+            "import_evolution",
+            "answers_report",
+            "answers_pdf_report",
+            "program_progress",
+            "question_answers",
+        ]
+        for b_result in results["benchmarks"].values():
+            assert b_result["seconds"]["min"] <= b_result["seconds"]["max"]
+            assert b_result["queries"] > 0
+            assert b_result["peak_memory_kib"] > 0
+        assert json.loads(json.dumps(results)) == results
+
+
+class TestCompareResults:
+    baseline = {
+        "dataset": {"organizations": 1, "users": 1, "programs": 1},
+        "benchmarks": {
+            "answers_report": {
+                "seconds": {"min": 1.0, "median": 1.0, "max": 1.0},
+                "queries": 9,
+                "peak_memory_kib": 10.0,
+            }
+        },
+    }
+
+    def test_no_regressions_within_threshold(self):
+        current = copy.deepcopy(self.baseline)
+        current["benchmarks"]["answers_report"]["seconds"]["min"] = 1.1
+        assert compare_results(self.baseline, current, 1.2) == []
+
+    def test_slower_benchmark_and_more_queries_are_regressions(self):
+        current = copy.deepcopy(self.baseline)
+        current["benchmarks"]["answers_report"]["seconds"]["min"] = 1.5
+        current["benchmarks"]["answers_report"]["queries"] = 10
+        assert compare_results(self.baseline, current, 1.2) == [
+            "answers_report: 1.5000s, baseline 1.0000s.",
+            "answers_report: 10 queries, baseline 9.",
+        ]
+
+    def test_different_datasets_are_not_compared(self):
+        current = copy.deepcopy(self.baseline)
+        current["dataset"]["users"] = 2
+        assert len(compare_results(self.baseline, current, 1.2)) == 1
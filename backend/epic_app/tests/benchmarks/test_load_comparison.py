@@ -0,0 +1,45 @@
+import json
+
+import pytest
+from django.contrib.auth.models import User
+
+from epic_app.benchmarks.load_comparison import ServingLoadComparison
+from epic_app.models.epic_answers import YesNoAnswer, YesNoAnswerType
+from epic_app.models.epic_questions import NationalFrameworkQuestion
+from epic_app.models.epic_user import EpicUser
+from epic_app.tests.epic_db_fixture import epic_test_db
+
+
+@pytest.mark.django_db(transaction=True)
+class TestServingLoadComparison:
+    def test_run_serves_the_load_in_both_modes(self, epic_test_db):
+        e_user = EpicUser.objects.get(username="Anakin")
+        question = NationalFrameworkQuestion.objects.first()
+        YesNoAnswer.objects.create(
+            user=e_user, question=question, short_answer=YesNoAnswerType.YES
+        )
+
+        results = ServingLoadComparison(
+            heavy_user=User.objects.get(username="admin"),
+            light_user=e_user,
+            light_url=f"/api/question/{question.pk}/",
+            n_light=4,
+            arrival_interval=0.0,
+        ).run()
+
+        assert results["requests"] == {
+            "heavy": 1,
+            "light": 4,
+            "wsgi_workers": 1,
+            "arrival_interval": 0.0,
+        }
+        for mode in ["wsgi", "asgi"]:
+            assert set(results[mode]["light_seconds"].keys()) == {
+                "median",
+                "p95",
+                "max",
+            }
+            assert (
+                results[mode]["heavy_seconds"]["max"] <= results[mode]["total_seconds"]
+            )
+        assert json.loads(json.dumps(results)) == results
@@ -0,0 +1,12 @@
+from pathlib import Path
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def _epic_metrics_file(settings, tmp_path_factory: pytest.TempPathFactory) -> Path:
+    """
+    Keeps the request metrics of the tests out of the source tree.
+    """
+    settings.EPIC_METRICS_FILE = tmp_path_factory.getbasetemp() / "metrics.sqlite3"
+    return settings.EPIC_METRICS_FILE
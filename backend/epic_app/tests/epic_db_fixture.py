@@ -1,5 +1,6 @@
 import pytest
 from django.contrib.auth.models import User
+from django.core.cache import cache
 from rest_framework.authtoken.models import Token
 
 from epic_app.models.epic_questions import (
@@ -19,6 +20,8 @@ def epic_test_db():
     Pytest automaticall sets and tears down this data for each test.
     (Or at least it should)
     """
+    # Cached domain responses from previous tests.
+    cache.clear()
     admin_user = User(
         username="admin",
         email="admin@testdb.com",
@@ -33,3 +33,54 @@ class TestEpicAgencyImporter:
 
         # Verify the initial data has been removed.
         assert dummy_agency not in Agency.objects.all()
+
+    @pytest.mark.django_db
+    def test_import_file_fixed_number_of_queries(
+        self, default_epic_domain_data, django_assert_num_queries
+    ):
+        test_file = test_data_dir / "xlsx" / "agency_data.xlsx"
+        # Programs index, agencies cleanup (with its relationships), one insert per table and the revision bump.
+        with django_assert_num_queries(7):
+            EpicAgencyImporter().import_file(test_file)
+
+        assert len(Agency.objects.all()) == 7
+        assert all(a.programs.exists() for a in Agency.objects.all())
+
+    @pytest.mark.django_db
+    def test_check_file_reports_duplicated_lines(
+        self, default_epic_domain_data, django_assert_num_queries
+    ):
+        test_file = test_data_dir / "xlsx" / "agency_data.xlsx"
+        with django_assert_num_queries(1):
+            import_check = EpicAgencyImporter().check_file(test_file)
+
+        assert import_check.is_valid
+        assert import_check.errors == []
+        assert [w.kind for w in import_check.warnings] == ["duplicate"]
+        assert not Agency.objects.exists()
+
+    @pytest.mark.django_db
+    def test_upsert_file_only_changes_differing_agencies(
+        self, default_epic_domain_data
+    ):
+        # Define test data
+        test_file = test_data_dir / "xlsx" / "agency_data.xlsx"
+        EpicAgencyImporter().import_file(test_file)
+        agencies = list(Agency.objects.order_by("pk"))
+        agencies[0].programs.clear()
+        agencies[1].delete()
+        dummy_agency = Agency.objects.create(name="dummyAgency")
+
+        # Run test
+        (agencies_diff,) = EpicAgencyImporter().upsert_file(test_file, dry_run=True)
+        assert Agency.objects.filter(pk=dummy_agency.pk).exists()
+        EpicAgencyImporter().upsert_file(test_file)
+
+        # Verify final expectations
+        assert [a.name for _, a in agencies_diff.inserted] == [agencies[1].name]
+        assert [a.pk for _, a in agencies_diff.updated] == [agencies[0].pk]
+        assert [a.pk for _, a in agencies_diff.removed] == [dummy_agency.pk]
+        assert agencies_diff.n_unchanged == len(agencies) - 2
+        assert len(Agency.objects.all()) == len(agencies)
+        assert Agency.objects.filter(pk=agencies[2].pk).exists()
+        assert all(a.programs.exists() for a in Agency.objects.all())
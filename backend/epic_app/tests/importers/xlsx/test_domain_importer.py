@@ -1,11 +1,21 @@
 from io import BytesIO
+from pathlib import Path
 
+import openpyxl
 import pytest
 from django.core.files.uploadedfile import InMemoryUploadedFile
+from django.forms import ValidationError
 
 from epic_app.importers.xlsx import BaseEpicImporter, EpicDomainImporter
 from epic_app.importers.xlsx.base_importer import ProtocolEpicImporter
-from epic_app.models.models import Area, Group, Program
+from epic_app.importers.xlsx.question_importer import (
+    NationalFrameworkQuestionImporter,
+)
+from epic_app.models.epic_answers import MultipleChoiceAnswer
+from epic_app.models.epic_questions import LinkagesQuestion, NationalFrameworkQuestion
+from epic_app.models.epic_summaries import AnswerSummary
+from epic_app.models.epic_user import EpicUser
+from epic_app.models.models import Area, DomainRevision, Group, Program
 from epic_app.tests import test_data_dir
 
 
@@ -76,6 +86,145 @@ class TestEpicDomainImporter:
             dict(area=dummy_area, group=dummy_group, program=dummy_program)
         )
 
+    def test_import_file_fixed_number_of_queries(self, django_assert_num_queries):
+        DomainRevision.get_current()
+        # Cleanup (with its cascades), one insert per entity type and the revision bump.
+        with django_assert_num_queries(9):
+            EpicDomainImporter().import_file(self.domain_xlsx_file)
+
+        assert DomainRevision.get_current().revision == 1
+
+        assert len(Program.objects.all()) == 38
+        for program in Program.objects.select_related("group__area").all():
+            assert program.group.area is not None
+
+    def test_upsert_file_keeps_unchanged_programs(self, tmp_path: Path):
+        # Define test data.
+        EpicDomainImporter().import_file(self.domain_xlsx_file)
+        NationalFrameworkQuestionImporter().import_file(
+            test_data_dir / "xlsx" / "nationalframeworkquestions.xlsx"
+        )
+        n_questions = len(NationalFrameworkQuestion.objects.all())
+        moved_program = Program.objects.order_by("pk").last()
+        moved_program.description = "Old description"
+        moved_program.save()
+        dummy_area = Area.objects.create(name="dummyArea")
+        dummy_program = Program.objects.create(
+            name="dummyProgram",
+            group=Group.objects.create(name="dummyGroup", area=dummy_area),
+        )
+        program_pks = set(Program.objects.values_list("pk", flat=True))
+        revision = DomainRevision.get_current().revision
+
+        # Run test.
+        areas_diff, groups_diff, programs_diff = EpicDomainImporter().upsert_file(
+            self.domain_xlsx_file
+        )
+
+        # Verify final expectations.
+        assert [a.name for _, a in areas_diff.removed] == ["dummyArea"]
+        assert [g.name for _, g in groups_diff.removed] == ["dummyGroup"]
+        assert [p.name for _, p in programs_diff.removed] == ["dummyProgram"]
+        assert [p.pk for _, p in programs_diff.updated] == [moved_program.pk]
+        assert not programs_diff.inserted
+        assert set(Program.objects.values_list("pk", flat=True)) == program_pks - {
+            dummy_program.pk
+        }
+        assert not Area.objects.filter(pk=dummy_area.pk).exists()
+        assert Program.objects.get(pk=moved_program.pk).description != (
+            "Old description"
+        )
+        assert len(NationalFrameworkQuestion.objects.all()) == n_questions
+        assert DomainRevision.get_current().revision == revision + 1
+        assert not any(
+            d.has_changes
+            for d in EpicDomainImporter().upsert_file(
+                self.domain_xlsx_file, dry_run=True
+            )
+        )
+
+    def test_upsert_file_updates_summaries_of_kept_linkage_answers(self):
+        # Define test data.
+        EpicDomainImporter().import_file(self.domain_xlsx_file)
+        kept_program = Program.objects.order_by("pk").first()
+        dummy_program = Program.objects.create(
+            name="dummyProgram", group=kept_program.group
+        )
+        linkages_question = LinkagesQuestion.objects.create(
+            program=kept_program, title="Linkages"
+        )
+        linkages_answer = MultipleChoiceAnswer.objects.create(
+            user=EpicUser.objects.create(username="Linker", password="linker"),
+            question=linkages_question,
+        )
+        linkages_answer.selected_programs.add(dummy_program)
+        assert AnswerSummary.verify() == {}
+
+        # Run test.
+        EpicDomainImporter().upsert_file(self.domain_xlsx_file)
+
+        # Verify final expectations.
+        assert not linkages_answer.selected_programs.exists()
+        assert AnswerSummary.verify() == {}
+
+    def test_upsert_file_updates_program_name_case(self):
+        # Define test data.
+        EpicDomainImporter().import_file(self.domain_xlsx_file)
+        program = Program.objects.order_by("pk").first()
+        imported_name = program.name
+        program.name = imported_name.upper()
+        program.save()
+
+        # Run test.
+        _, _, programs_diff = EpicDomainImporter().upsert_file(self.domain_xlsx_file)
+
+        # Verify final expectations.
+        assert [p.pk for _, p in programs_diff.updated] == [program.pk]
+        assert Program.objects.get(pk=program.pk).name == imported_name
+
+    def test_import_file_duplicated_program_keeps_domain(self, tmp_path: Path):
+        # Define test data.
+        EpicDomainImporter().import_file(self.domain_xlsx_file)
+        test_file = tmp_path / "domain.xlsx"
+        test_workbook = openpyxl.Workbook()
+        test_workbook.active.append(["Area", "Group", "Program", "Description"])
+        test_workbook.active.append(["alpha", "first", "Program A", "Lorem"])
+        test_workbook.active.append(["alpha", "second", "program a ", "Ipsum"])
+        test_workbook.save(test_file)
+
+        # Run test.
+        with pytest.raises(ValidationError) as e_info:
+            EpicDomainImporter().import_file(test_file)
+
+        # Verify final expectations.
+        assert e_info.value.messages == [
+            "  - Line 3. There's already a Program with the name: Program A."
+        ]
+        assert len(Program.objects.all()) == 38
+
+    def test_check_file_reports_duplicated_programs(self, tmp_path: Path):
+        # Define test data.
+        test_file = tmp_path / "domain.xlsx"
+        test_workbook = openpyxl.Workbook()
+        test_workbook.active.append(["Area", "Group", "Program", "Description"])
+        test_workbook.active.append(["alpha", "first", "Program A", "Lorem"])
+        test_workbook.active.append(["alpha", "second", "program a ", "Ipsum"])
+        test_workbook.save(test_file)
+
+        # Run test.
+        import_check = EpicDomainImporter().check_file(test_file)
+
+        # Verify final expectations.
+        assert not import_check.is_valid
+        assert [e.to_dict() for e in import_check.errors] == [
+            dict(
+                line=3,
+                kind="duplicate",
+                message="Line 3. There's already a Program with the name: Program A.",
+            )
+        ]
+        assert not Program.objects.exists()
+
     def _verify_default_import_final_expectations(self, dummy_set: dict):
         # Verify final expectations
         assert len(Area.objects.all()) == 5
@@ -1,7 +1,9 @@
 from pathlib import Path
 from typing import Tuple, Type
 
+import openpyxl
 import pytest
+from django.forms import ValidationError
 
 from epic_app.importers.xlsx.base_importer import BaseEpicImporter, ProtocolEpicImporter
 from epic_app.importers.xlsx.question_importer import (
@@ -16,6 +18,7 @@ from epic_app.models.epic_questions import (
     NationalFrameworkQuestion,
     Question,
 )
+from epic_app.models.models import Program
 from epic_app.tests import test_data_dir
 from epic_app.tests.importers import default_epic_domain_data
 
@@ -71,6 +74,151 @@ class TestYesNoJustifyQuestionImporter:
         assert len(question_type.objects.all()) == dict_values["expected_entries"]
         assert question_type.objects.first().title == dict_values["first_entry_title"]
 
+    @pytest.mark.parametrize("importer_type", question_type_dict.keys())
+    def test_import_file_stores_questions_in_batches(
+        self,
+        importer_type: Type[_YesNoJustifyQuestionImporter],
+        default_epic_domain_data,
+        tmp_path: Path,
+        django_assert_max_num_queries,
+    ):
+        # Define test data.
+        n_lines = 5000
+        programs = list(Program.objects.select_related("group").all())
+        test_file = tmp_path / "yesnoquestions.xlsx"
+        test_workbook = openpyxl.Workbook()
+        test_workbook.active.append(["Group", "Program", "Description", "Question"])
+        for n_line in range(n_lines):
+            program = programs[n_line % len(programs)]
+            test_workbook.active.append(
+                [
+                    program.group.name.upper(),
+                    program.name.lower(),
+                    f"Description {n_line}",
+                    f"Question {n_line}",
+                ]
+            )
+        test_workbook.save(test_file)
+
+        # Run test.
+        # SQLite limits the parameters of a statement, rows are inserted in batches of hundreds.
+        with django_assert_max_num_queries(35):
+            importer_type().import_file(test_file)
+
+        # Verify final expectations.
+        question_type = self.question_type_dict[importer_type]["question_type"]
+        assert len(question_type.objects.all()) == n_lines
+        assert question_type.objects.first().title == "Question 0"
+        assert question_type.objects.first().program == programs[0]
+
+    def test_import_file_with_errors_keeps_existing_questions(
+        self, default_epic_domain_data, tmp_path: Path
+    ):
+        # Define test data.
+        NationalFrameworkQuestionImporter().import_file(
+            self.question_type_dict[NationalFrameworkQuestionImporter]["test_file"]
+        )
+        n_questions = len(NationalFrameworkQuestion.objects.all())
+        program = Program.objects.select_related("group").first()
+        test_file = tmp_path / "yesnoquestions.xlsx"
+        test_workbook = openpyxl.Workbook()
+        test_workbook.active.append(["Group", "Program", "Description", "Question"])
+        test_workbook.active.append([program.group.name, program.name, "", "Q1"])
+        test_workbook.active.append(["Not a group", program.name, "", "Q2"])
+        test_workbook.active.append([program.group.name, "Not a program", "", "Q3"])
+        test_workbook.save(test_file)
+
+        # Run test.
+        with pytest.raises(ValidationError) as e_info:
+            NationalFrameworkQuestionImporter().import_file(test_file)
+
+        # Verify final expectations.
+        assert e_info.value.messages == [
+            f"  - Line 3. Program: '{program.name}', Group: 'Not a group' does not exist.",
+            f"  - Line 4. Program: 'Not a program', Group: '{program.group.name}' does not exist.",
+        ]
+        assert len(NationalFrameworkQuestion.objects.all()) == n_questions
+
+    def test_check_file_returns_line_errors_without_writing(
+        self, default_epic_domain_data, tmp_path: Path, django_assert_num_queries
+    ):
+        # Define test data.
+        program = Program.objects.select_related("group").first()
+        test_file = tmp_path / "yesnoquestions.xlsx"
+        test_workbook = openpyxl.Workbook()
+        test_workbook.active.append(["Group", "Program", "Description", "Question"])
+        test_workbook.active.append([program.group.name, program.name, "", "Q1"])
+        test_workbook.active.append(["Not a group", program.name, "", "Q2"])
+        test_workbook.active.append([program.group.name, "Not a program", "", "Q3"])
+        test_workbook.active.append([program.group.name, program.name, "", "Q1"])
+        test_workbook.save(test_file)
+
+        # Run test.
+        with django_assert_num_queries(1):
+            import_check = NationalFrameworkQuestionImporter().check_file(test_file)
+
+        # Verify final expectations.
+        assert not import_check.is_valid
+        assert import_check.to_dict() == dict(
+            lines=4,
+            is_valid=False,
+            errors=[
+                dict(
+                    line=3,
+                    kind="unknown_reference",
+                    message=f"Line 3. Program: '{program.name}', Group: 'Not a group' does not exist.",
+                ),
+                dict(
+                    line=4,
+                    kind="unknown_reference",
+                    message=f"Line 4. Program: 'Not a program', Group: '{program.group.name}' does not exist.",
+                ),
+                dict(line=5, kind="duplicate", message="Line 5. Same entry as line 2."),
+            ],
+            warnings=[],
+        )
+        assert not NationalFrameworkQuestion.objects.exists()
+
+    @pytest.mark.parametrize(
+        "question_importer, header, line",
+        [
+            pytest.param(
+                NationalFrameworkQuestionImporter,
+                ["Group", "Program", "Description", "Question"],
+                lambda program: [program.group.name, program.name, "", "Q1"],
+                id="Yes/No questions",
+            ),
+            pytest.param(
+                EvolutionQuestionImporter,
+                ["Group", "Program", "Dimension"],
+                lambda program: [program.group.name, program.name, "Dimension"],
+                id="Evolution questions",
+            ),
+        ],
+    )
+    def test_check_file_and_import_file_agree_on_duplicated_questions(
+        self, default_epic_domain_data, tmp_path: Path, question_importer, header, line
+    ):
+        # Define test data.
+        program = Program.objects.select_related("group").first()
+        test_file = tmp_path / "questions.xlsx"
+        test_workbook = openpyxl.Workbook()
+        test_workbook.active.append(header)
+        test_workbook.active.append(line(program))
+        test_workbook.active.append(line(program))
+        test_workbook.save(test_file)
+
+        # Run test.
+        import_check = question_importer().check_file(test_file)
+        with pytest.raises(ValidationError) as e_info:
+            question_importer().import_file(test_file)
+
+        # Verify final expectations.
+        assert not import_check.is_valid
+        assert [e.kind for e in import_check.errors] == ["duplicate"]
+        assert e_info.value.messages == [str(e) for e in import_check.errors]
+        assert not Question.objects.exists()
+
 
 @pytest.mark.django_db
 class TestEvolutionQuestionImporter:
@@ -88,3 +236,96 @@ class TestEvolutionQuestionImporter:
         EvolutionQuestionImporter().import_file(test_file)
 
         assert len(EvolutionQuestion.objects.all()) == 55
+
+
+@pytest.mark.django_db
+class TestQuestionImporterUpsert:
+    nfq_file = test_data_dir / "xlsx" / "nationalframeworkquestions.xlsx"
+
+    @pytest.fixture(autouse=False)
+    def _upsert_fixture(self, default_epic_domain_data, tmp_path: Path) -> Path:
+        NationalFrameworkQuestionImporter().import_file(self.nfq_file)
+        # Same questions, except for the first one removed, the second one described differently and a new one.
+        test_file = tmp_path / "nationalframeworkquestions.xlsx"
+        test_workbook = openpyxl.Workbook()
+        test_workbook.active.append(["Group", "Program", "Description", "Question"])
+        questions = NationalFrameworkQuestion.objects.select_related(
+            "program__group"
+        ).order_by("pk")
+        for n_question, nfq in enumerate(questions):
+            if n_question == 0:
+                continue
+            test_workbook.active.append(
+                [
+                    nfq.program.group.name,
+                    nfq.program.name,
+                    "New description" if n_question == 1 else nfq.description,
+                    nfq.title,
+                ]
+            )
+        test_workbook.active.append(
+            [nfq.program.group.name, nfq.program.name, "", "A new question"]
+        )
+        test_workbook.save(test_file)
+        return test_file
+
+    def test_upsert_file_dry_run_writes_nothing(
+        self, _upsert_fixture: Path, django_assert_num_queries
+    ):
+        # Define test data.
+        existing = list(NationalFrameworkQuestion.objects.order_by("pk"))
+
+        # Run test.
+        # Programs index, program names and existing questions.
+        with django_assert_num_queries(3):
+            (question_diff,) = NationalFrameworkQuestionImporter().upsert_file(
+                _upsert_fixture, dry_run=True
+            )
+
+        # Verify final expectations.
+        assert [label for label, _ in question_diff.inserted] == [
+            f"{existing[-1].program.name}: A new question"
+        ]
+        assert [q.pk for _, q in question_diff.updated] == [existing[1].pk]
+        assert [q.pk for _, q in question_diff.removed] == [existing[0].pk]
+        assert question_diff.n_unchanged == len(existing) - 2
+        assert question_diff.get_summary()[0] == (
+            f"NationalFrameworkQuestion: 1 inserted, 1 updated, 1 removed, {len(existing) - 2} unchanged."
+        )
+        assert list(NationalFrameworkQuestion.objects.order_by("pk")) == existing
+        assert NationalFrameworkQuestion.objects.get(pk=existing[1].pk).description == (
+            existing[1].description
+        )
+
+    def test_upsert_file_keeps_unchanged_questions(self, _upsert_fixture: Path):
+        # Define test data.
+        existing = list(NationalFrameworkQuestion.objects.order_by("pk"))
+
+        # Run test.
+        NationalFrameworkQuestionImporter().upsert_file(_upsert_fixture)
+
+        # Verify final expectations.
+        stored = list(NationalFrameworkQuestion.objects.order_by("pk"))
+        assert [q.pk for q in stored[:-1]] == [q.pk for q in existing[1:]]
+        assert stored[0].description == "New description"
+        assert stored[-1].title == "A new question"
+        # Importing the same file again does not change anything.
+        (question_diff,) = NationalFrameworkQuestionImporter().upsert_file(
+            _upsert_fixture
+        )
+        assert not question_diff.has_changes
+        assert question_diff.n_unchanged == len(stored)
+
+    def test_upsert_evolution_questions_twice_has_no_changes(
+        self, default_epic_domain_data
+    ):
+        test_file = test_data_dir / "xlsx" / "evolutionquestions.xlsx"
+        EvolutionQuestionImporter().import_file(test_file)
+        existing_pks = list(EvolutionQuestion.objects.values_list("pk", flat=True))
+
+        (question_diff,) = EvolutionQuestionImporter().upsert_file(test_file)
+
+        assert not question_diff.has_changes
+        assert list(EvolutionQuestion.objects.values_list("pk", flat=True)) == (
+            existing_pks
+        )
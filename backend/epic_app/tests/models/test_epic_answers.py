@@ -152,6 +152,69 @@ class TestEpicAnswers:
             # Create it twice, it should trigger an update instead of create.
             self.test_SAVE_answer(question_subtype, answer_subtype)
 
+    @pytest.mark.parametrize(
+        "question_subtype, answer_subtype",
+        [
+            pytest.param(NationalFrameworkQuestion, YesNoAnswer),
+            pytest.param(EvolutionQuestion, SingleChoiceAnswer),
+            pytest.param(LinkagesQuestion, MultipleChoiceAnswer),
+        ],
+    )
+    def test_question_integrity_of_loaded_question_requires_no_queries(
+        self,
+        question_subtype: Question,
+        answer_subtype: Answer,
+        django_assert_num_queries,
+    ):
+        concrete_question = question_subtype.objects.first()
+        base_question = Question.objects.get(pk=concrete_question.pk)
+        epic_user = EpicUser.objects.first()
+        with django_assert_num_queries(0):
+            for question in [concrete_question, base_question]:
+                assert answer_subtype(
+                    user=epic_user, question=question
+                )._check_question_integrity()
+                assert not Answer(
+                    user=epic_user, question=question
+                )._check_question_integrity()
+        with django_assert_num_queries(1):
+            assert answer_subtype(
+                user=epic_user, question_id=concrete_question.pk
+            )._check_question_integrity()
+
+    def test_check_questions_integrity_requires_one_query(
+        self, django_assert_num_queries
+    ):
+        epic_user = EpicUser.objects.first()
+        answers = (
+            [
+                YesNoAnswer(user=epic_user, question_id=q_pk)
+                for q_pk in NationalFrameworkQuestion.objects.values_list(
+                    "pk", flat=True
+                )
+            ]
+            + [
+                SingleChoiceAnswer(user=epic_user, question_id=q_pk)
+                for q_pk in EvolutionQuestion.objects.values_list("pk", flat=True)
+            ]
+            + [
+                MultipleChoiceAnswer(user=epic_user, question=question)
+                for question in LinkagesQuestion.objects.all()
+            ]
+        )
+        with django_assert_num_queries(1):
+            Answer.check_questions_integrity(answers)
+
+        invalid_answer = YesNoAnswer(
+            user=epic_user, question_id=EvolutionQuestion.objects.first().pk
+        )
+        with pytest.raises(IntegrityError) as err_info:
+            Answer.check_questions_integrity(answers + [invalid_answer])
+        assert str(err_info.value) == (
+            "Question type `Question` not allowed. Supported types: "
+            "[`NationalFrameworkQuestion`, `KeyAgencyActionsQuestion`]."
+        )
+
 
 @pytest.mark.django_db
 class TestSingleChoiceAnswer:
@@ -196,6 +259,12 @@ class TestSingleChoiceAnswer:
         sca.justify_answer = justify_answer
         sca.save()
         assert sca.is_valid_answer() == expected_result
+        assert (
+            SingleChoiceAnswer.get_valid_answers(
+                SingleChoiceAnswer.objects.all()
+            ).exists()
+            == expected_result
+        )
 
     @pytest.mark.parametrize(
         "selected_choice",
@@ -290,6 +359,10 @@ class TestYesNoAnswer:
         yna.justify_answer = justify_answer
         yna.save()
         assert yna.is_valid_answer() == expected_result
+        assert (
+            YesNoAnswer.get_valid_answers(YesNoAnswer.objects.all()).exists()
+            == expected_result
+        )
 
     @pytest.mark.parametrize(
         "short_answer",
@@ -359,6 +432,12 @@ class TestMultipleChoiceAnswer:
         mca.selected_programs.set(selected_programs)
         mca.save()
         assert mca.is_valid_answer() == expected_result
+        assert (
+            MultipleChoiceAnswer.get_valid_answers(
+                MultipleChoiceAnswer.objects.all()
+            ).exists()
+            == expected_result
+        )
 
     @pytest.mark.parametrize(
         "selected_programs",
@@ -392,3 +471,79 @@ class TestMultipleChoiceAnswer:
 
         # Verify final expectations
         assert detailed_summary == expected_result
+
+    @pytest.fixture(autouse=False)
+    def _linkages_answers(self) -> List[MultipleChoiceAnswer]:
+        MultipleChoiceAnswer.objects.all().delete()
+        programs = list(Program.objects.all())
+        linkages_answers = []
+        for e_user, selected_programs in zip(
+            EpicUser.objects.all()[:3], [programs[:2], programs[1:3], []]
+        ):
+            for lnk in LinkagesQuestion.objects.all():
+                mca = MultipleChoiceAnswer.objects.create(user=e_user, question=lnk)
+                mca.selected_programs.set(selected_programs)
+                linkages_answers.append(mca)
+        return linkages_answers
+
+    def test_multiplechoiceanswer_get_detailed_summary_is_grouped(
+        self, _linkages_answers: List[MultipleChoiceAnswer], django_assert_num_queries
+    ):
+        # Define expectations
+        programs = list(Program.objects.all())
+        n_questions = LinkagesQuestion.objects.count()
+        expected_result = {
+            programs[0].name: n_questions,
+            programs[1].name: 2 * n_questions,
+            programs[2].name: n_questions,
+            "no_valid_response": n_questions,
+        }
+
+        # Run test and verify expectations.
+        with django_assert_num_queries(2):
+            assert (
+                MultipleChoiceAnswer.get_detailed_summary(_linkages_answers)
+                == expected_result
+            )
+        assert list(
+            MultipleChoiceAnswer.get_detailed_summary(
+                MultipleChoiceAnswer.objects.all()
+            ).keys()
+        ) == list(expected_result.keys())
+
+    def test_multiplechoiceanswer_get_linkage_counts(
+        self, _linkages_answers: List[MultipleChoiceAnswer], django_assert_num_queries
+    ):
+        # Define expectations
+        programs = list(Program.objects.all())
+        expected_counts = {}
+        for lnk in LinkagesQuestion.objects.all():
+            for linked_program, n_answers in [
+                (programs[0], 1),
+                (programs[1], 2),
+                (programs[2], 1),
+            ]:
+                p_key = (lnk.program_id, linked_program.pk)
+                expected_counts[p_key] = expected_counts.get(p_key, 0) + n_answers
+
+        # Run test and verify expectations.
+        with django_assert_num_queries(1):
+            assert (
+                MultipleChoiceAnswer.get_linkage_counts(
+                    MultipleChoiceAnswer.objects.all()
+                )
+                == expected_counts
+            )
+
+    def test_multiplechoiceanswer_is_valid_answer_uses_prefetched_programs(
+        self, _linkages_answers: List[MultipleChoiceAnswer], django_assert_num_queries
+    ):
+        expected_validity = [a.selected_programs.exists() for a in _linkages_answers]
+        answers = list(
+            MultipleChoiceAnswer.objects.order_by("pk").prefetch_related(
+                "selected_programs"
+            )
+        )
+        with django_assert_num_queries(0):
+            assert [a.is_valid_answer() for a in answers] == expected_validity
+        assert [a.is_valid_answer() for a in _linkages_answers] == expected_validity
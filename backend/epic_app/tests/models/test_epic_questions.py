@@ -11,6 +11,7 @@ from epic_app.models.epic_questions import (
 from epic_app.models.epic_user import EpicUser
 from epic_app.models.models import Program
 from epic_app.tests.epic_db_fixture import epic_test_db
+from epic_app.utils import get_instance_as_submodel_type
 
 
 @pytest.fixture(autouse=True)
@@ -72,6 +73,27 @@ class TestQuestion:
         )
         assert Question.objects.filter(title=q_title, program=q_program).exists()
 
+    @pytest.mark.parametrize(
+        "question_subtype",
+        [
+            pytest.param(NationalFrameworkQuestion),
+            pytest.param(KeyAgencyActionsQuestion),
+            pytest.param(EvolutionQuestion),
+            pytest.param(LinkagesQuestion),
+        ],
+    )
+    def test_save_base_question_keeps_subtype(self, question_subtype: Question):
+        concrete_question = question_subtype.objects.first()
+        base_question = Question.objects.get(pk=concrete_question.pk)
+        base_question.title = "Aliqua culpa consequat eiusmod eu voluptate."
+        base_question.save()
+
+        saved_question = Question.objects.get(pk=concrete_question.pk)
+        assert saved_question.subtype == concrete_question.subtype
+        assert isinstance(
+            get_instance_as_submodel_type(saved_question), question_subtype
+        )
+
 
 @pytest.mark.django_db
 class TestNationalFrameworkQuestion:
@@ -0,0 +1,201 @@
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from epic_app.models.epic_answers import (
+    MultipleChoiceAnswer,
+    SingleChoiceAnswer,
+    YesNoAnswer,
+    YesNoAnswerType,
+)
+from epic_app.models.epic_questions import (
+    EvolutionChoiceType,
+    EvolutionQuestion,
+    LinkagesQuestion,
+    NationalFrameworkQuestion,
+)
+from epic_app.models.epic_summaries import AnswerSummary, suspended_summary_tracking
+from epic_app.models.epic_user import EpicOrganization, EpicUser
+from epic_app.models.models import Program
+from epic_app.tests.epic_db_fixture import epic_test_db
+
+
+@pytest.fixture(autouse=True)
+def EpicSummariesFixture(epic_test_db: pytest.fixture):
+    """
+    Dummy fixture just to load a default db from dummy_db.
+
+    Args:
+        epic_test_db (pytest.fixture): Fixture to load for the whole file tests.
+    """
+    pass
+
+
+def get_stored_counts() -> dict:
+    return {
+        a_summary.get_key(): a_summary.n_answers
+        for a_summary in AnswerSummary.objects.filter(n_answers__gt=0)
+    }
+
+
+@pytest.mark.django_db
+class TestAnswerSummary:
+    def _get_user(self, username: str) -> EpicUser:
+        return EpicUser.objects.get(username=username)
+
+    def test_save_and_update_answer_updates_counters(self):
+        question = NationalFrameworkQuestion.objects.first()
+        e_user = self._get_user("Palpatine")
+        organization_id = e_user.organization_id
+
+        answer = YesNoAnswer.objects.create(question=question, user=e_user)
+        assert get_stored_counts() == {(question.pk, organization_id, ""): 1}
+
+        answer.short_answer = YesNoAnswerType.YES
+        answer.save()
+        assert get_stored_counts() == {(question.pk, organization_id, "Y"): 1}
+        assert AnswerSummary.verify() == {}
+
+    def test_delete_answer_updates_counters(self):
+        question = EvolutionQuestion.objects.first()
+        for username in ["Palpatine", "Anakin"]:
+            SingleChoiceAnswer.objects.create(
+                question=question,
+                user=self._get_user(username),
+                selected_choice=EvolutionChoiceType.CAPABLE,
+            )
+        organization_id = self._get_user("Anakin").organization_id
+        assert get_stored_counts() == {(question.pk, organization_id, "CAPABLE"): 2}
+
+        SingleChoiceAnswer.objects.filter(user__username="Anakin").delete()
+        assert get_stored_counts() == {(question.pk, organization_id, "CAPABLE"): 1}
+        assert AnswerSummary.verify() == {}
+
+    def test_selected_programs_changes_update_counters(self):
+        question = LinkagesQuestion.objects.first()
+        e_user = self._get_user("Palpatine")
+        organization_id = e_user.organization_id
+        p_a, p_b = Program.objects.order_by("pk")[:2]
+        answer = MultipleChoiceAnswer.objects.create(question=question, user=e_user)
+
+        answer.selected_programs.add(p_a, p_b)
+        assert get_stored_counts() == {
+            (question.pk, organization_id, str(p_a.pk)): 1,
+            (question.pk, organization_id, str(p_b.pk)): 1,
+        }
+
+        p_b.selected_answers.remove(answer)
+        assert get_stored_counts() == {(question.pk, organization_id, str(p_a.pk)): 1}
+
+        answer.selected_programs.clear()
+        assert get_stored_counts() == {(question.pk, organization_id, ""): 1}
+        assert AnswerSummary.verify() == {}
+
+    def test_deleting_selected_program_updates_counters(self):
+        question = LinkagesQuestion.objects.first()
+        e_user = self._get_user("Palpatine")
+        selected_program = Program.objects.exclude(pk=question.program_id).first()
+        answer = MultipleChoiceAnswer.objects.create(question=question, user=e_user)
+        answer.selected_programs.add(selected_program)
+
+        selected_program.delete()
+        assert get_stored_counts() == {(question.pk, e_user.organization_id, ""): 1}
+        assert AnswerSummary.verify() == {}
+
+    def test_moving_user_to_another_organization_updates_counters(self):
+        question = NationalFrameworkQuestion.objects.first()
+        e_user = self._get_user("Palpatine")
+        YesNoAnswer.objects.create(
+            question=question, user=e_user, short_answer=YesNoAnswerType.NO
+        )
+        new_organization = EpicOrganization.objects.create(name="Rebel Alliance")
+
+        e_user.organization = new_organization
+        e_user.save()
+        assert get_stored_counts() == {(question.pk, new_organization.pk, "N"): 1}
+        assert AnswerSummary.verify() == {}
+
+    def test_apply_deltas_with_concurrently_created_counter(self, monkeypatch):
+        question = NationalFrameworkQuestion.objects.first()
+        organization_id = self._get_user("Palpatine").organization_id
+        s_key = (question.pk, organization_id, "Y")
+        get_locked_summaries = AnswerSummary._get_locked_summaries
+
+        def create_after_first_lock(s_keys):
+            locked_summaries = get_locked_summaries(s_keys)
+            if not AnswerSummary.objects.filter(question=question).exists():
+                # Another first answer to the same counter commits meanwhile.
+                AnswerSummary.objects.create(
+                    question=question,
+                    organization_id=organization_id,
+                    choice="Y",
+                    n_answers=1,
+                )
+            return locked_summaries
+
+        monkeypatch.setattr(
+            AnswerSummary,
+            "_get_locked_summaries",
+            staticmethod(create_after_first_lock),
+        )
+        AnswerSummary.apply_deltas({s_key: 1})
+
+        assert get_stored_counts() == {s_key: 2}
+
+    def test_apply_deltas_only_locks_affected_counters(self):
+        question = NationalFrameworkQuestion.objects.first()
+        organization_id = self._get_user("Palpatine").organization_id
+        AnswerSummary.apply_deltas(
+            {
+                (question.pk, organization_id, "Y"): 1,
+                (question.pk, organization_id, "N"): 1,
+            }
+        )
+
+        locked_summaries = AnswerSummary._get_locked_summaries(
+            [(question.pk, organization_id, "Y")]
+        )
+        assert list(locked_summaries.keys()) == [(question.pk, organization_id, "Y")]
+
+    def test_get_choice_counts_by_organizations(self):
+        question = NationalFrameworkQuestion.objects.first()
+        other_organization = EpicOrganization.objects.create(name="Rebel Alliance")
+        YesNoAnswer.objects.create(
+            question=question,
+            user=self._get_user("Palpatine"),
+            short_answer=YesNoAnswerType.YES,
+        )
+        YesNoAnswer.objects.create(
+            question=question,
+            user=EpicUser.objects.create(
+                username="Leia", organization=other_organization
+            ),
+            short_answer=YesNoAnswerType.YES,
+        )
+        questions = NationalFrameworkQuestion.objects.all()
+
+        assert AnswerSummary.get_choice_counts(questions, None) == {
+            question.pk: {"Y": 2}
+        }
+        assert AnswerSummary.get_choice_counts(questions, [other_organization.pk]) == {
+            question.pk: {"Y": 1}
+        }
+
+    def test_rebuild_and_verify_command(self):
+        question = NationalFrameworkQuestion.objects.first()
+        with suspended_summary_tracking():
+            YesNoAnswer.objects.create(
+                question=question,
+                user=self._get_user("Anakin"),
+                short_answer=YesNoAnswerType.YES,
+            )
+        assert not AnswerSummary.objects.exists()
+        with pytest.raises(CommandError) as e_info:
+            call_command("rebuild_answer_summaries", "--verify")
+        assert "stored 0, expected 1" in str(e_info.value)
+
+        call_command("rebuild_answer_summaries")
+        assert get_stored_counts() == {
+            (question.pk, self._get_user("Anakin").organization_id, "Y"): 1
+        }
+        call_command("rebuild_answer_summaries", "--verify")
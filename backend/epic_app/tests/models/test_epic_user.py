@@ -1,12 +1,17 @@
+import csv
+import io
 import json
+from concurrent.futures import ProcessPoolExecutor
 
 import pytest
+from django.contrib.auth.hashers import check_password
 from django.contrib.auth.models import User
 from rest_framework.authtoken.models import Token
 from rest_framework.authtoken.views import obtain_auth_token
 from rest_framework.response import Response as RfResponse
 from rest_framework.test import APIRequestFactory
 
+from epic_app.models import epic_user
 from epic_app.models.epic_user import EpicOrganization, EpicUser
 from epic_app.tests.epic_db_fixture import epic_test_db
 from epic_app.views import EpicUserViewSet
@@ -57,6 +62,87 @@ class TestEpicOrganization:
         assert all(last_org.organization_users.contains(n_user) for n_user in new_users)
         assert len(EpicUser.objects.all()) - len(new_users) == previous_users
 
+    @pytest.mark.parametrize(
+        "n_workers",
+        [pytest.param(1, id="Serial hashing"), pytest.param(2, id="Process pool")],
+    )
+    def test_provision_users(
+        self, n_workers: int, settings, django_assert_max_num_queries
+    ):
+        # Define test data.
+        settings.EPIC_PASSWORD_HASHING_WORKERS = n_workers
+        last_org: EpicOrganization = EpicOrganization.objects.last()
+        n_users = 40
+
+        # Run test: count, username check, savepoint, 2 user inserts, token insert, release.
+        with django_assert_max_num_queries(7):
+            credentials = last_org.provision_users(n_users)
+
+        # Verify final expectations.
+        assert len(credentials) == n_users
+        usernames = [e_user.username for e_user, _ in credentials]
+        assert len(set(usernames)) == n_users
+        for e_user, raw_password in credentials[:: n_users // 4]:
+            stored_user = EpicUser.objects.get(pk=e_user.pk)
+            assert stored_user.organization == last_org
+            assert raw_password == stored_user.username.lower()
+            assert stored_user.check_password(raw_password)
+        assert Token.objects.filter(
+            user__in=[e_u.pk for e_u, _ in credentials]
+        ).count() == (n_users)
+
+    def test_hash_passwords_spawns_processes(self, settings, monkeypatch):
+        # Forking a multi-threaded web server process could deadlock.
+        settings.EPIC_PASSWORD_HASHING_WORKERS = 2
+        start_methods = []
+
+        class RecordingPoolExecutor(ProcessPoolExecutor):
+            def __init__(self, *args, **kwargs):
+                start_methods.append(kwargs["mp_context"].get_start_method())
+                super().__init__(*args, **kwargs)
+
+        monkeypatch.setattr(epic_user, "ProcessPoolExecutor", RecordingPoolExecutor)
+        raw_passwords = [f"password{n_password}" for n_password in range(8)]
+        hashed_passwords = epic_user._hash_passwords(raw_passwords)
+        assert start_methods == ["spawn"]
+        assert all(
+            check_password(r_pwd, h_pwd)
+            for r_pwd, h_pwd in zip(raw_passwords, hashed_passwords)
+        )
+
+    def test_provision_users_regenerates_taken_usernames(self, monkeypatch):
+        # Force the first generated username to collide with an existing one.
+        random_strings = iter(["Taken01", "Unique1"])
+        monkeypatch.setattr(
+            epic_user, "get_random_string", lambda length: next(random_strings)
+        )
+        n_existing = User.objects.count() + 1
+        EpicUser.objects.create(username=f"Taken01{n_existing}")
+
+        credentials = EpicOrganization.objects.last().provision_users(1)
+
+        assert credentials[0][0].username == f"Unique1{n_existing}"
+
+    @pytest.mark.parametrize("export_format", ["csv", "json"])
+    def test_export_credentials(self, export_format: str):
+        last_org: EpicOrganization = EpicOrganization.objects.last()
+        credentials = last_org.provision_users(3)
+
+        exported = EpicOrganization.export_credentials(credentials, export_format)
+
+        if export_format == "csv":
+            rows = list(csv.DictReader(io.StringIO(exported)))
+        else:
+            rows = json.loads(exported)
+        assert rows == [
+            dict(organization=last_org.name, username=e_user.username, password=pwd)
+            for e_user, pwd in credentials
+        ]
+
+    def test_export_credentials_unknown_format_raises(self):
+        with pytest.raises(ValueError):
+            EpicOrganization.export_credentials([], "xml")
+
 
 @pytest.mark.django_db
 class TestEpicUser:
@@ -1,7 +1,9 @@
 import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
 from django.forms import ValidationError
 
-from epic_app.models.models import Agency, Area, Group, Program
+from epic_app.models.models import Agency, Area, DomainRevision, Group, Program
 from epic_app.tests.epic_db_fixture import epic_test_db
 
 
@@ -142,3 +144,96 @@ class TestProgram:
             == f"There's already a Program with the name: {a_name}."
         )
         assert not Program.objects.filter(name=name_case).exists()
+
+    def test_program_save_does_not_scan_programs(self, django_assert_max_num_queries):
+        a_group: Group = Group.objects.all().first()
+        # Savepoint, insert and savepoint release.
+        with django_assert_max_num_queries(3):
+            Program(name="A new program", group=a_group, description="Lorem").save()
+
+    def test_program_update_keeps_name(self):
+        program: Program = Program.objects.get(name="a")
+        program.description = "Updated description"
+        program.save()
+        assert Program.objects.get(name="a").description == "Updated description"
+
+    @pytest.mark.parametrize("name_case", ["c", "C"])
+    def test_get_program_by_name(self, name_case: str, django_assert_num_queries):
+        with django_assert_num_queries(1):
+            program = Program.get_program_by_name(name_case)
+        assert program == Program.objects.get(name="c")
+        assert Program.get_program_by_name("not a program") is None
+
+    def test_get_programs_by_names_one_query(self, django_assert_num_queries):
+        with django_assert_num_queries(1):
+            programs = Program.get_programs_by_names(["A", "b", "E", "not a program"])
+        assert list(sorted(programs.keys())) == ["a", "b", "e"]
+        assert programs["e"] == Program.objects.get(name="e")
+        with django_assert_num_queries(0):
+            assert Program.get_programs_by_names([]) == {}
+
+    def test_get_name_collisions(self):
+        assert Program.get_name_collisions() == {}
+        call_command("check_program_names")
+
+        # Simulate programs stored before the name key existed.
+        a_group: Group = Group.objects.all().first()
+        Program.objects.bulk_create(
+            [
+                Program(name="A", group=a_group, description="Lorem"),
+                Program(name="B", group=a_group, description="Lorem"),
+            ]
+        )
+        assert Program.get_name_collisions() == {"a": ["a", "A"], "b": ["b", "B"]}
+        with pytest.raises(CommandError) as e_info:
+            call_command("check_program_names")
+        assert "'a', 'A'" in str(e_info.value)
+
+    def test_backfill_name_keys(self):
+        # Simulate programs stored before the name key existed.
+        Program.objects.update(name_key=None)
+        assert Program.get_program_by_name("a") is None
+
+        call_command("backfill_program_name_keys")
+
+        assert not Program.objects.filter(name_key__isnull=True).exists()
+        assert Program.get_program_by_name("A") == Program.objects.get(name="a")
+
+    @pytest.mark.parametrize(
+        "name, other_case",
+        [
+            pytest.param("Ärzte ohne Grenzen", "ÄRZTE OHNE GRENZEN", id="Latin-1"),
+            pytest.param("Ωmega", "ωMEGA", id="Greek"),
+        ],
+    )
+    def test_non_ascii_names_are_case_insensitive(self, name: str, other_case: str):
+        a_group: Group = Group.objects.all().first()
+        Program(name=name, group=a_group, description="Lorem").save()
+
+        assert Program.get_program_by_name(other_case).name == name
+        assert (
+            list(Program.get_programs_by_names([other_case]).values())[0].name == name
+        )
+        with pytest.raises(ValidationError):
+            Program(name=other_case, group=a_group, description="Lorem").save()
+
+
+@pytest.mark.django_db
+class TestDomainRevision:
+    def test_get_current_starts_at_zero(self):
+        assert DomainRevision.get_current().revision == 0
+        assert DomainRevision.objects.count() == 1
+
+    def test_bump_increases_revision(self):
+        initial_revision = DomainRevision.get_current()
+        DomainRevision.bump()
+        DomainRevision.bump()
+        bumped_revision = DomainRevision.get_current()
+        assert bumped_revision.revision == initial_revision.revision + 2
+        assert bumped_revision.get_etag() != initial_revision.get_etag()
+        assert bumped_revision.updated_on >= initial_revision.updated_on
+
+    def test_bump_without_current_revision(self):
+        DomainRevision.bump()
+        assert DomainRevision.get_current().revision == 1
+        assert DomainRevision.objects.count() == 1
@@ -14,6 +14,7 @@ from epic_app.models.epic_answers import (
 from epic_app.models.epic_questions import (
     EvolutionChoiceType,
     EvolutionQuestion,
+    KeyAgencyActionsQuestion,
     LinkagesQuestion,
     NationalFrameworkQuestion,
 )
@@ -21,10 +22,13 @@ from epic_app.models.epic_user import EpicOrganization, EpicUser
 from epic_app.models.models import Program
 from epic_app.serializers.answer_serializer import (
     AnswerSerializer,
+    AnswerTypeRegistry,
+    BulkAnswerUpsert,
     MultipleChoiceAnswerSerializer,
     SingleChoiceAnswerSerializer,
     YesNoAnswerSerializer,
     _BaseAnswerSerializer,
+    answer_type_registry,
 )
 from epic_app.tests.epic_db_fixture import epic_test_db
 from epic_app.utils import get_submodel_type_list
@@ -188,3 +192,187 @@ class TestAnswerSerializer:
         assert len(serialized_data) == 1
         for field, value in expected_data.items():
             assert serialized_data[0][field] == value
+
+
+class TestAnswerTypeRegistry:
+    @pytest.mark.parametrize("answer_type", get_submodel_type_list(Answer))
+    def test_registry_maps_supported_questions(self, answer_type: Answer):
+        registry = AnswerTypeRegistry()
+        registry.build()
+        for q_type in answer_type._get_supported_questions():
+            assert registry.get_answer_type(q_type) is answer_type
+        assert registry.get_serializer(
+            answer_type
+        ) is _BaseAnswerSerializer.get_concrete_serializer(answer_type)
+
+    def test_registry_unregistered_answer_type_raises(self):
+        with pytest.raises(ValueError):
+            answer_type_registry.get_serializer(Answer)
+
+    @pytest.mark.django_db
+    @pytest.mark.parametrize(
+        "question_type, answer_type",
+        [
+            pytest.param(NationalFrameworkQuestion, YesNoAnswer, id="YesNo"),
+            pytest.param(KeyAgencyActionsQuestion, YesNoAnswer, id="KeyAgency"),
+            pytest.param(EvolutionQuestion, SingleChoiceAnswer, id="Evolution"),
+            pytest.param(LinkagesQuestion, MultipleChoiceAnswer, id="Linkages"),
+        ],
+    )
+    def test_get_question_answer_type_reads_only_the_discriminator(
+        self,
+        question_type,
+        answer_type,
+        epic_test_db: pytest.fixture,
+        django_assert_num_queries,
+    ):
+        question_pk = question_type.objects.first().pk
+        with django_assert_num_queries(1):
+            assert (
+                answer_type_registry.get_question_answer_type(str(question_pk))
+                is answer_type
+            )
+
+    @pytest.mark.django_db
+    @pytest.mark.parametrize("question_pk", [42, "not-a-pk"])
+    def test_get_question_answer_type_unknown_question(self, question_pk):
+        assert answer_type_registry.get_question_answer_type(question_pk) is None
+
+
+@pytest.mark.django_db
+class TestBulkAnswerUpsert:
+    @pytest.fixture(autouse=True)
+    def _bulk_fixture(self, answer_serializer_fixture: dict):
+        self.epic_user = EpicUser.objects.get(username="TheOneWhoAsks")
+
+    def _get_program_answers(self) -> list:
+        return (
+            [
+                dict(question=nfq.pk, short_answer="N", justify_answer="Lorem ipsum.")
+                for nfq in NationalFrameworkQuestion.objects.all()
+            ]
+            + [
+                dict(question=kaa.pk, short_answer="Y")
+                for kaa in KeyAgencyActionsQuestion.objects.all()
+            ]
+            + [
+                dict(question=evq.pk, selected_choice=str(EvolutionChoiceType.CAPABLE))
+                for evq in EvolutionQuestion.objects.all()
+            ]
+            + [
+                dict(question=lkq.pk, selected_programs=[1, 2])
+                for lkq in LinkagesQuestion.objects.all()
+            ]
+        )
+
+    def test_upsert_creates_and_updates_answers(self):
+        # Define test data.
+        answers_data = self._get_program_answers()
+        existing = set(
+            Answer.objects.filter(user=self.epic_user).values_list(
+                "question_id", flat=True
+            )
+        )
+        assert existing
+
+        # Run test.
+        bulk_upsert = BulkAnswerUpsert(self.epic_user, answers_data)
+        assert bulk_upsert.is_valid(), bulk_upsert.errors
+        results = bulk_upsert.save()
+
+        # Verify final expectations.
+        assert [r["question"] for r in results] == [a["question"] for a in answers_data]
+        for result in results:
+            assert result["created"] == (result["question"] not in existing)
+            answer = Answer.objects.get(pk=result["id"])
+            assert answer.user == self.epic_user
+            assert answer.question_id == result["question"]
+        nfq_answer = YesNoAnswer.objects.get(
+            user=self.epic_user, question=NationalFrameworkQuestion.objects.first()
+        )
+        assert nfq_answer.short_answer == "N"
+        assert nfq_answer.justify_answer == "Lorem ipsum."
+        for sca in SingleChoiceAnswer.objects.filter(user=self.epic_user):
+            assert sca.selected_choice == EvolutionChoiceType.CAPABLE
+            assert sca.subtype == "singlechoiceanswer"
+        # Previous justification is kept as it was not given.
+        assert (
+            SingleChoiceAnswer.objects.get(
+                user=self.epic_user, question=EvolutionQuestion.objects.first()
+            ).justify_answer
+            == "Ipsum anim fugiat sit nostrud enim."
+        )
+        for mca in MultipleChoiceAnswer.objects.filter(user=self.epic_user):
+            assert sorted(p.pk for p in mca.selected_programs.all()) == [1, 2]
+
+    def test_upsert_number_of_queries_does_not_depend_on_answers(
+        self, django_assert_max_num_queries
+    ):
+        answers_data = self._get_program_answers()
+        bulk_upsert = BulkAnswerUpsert(self.epic_user, answers_data)
+        # A fixed number of queries per answer type, including the (conflict-safe) update of the answer summaries.
+        with django_assert_max_num_queries(44):
+            assert bulk_upsert.is_valid()
+            bulk_upsert.save()
+
+    @pytest.mark.parametrize(
+        "answers_data, expected_errors",
+        [
+            pytest.param(
+                {"question": 1},
+                {"non_field_errors": ['Expected a list of items but got type "dict".']},
+                id="Not a list",
+            ),
+            pytest.param(
+                [dict(short_answer="Y")],
+                [{"question": ["This field is required."]}],
+                id="Missing question",
+            ),
+            pytest.param(
+                [dict(question=42, short_answer="Y")],
+                [{"question": ['Invalid pk "42" - object does not exist.']}],
+                id="Unknown question",
+            ),
+            pytest.param(
+                [dict(question=1, short_answer="Y"), dict(question=1)],
+                [{}, {"question": ["Duplicated question in the request."]}],
+                id="Duplicated question",
+            ),
+            pytest.param(
+                [dict(question=1, short_answer="Maybe")],
+                [{"short_answer": ['"Maybe" is not a valid choice.']}],
+                id="Invalid choice",
+            ),
+            pytest.param(
+                [dict(question=5, selected_programs=[1, 42])],
+                [{"selected_programs": ['Invalid pk "42" - object does not exist.']}],
+                id="Unknown program",
+            ),
+            pytest.param(
+                [dict(question=5, selected_programs=1)],
+                [
+                    {
+                        "selected_programs": [
+                            'Expected a list of items but got type "int".'
+                        ]
+                    }
+                ],
+                id="Programs not a list",
+            ),
+            pytest.param(
+                [dict(question=1, user=1)],
+                [{"user": ["Answers can only be stored for the requesting user."]}],
+                id="Other user",
+            ),
+        ],
+    )
+    def test_upsert_invalid_data_stores_nothing(
+        self, answers_data, expected_errors: dict
+    ):
+        n_answers = Answer.objects.count()
+        bulk_upsert = BulkAnswerUpsert(self.epic_user, answers_data)
+        assert not bulk_upsert.is_valid()
+        assert bulk_upsert.errors == expected_errors
+        with pytest.raises(AssertionError):
+            BulkAnswerUpsert(self.epic_user, answers_data).save()
+        assert Answer.objects.count() == n_answers
@@ -0,0 +1,153 @@
+from typing import Type
+
+import pytest
+from django.db import models
+from rest_framework import serializers
+from rest_framework.request import Request
+from rest_framework.reverse import reverse
+from rest_framework.test import APIRequestFactory
+
+from epic_app.models.models import Agency, Area, Group, Program
+from epic_app.serializers import (
+    AgencySerializer,
+    AreaSerializer,
+    GroupSerializer,
+    ProgramSerializer,
+)
+from epic_app.serializers.base_serializer import (
+    EagerLoadingModelSerializer,
+    TemplatedHyperlinkedIdentityField,
+)
+from epic_app.tests.epic_db_fixture import epic_test_db
+
+
+@pytest.fixture(autouse=True)
+def base_serializer_fixture(
+    epic_test_db: pytest.fixture,
+):
+    """
+    Dummy fixture just to load a default db from dummy_db.
+
+    Args:
+        epic_test_db (pytest.fixture): Fixture to load for the whole file tests.
+    """
+    pass
+
+
+def get_serializer_context() -> dict:
+    factory = APIRequestFactory()
+    return {"request": Request(factory.get("/"))}
+
+
+def _add_domain_entities(n_entities: int):
+    """
+    Grows the domain tree with `n_entities` areas, each with one group containing one program (related to all agencies).
+    """
+    agencies = list(Agency.objects.all())
+    for n_entity in range(n_entities):
+        area = Area.objects.create(name=f"Area {n_entity}")
+        group = Group.objects.create(name=f"Group {n_entity}", area=area)
+        program = Program.objects.create(
+            name=f"Program {n_entity}", group=group, description="Lorem ipsum"
+        )
+        program.agencies.set(agencies)
+
+
+@pytest.mark.django_db
+class TestTemplatedHyperlinkedIdentityField:
+    def test_get_url_matches_reverse(self):
+        context = get_serializer_context()
+        url_field = TemplatedHyperlinkedIdentityField(view_name="program-detail")
+        for program in Program.objects.all():
+            assert url_field.get_url(
+                program, "program-detail", context["request"], None
+            ) == reverse(
+                "program-detail",
+                kwargs={"pk": program.pk},
+                request=context["request"],
+            )
+
+    def test_get_url_unsaved_instance_returns_none(self):
+        context = get_serializer_context()
+        url_field = TemplatedHyperlinkedIdentityField(view_name="program-detail")
+        assert (
+            url_field.get_url(
+                Program(name="z"), "program-detail", context["request"], None
+            )
+            is None
+        )
+
+
+@pytest.mark.django_db
+class TestEagerLoadingModelSerializer:
+    @pytest.mark.parametrize(
+        "serializer_type, model_type, expected_queries",
+        [
+            pytest.param(AreaSerializer, Area, 3, id="Areas, groups and programs"),
+            pytest.param(GroupSerializer, Group, 2, id="Groups and programs"),
+            pytest.param(AgencySerializer, Agency, 2, id="Agencies and programs"),
+            pytest.param(
+                ProgramSerializer, Program, 3, id="Programs, agencies and questions"
+            ),
+        ],
+    )
+    def test_serialize_many_fixed_number_of_queries(
+        self,
+        serializer_type: Type[EagerLoadingModelSerializer],
+        model_type: Type[models.Model],
+        expected_queries: int,
+        django_assert_num_queries,
+    ):
+        def serialize_all() -> list:
+            return serializer_type(
+                serializer_type.setup_eager_loading(model_type.objects.all()),
+                many=True,
+                context=get_serializer_context(),
+            ).data
+
+        # Serialize the fixture tree and a (much) bigger one.
+        with django_assert_num_queries(expected_queries):
+            initial_data = serialize_all()
+        _add_domain_entities(20)
+        with django_assert_num_queries(expected_queries):
+            grown_data = serialize_all()
+
+        assert grown_data != initial_data
+
+    @pytest.mark.parametrize(
+        "serializer_type, model_type",
+        [
+            pytest.param(AreaSerializer, Area),
+            pytest.param(GroupSerializer, Group),
+            pytest.param(AgencySerializer, Agency),
+            pytest.param(ProgramSerializer, Program),
+        ],
+    )
+    def test_eager_loading_keeps_serialized_data(
+        self,
+        serializer_type: Type[EagerLoadingModelSerializer],
+        model_type: Type[models.Model],
+    ):
+        context = get_serializer_context()
+        lazy_data = serializer_type(
+            model_type.objects.all(), many=True, context=context
+        ).data
+        eager_data = serializer_type(
+            serializer_type.setup_eager_loading(model_type.objects.all()),
+            many=True,
+            context=context,
+        ).data
+        assert eager_data == lazy_data
+
+    def test_setup_eager_loading_without_prefetches(self):
+        class PlainAgencySerializer(EagerLoadingModelSerializer):
+            class Meta:
+                model = Agency
+                fields = ("url", "id", "name")
+
+        queryset = Agency.objects.all()
+        assert PlainAgencySerializer.setup_eager_loading(queryset) is queryset
+        assert isinstance(
+            PlainAgencySerializer(context=get_serializer_context()).fields["url"],
+            serializers.HyperlinkedIdentityField,
+        )
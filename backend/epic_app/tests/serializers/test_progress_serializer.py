@@ -3,8 +3,18 @@ from multiprocessing.sharedctypes import Value
 import pytest
 from rest_framework import serializers
 
-from epic_app.models.epic_answers import YesNoAnswer
-from epic_app.models.epic_questions import NationalFrameworkQuestion, Question
+from epic_app.models.epic_answers import (
+    MultipleChoiceAnswer,
+    SingleChoiceAnswer,
+    YesNoAnswer,
+    YesNoAnswerType,
+)
+from epic_app.models.epic_questions import (
+    EvolutionQuestion,
+    LinkagesQuestion,
+    NationalFrameworkQuestion,
+    Question,
+)
 from epic_app.models.epic_user import EpicUser
 from epic_app.models.models import Program
 from epic_app.serializers.progress_serializer import (
@@ -104,3 +114,41 @@ class TestProgressSerializer:
         assert isinstance(qa_list, list)
         assert list(qa_list[0].keys()) == ["question", "answer"]
         assert len(qa_list) == len(program.questions.all())
+
+    def test_to_representation_many_programs_fixed_queries(
+        self, epic_test_db, django_assert_num_queries
+    ):
+        # Define test data.
+        e_users = list(EpicUser.objects.all())
+        for e_user in e_users:
+            for nfq in NationalFrameworkQuestion.objects.all():
+                YesNoAnswer.objects.create(
+                    user=e_user, question=nfq, short_answer=YesNoAnswerType.YES
+                )
+            for evq in EvolutionQuestion.objects.all():
+                SingleChoiceAnswer.objects.create(user=e_user, question=evq)
+            for lkq in LinkagesQuestion.objects.all():
+                mca = MultipleChoiceAnswer.objects.create(user=e_user, question=lkq)
+                mca.selected_programs.add(Program.objects.first())
+        fr = self._FakeRequest()
+        fr.user = e_users[0]
+        n_programs = len(Program.objects.all())
+
+        # Run test: programs, questions, answers and one query per answer subtype.
+        with django_assert_num_queries(6):
+            serialized_list = ProgressSerializer(
+                Program.objects.all(),
+                many=True,
+                context={"request": fr, "users": e_users},
+            ).data
+
+        # Verify final expectations.
+        assert len(serialized_list) == n_programs * len(e_users)
+        a_program = Program.objects.get(name="a")
+        for p_entry in serialized_list:
+            if p_entry["program"] != a_program.pk:
+                assert p_entry["progress"] == 0.0
+                continue
+            # 2 NFQ and 1 LNK valid, 2 EVO empty, 1 KAA unanswered.
+            assert p_entry["progress"] == 3 / 6
+            assert all(qa["answer"] for qa in p_entry["questions_answers"][:5])
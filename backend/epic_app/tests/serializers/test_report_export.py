@@ -0,0 +1,159 @@
+import csv
+import io
+
+import pytest
+from openpyxl import load_workbook
+
+from epic_app.models.epic_answers import (
+    MultipleChoiceAnswer,
+    SingleChoiceAnswer,
+    YesNoAnswer,
+    YesNoAnswerType,
+)
+from epic_app.models.epic_questions import (
+    EvolutionChoiceType,
+    EvolutionQuestion,
+    LinkagesQuestion,
+    NationalFrameworkQuestion,
+    Question,
+)
+from epic_app.models.epic_user import EpicUser
+from epic_app.models.models import Program
+from epic_app.serializers.report_export import (
+    REPORT_COLUMNS,
+    AnswersReportRows,
+    stream_report_csv,
+    stream_report_xlsx,
+)
+from epic_app.tests.epic_db_fixture import epic_test_db
+
+
+@pytest.mark.django_db
+class TestAnswersReportRows:
+    @pytest.fixture(autouse=True)
+    def _answers_fixture(self, epic_test_db):
+        for e_user in EpicUser.objects.filter(username__in=["Anakin", "Palpatine"]):
+            for nfq in NationalFrameworkQuestion.objects.all():
+                YesNoAnswer.objects.create(
+                    user=e_user,
+                    question=nfq,
+                    short_answer=YesNoAnswerType.YES,
+                    justify_answer="Because",
+                )
+            for eq in EvolutionQuestion.objects.all():
+                SingleChoiceAnswer.objects.create(
+                    user=e_user,
+                    question=eq,
+                    selected_choice=EvolutionChoiceType.ENGAGED,
+                )
+            for lnk in LinkagesQuestion.objects.all():
+                mca = MultipleChoiceAnswer.objects.create(user=e_user, question=lnk)
+                mca.selected_programs.add(
+                    Program.objects.first(), Program.objects.last()
+                )
+
+    def _get_rows(self, username: str):
+        return [
+            dict(zip(REPORT_COLUMNS, row))
+            for row in AnswersReportRows(EpicUser.objects.filter(username=username))
+        ]
+
+    def test_rows_one_per_answer(self):
+        rows = self._get_rows("Anakin")
+        anakin = EpicUser.objects.get(username="Anakin")
+        assert sorted(r["answer_id"] for r in rows) == sorted(
+            anakin.user_answers.values_list("pk", flat=True)
+        )
+        assert all(r["user"] == "Anakin" for r in rows)
+        assert all(r["organization"] == anakin.organization.name for r in rows)
+
+    def test_rows_ordered_by_program_and_question(self):
+        rows = self._get_rows("Anakin")
+        question_programs = dict(Question.objects.values_list("pk", "program_id"))
+        keys = [
+            (question_programs[r["question_id"]], r["question_id"], r["answer_id"])
+            for r in rows
+        ]
+        assert keys == sorted(keys)
+
+    def test_rows_answer_values(self):
+        rows = {r["question_id"]: r for r in self._get_rows("Anakin")}
+        nfq = NationalFrameworkQuestion.objects.first()
+        assert rows[nfq.pk]["answer"] == YesNoAnswerType.YES.label
+        assert rows[nfq.pk]["justification"] == "Because"
+        assert rows[nfq.pk]["question_type"] == "nationalframeworkquestion"
+        assert rows[nfq.pk]["program"] == nfq.program.name
+        eq = EvolutionQuestion.objects.first()
+        assert rows[eq.pk]["answer"] == EvolutionChoiceType.ENGAGED.label
+        lnk = LinkagesQuestion.objects.first()
+        assert rows[lnk.pk]["answer"] == "; ".join(
+            [Program.objects.first().name, Program.objects.last().name]
+        )
+
+    @pytest.mark.parametrize("chunk_size", [1, 2, 1000])
+    def test_rows_chunked_with_fixed_queries(
+        self, chunk_size: int, settings, django_assert_num_queries
+    ):
+        settings.EPIC_EXPORT_CHUNK_SIZE = chunk_size
+        expected_rows = self._get_rows("Anakin")
+        n_chunks = -(-len(expected_rows) // chunk_size)
+        # One query per chunk (plus the empty one closing the iteration) and one more per chunk with linkages.
+        n_linkages = LinkagesQuestion.objects.count()
+        max_queries = (n_chunks + 1) + min(n_chunks, n_linkages)
+        users = EpicUser.objects.filter(username="Anakin")
+        with django_assert_num_queries(max_queries, exact=False):
+            rows = list(AnswersReportRows(users))
+        assert [dict(zip(REPORT_COLUMNS, r)) for r in rows] == expected_rows
+
+
+@pytest.mark.django_db
+class TestStreamReport:
+    def test_stream_report_csv(self, epic_test_db):
+        e_user = EpicUser.objects.get(username="Anakin")
+        nfq = NationalFrameworkQuestion.objects.first()
+        YesNoAnswer.objects.create(
+            user=e_user, question=nfq, short_answer=YesNoAnswerType.NO
+        )
+        lines = list(stream_report_csv(EpicUser.objects.all()))
+        rows = list(csv.reader(io.StringIO("".join(lines))))
+        assert len(lines) == 2
+        assert rows[0] == REPORT_COLUMNS
+        assert rows[1][REPORT_COLUMNS.index("answer")] == YesNoAnswerType.NO.label
+
+    def test_stream_report_xlsx(self, epic_test_db):
+        e_user = EpicUser.objects.get(username="Anakin")
+        for nfq in NationalFrameworkQuestion.objects.all():
+            YesNoAnswer.objects.create(
+                user=e_user, question=nfq, short_answer=YesNoAnswerType.YES
+            )
+        xlsx_content = b"".join(stream_report_xlsx(EpicUser.objects.all()))
+        rows = list(load_workbook(io.BytesIO(xlsx_content)).active.values)
+        assert list(rows[0]) == REPORT_COLUMNS
+        assert len(rows) == 1 + NationalFrameworkQuestion.objects.count()
+
+    @pytest.mark.parametrize(
+        "justification",
+        ["=1+1", '=HYPERLINK("http://evil", "x")', "+1", "-1", "@SUM(A1)"],
+    )
+    def test_stream_report_neutralizes_formulas(self, epic_test_db, justification: str):
+        e_user = EpicUser.objects.get(username="Anakin")
+        nfq = NationalFrameworkQuestion.objects.first()
+        YesNoAnswer.objects.create(
+            user=e_user,
+            question=nfq,
+            short_answer=YesNoAnswerType.NO,
+            justify_answer=justification,
+        )
+        justification_col = REPORT_COLUMNS.index("justification")
+
+        csv_rows = list(
+            csv.reader(io.StringIO("".join(stream_report_csv(EpicUser.objects.all()))))
+        )
+        assert csv_rows[1][justification_col] == f"'{justification}"
+
+        xlsx_content = b"".join(stream_report_xlsx(EpicUser.objects.all()))
+        xlsx_cell = list(load_workbook(io.BytesIO(xlsx_content)).active.rows)[1][
+            justification_col
+        ]
+        assert xlsx_cell.data_type == "s"
+        assert xlsx_cell.value == justification
@@ -0,0 +1,138 @@
+import copy
+from io import BytesIO
+from typing import Any, Dict, List
+
+import pytest
+from django.core.cache import cache
+from pypdf import PdfReader
+
+from epic_app.serializers import report_pdf
+from epic_app.serializers.report_pdf import EpicPdfReport
+
+
+def _get_report_data(n_programs: int) -> List[Dict[str, Any]]:
+    def get_question(p_idx: int, q_idx: int) -> Dict[str, Any]:
+        return {
+            "url": f"http://testserver/api/question/{p_idx * 10 + q_idx}/",
+            "id": p_idx * 10 + q_idx,
+            "title": f"Question {q_idx} of program {p_idx}",
+            "question_answers": {
+                "answers": [{"id": 1}],
+                "summary": {
+                    "yes": q_idx + 1,
+                    "no": p_idx,
+                    "no_valid_response": 0,
+                    "yes_justify": [f"Justification {j}" for j in range(3 * q_idx)],
+                    "no_justify": [],
+                },
+            },
+        }
+
+    return [
+        {
+            "url": f"http://testserver/api/program/{p_idx}/",
+            "id": p_idx,
+            "name": f"Program {p_idx}",
+            "questions": [get_question(p_idx, q_idx) for q_idx in range(p_idx % 4)],
+        }
+        for p_idx in range(n_programs)
+    ]
+
+
+class TestEpicPdfReport:
+    @pytest.fixture(autouse=True)
+    def _clear_cache(self):
+        cache.clear()
+        yield
+        cache.clear()
+
+    @pytest.fixture
+    def laid_out_sections(self, monkeypatch) -> List[str]:
+        laid_out = []
+
+        def layout_section(section: Dict[str, Any]) -> Dict[str, Any]:
+            laid_out.append(section["name"])
+            return EpicPdfReport().get_section_layout(section)
+
+        monkeypatch.setattr(report_pdf, "_layout_section", layout_section)
+        return laid_out
+
+    def test_get_reported_programs_skips_unanswered(self):
+        report_data = _get_report_data(5)
+        assert EpicPdfReport().get_reported_programs(report_data) == [
+            "Program 1",
+            "Program 2",
+            "Program 3",
+        ]
+
+    def test_generate_report_toc_matches_built_pages(self, monkeypatch):
+        toc_entries = []
+        get_front_matter = EpicPdfReport._get_front_matter
+
+        def front_matter(pdf_report: EpicPdfReport, entries):
+            toc_entries[:] = entries
+            return get_front_matter(pdf_report, entries)
+
+        monkeypatch.setattr(EpicPdfReport, "_get_front_matter", front_matter)
+        buffer = BytesIO()
+        EpicPdfReport().generate_report(buffer, _get_report_data(12))
+
+        report_pages = PdfReader(buffer).pages
+        assert toc_entries
+        for _, text, page in toc_entries:
+            assert text in report_pages[page - 1].extract_text()
+        # Footers are stamped on the assembled sections.
+        assert f"Page {len(report_pages)} " in report_pages[-1].extract_text()
+
+    def test_generate_report_reuses_cached_sections(
+        self, laid_out_sections: List[str], monkeypatch
+    ):
+        report_data = _get_report_data(8)
+        EpicPdfReport().generate_report(BytesIO(), report_data)
+        assert len(laid_out_sections) == len(
+            EpicPdfReport().get_reported_programs(report_data)
+        )
+
+        # Change a single answer (and the absolute urls), only its section is laid out again.
+        laid_out_sections.clear()
+        changed_data = copy.deepcopy(report_data)
+        for p_entry in changed_data:
+            p_entry["url"] = p_entry["url"].replace("testserver", "otherserver")
+        changed_data[2]["questions"][0]["question_answers"]["summary"]["no"] += 1
+        rendered_stories = []
+        get_section_story = EpicPdfReport._get_section_story
+
+        def section_story(pdf_report: EpicPdfReport, section: Dict[str, Any]):
+            rendered_stories.append(section["name"])
+            return get_section_story(pdf_report, section)
+
+        monkeypatch.setattr(EpicPdfReport, "_get_section_story", section_story)
+        EpicPdfReport().generate_report(BytesIO(), changed_data)
+        assert laid_out_sections == ["Program 2"]
+        # The report is assembled from the cached sections, they are not rendered again.
+        assert rendered_stories == ["Program 2"]
+
+    def test_get_section_layouts_is_serial_by_default(self, monkeypatch):
+        def process_pool(*args, **kwargs):
+            raise AssertionError("Only the report worker forks rendering processes.")
+
+        monkeypatch.setattr(report_pdf, "ProcessPoolExecutor", process_pool)
+        pdf_report = EpicPdfReport()
+        sections = [s for s in map(pdf_report._get_section, _get_report_data(12)) if s]
+        assert len(sections) >= report_pdf._MIN_PARALLEL_SECTIONS
+        assert len(pdf_report.get_section_layouts(sections)) == len(sections)
+
+    def test_generate_report_notifies_rendered_programs(self):
+        report_data = _get_report_data(6)
+        rendered = []
+        EpicPdfReport().generate_report(BytesIO(), report_data, rendered.append)
+        assert rendered == EpicPdfReport().get_reported_programs(report_data)
+
+    def test_get_section_layouts_in_process_pool(self):
+        pdf_report = EpicPdfReport()
+        pdf_report.rendering_workers = 2
+        sections = [s for s in map(pdf_report._get_section, _get_report_data(12)) if s]
+        assert len(sections) >= report_pdf._MIN_PARALLEL_SECTIONS
+        assert pdf_report.get_section_layouts(sections) == [
+            pdf_report.get_section_layout(section) for section in sections
+        ]
@@ -21,7 +21,7 @@ from epic_app.models.epic_questions import (
     NationalFrameworkQuestion,
     Question,
 )
-from epic_app.models.epic_user import EpicUser
+from epic_app.models.epic_user import EpicOrganization, EpicUser
 from epic_app.models.models import Program
 from epic_app.serializers.report_serializer import (
     AnswerListReportSerializer,
@@ -278,3 +278,69 @@ class TestProgramReportSerializer:
             context=serializer_context
         ).to_representation(program_instance)
         assert json.dumps(represented_data) == json.dumps(self.expected_program_data)
+
+
+@pytest.mark.django_db
+class TestProgramListReportSerializer:
+    report_query_budget = 9
+
+    def _answer_all_questions(self, n_users: int):
+        organization = EpicOrganization.objects.create(name=f"Org with {n_users}")
+        for n_user in range(n_users):
+            e_user = EpicUser.objects.create(
+                username=f"{organization.name}_{n_user}", organization=organization
+            )
+            for question in NationalFrameworkQuestion.objects.all():
+                YesNoAnswer.objects.create(
+                    user=e_user,
+                    question=question,
+                    short_answer=YesNoAnswerType.YES,
+                    justify_answer="Ullamco sunt dolore.",
+                )
+            for question in EvolutionQuestion.objects.all():
+                SingleChoiceAnswer.objects.create(
+                    user=e_user,
+                    question=question,
+                    selected_choice=EvolutionChoiceType.NASCENT,
+                )
+            for question in LinkagesQuestion.objects.all():
+                mca = MultipleChoiceAnswer.objects.create(
+                    user=e_user, question=question
+                )
+                mca.selected_programs.add(1, 3)
+
+    def _serialize_report(self) -> list:
+        return ProgramReportSerializer(
+            Program.objects.all(),
+            many=True,
+            context={**serializer_context, "users": EpicUser.objects.all()},
+        ).data
+
+    def test_to_representation_matches_single_program_serialization(
+        self, _report_serializer_fixture: pytest.fixture
+    ):
+        self._answer_all_questions(2)
+        represented_data = self._serialize_report()
+        assert len(represented_data) == len(Program.objects.all())
+        for p_data in represented_data:
+            p_expected = ProgramReportSerializer(
+                context={**serializer_context, "users": EpicUser.objects.all()}
+            ).to_representation(Program.objects.get(pk=p_data["id"]))
+            assert json.dumps(p_data) == json.dumps(p_expected)
+
+    def test_to_representation_fixed_number_of_queries(
+        self, _report_serializer_fixture: pytest.fixture, django_assert_num_queries
+    ):
+        with django_assert_num_queries(self.report_query_budget):
+            self._serialize_report()
+
+        # More users and answers should not require more queries.
+        self._answer_all_questions(4)
+        with django_assert_num_queries(self.report_query_budget):
+            represented_data = self._serialize_report()
+        lnk_summary = next(
+            q_data["question_answers"]["summary"]
+            for q_data in represented_data[0]["questions"]
+            if q_data["id"] == 5
+        )
+        assert lnk_summary == {"a": 4, "c": 4, "b": 1, "d": 1, "no_valid_response": 2}
@@ -0,0 +1,188 @@
+import asyncio
+import threading
+import time
+from typing import Any, Dict, List, Tuple
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.signals import request_finished
+from django.test import override_settings
+
+from epic_app import epic_async
+from epic_app.epic_async import EpicASGIHandler, get_executor, run_in_pool
+from epic_app.models.epic_answers import YesNoAnswer, YesNoAnswerType
+from epic_app.models.epic_questions import NationalFrameworkQuestion
+from epic_app.models.epic_user import EpicUser
+from epic_app.serializers.report_pdf import EpicPdfReport
+from epic_app.tests.epic_db_fixture import epic_test_db
+
+
+@pytest.fixture
+def thread_pools(settings):
+    # Fresh pools for each test, so their size follows the test settings.
+    settings.EPIC_ASYNC_THREAD_POOLS = {"read": 4, "render": 1}
+    epic_async._executors.clear()
+    yield settings.EPIC_ASYNC_THREAD_POOLS
+    for executor in epic_async._executors.values():
+        executor.shutdown()
+    epic_async._executors.clear()
+
+
+async def _asgi_get(
+    application: EpicASGIHandler, url: str, username: str
+) -> Tuple[int, bytes, float]:
+    token_key = await run_in_pool(
+        "read", lambda: User.objects.get(username=username).auth_token.key
+    )
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": url,
+        "root_path": "",
+        "query_string": b"",
+        "headers": [
+            (b"host", b"testserver"),
+            (b"authorization", f"Token {token_key}".encode("latin1")),
+        ],
+        "server": ("testserver", 80),
+        "client": ("127.0.0.1", 0),
+    }
+    messages: List[Dict[str, Any]] = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message: Dict[str, Any]):
+        messages.append(message)
+
+    await application(scope, receive, send)
+    body = b"".join(
+        m.get("body", b"") for m in messages if m["type"] == "http.response.body"
+    )
+    return messages[0]["status"], body, time.perf_counter()
+
+
+class TestThreadPools:
+    def test_get_executor_is_bounded_and_shared(self, thread_pools: dict):
+        executor = get_executor("read")
+        assert executor is get_executor("read")
+        assert executor._max_workers == thread_pools["read"]
+        assert get_executor("render")._max_workers == thread_pools["render"]
+
+    def test_run_in_pool_runs_in_pool_thread(self, thread_pools: dict):
+        thread_name = asyncio.run(
+            run_in_pool("render", lambda: threading.current_thread().name)
+        )
+        assert thread_name.startswith("epic-render")
+
+
+@pytest.mark.django_db(transaction=True)
+class TestEpicASGIHandler:
+    @pytest.fixture(autouse=True)
+    def _asgi_fixture(self, epic_test_db, thread_pools: dict):
+        e_user = EpicUser.objects.get(username="Anakin")
+        for nfq in NationalFrameworkQuestion.objects.all():
+            YesNoAnswer.objects.create(
+                user=e_user, question=nfq, short_answer=YesNoAnswerType.YES
+            )
+
+    def test_pooled_routes_run_in_their_pool(self, monkeypatch):
+        handled_in = []
+        get_response = epic_async.BaseHandler.get_response
+
+        def record_thread(handler, request):
+            handled_in.append(threading.current_thread().name)
+            return get_response(handler, request)
+
+        monkeypatch.setattr(epic_async.BaseHandler, "get_response", record_thread)
+        application = EpicASGIHandler()
+        status, _, _ = asyncio.run(_asgi_get(application, "/api/program/", "Anakin"))
+        assert status == 200
+        assert handled_in and handled_in[0].startswith("epic-read")
+
+        # Not pooled routes keep the default (async) handling.
+        handled_in.clear()
+        status, _, _ = asyncio.run(_asgi_get(application, "/api/answer/", "Anakin"))
+        assert status == 200
+        assert handled_in == []
+
+    def test_streaming_report_queries_outside_event_loop(self):
+        status, body, _ = asyncio.run(
+            _asgi_get(EpicASGIHandler(), "/api/epicorganization/report.csv/", "Dooku")
+        )
+        assert status == 200
+        assert len(body.decode("utf-8").splitlines()) == 1 + YesNoAnswer.objects.count()
+
+    def test_streaming_report_is_drained_in_one_thread_and_closed(self, monkeypatch):
+        streamed_in = set()
+        finished = []
+        stream_parts = EpicASGIHandler._stream_parts
+
+        def record_stream(handler, response, send):
+            streamed_in.add(threading.current_thread().name)
+            return stream_parts(handler, response, send)
+
+        def record_finished(**kwargs):
+            finished.append(kwargs["sender"])
+
+        monkeypatch.setattr(epic_async, "_STREAMED_PARTS_BATCH", 2)
+        monkeypatch.setattr(EpicASGIHandler, "_stream_parts", record_stream)
+        request_finished.connect(record_finished)
+        try:
+            status, body, _ = asyncio.run(
+                _asgi_get(
+                    EpicASGIHandler(), "/api/epicorganization/report.csv/", "Dooku"
+                )
+            )
+        finally:
+            request_finished.disconnect(record_finished)
+
+        assert status == 200
+        assert len(body.decode("utf-8").splitlines()) == 1 + YesNoAnswer.objects.count()
+        assert len(streamed_in) == 1
+        assert next(iter(streamed_in)).startswith("epic-render")
+        assert finished
+
+    def test_pdf_reports_are_bounded_to_the_render_pool(
+        self, thread_pools: dict, monkeypatch
+    ):
+        rendering = {"current": 0, "max": 0}
+        rendering_lock = threading.Lock()
+        generate_report = EpicPdfReport.generate_report
+
+        def slow_generate_report(pdf_report, *args, **kwargs):
+            with rendering_lock:
+                rendering["current"] += 1
+                rendering["max"] = max(rendering["max"], rendering["current"])
+            time.sleep(0.3)
+            with rendering_lock:
+                rendering["current"] -= 1
+            return generate_report(pdf_report, *args, **kwargs)
+
+        monkeypatch.setattr(EpicPdfReport, "generate_report", slow_generate_report)
+        application = EpicASGIHandler()
+
+        async def get_concurrently():
+            pdf_requests = asyncio.gather(
+                *[
+                    _asgi_get(application, "/api/epicorganization/report-pdf/", "Dooku")
+                    for _ in range(3)
+                ]
+            )
+            await asyncio.sleep(0.1)
+            light_responses = await asyncio.gather(
+                _asgi_get(application, "/api/area/", "Anakin"),
+                _asgi_get(application, "/api/answer/", "Anakin"),
+            )
+            return await pdf_requests, light_responses
+
+        pdf_responses, light_responses = asyncio.run(get_concurrently())
+        assert [p_status for p_status, _, _ in pdf_responses] == [200] * 3
+        assert rendering["max"] == thread_pools["render"]
+        # Lightweight requests are not queued behind the reports.
+        for l_status, _, l_end in light_responses:
+            assert l_status == 200
+            assert l_end < min(p_end for _, _, p_end in pdf_responses)
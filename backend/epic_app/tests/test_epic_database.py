@@ -0,0 +1,170 @@
+import threading
+import time
+from pathlib import Path
+from typing import Iterator
+
+import django
+import pytest
+from django.db import OperationalError, connections, transaction
+
+from epic_app.epic_database import (
+    check_persistent_connections,
+    is_database_lock_error,
+    retry_on_database_lock,
+)
+
+_alias = "concurrency"
+
+
+@pytest.fixture
+def file_database(
+    settings, monkeypatch, django_db_blocker, tmp_path: Path
+) -> Iterator[str]:
+    """
+    Registers a database alias on a file, as the test database lives in memory.
+    """
+    settings.EPIC_DB_LOCK_RETRY_DELAY = 0.01
+    db_settings = dict(connections.settings["default"])
+    db_settings.update(
+        ENGINE="django.db.backends.sqlite3",
+        NAME=str(tmp_path / "concurrency.sqlite3"),
+        OPTIONS={},
+        TEST={},
+    )
+    monkeypatch.setitem(connections.settings, _alias, db_settings)
+    with django_db_blocker.unblock():
+        with connections[_alias].cursor() as cursor:
+            cursor.execute("CREATE TABLE answer (user INTEGER, question INTEGER)")
+        yield _alias
+        connections[_alias].close()
+    del connections[_alias]
+
+
+def _run_writers(write_answers, n_writers: int) -> list:
+    errors = []
+
+    def run_writer(n_writer: int):
+        try:
+            write_answers(n_writer)
+        except Exception as e_info:
+            errors.append(e_info)
+        finally:
+            connections[_alias].close()
+
+    writers = [
+        threading.Thread(target=run_writer, args=(n_writer,))
+        for n_writer in range(n_writers)
+    ]
+    for writer in writers:
+        writer.start()
+    for writer in writers:
+        writer.join()
+    return errors
+
+
+def _write_answers(n_writer: int, n_answers: int = 5):
+    # Reading before writing upgrades the lock inside the transaction, SQLite does not wait for it.
+    with transaction.atomic(using=_alias):
+        with connections[_alias].cursor() as cursor:
+            cursor.execute("SELECT COUNT(*) FROM answer WHERE user = %s", [n_writer])
+            # Let other writers commit meanwhile.
+            time.sleep(0.01)
+            for n_question in range(n_answers):
+                cursor.execute(
+                    "INSERT INTO answer (user, question) VALUES (%s, %s)",
+                    [n_writer, n_question],
+                )
+
+
+class TestSqliteConnection:
+    def test_pragmas_are_set_on_new_connections(self, file_database: str):
+        with connections[file_database].cursor() as cursor:
+            cursor.execute("PRAGMA journal_mode")
+            assert cursor.fetchone()[0] == "wal"
+            cursor.execute("PRAGMA busy_timeout")
+            assert cursor.fetchone()[0] == 5000
+            cursor.execute("PRAGMA synchronous")
+            # NORMAL
+            assert cursor.fetchone()[0] == 1
+        connections[file_database].close()
+
+    def test_concurrent_writers_with_retries_store_all_answers(
+        self, settings, file_database: str
+    ):
+        settings.EPIC_DB_LOCK_RETRIES = 20
+        n_writers = 16
+        errors = _run_writers(
+            retry_on_database_lock(_write_answers, using=file_database), n_writers
+        )
+
+        assert errors == []
+        with connections[file_database].cursor() as cursor:
+            cursor.execute("SELECT COUNT(*) FROM answer")
+            assert cursor.fetchone()[0] == n_writers * 5
+        connections[file_database].close()
+
+
+class TestRetryOnDatabaseLock:
+    def test_lock_errors_are_retried_up_to_the_limit(self, settings):
+        settings.EPIC_DB_LOCK_RETRIES = 2
+        settings.EPIC_DB_LOCK_RETRY_DELAY = 0
+        attempts = []
+
+        @retry_on_database_lock
+        def locked_write():
+            attempts.append(len(attempts))
+            raise OperationalError("database is locked")
+
+        with pytest.raises(OperationalError):
+            locked_write()
+        assert len(attempts) == 3
+
+    def test_other_errors_are_not_retried(self, settings):
+        settings.EPIC_DB_LOCK_RETRY_DELAY = 0
+        attempts = []
+
+        @retry_on_database_lock
+        def failing_write():
+            attempts.append(len(attempts))
+            raise OperationalError("no such table: answer")
+
+        with pytest.raises(OperationalError):
+            failing_write()
+        assert attempts == [0]
+        assert not is_database_lock_error(ValueError("database is locked"))
+
+    @pytest.mark.django_db
+    def test_writes_inside_a_transaction_are_not_retried(self, settings):
+        settings.EPIC_DB_LOCK_RETRY_DELAY = 0
+        attempts = []
+
+        @retry_on_database_lock
+        def locked_write():
+            attempts.append(len(attempts))
+            raise OperationalError("database is locked")
+
+        with pytest.raises(OperationalError):
+            with transaction.atomic():
+                locked_write()
+        assert attempts == [0]
+
+
+@pytest.mark.django_db
+@pytest.mark.skipif(
+    django.VERSION >= (4, 1), reason="Django checks the connections itself."
+)
+class TestCheckPersistentConnections:
+    def test_unusable_connections_are_closed(self, monkeypatch):
+        db_connection = connections["default"]
+        db_connection.ensure_connection()
+        monkeypatch.setattr(db_connection, "is_usable", lambda: False)
+        monkeypatch.setitem(db_connection.settings_dict, "CONN_HEALTH_CHECKS", False)
+        monkeypatch.setattr(db_connection, "close", lambda: closed.append(True))
+        closed = []
+
+        check_persistent_connections()
+        assert closed == []
+
+        db_connection.settings_dict["CONN_HEALTH_CHECKS"] = True
+        check_persistent_connections()
+        assert closed == [True]
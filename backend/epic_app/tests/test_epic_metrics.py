@@ -0,0 +1,189 @@
+import asyncio
+import threading
+from pathlib import Path
+
+import pytest
+from django.http import HttpRequest, HttpResponse
+from django.test import RequestFactory
+
+from epic_app.epic_async import EpicASGIHandler, run_in_pool
+from epic_app.epic_metrics import (
+    LATENCY_BUCKETS,
+    EpicMetricsMiddleware,
+    MetricsStore,
+    get_request_samples,
+    metrics_store,
+    render_prometheus_text,
+)
+from epic_app.models.models import Program
+
+
+def _get_samples(route: str, duration: float) -> dict:
+    return get_request_samples(
+        route=route,
+        method="GET",
+        status=200,
+        duration=duration,
+        n_queries=3,
+        queries_duration=0.002,
+        response_size=42,
+    )
+
+
+@pytest.fixture
+def metrics_file(settings, tmp_path: Path) -> Path:
+    settings.EPIC_METRICS_FILE = tmp_path / "metrics.sqlite3"
+    settings.EPIC_METRICS_FLUSH_SECONDS = 3600
+    return settings.EPIC_METRICS_FILE
+
+
+class TestGetRequestSamples:
+    def test_latency_is_added_to_the_matching_buckets(self):
+        samples = _get_samples("program-progress", 0.03)
+        buckets = {
+            dict(labels)["le"]: value
+            for (name, labels), value in samples.items()
+            if name == "epic_http_request_duration_seconds_bucket"
+        }
+        assert "0.025" not in buckets
+        assert list(buckets.keys()) == [
+            str(b) for b in LATENCY_BUCKETS if b >= 0.03
+        ] + ["+Inf"]
+        assert set(buckets.values()) == {1}
+
+    def test_route_and_method_label_all_samples(self):
+        for (_, labels), _ in _get_samples("answer-bulk", 0.2).items():
+            assert ("route", "answer-bulk") in labels
+            assert ("method", "GET") in labels
+
+
+class TestMetricsStore:
+    def test_samples_are_aggregated_across_processes(self, metrics_file: Path):
+        # Each store instance plays the role of a gunicorn worker.
+        first_worker, second_worker = MetricsStore(), MetricsStore()
+        first_worker.reset()
+        first_worker.add(_get_samples("epicorganization-report", 0.5))
+        second_worker.add(_get_samples("epicorganization-report", 1.5))
+        # Not flushed yet, the interval did not elapse.
+        assert first_worker._pending
+
+        second_worker.flush()
+        samples = first_worker.get_samples()
+        sum_key = (
+            "epic_http_request_duration_seconds_sum",
+            (("method", "GET"), ("route", "epicorganization-report")),
+        )
+        assert samples[sum_key] == 2.0
+        assert samples[("epic_db_queries_total", sum_key[1])] == 6
+
+    def test_samples_are_flushed_after_the_interval(self, settings, metrics_file):
+        settings.EPIC_METRICS_FLUSH_SECONDS = 0
+        worker = MetricsStore()
+        worker.reset()
+        worker.add(_get_samples("program-progress", 0.1))
+        assert not worker._pending
+        assert MetricsStore().get_samples()
+
+
+class TestRenderPrometheusText:
+    def test_render_histogram_and_counters(self):
+        text = render_prometheus_text(_get_samples("epicorganization-report-pdf", 3))
+        lines = text.splitlines()
+        assert "# TYPE epic_http_request_duration_seconds histogram" in lines
+        assert (
+            'epic_http_requests_total{method="GET",route="epicorganization-report-pdf",status="200"} 1'
+            in lines
+        )
+        bucket_lines = [l for l in lines if "_bucket{" in l]
+        assert bucket_lines[0].startswith(
+            'epic_http_request_duration_seconds_bucket{le="5.0"'
+        )
+        assert 'le="+Inf"' in bucket_lines[-1]
+        assert (
+            'epic_http_response_size_bytes_total{method="GET",route="epicorganization-report-pdf"} 42'
+            in lines
+        )
+
+
+@pytest.mark.django_db(transaction=True)
+class TestEpicMetricsMiddleware:
+    def test_async_requests_count_queries_of_other_threads(
+        self, metrics_file: Path, settings
+    ):
+        settings.EPIC_ASYNC_THREAD_POOLS = {"read": 1}
+        request = RequestFactory().get("/api/program/")
+
+        async def get_response(request: HttpRequest) -> HttpResponse:
+            n_programs = await run_in_pool("read", lambda: Program.objects.count())
+            return HttpResponse(str(n_programs))
+
+        middleware = EpicMetricsMiddleware(get_response)
+        assert asyncio.iscoroutinefunction(middleware)
+        metrics_store.reset()
+        response = asyncio.run(middleware(request))
+
+        assert response.status_code == 200
+        queries = {
+            s_name: value
+            for (s_name, _), value in metrics_store.get_samples().items()
+            if s_name == "epic_db_queries_total"
+        }
+        assert queries == {"epic_db_queries_total": 1}
+
+    def test_async_requests_flush_outside_the_event_loop(
+        self, metrics_file: Path, settings, monkeypatch
+    ):
+        settings.EPIC_METRICS_FLUSH_SECONDS = 0
+        flushed_in = []
+        flush = MetricsStore.flush
+
+        def record_flush(store: MetricsStore):
+            flushed_in.append(threading.current_thread())
+            return flush(store)
+
+        async def get_response(request: HttpRequest) -> HttpResponse:
+            return HttpResponse("")
+
+        monkeypatch.setattr(MetricsStore, "flush", record_flush)
+        middleware = EpicMetricsMiddleware(get_response)
+        response = asyncio.run(middleware(RequestFactory().get("/api/program/")))
+
+        assert response.status_code == 200
+        assert flushed_in and threading.main_thread() not in flushed_in
+
+    def test_asgi_handler_runs_the_async_path(self, metrics_file: Path, monkeypatch):
+        added = []
+
+        async def aadd(samples: dict):
+            added.append(samples)
+
+        def add(samples: dict):
+            raise AssertionError("ASGI requests are measured asynchronously.")
+
+        monkeypatch.setattr(metrics_store, "aadd", aadd)
+        monkeypatch.setattr(metrics_store, "add", add)
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": "/api/answer/",
+            "root_path": "",
+            "query_string": b"",
+            "headers": [(b"host", b"testserver")],
+            "server": ("testserver", 80),
+            "client": ("127.0.0.1", 0),
+        }
+        messages = []
+
+        async def receive():
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        async def send(message: dict):
+            messages.append(message)
+
+        asyncio.run(EpicASGIHandler()(scope, receive, send))
+
+        assert messages[0]["type"] == "http.response.start"
+        assert len(added) == 1
@@ -1,12 +1,19 @@
+import csv
+import io
+import itertools
 import json
 from pathlib import Path
-from typing import Callable, Optional, Type
+from typing import Callable, List, Optional, Type
 
 import pytest
 from django.contrib.auth.models import User
+from django.core.management import call_command
 from django.http import FileResponse
+from openpyxl import load_workbook
+from pypdf import PdfReader
 from rest_framework.test import APIClient
 
+from epic_app.epic_metrics import metrics_store
 from epic_app.models.epic_answers import (
     Answer,
     MultipleChoiceAnswer,
@@ -22,8 +29,11 @@ from epic_app.models.epic_questions import (
     NationalFrameworkQuestion,
     Question,
 )
+from epic_app.models.epic_reports import EpicReportJob, ReportJobStatus
 from epic_app.models.epic_user import EpicOrganization, EpicUser
-from epic_app.models.models import Program
+from epic_app.models.models import Agency, Area, DomainRevision, Group, Program
+from epic_app.serializers.report_export import REPORT_COLUMNS
+from epic_app.serializers.report_pdf import EpicPdfReport
 from epic_app.tests import test_data_dir
 from epic_app.tests.epic_db_fixture import epic_test_db
 from epic_app.utils import get_submodel_type_list
@@ -161,7 +171,23 @@ class TestEpicUserViewSet:
 
         # Verify final exepctations.
         assert response.status_code == 200
-        assert len(response.data) > 1
+        assert len(response.data["results"]) == EpicUser.objects.count()
+        assert [e_user["id"] for e_user in response.data["results"]] == list(
+            EpicUser.objects.order_by("pk").values_list("pk", flat=True)
+        )
+
+    def test_GET_epic_user_as_admin_paged(
+        self,
+        admin_api_client: APIClient,
+    ):
+        # Define test data.
+        response = admin_api_client.get(self.url_root + "?page_size=2")
+        next_response = admin_api_client.get(response.data["next"])
+
+        # Verify final exepctations.
+        assert len(response.data["results"]) == 2
+        assert len(next_response.data["results"]) == EpicUser.objects.count() - 2
+        assert next_response.data["previous"] is not None
 
     def test_GET_epic_user_as_user_not_allowed(
         self,
@@ -383,6 +409,32 @@ class TestEpicOrganizationViewSet:
         assert response.status_code == 200
         assert len(response.data) == len(Program.objects.all())
 
+    def test_RETRIEVE_report_paged_over_programs(
+        self,
+        _report_fixture: dict,
+        admin_api_client: APIClient,
+        django_assert_max_num_queries,
+    ):
+        # Define test data.
+        full_report = admin_api_client.get(self.url_root + "report/").data
+        next_url = self.url_root + "report/?page_size=2"
+
+        # Run request
+        paged_report = []
+        while next_url:
+            # The queries of a page do not depend on the number of programs.
+            with django_assert_max_num_queries(14):
+                response = admin_api_client.get(next_url)
+            assert response.status_code == 200
+            assert len(response.data["results"]) <= 2
+            paged_report.extend(response.data["results"])
+            next_url = response.data["next"]
+
+        # Verify final expectations
+        assert sorted(paged_report, key=lambda p: p["id"]) == sorted(
+            full_report, key=lambda p: p["id"]
+        )
+
     def test_RETRIEVE_pdf_report_As_Advisor_epic_user(
         self, _report_fixture: dict, api_client: APIClient
     ):
@@ -403,6 +455,237 @@ class TestEpicOrganizationViewSet:
             f.write(fs)
         assert output_file.exists()
 
+    def test_RETRIEVE_csv_report_As_Advisor_epic_user(
+        self, _report_fixture: dict, api_client: APIClient
+    ):
+        # The rows of this endpoint are better tested through the serializer.
+        full_url = self.url_root + "report.csv/"
+
+        # Run request
+        set_user_auth_token(api_client, "Dooku")
+        response = api_client.get(full_url)
+
+        # Verify final expectations
+        assert response.status_code == 200
+        assert response.streaming
+        assert response["Content-Type"].startswith("text/csv")
+        assert "answers_report.csv" in response["Content-Disposition"]
+        rows = list(
+            csv.reader(
+                io.StringIO(b"".join(response.streaming_content).decode("utf-8"))
+            )
+        )
+        assert rows[0] == REPORT_COLUMNS
+        assert len(rows) == 1 + Answer.objects.count()
+
+    def test_RETRIEVE_xlsx_report_As_Advisor_epic_user(
+        self, _report_fixture: dict, api_client: APIClient
+    ):
+        full_url = self.url_root + "report.xlsx/"
+
+        # Run request
+        set_user_auth_token(api_client, "Dooku")
+        response = api_client.get(full_url)
+
+        # Verify final expectations
+        assert response.status_code == 200
+        assert response.streaming
+        assert "answers_report.xlsx" in response["Content-Disposition"]
+        workbook = load_workbook(io.BytesIO(b"".join(response.streaming_content)))
+        rows = list(workbook.active.values)
+        assert list(rows[0]) == REPORT_COLUMNS
+        assert len(rows) == 1 + Answer.objects.count()
+
+    def test_RETRIEVE_linkages_matrix_As_admin(
+        self,
+        _report_fixture: dict,
+        admin_api_client: APIClient,
+        django_assert_max_num_queries,
+    ):
+        # Define test data.
+        programs = list(Program.objects.all())
+        linked_programs = {programs[0].pk, programs[-1].pk}
+        linkages_programs = [lnk.program_id for lnk in LinkagesQuestion.objects.all()]
+
+        # Run request
+        with django_assert_max_num_queries(6):
+            response = admin_api_client.get(self.url_root + "linkages/")
+
+        # Verify final expectations
+        assert response.status_code == 200
+        assert [p["id"] for p in response.data["programs"]] == [p.pk for p in programs]
+        assert response.data["linkages"] == [
+            [
+                linkages_programs.count(row.pk) if column.pk in linked_programs else 0
+                for column in programs
+            ]
+            for row in programs
+        ]
+
+    @pytest.mark.parametrize("report_url", ["report.csv/", "report.xlsx/", "linkages/"])
+    def test_RETRIEVE_export_report_As_user_denied(
+        self, report_url: str, api_client: APIClient
+    ):
+        # Run request
+        set_user_auth_token(api_client, "Anakin")
+        response = api_client.get(self.url_root + report_url)
+
+        # Verify final expectations
+        assert response.status_code == 403
+
+
+@pytest.mark.django_db
+class TestEpicReportJobViewSet:
+    url_root = "/api/report-job/"
+
+    @pytest.fixture(autouse=False)
+    def _report_job_fixture(self, settings, tmp_path: Path):
+        settings.EPIC_REPORTS_DIR = tmp_path
+        e_user: EpicUser = EpicUser.objects.get(username="Anakin")
+        for nfq in NationalFrameworkQuestion.objects.all():
+            YesNoAnswer.objects.create(
+                user=e_user, question=nfq, short_answer=YesNoAnswerType.YES
+            )
+
+    def test_POST_report_job_as_user_denied(
+        self, _report_job_fixture: None, api_client: APIClient
+    ):
+        set_user_auth_token(api_client, "Anakin")
+        response = api_client.post(self.url_root)
+
+        # Verify final expectations
+        assert response.status_code == 403
+        assert not EpicReportJob.objects.exists()
+
+    def test_GET_report_jobs_only_returns_own_jobs(
+        self, _report_job_fixture: None, api_client: APIClient
+    ):
+        # Define test data.
+        EpicReportJob.objects.create(requested_by=User.objects.get(username="admin"))
+        set_user_auth_token(api_client, "Dooku")
+        assert api_client.post(self.url_root).status_code == 201
+
+        # Run request.
+        response = api_client.get(self.url_root)
+
+        # Verify final expectations
+        assert response.status_code == 200
+        assert len(response.data) == 1
+        assert response.data[0]["requested_by"] == get_epic_user("Dooku").pk
+
+    def test_report_job_lifecycle_as_advisor_epic_user(
+        self, _report_job_fixture: None, api_client: APIClient, tmp_path: Path
+    ):
+        # Request a new report.
+        set_user_auth_token(api_client, "Dooku")
+        response = api_client.post(self.url_root)
+        assert response.status_code == 201
+        assert response.data["status"] == ReportJobStatus.PENDING
+        assert response.data["organization"] == get_epic_user("Dooku").organization.pk
+        job_url = f"{self.url_root}{response.data['id']}/"
+        assert api_client.get(job_url + "download/").status_code == 409
+
+        # Render it in the worker.
+        call_command("run_report_worker", "--once")
+        response = api_client.get(job_url)
+        assert response.status_code == 200
+        assert response.data["status"] == ReportJobStatus.FINISHED
+        assert response.data["progress"] == 1.0
+        assert response.data["total_programs"] == 1
+        assert response.data["rendered_programs"] == ["a"]
+
+        # Download it.
+        response: FileResponse = api_client.get(job_url + "download/")
+        assert response.status_code == 200
+        assert b"".join(response.streaming_content).startswith(b"%PDF")
+
+        # Same answers reuse the artifact.
+        first_signature = EpicReportJob.objects.get(pk=job_url.split("/")[-2]).signature
+        response = api_client.post(self.url_root)
+        assert response.data["status"] == ReportJobStatus.PENDING
+        call_command("run_report_worker", "--once")
+        assert api_client.get(response.data["url"] + "download/").status_code == 200
+        assert len(list(tmp_path.iterdir())) == 1
+
+        # Changed answers require a new render.
+        YesNoAnswer.objects.all().update(short_answer=YesNoAnswerType.NO)
+        response = api_client.post(self.url_root)
+        call_command("run_report_worker", "--once")
+        changed_job = EpicReportJob.objects.get(pk=response.data["id"])
+        assert changed_job.status == ReportJobStatus.FINISHED
+        assert changed_job.signature != first_signature
+        assert len(list(tmp_path.iterdir())) == 2
+
+    def test_report_jobs_of_other_requesters_do_not_share_artifacts(
+        self, _report_job_fixture: None, api_client: APIClient, tmp_path: Path
+    ):
+        # Define test data.
+        dooku = get_epic_user("Dooku")
+        EpicUser.objects.create(
+            username="Tyranus",
+            password="tyranus",
+            organization=dooku.organization,
+            is_advisor=True,
+        )
+        report_jobs = []
+        for username in ["Dooku", "Tyranus"]:
+            set_user_auth_token(api_client, username)
+            response = api_client.post(self.url_root)
+            assert response.status_code == 201
+            report_jobs.append(response.data["id"])
+
+        # Run test.
+        call_command("run_report_worker", "--once")
+
+        # Verify final expectations.
+        first_job, second_job = (
+            EpicReportJob.objects.get(pk=job_pk) for job_pk in report_jobs
+        )
+        assert first_job.status == second_job.status == ReportJobStatus.FINISHED
+        assert first_job.signature != second_job.signature
+        second_pdf = PdfReader(second_job.get_report_file())
+        assert second_pdf.metadata.author == "Tyranus"
+        assert len(list(tmp_path.iterdir())) == 2
+
+    def test_POST_report_job_does_not_compute_the_report(
+        self, _report_job_fixture: None, api_client: APIClient, monkeypatch
+    ):
+        def get_programs_report(*args, **kwargs):
+            raise AssertionError("The report is only computed by the worker.")
+
+        monkeypatch.setattr(
+            "epic_app.management.commands.run_report_worker.get_programs_report",
+            get_programs_report,
+        )
+        monkeypatch.setattr("epic_app.views.get_programs_report", get_programs_report)
+        set_user_auth_token(api_client, "Dooku")
+        response = api_client.post(self.url_root)
+
+        assert response.status_code == 201
+        assert response.data["status"] == ReportJobStatus.PENDING
+
+    def test_failed_report_job_removes_partial_file(
+        self,
+        _report_job_fixture: None,
+        api_client: APIClient,
+        tmp_path: Path,
+        monkeypatch,
+    ):
+        def generate_report(pdf_report, buffer, *args, **kwargs):
+            buffer.write(b"%PDF partial")
+            raise ValueError("Rendering failed.")
+
+        monkeypatch.setattr(EpicPdfReport, "generate_report", generate_report)
+        set_user_auth_token(api_client, "Dooku")
+        response = api_client.post(self.url_root)
+
+        call_command("run_report_worker", "--once")
+
+        report_job = EpicReportJob.objects.get(pk=response.data["id"])
+        assert report_job.status == ReportJobStatus.FAILED
+        assert report_job.error_message == "Rendering failed."
+        assert list(tmp_path.iterdir()) == []
+
 
 @pytest.mark.django_db
 class TestAreaViewSet:
@@ -665,6 +948,170 @@ class TestProgramViewSet:
         for qa in response.data["questions_answers"]:
             assert qa in _progress_fixture["questions_answers"]
 
+    def test_LIST_progress_epic_user(
+        self, api_client: APIClient, _progress_fixture: dict
+    ):
+        # Define test data.
+        full_url = self.url_root + "progress/"
+        a_program: Program = Program.objects.get(name="a")
+        anakin = EpicUser.objects.get(username="Anakin")
+
+        # Run request.
+        set_user_auth_token(api_client, "Anakin")
+        response = api_client.get(full_url)
+
+        # Verify final expectations.
+        assert response.status_code == 200
+        assert len(response.data) == len(Program.objects.all())
+        assert all(p_entry["user"] == anakin.pk for p_entry in response.data)
+        a_entry = next(p for p in response.data if p["program"] == a_program.pk)
+        assert a_entry["progress"] == _progress_fixture["progress"]
+        for qa in a_entry["questions_answers"]:
+            assert qa in _progress_fixture["questions_answers"]
+        other_entries = [p for p in response.data if p["program"] != a_program.pk]
+        assert all(p_entry["progress"] == 0.0 for p_entry in other_entries)
+
+    @pytest.mark.parametrize(
+        "username, expected_status, expected_users",
+        [
+            pytest.param("Dooku", 200, ["Palpatine", "Anakin", "Dooku"], id="Advisor"),
+            pytest.param("Anakin", 403, [], id="Non-advisor"),
+            pytest.param("admin", 403, [], id="Not an EpicUser"),
+        ],
+    )
+    def test_LIST_progress_all_users(
+        self,
+        username: str,
+        expected_status: int,
+        expected_users: List[str],
+        api_client: APIClient,
+        _progress_fixture: dict,
+    ):
+        # Run request.
+        set_user_auth_token(api_client, username)
+        response = api_client.get(self.url_root + "progress/?all_users=true")
+
+        # Verify final expectations.
+        assert response.status_code == expected_status
+        if expected_status != 200:
+            return
+        expected_pks = [EpicUser.objects.get(username=u).pk for u in expected_users]
+        assert sorted(set(p_entry["user"] for p_entry in response.data)) == sorted(
+            expected_pks
+        )
+        assert len(response.data) == len(expected_users) * len(Program.objects.all())
+        anakin_pk = EpicUser.objects.get(username="Anakin").pk
+        assert sum(p["progress"] for p in response.data if p["user"] == anakin_pk) == (
+            _progress_fixture["progress"]
+        )
+
+
+@pytest.mark.django_db
+class TestDomainRevisionCache:
+    domain_urls = ["/api/area/", "/api/agency/", "/api/group/", "/api/program/1/"]
+
+    @pytest.mark.parametrize("full_url", domain_urls)
+    def test_GET_conditional_returns_not_modified(
+        self, full_url: str, api_client: APIClient
+    ):
+        # Define test data.
+        set_user_auth_token(api_client, "Palpatine")
+        response = api_client.get(full_url)
+        assert response.status_code == 200
+        assert response.has_header("ETag")
+        assert response.has_header("Last-Modified")
+
+        # Run test.
+        etag_response = api_client.get(full_url, HTTP_IF_NONE_MATCH=response["ETag"])
+        modified_response = api_client.get(
+            full_url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]
+        )
+
+        # Verify final expectations.
+        assert etag_response.status_code == 304
+        assert etag_response["ETag"] == response["ETag"]
+        assert modified_response.status_code == 304
+
+    @pytest.mark.parametrize("full_url", domain_urls)
+    def test_GET_repeated_is_served_from_cache(
+        self, full_url: str, api_client: APIClient, django_assert_num_queries
+    ):
+        # Define test data.
+        set_user_auth_token(api_client, "Palpatine")
+        response = api_client.get(full_url)
+
+        # Run test, only the authentication and the revision are queried.
+        with django_assert_num_queries(2):
+            cached_response = api_client.get(full_url)
+
+        # Verify final expectations.
+        assert cached_response.status_code == 200
+        assert cached_response.data == response.data
+        assert cached_response["ETag"] == response["ETag"]
+
+    @pytest.mark.parametrize(
+        "full_url, expected_queries",
+        [
+            pytest.param("/api/area/", 3, id="Areas, groups and programs"),
+            pytest.param("/api/agency/", 2, id="Agencies and programs"),
+            pytest.param("/api/group/", 2, id="Groups and programs"),
+            pytest.param("/api/program/", 3, id="Programs, agencies and questions"),
+        ],
+    )
+    def test_GET_domain_tree_fixed_number_of_queries(
+        self,
+        full_url: str,
+        expected_queries: int,
+        api_client: APIClient,
+        django_assert_num_queries,
+    ):
+        # Define test data.
+        a_group = Group.objects.all().first()
+        for n_area in range(10):
+            area = Area.objects.create(name=f"Area {n_area}")
+            Group.objects.create(name=f"Group {n_area}", area=area)
+            Program.objects.create(
+                name=f"Program {n_area}", group=a_group, description="Lorem"
+            ).agencies.set(Agency.objects.all())
+        DomainRevision.get_current()
+        set_user_auth_token(api_client, "Palpatine")
+
+        # Run test, authentication and revision plus the serialized tree.
+        with django_assert_num_queries(2 + expected_queries):
+            response = api_client.get(full_url)
+
+        # Verify final expectations.
+        assert response.status_code == 200
+
+    def test_GET_after_revision_bump_returns_new_data(self, api_client: APIClient):
+        # Define test data.
+        full_url = "/api/area/"
+        set_user_auth_token(api_client, "Palpatine")
+        response = api_client.get(full_url)
+        Area.objects.create(name="gamma")
+        DomainRevision.bump()
+
+        # Run test.
+        bumped_response = api_client.get(full_url, HTTP_IF_NONE_MATCH=response["ETag"])
+
+        # Verify final expectations.
+        assert bumped_response.status_code == 200
+        assert bumped_response["ETag"] != response["ETag"]
+        assert len(bumped_response.data) == len(response.data) + 1
+
+    def test_GET_cached_still_requires_authentication(self, api_client: APIClient):
+        # Define test data.
+        full_url = "/api/area/"
+        set_user_auth_token(api_client, "Palpatine")
+        api_client.get(full_url)
+
+        # Run test.
+        api_client.credentials()
+        response = api_client.get(full_url)
+
+        # Verify final expectations.
+        assert response.status_code == 403
+
 
 @pytest.mark.django_db
 class TestQuestionViewSet:
@@ -678,7 +1125,27 @@ class TestQuestionViewSet:
 
         # Verify final expectations.
         assert response.status_code == 200
-        assert len(response.data) == 6
+        assert len(response.data["results"]) == 6
+        assert response.data["next"] is None
+
+    def test_GET_question_cursor_pages(self, api_client: APIClient, settings):
+        # Define test data.
+        settings.EPIC_PAGE_SIZE = 4
+        set_user_auth_token(api_client, "Palpatine")
+        first_page = api_client.get(self.url_root)
+
+        # Run test.
+        Question.objects.filter(pk=first_page.data["results"][0]["id"]).delete()
+        second_page = api_client.get(first_page.data["next"])
+        custom_page = api_client.get(self.url_root + "?page_size=10")
+
+        # Verify final expectations.
+        assert len(first_page.data["results"]) == 4
+        assert [q["id"] for q in second_page.data["results"]] == list(
+            Question.objects.order_by("pk").values_list("pk", flat=True)[3:]
+        )
+        assert second_page.data["next"] is None
+        assert len(custom_page.data["results"]) == Question.objects.count()
 
     @pytest.mark.parametrize("username", [("Palpatine"), ("admin")])
     @pytest.mark.parametrize("q_type", q_subtypes)
@@ -702,7 +1169,7 @@ class TestQuestionViewSet:
         q_pk = q_type.objects.all().first().pk
         full_url = self.url_root + str(q_pk) + "/answers/"
 
-        # Remove all previous answers, the call should create a new one
+        # Remove all previous answers, the call should return a placeholder.
         Answer.objects.all().delete()
 
         # Run test
@@ -711,8 +1178,66 @@ class TestQuestionViewSet:
 
         # Verify final expectations.
         assert response.status_code == 200
-        # One user = One (new) answer
+        # One user = One (placeholder) answer, nothing gets stored.
         assert len(response.data) == 1
+        assert response.data[0]["id"] is None
+        assert response.data[0]["question"] == q_pk
+        assert not Answer.objects.exists()
+
+    @pytest.mark.parametrize("q_type", q_subtypes)
+    def test_RETRIEVE_answers_for_epic_user_create_missing(
+        self, q_type: Type[Question], api_client: APIClient
+    ):
+        # Define test data.
+        q_pk = q_type.objects.all().first().pk
+        full_url = self.url_root + str(q_pk) + "/answers/?create_missing=true"
+        Answer.objects.all().delete()
+
+        # Run test
+        set_user_auth_token(api_client, "Palpatine")
+        response = api_client.get(full_url)
+        second_response = api_client.get(full_url)
+
+        # Verify final expectations.
+        assert response.status_code == 200
+        assert len(response.data) == 1
+        stored_answer = Answer.objects.get(question=q_pk, user__username="Palpatine")
+        assert response.data[0]["id"] == stored_answer.pk
+        assert second_response.data[0]["id"] == stored_answer.pk
+        assert Answer.objects.count() == 1
+
+    @pytest.mark.parametrize("q_pk", ["abc", "4242"])
+    def test_RETRIEVE_answers_for_unknown_question(
+        self, q_pk: str, api_client: APIClient
+    ):
+        # Define test data.
+        full_url = self.url_root + q_pk + "/answers/"
+
+        # Run test
+        set_user_auth_token(api_client, "Palpatine")
+        response = api_client.get(full_url)
+
+        # Verify final expectations.
+        assert response.status_code == 404
+
+    def test_RETRIEVE_answers_returns_existing_answer(self, api_client: APIClient):
+        # Define test data.
+        palpatine = EpicUser.objects.get(username="Palpatine")
+        question = NationalFrameworkQuestion.objects.all().first()
+        Answer.objects.all().delete()
+        YesNoAnswer.objects.create(
+            user=palpatine, question=question, short_answer=YesNoAnswerType.YES
+        )
+        full_url = self.url_root + str(question.pk) + "/answers/"
+
+        # Run test
+        set_user_auth_token(api_client, "Palpatine")
+        response = api_client.get(full_url)
+
+        # Verify final expectations.
+        assert response.status_code == 200
+        assert len(response.data) == 1
+        assert response.data[0]["short_answer"] == YesNoAnswerType.YES
 
     @pytest.mark.parametrize("q_type", q_subtypes)
     def test_RETRIEVE_answers_for_superuser(
@@ -721,13 +1246,55 @@ class TestQuestionViewSet:
         # Define test data.
         q_pk = q_type.objects.all().first().pk
         full_url = self.url_root + str(q_pk) + "/answers/"
+        n_answers = Answer.objects.count()
         set_user_auth_token(api_client, "admin")
         response = api_client.get(full_url)
 
         # Verify final expectations.
         assert response.status_code == 200
         # As many answers as users there are
-        assert len(response.data) == len(EpicUser.objects.all())
+        assert response.data["next"] is None
+        assert len(response.data["results"]) == len(EpicUser.objects.all())
+        assert Answer.objects.count() == n_answers
+
+    def test_RETRIEVE_answers_for_superuser_is_paginated(self, api_client: APIClient):
+        # Define test data.
+        q_pk = EvolutionQuestion.objects.all().first().pk
+        next_url = self.url_root + str(q_pk) + "/answers/?page_size=2"
+        e_users = list(EpicUser.objects.order_by("pk"))
+
+        # Run test
+        set_user_auth_token(api_client, "admin")
+        pages = []
+        while next_url:
+            response = api_client.get(next_url)
+            assert response.status_code == 200
+            pages.append([a["user"] for a in response.data["results"]])
+            next_url = response.data["next"]
+
+        # Verify final expectations.
+        assert pages[0] == [e_user.pk for e_user in e_users[0:2]]
+        assert list(itertools.chain(*pages)) == [e_user.pk for e_user in e_users]
+
+    def test_RETRIEVE_answers_fixed_queries(
+        self, api_client: APIClient, django_assert_max_num_queries
+    ):
+        # Define test data.
+        q_pk = LinkagesQuestion.objects.all().first().pk
+        Answer.objects.all().delete()
+        for n_user in range(20):
+            EpicUser.objects.create(username=f"Clone{n_user}", password="clone")
+        full_url = self.url_root + str(q_pk) + "/answers/?create_missing=true"
+        set_user_auth_token(api_client, "admin")
+
+        # Run test (includes the conflict-safe creation of the answer summaries).
+        with django_assert_max_num_queries(20):
+            response = api_client.get(full_url)
+
+        # Verify final expectations.
+        assert response.status_code == 200
+        assert len(response.data["results"]) == EpicUser.objects.count()
+        assert Answer.objects.count() == EpicUser.objects.count()
 
 
 @pytest.mark.django_db
@@ -860,10 +1427,10 @@ class TestAnswerViewSet:
         # Verify final expectations.
         assert response.status_code == 200
         if not username == self.anakin.username:
-            assert len(response.data) == 0
+            assert len(response.data["results"]) == 0
             return
-        assert len(response.data) == 3
-        assert json.dumps(response.data) == json.dumps(expected_values)
+        assert len(response.data["results"]) == 3
+        assert json.dumps(response.data["results"]) == json.dumps(expected_values)
 
     @pytest.mark.parametrize("username", answer_fixture_users)
     @pytest.mark.parametrize("answer_type", get_submodel_type_list(Answer))
@@ -1015,6 +1582,106 @@ class TestAnswerViewSet:
         assert changed_answer is not None
         self._compare_answer_fields(changed_answer, json_data, lambda x, y: x == y)
 
+    @pytest.mark.parametrize("epic_username", answer_fixture_users)
+    def test_POST_bulk_answers(
+        self, epic_username: str, api_client: APIClient, _answers_fixture: dict
+    ):
+        # Define test data.
+        json_data = [
+            dict(question=1, short_answer="Y", justify_answer="For my own reasons"),
+            dict(question=2, short_answer="N"),
+            dict(question=3, selected_choice=str(EvolutionChoiceType.NASCENT)),
+            dict(question=5, selected_programs=[1, 3]),
+        ]
+        full_url = self.url_root + "bulk/"
+
+        # Run test.
+        set_user_auth_token(api_client, epic_username)
+        response = api_client.post(full_url, json_data, format="json")
+
+        # Verify final expectations.
+        if epic_username == "admin":
+            assert response.status_code == 403
+            return
+        assert response.status_code == 200
+        epic_user = EpicUser.objects.get(username=epic_username)
+        owns_fixture = epic_username == "Anakin"
+        assert [r["question"] for r in response.data] == [1, 2, 3, 5]
+        assert [r["created"] for r in response.data] == [
+            not owns_fixture,
+            True,
+            not owns_fixture,
+            not owns_fixture,
+        ]
+        assert Answer.objects.filter(user=epic_user).count() == 4
+        assert YesNoAnswer.objects.get(pk=response.data[0]["id"]).short_answer == "Y"
+        assert (
+            SingleChoiceAnswer.objects.get(pk=response.data[2]["id"]).selected_choice
+            == EvolutionChoiceType.NASCENT
+        )
+        assert [
+            p.pk
+            for p in MultipleChoiceAnswer.objects.get(
+                pk=response.data[3]["id"]
+            ).selected_programs.order_by("pk")
+        ] == [1, 3]
+
+    def test_POST_bulk_answers_invalid_stores_nothing(
+        self, api_client: APIClient, _answers_fixture: dict
+    ):
+        json_data = [
+            dict(question=1, short_answer="Y"),
+            dict(question=3, selected_choice="Z"),
+        ]
+        set_user_auth_token(api_client, "Anakin")
+        response = api_client.post(self.url_root + "bulk/", json_data, format="json")
+
+        assert response.status_code == 400
+        assert response.data[0] == {}
+        assert "selected_choice" in response.data[1]
+        assert YesNoAnswer.objects.get(pk=self.yna.pk).short_answer == "N"
+
+
+@pytest.mark.django_db
+class TestMetricsViewSet:
+    url_root = "/api/metrics/"
+
+    @pytest.fixture(autouse=True)
+    def _metrics_fixture(self, settings, tmp_path: Path):
+        settings.EPIC_METRICS_FILE = tmp_path / "metrics.sqlite3"
+        metrics_store.reset()
+
+    def test_GET_metrics_as_non_staff_is_forbidden(self, api_client: APIClient):
+        set_user_auth_token(api_client, "Dooku")
+        assert api_client.get(self.url_root).status_code == 403
+
+    def test_GET_metrics_labels_hot_routes(self, api_client: APIClient):
+        set_user_auth_token(api_client, "Palpatine")
+        program_pk = Program.objects.first().pk
+        assert api_client.get(f"/api/program/{program_pk}/progress/").status_code == 200
+        bulk_data = [dict(question=1, short_answer="Y")]
+        assert (
+            api_client.post("/api/answer/bulk/", bulk_data, format="json").status_code
+            == 200
+        )
+        set_user_auth_token(api_client, "admin")
+        assert api_client.get("/api/epicorganization/report/").status_code == 200
+
+        response = api_client.get(self.url_root)
+
+        assert response.status_code == 200
+        assert response["Content-Type"].startswith("text/plain; version=0.0.4")
+        metrics_text = response.content.decode("utf-8")
+        for route_labels in [
+            'method="GET",route="program-progress",status="200"',
+            'method="POST",route="answer-bulk",status="200"',
+            'method="GET",route="epicorganization-report",status="200"',
+        ]:
+            assert f"epic_http_requests_total{{{route_labels}}} 1" in metrics_text
+        assert (
+            'epic_db_queries_total{method="POST",route="answer-bulk"}' in metrics_text
+        )
+
 
 @pytest.mark.django_db
 class TestApiDocumentation:
@@ -0,0 +1,161 @@
+from typing import Type
+
+import pytest
+
+from epic_app.models.epic_answers import (
+    Answer,
+    MultipleChoiceAnswer,
+    SingleChoiceAnswer,
+    YesNoAnswer,
+)
+from epic_app.models.epic_questions import (
+    EvolutionQuestion,
+    KeyAgencyActionsQuestion,
+    LinkagesQuestion,
+    NationalFrameworkQuestion,
+    Question,
+)
+from epic_app.models.epic_user import EpicUser
+from epic_app.tests.epic_db_fixture import epic_test_db
+from epic_app.utils import (
+    backfill_submodel_types,
+    bulk_create_submodel_instances,
+    get_instance_as_submodel_type,
+    get_instances_as_submodel_type,
+    get_submodel_instances,
+    get_submodel_name,
+    get_submodel_type,
+    get_submodel_type_by_name,
+    get_submodel_type_list,
+)
+
+
+@pytest.fixture(autouse=True)
+def utils_fixture(epic_test_db: pytest.fixture):
+    """
+    Dummy fixture just to load a default db from dummy_db, plus one answer per `Answer` subtype.
+
+    Args:
+        epic_test_db (pytest.fixture): Fixture to load for the whole file tests.
+    """
+    e_user = EpicUser.objects.get(username="Anakin")
+    YesNoAnswer.objects.create(
+        user=e_user, question=NationalFrameworkQuestion.objects.first()
+    )
+    SingleChoiceAnswer.objects.create(
+        user=e_user, question=EvolutionQuestion.objects.first()
+    )
+    MultipleChoiceAnswer.objects.create(
+        user=e_user, question=LinkagesQuestion.objects.first()
+    )
+
+
+@pytest.mark.django_db
+class TestSubmodelResolution:
+    @pytest.mark.parametrize(
+        "base_type", [pytest.param(Question), pytest.param(Answer)]
+    )
+    def test_save_stores_submodel_name(self, base_type: Type[Question]):
+        for sm_type in get_submodel_type_list(base_type):
+            for sm_instance in sm_type.objects.all():
+                stored = base_type.objects.get(pk=sm_instance.pk).subtype
+                assert stored == get_submodel_name(sm_type)
+                assert get_submodel_type_by_name(base_type, stored) == sm_type
+
+    def test_get_submodel_type_by_name_unknown_returns_none(self):
+        assert get_submodel_type_by_name(Question, "") is None
+        assert get_submodel_type_by_name(Question, "notaquestion") is None
+
+    @pytest.mark.parametrize(
+        "base_type", [pytest.param(Question), pytest.param(Answer)]
+    )
+    def test_get_submodel_type_one_query(
+        self, base_type: Type[Question], django_assert_num_queries
+    ):
+        for sm_type in get_submodel_type_list(base_type):
+            sm_pk = sm_type.objects.first().pk
+            with django_assert_num_queries(1):
+                assert get_submodel_type(base_type, sm_pk) == sm_type
+
+    def test_get_instance_as_submodel_type_one_query(self, django_assert_num_queries):
+        for q_instance in Question.objects.all():
+            with django_assert_num_queries(1):
+                sm_instance = get_instance_as_submodel_type(q_instance)
+            assert type(sm_instance) == get_submodel_type_by_name(
+                Question, q_instance.subtype
+            )
+            assert sm_instance.pk == q_instance.pk
+
+    def test_get_instance_as_submodel_type_concrete_no_query(
+        self, django_assert_num_queries
+    ):
+        nfq = NationalFrameworkQuestion.objects.first()
+        with django_assert_num_queries(0):
+            assert get_instance_as_submodel_type(nfq) is nfq
+
+    def test_get_instances_as_submodel_type_one_query_per_subtype(
+        self, django_assert_num_queries
+    ):
+        questions = list(Question.objects.all())
+        n_subtypes = len(set(q.subtype for q in questions))
+        with django_assert_num_queries(n_subtypes):
+            sm_instances = get_instances_as_submodel_type(questions)
+        assert [q.pk for q in sm_instances] == [q.pk for q in questions]
+        assert all(type(q) != Question for q in sm_instances)
+
+    def test_get_submodel_instances_keeps_order(self, django_assert_num_queries):
+        pks = [str(a.pk) for a in Answer.objects.all().order_by("-pk")]
+        with django_assert_num_queries(1 + len(get_submodel_type_list(Answer))):
+            sm_instances = get_submodel_instances(Answer, pks)
+        assert [str(a.pk) for a in sm_instances] == pks
+        assert [type(a) for a in sm_instances] == [
+            MultipleChoiceAnswer,
+            SingleChoiceAnswer,
+            YesNoAnswer,
+        ]
+
+    def test_legacy_rows_are_resolved_and_backfilled(self):
+        # Simulate rows created before the discriminator column existed.
+        Question.objects.all().update(subtype="")
+        kaa = KeyAgencyActionsQuestion.objects.first()
+        assert get_submodel_type(Question, kaa.pk) == KeyAgencyActionsQuestion
+        assert type(get_instance_as_submodel_type(Question.objects.get(pk=kaa.pk))) == (
+            KeyAgencyActionsQuestion
+        )
+        assert [
+            type(q) for q in get_instances_as_submodel_type(Question.objects.all())
+        ] == [type(get_instance_as_submodel_type(q)) for q in Question.objects.all()]
+
+        # Run backfill.
+        assert backfill_submodel_types(Question) == len(Question.objects.all())
+        assert not Question.objects.filter(subtype="").exists()
+        assert backfill_submodel_types(Question) == 0
+
+
+@pytest.mark.django_db
+class TestBulkCreateSubmodelInstances:
+    def test_bulk_create_inserts_base_and_submodel_rows(
+        self, django_assert_num_queries
+    ):
+        e_user = EpicUser.objects.get(username="Palpatine")
+        new_answers = [
+            YesNoAnswer(user=e_user, question=q, short_answer="Y")
+            for q in NationalFrameworkQuestion.objects.all()
+        ]
+        assert len(new_answers) > 1
+
+        with django_assert_num_queries(2):
+            bulk_create_submodel_instances(YesNoAnswer, new_answers)
+
+        assert all(a.pk for a in new_answers)
+        for new_answer in new_answers:
+            stored = YesNoAnswer.objects.get(pk=new_answer.pk)
+            assert stored.short_answer == "Y"
+            assert stored.user == e_user
+            assert stored.subtype == get_submodel_name(YesNoAnswer)
+
+    def test_bulk_create_without_instances_does_nothing(
+        self, django_assert_num_queries
+    ):
+        with django_assert_num_queries(0):
+            assert bulk_create_submodel_instances(YesNoAnswer, []) == []
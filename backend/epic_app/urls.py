@@ -12,6 +12,7 @@ router = routers.DefaultRouter()
 # User url's
 router.register(r"epicorganization", views.EpicOrganizationViewSet)
 router.register(r"epicuser", views.EpicUserViewSet)
+router.register(r"report-job", views.EpicReportJobViewSet)
 
 # Readonly Epic Domain
 router.register(r"area", views.AreaViewSet)
@@ -23,6 +24,30 @@ router.register(r"program", views.ProgramViewSet)
 router.register(r"question", views.QuestionViewSet)
 router.register(r"answer", views.AnswerViewSet)
 
+# Monitoring
+router.register(r"metrics", views.MetricsViewSet, basename="metrics")
+
+# Routes handled in a bounded thread pool under ASGI (`epic_core.asgi`), see `epic_app.epic_async.EpicASGIHandler`.
+# Reports are rendered in their own small pool, so they do not starve the lightweight requests.
+async_routes = {
+    **{
+        f"{basename}-{suffix}": "read"
+        for basename in ["area", "agency", "group", "program", "question"]
+        for suffix in ["list", "detail"]
+    },
+    "program-progress": "read",
+    "program-progress-list": "read",
+    "program-question_nationalframework": "read",
+    "program-question_keyagencyactions": "read",
+    "program-question_evolution": "read",
+    "program-question_linkages": "read",
+    "epicorganization-report": "read",
+    "epicorganization-linkages": "read",
+    "epicorganization-report-pdf": "render",
+    "epicorganization-report-csv": "render",
+    "epicorganization-report-xlsx": "render",
+}
+
 # Wire up our API using automatic URL routing.
 # Additionally, we include login URLs for the browsable API.
 urlpatterns = [
@@ -1,7 +1,10 @@
 import itertools
-from typing import List, Type
+from typing import Dict, Iterable, List, Optional, Type
 
-from django.db import models
+from django.db import connections, models, router
+
+# Name of the (base model) column storing the concrete submodel of each row.
+SUBMODEL_FIELD = "subtype"
 
 
 def get_submodel_type_list(model: Type[models.Model]) -> List[Type[models.Model]]:
@@ -23,12 +26,86 @@ def get_submodel_type_list(model: Type[models.Model]) -> List[Type[models.Model]
     return list(itertools.chain(*subtypes))
 
 
-def get_submodel_type(model_type: Type[models.Model], pk: str) -> Type[models.Model]:
-    l_subtypes = get_submodel_type_list(model_type)
-    sm_type = next(
-        (q_t for q_t in l_subtypes if q_t.objects.filter(pk=pk).exists()),
+def get_submodel_name(model_type: Type[models.Model]) -> str:
+    """
+    Gets the discriminator value stored for rows of the given (sub)model type.
+
+    Args:
+        model_type (Type[models.Model]): Concrete model type.
+
+    Returns:
+        str: Value to store in the `SUBMODEL_FIELD` column.
+    """
+    return model_type._meta.model_name
+
+
+def get_submodel_type_by_name(
+    model_type: Type[models.Model], submodel_name: Optional[str]
+) -> Optional[Type[models.Model]]:
+    """
+    Gets the submodel type of `model_type` matching the given discriminator value.
+
+    Args:
+        model_type (Type[models.Model]): Base model Type containing submodels.
+        submodel_name (Optional[str]): Discriminator value as stored in the database.
+
+    Returns:
+        Optional[Type[models.Model]]: Matching submodel type, `None` when not found.
+    """
+    if not submodel_name:
+        return None
+    return next(
+        (
+            sm_t
+            for sm_t in get_submodel_type_list(model_type)
+            if get_submodel_name(sm_t) == submodel_name
+        ),
         None,
     )
+
+
+def _has_submodel_field(model_type: Type[models.Model]) -> bool:
+    return any(f.name == SUBMODEL_FIELD for f in model_type._meta.concrete_fields)
+
+
+def _probe_submodel_type(
+    model_type: Type[models.Model], pk: str
+) -> Optional[Type[models.Model]]:
+    """
+    Legacy resolution for rows without discriminator, it queries each submodel table.
+    """
+    return next(
+        (
+            q_t
+            for q_t in get_submodel_type_list(model_type)
+            if q_t.objects.filter(pk=pk).exists()
+        ),
+        None,
+    )
+
+
+def get_submodel_type(model_type: Type[models.Model], pk: str) -> Type[models.Model]:
+    """
+    Gets the submodel type of the `model_type` entry with the given `pk` by reading its discriminator column (one query).
+    Rows that were never backfilled are resolved by probing each of the submodel tables.
+
+    Args:
+        model_type (Type[models.Model]): Base model Type containing submodels.
+        pk (str): Primary key of the entry.
+
+    Returns:
+        Type[models.Model]: Found submodel type, `None` when not found.
+    """
+    sm_type = None
+    if _has_submodel_field(model_type):
+        submodel_name = (
+            model_type.objects.filter(pk=pk)
+            .values_list(SUBMODEL_FIELD, flat=True)
+            .first()
+        )
+        sm_type = get_submodel_type_by_name(model_type, submodel_name)
+    if not sm_type:
+        sm_type = _probe_submodel_type(model_type, pk)
     return sm_type
 
 
@@ -36,5 +113,166 @@ def get_instance_as_submodel_type(model_instance: models.Model) -> models.Model:
     """
     Gets the instance equivalent as a submodel. This model is done to avoid using the polymorphic library for django.
     """
-    submodel_type = get_submodel_type(type(model_instance), model_instance.pk)
+    model_type = type(model_instance)
+    submodel_name = getattr(model_instance, SUBMODEL_FIELD, None)
+    if submodel_name == get_submodel_name(model_type):
+        # Already a concrete instance.
+        return model_instance
+    submodel_type = get_submodel_type_by_name(model_type, submodel_name)
+    if not submodel_type:
+        submodel_type = get_submodel_type(model_type, model_instance.pk)
     return submodel_type.objects.get(pk=model_instance.pk)
+
+
+def get_instances_as_submodel_type(
+    model_instances: Iterable[models.Model],
+) -> List[models.Model]:
+    """
+    Gets the submodel equivalent of all given instances with one query per present submodel type.
+    The order of the given instances is preserved.
+
+    Args:
+        model_instances (Iterable[models.Model]): Base model instances (or queryset) to resolve.
+
+    Returns:
+        List[models.Model]: Resolved submodel instances.
+    """
+    model_instances = list(model_instances)
+    if not model_instances:
+        return []
+    resolved: Dict[str, models.Model] = {}
+    pks_by_type: Dict[Type[models.Model], List[str]] = {}
+    unknown_pks: List[str] = []
+    for m_instance in model_instances:
+        model_type = type(m_instance)
+        submodel_name = getattr(m_instance, SUBMODEL_FIELD, None)
+        if submodel_name == get_submodel_name(model_type):
+            resolved[m_instance.pk] = m_instance
+            continue
+        submodel_type = get_submodel_type_by_name(model_type, submodel_name)
+        if submodel_type:
+            pks_by_type.setdefault(submodel_type, []).append(m_instance.pk)
+        else:
+            unknown_pks.append(m_instance.pk)
+
+    if unknown_pks:
+        # Legacy rows: find them in every submodel table at once.
+        for sm_type in get_submodel_type_list(type(model_instances[0])):
+            pks_by_type.setdefault(sm_type, []).extend(unknown_pks)
+
+    for sm_type, sm_pks in pks_by_type.items():
+        resolved.update(sm_type.objects.in_bulk(sm_pks))
+    return [resolved.get(m_instance.pk, m_instance) for m_instance in model_instances]
+
+
+def get_submodel_instances(
+    model_type: Type[models.Model], pks: Iterable[str]
+) -> List[models.Model]:
+    """
+    Gets the submodel instances of `model_type` for all the given `pks`.
+    It requires one query to read the discriminators plus one query per present submodel type.
+
+    Args:
+        model_type (Type[models.Model]): Base model Type containing submodels.
+        pks (Iterable[str]): Primary keys of the entries to retrieve.
+
+    Returns:
+        List[models.Model]: Found submodel instances ordered as the given `pks`.
+    """
+    pks = [model_type._meta.pk.to_python(pk) for pk in pks]
+    base_instances = model_type.objects.only(SUBMODEL_FIELD).in_bulk(pks)
+    return get_instances_as_submodel_type(
+        base_instances[pk] for pk in pks if pk in base_instances
+    )
+
+
+def bulk_create_submodel_instances(
+    submodel_type: Type[models.Model], instances: List[models.Model]
+) -> List[models.Model]:
+    """
+    Inserts the given (new) instances of a multi-table inherited submodel with one query per table (and batch).
+    `QuerySet.bulk_create` does not support multi-table inheritance, so the base model rows are bulk created first and then the submodel rows are inserted with their explicit `*_ptr` ids.
+    The discriminator column is also set when the base model has one.
+
+    Args:
+        submodel_type (Type[models.Model]): Concrete submodel type of all the instances.
+        instances (List[models.Model]): Instances not yet stored in the database.
+
+    Raises:
+        ValueError: When the submodel does not derive from exactly one base model.
+
+    Returns:
+        List[models.Model]: The given instances with their primary keys set.
+    """
+    if not instances:
+        return []
+    base_types = submodel_type._meta.get_parent_list()
+    if len(base_types) != 1:
+        raise ValueError(
+            f"Submodel type {submodel_type} needs to derive from a single base model."
+        )
+    base_type = base_types[0]
+    connection = connections[router.db_for_write(submodel_type)]
+    if not connection.features.can_return_rows_from_bulk_insert:
+        # The generated primary keys cannot be retrieved, store them one by one.
+        for sm_instance in instances:
+            sm_instance.save()
+        return instances
+
+    if _has_submodel_field(base_type):
+        for sm_instance in instances:
+            setattr(sm_instance, SUBMODEL_FIELD, get_submodel_name(submodel_type))
+    base_fields = [f for f in base_type._meta.concrete_fields if not f.primary_key]
+    base_instances = base_type.objects.bulk_create(
+        [
+            base_type(
+                **{f.attname: getattr(sm_instance, f.attname) for f in base_fields}
+            )
+            for sm_instance in instances
+        ]
+    )
+    parent_link = submodel_type._meta.get_ancestor_link(base_type)
+    for sm_instance, b_instance in zip(instances, base_instances):
+        setattr(sm_instance, base_type._meta.pk.attname, b_instance.pk)
+        setattr(sm_instance, parent_link.attname, b_instance.pk)
+        sm_instance._state.adding = False
+        sm_instance._state.db = connection.alias
+
+    # The submodel rows only hold their own columns, including the `*_ptr` id.
+    local_fields = submodel_type._meta.local_concrete_fields
+    insert_sql = "INSERT INTO {} ({}) VALUES ({})".format(
+        connection.ops.quote_name(submodel_type._meta.db_table),
+        ", ".join(connection.ops.quote_name(f.column) for f in local_fields),
+        ", ".join(["%s"] * len(local_fields)),
+    )
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            insert_sql,
+            [
+                [
+                    f.get_db_prep_save(f.pre_save(sm_instance, True), connection)
+                    for f in local_fields
+                ]
+                for sm_instance in instances
+            ],
+        )
+    return instances
+
+
+def backfill_submodel_types(model_type: Type[models.Model]) -> int:
+    """
+    Stores the discriminator of every `model_type` row which does not have it yet.
+    It requires one update query per submodel type.
+
+    Args:
+        model_type (Type[models.Model]): Base model Type containing submodels.
+
+    Returns:
+        int: Number of updated rows.
+    """
+    updated = 0
+    for sm_type in get_submodel_type_list(model_type):
+        updated += model_type.objects.filter(
+            **{SUBMODEL_FIELD: ""}, pk__in=sm_type.objects.values("pk")
+        ).update(**{SUBMODEL_FIELD: get_submodel_name(sm_type)})
+    return updated
@@ -1,17 +1,30 @@
 # Create your views here.
 import io
-from typing import List, Type, Union
+from typing import Callable, Dict, List, Type, Union
 
 from django.contrib.auth.models import User
-from django.db import models
-from django.http import FileResponse, HttpResponseForbidden
-from rest_framework import permissions, serializers, viewsets
+from django.core.cache import cache
+from django.db import IntegrityError, models, transaction
+from django.http import (
+    FileResponse,
+    Http404,
+    HttpResponse,
+    HttpResponseForbidden,
+    StreamingHttpResponse,
+)
+from django.http.response import HttpResponseBase
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from rest_framework import mixins, permissions, serializers, status, viewsets
 from rest_framework.decorators import action
 from rest_framework.request import Request
 from rest_framework.response import Response
 
 from epic_app import epic_permissions
 from epic_app import serializers as epic_serializer
+from epic_app.epic_database import retry_on_database_lock
+from epic_app.epic_metrics import metrics_store, render_prometheus_text
+from epic_app.epic_pagination import EpicCursorPagination
 from epic_app.models.epic_answers import Answer
 from epic_app.models.epic_questions import (
     EvolutionQuestion,
@@ -20,10 +33,20 @@ from epic_app.models.epic_questions import (
     NationalFrameworkQuestion,
     Question,
 )
+from epic_app.models.epic_reports import EpicReportJob, ReportJobStatus
+from epic_app.models.epic_summaries import AnswerSummaryChange
 from epic_app.models.epic_user import EpicOrganization, EpicUser
-from epic_app.models.models import Agency, Area, Group, Program
+from epic_app.models.models import Agency, Area, DomainRevision, Group, Program
+from epic_app.serializers.report_export import stream_report_csv, stream_report_xlsx
 from epic_app.serializers.report_pdf import EpicPdfReport
-from epic_app.utils import get_submodel_type, get_submodel_type_list
+from epic_app.serializers.report_serializer import (
+    get_linkages_matrix,
+    get_programs_report,
+)
+from epic_app.utils import (
+    bulk_create_submodel_instances,
+    get_submodel_type,
+)
 
 
 class EpicUserViewSet(viewsets.ReadOnlyModelViewSet):
@@ -34,6 +57,7 @@ class EpicUserViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = EpicUser.objects.all()
     serializer_class = epic_serializer.EpicUserSerializer
     permission_classes = [permissions.IsAdminUser]
+    pagination_class = EpicCursorPagination
 
     @action(
         methods=["put"],
@@ -76,27 +100,78 @@ class EpicOrganizationViewSet(viewsets.ReadOnlyModelViewSet):
         url_name="report",
         permission_classes=[epic_permissions.IsAdminOrEpicAdvisor],
     )
-    def get_answers_report(self, request: Request, pk: str = None) -> models.QuerySet:
+    def get_answers_report(self, request: Request, pk: str = None) -> Response:
         """
         RETRIEVES all the `Answers` for each of the `Questions` filled by the `EpicUsers` of the requested `EpicOrganization`.
-        """
+        The report can be paged over its programs with the query parameters `page_size` and `cursor`.
+        """
+        report_users = self._get_report_users(request)
+        if not EpicCursorPagination.is_requested(request):
+            return Response(get_programs_report(report_users, request))
+        paginator = EpicCursorPagination()
+        programs_page = paginator.paginate_queryset(
+            Program.objects.all(), request, view=self
+        )
+        return paginator.get_paginated_response(
+            get_programs_report(report_users, request, programs_page)
+        )
 
-        def _filter_queryset() -> Union[models.QuerySet, List[EpicUser]]:
-            if bool(request.user.is_staff or request.user.is_superuser):
-                return EpicUser.objects.all()
-            else:
-                epic_org = request.user.epicuser.organization
-                return epic_org.organization_users
+    @staticmethod
+    def _get_report_users(request: Request) -> Union[models.QuerySet, List[EpicUser]]:
+        if bool(request.user.is_staff or request.user.is_superuser):
+            return EpicUser.objects.all()
+        return request.user.epicuser.organization.organization_users
 
-        r_serializer = epic_serializer.ProgramReportSerializer(
-            Program.objects.all(),
-            many=True,
-            context={
-                "request": request,
-                "users": _filter_queryset(),
-            },
+    # Extra actions are routed by method name, these ones must precede `get_answers_report` so its format suffix route does not catch them.
+    @action(
+        detail=False,
+        url_path="report.csv",
+        url_name="report-csv",
+        permission_classes=[epic_permissions.IsAdminOrEpicAdvisor],
+    )
+    def get_answers_export_csv(
+        self, request: Request, pk: str = None
+    ) -> StreamingHttpResponse:
+        """
+        STREAMS all the reported `Answers` as CSV, one row per program, question, user and answer.
+        """
+        response = StreamingHttpResponse(
+            stream_report_csv(self._get_report_users(request)),
+            content_type="text/csv; charset=utf-8",
+        )
+        response["Content-Disposition"] = 'attachment; filename="answers_report.csv"'
+        return response
+
+    @action(
+        detail=False,
+        url_path="report.xlsx",
+        url_name="report-xlsx",
+        permission_classes=[epic_permissions.IsAdminOrEpicAdvisor],
+    )
+    def get_answers_export_xlsx(
+        self, request: Request, pk: str = None
+    ) -> StreamingHttpResponse:
+        """
+        STREAMS all the reported `Answers` as an XLSX workbook, one row per program, question, user and answer.
+        """
+        response = StreamingHttpResponse(
+            stream_report_xlsx(self._get_report_users(request)),
+            content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
         )
-        return Response(r_serializer.data)
+        response["Content-Disposition"] = 'attachment; filename="answers_report.xlsx"'
+        return response
+
+    @action(
+        detail=False,
+        url_path="linkages",
+        url_name="linkages",
+        permission_classes=[epic_permissions.IsAdminOrEpicAdvisor],
+    )
+    def get_linkages_matrix(self, request: Request, pk: str = None) -> Response:
+        """
+        RETRIEVES the program x program matrix with the number of linkages answers of the `EpicUsers` of the requested `EpicOrganization` selecting each program.
+        """
+        return Response(get_linkages_matrix(self._get_report_users(request)))
 
     @action(
         detail=False,
@@ -107,7 +182,7 @@ class EpicOrganizationViewSet(viewsets.ReadOnlyModelViewSet):
     def get_answers_pdf_report(
         self, request: Request, pk: str = None
     ) -> models.QuerySet:
-        answer_report = self.get_answers_report(request, pk)
+        report_data = get_programs_report(self._get_report_users(request), request)
 
         def get_organization() -> List[str]:
             if bool(request.user.is_staff or request.user.is_superuser):
@@ -121,12 +196,116 @@ class EpicOrganizationViewSet(viewsets.ReadOnlyModelViewSet):
             (", ").join(get_organization())
         )
         pdf_report.report_author = request.user.username
-        pdf_report.generate_report(buffer, answer_report.data)
+        pdf_report.generate_report(buffer, report_data)
         buffer.seek(0)
         return FileResponse(buffer, as_attachment=True, filename="answers_report.pdf")
 
 
-class AreaViewSet(viewsets.ReadOnlyModelViewSet):
+class EpicReportJobViewSet(mixins.CreateModelMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    Acess point to request PDF reports which are rendered in the background by `manage.py run_report_worker`.
+    """
+
+    queryset = EpicReportJob.objects.all().order_by("-created_on")
+    serializer_class = epic_serializer.EpicReportJobSerializer
+    permission_classes = [epic_permissions.IsAdminOrEpicAdvisor]
+
+    def get_queryset(self) -> Union[models.QuerySet, List[EpicReportJob]]:
+        """
+        GET list of `EpicReportJob`. When `superuser` or `staff` all entries will be retrieved, otherwise only the ones requested by the user.
+        """
+        if bool(self.request.user.is_staff or self.request.user.is_superuser):
+            return self.queryset
+        return self.queryset.filter(requested_by=self.request.user)
+
+    def create(self, request: Request, *args, **kwargs) -> Response:
+        """
+        CREATE a new (pending) `EpicReportJob` for the requesting user's organization (or all of them for `staff`).
+        The report is only computed by the worker, which reuses the artifact of a report with the same content.
+        """
+        report_job = EpicReportJob(requested_by=request.user)
+        if not bool(request.user.is_staff or request.user.is_superuser):
+            report_job.organization = request.user.epicuser.organization
+        report_job.save()
+        serializer = self.get_serializer(report_job)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    @action(detail=True, url_path="download", url_name="download")
+    def download_report(self, request: Request, pk: str = None):
+        """
+        Streams the PDF file of a finished `EpicReportJob`.
+
+        Args:
+            request (Request): API Request.
+            pk (str, optional): `EpicReportJob` id. Defaults to None.
+
+        Returns:
+            FileResponse: Streamed PDF report, or a 409 response when it is not available yet.
+        """
+        report_job: EpicReportJob = self.get_object()
+        if (
+            report_job.status != ReportJobStatus.FINISHED
+            or not report_job.has_report_file()
+        ):
+            return Response(
+                {"detail": f"Report not available, job status: {report_job.status}."},
+                status=status.HTTP_409_CONFLICT,
+            )
+        return FileResponse(
+            open(report_job.get_report_file(), "rb"),
+            as_attachment=True,
+            filename="answers_report.pdf",
+        )
+
+
+class EagerLoadingMixin:
+    """
+    Applies the prefetch plan declared by the viewset serializer (see `EagerLoadingModelSerializer`) to the viewset queryset.
+    """
+
+    def get_queryset(self) -> models.QuerySet:
+        return self.get_serializer_class().setup_eager_loading(super().get_queryset())
+
+
+class DomainRevisionCacheMixin:
+    """
+    Serves read-only domain data with conditional responses (`ETag` and `Last-Modified`) based on the `DomainRevision`.
+    The serialized data is kept in the server cache for the current revision, so repeated requests are not serialized again.
+    """
+
+    def _get_revision_response(
+        self, request: Request, handler: Callable[..., Response], *args, **kwargs
+    ) -> HttpResponseBase:
+        d_revision = DomainRevision.get_current()
+        etag = f'"{d_revision.get_etag()}-{request.accepted_renderer.format}"'
+        last_modified = int(d_revision.updated_on.timestamp())
+        response = get_conditional_response(
+            request._request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            cache_key = f"epic_domain:{etag}:{request.build_absolute_uri()}"
+            cached_data = cache.get(cache_key)
+            if cached_data is not None:
+                response = Response(cached_data)
+            else:
+                response = handler(request, *args, **kwargs)
+                if response.status_code == status.HTTP_200_OK:
+                    cache.set(cache_key, response.data, timeout=None)
+        response["ETag"] = etag
+        response["Last-Modified"] = http_date(last_modified)
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    def list(self, request: Request, *args, **kwargs) -> HttpResponseBase:
+        return self._get_revision_response(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request: Request, *args, **kwargs) -> HttpResponseBase:
+        return self._get_revision_response(request, super().retrieve, *args, **kwargs)
+
+
+class AreaViewSet(
+    DomainRevisionCacheMixin, EagerLoadingMixin, viewsets.ReadOnlyModelViewSet
+):
     """
     Acess point for CRUD operations on `Area` table.
     """
@@ -136,7 +315,9 @@ class AreaViewSet(viewsets.ReadOnlyModelViewSet):
     permission_classes = [permissions.DjangoModelPermissions]
 
 
-class AgencyViewSet(viewsets.ReadOnlyModelViewSet):
+class AgencyViewSet(
+    DomainRevisionCacheMixin, EagerLoadingMixin, viewsets.ReadOnlyModelViewSet
+):
     """
     Acess point for CRUD operations on `Agency` table.
     """
@@ -146,7 +327,9 @@ class AgencyViewSet(viewsets.ReadOnlyModelViewSet):
     permission_classes = [permissions.DjangoModelPermissions]
 
 
-class GroupViewSet(viewsets.ReadOnlyModelViewSet):
+class GroupViewSet(
+    DomainRevisionCacheMixin, EagerLoadingMixin, viewsets.ReadOnlyModelViewSet
+):
     """
     Acess point for CRUD operations on `Group` table.
     """
@@ -156,7 +339,9 @@ class GroupViewSet(viewsets.ReadOnlyModelViewSet):
     permission_classes = [permissions.DjangoModelPermissions]
 
 
-class ProgramViewSet(viewsets.ReadOnlyModelViewSet):
+class ProgramViewSet(
+    DomainRevisionCacheMixin, EagerLoadingMixin, viewsets.ReadOnlyModelViewSet
+):
     """
     Acess point for CRUD operations on `Program` table.
     """
@@ -184,6 +369,36 @@ class ProgramViewSet(viewsets.ReadOnlyModelViewSet):
         )
         return Response(serializer.data)
 
+    @action(detail=False, url_path="progress", url_name="progress-list")
+    def get_progress_list(self, request: Request) -> Response:
+        """
+        Gets the percentage of answered questions of every `Program` for the `EpicUser` currently logged in.
+        Advisors can request the progress of all the users of their `EpicOrganization` with the query parameter `all_users=true`.
+
+        Args:
+            request (Request): API Request.
+
+        Returns:
+            Response: Serialized list of progress entries (one per user and program).
+        """
+        epic_user: EpicUser = getattr(request.user, "epicuser", None)
+        if not epic_user:
+            return HttpResponseForbidden()
+        progress_users = [epic_user]
+        if request.query_params.get("all_users", "").lower() == "true":
+            if not epic_user.is_advisor:
+                return HttpResponseForbidden()
+            if epic_user.organization_id:
+                progress_users = EpicUser.objects.filter(
+                    organization_id=epic_user.organization_id
+                ).order_by("pk")
+        serializer = epic_serializer.ProgressSerializer(
+            Program.objects.all(),
+            many=True,
+            context={"request": request, "users": progress_users},
+        )
+        return Response(serializer.data)
+
     def _get_question(
         self, request: Request, question_type: Question, pk: str = None
     ) -> Response:
@@ -275,21 +490,14 @@ class ProgramViewSet(viewsets.ReadOnlyModelViewSet):
 class QuestionViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = Question.objects.all()
     serializer_class = epic_serializer.QuestionSerializer
+    pagination_class = EpicCursorPagination
     permissiion_classes = [permissions.DjangoModelPermissions]
 
     @staticmethod
     def _get_related_answer_type(question_pk: str) -> Type[Answer]:
-        q_type = get_submodel_type(Question, question_pk)
-        answer_subtypes: List[Type[Answer]] = get_submodel_type_list(Answer)
-        a_type = next(
-            (
-                a_t
-                for a_t in answer_subtypes
-                if q_type in a_t._get_supported_questions()
-            ),
-            None,
+        return epic_serializer.answer_type_registry.get_question_answer_type(
+            question_pk
         )
-        return a_type
 
     def _get_epic_users_queryset(
         self, request: Request
@@ -321,38 +529,86 @@ class QuestionViewSet(viewsets.ReadOnlyModelViewSet):
 
         return Response(q_serializer.data)
 
+    @staticmethod
+    def _get_many_to_many_names(a_type: Type[Answer]) -> List[str]:
+        return [m2m.name for m2m in a_type._meta.many_to_many]
+
+    def _get_user_answers(
+        self, a_type: Type[Answer], question_pk: int, e_users: List[EpicUser]
+    ) -> Dict[int, Answer]:
+        """
+        Gets the existing `answers` of the given users to the given `question` (one query plus prefetches).
+        """
+        answers = a_type.objects.filter(
+            question_id=question_pk, user__in=[e_user.pk for e_user in e_users]
+        ).prefetch_related(*self._get_many_to_many_names(a_type))
+        return {answer.user_id: answer for answer in answers}
+
+    @staticmethod
+    @retry_on_database_lock
+    def _create_missing_answers(a_type: Type[Answer], missing_answers: List[Answer]):
+        with transaction.atomic():
+            bulk_create_submodel_instances(a_type, missing_answers)
+            AnswerSummaryChange(a_type, []).apply([a.pk for a in missing_answers])
+
     @action(detail=True, url_path="answers", url_name="answers")
-    def retrieve_answers(self, request: Request, pk: str = None) -> models.QuerySet:
+    def retrieve_answers(self, request: Request, pk: str = None) -> Response:
         """
-        Retrieves the `answers` for the given `question`.
-        ASSUMPTION: The request is done with an `EpicUser`.
+        Retrieves the `answers` for the given `question`, one per involved `EpicUser`.
+        Missing answers are returned as placeholders (without `id`) unless the query parameter `create_missing=true` is given, in which case they are stored at once.
+        Requests from `superuser` or staff users are cursor paginated (`cursor` and `page_size` query parameters).
 
         Args:
             request (Request): Request from the client.
-            pk (str, optional): `Answer` id. Defaults to None.
+            pk (str, optional): `Question` id. Defaults to None.
         """
-
-        def get_user_answer(epic_user: EpicUser) -> Answer:
-            a_instance, _ = a_type.objects.get_or_create(
-                question=Question.objects.get(pk=pk), user=epic_user
-            )
-            return a_instance
-
-        e_users = self._get_epic_users_queryset(request)
+        # Unknown (or not numeric) question ids resolve to no answer type.
         a_type = self._get_related_answer_type(question_pk=pk)
-        a_serializer_type = epic_serializer.AnswerSerializer.get_concrete_serializer(
-            a_type
-        )
-        a_instances = [get_user_answer(e_user) for e_user in e_users]
+        if a_type is None:
+            raise Http404(f"No question found with id {pk}.")
+        question_pk = Question._meta.pk.to_python(pk)
+        e_users = self._get_epic_users_queryset(request)
+        paginator = None
+        if getattr(request.user, "epicuser", None) is None:
+            paginator = EpicCursorPagination()
+            e_users = paginator.paginate_queryset(e_users, request, view=self)
+        else:
+            e_users = list(e_users)
+        user_answers = self._get_user_answers(a_type, question_pk, e_users)
+        missing_answers = [
+            a_type(user=e_user, question_id=question_pk)
+            for e_user in e_users
+            if e_user.pk not in user_answers
+        ]
+        if (
+            missing_answers
+            and request.query_params.get("create_missing", "").lower() == "true"
+        ):
+            try:
+                self._create_missing_answers(a_type, missing_answers)
+                models.prefetch_related_objects(
+                    missing_answers, *self._get_many_to_many_names(a_type)
+                )
+            except IntegrityError:
+                # Created meanwhile by a concurrent request, read them again.
+                user_answers = self._get_user_answers(a_type, question_pk, e_users)
+        for a_missing in missing_answers:
+            user_answers.setdefault(a_missing.user_id, a_missing)
+        a_serializer_type = epic_serializer.answer_type_registry.get_serializer(a_type)
         a_serializer = a_serializer_type(
-            a_instances, many=True, context={"request": request}
+            [user_answers[e_user.pk] for e_user in e_users],
+            many=True,
+            context={"request": request},
         )
+        if paginator:
+            return paginator.get_paginated_response(a_serializer.data)
         return Response(a_serializer.data)
 
 
 class AnswerViewSet(viewsets.ModelViewSet):
     queryset = Answer.objects.all()
     serializer_class = epic_serializer.AnswerSerializer
+    pagination_class = EpicCursorPagination
 
     def get_permissions(self):
         """
@@ -361,8 +617,10 @@ class AnswerViewSet(viewsets.ModelViewSet):
         Returns:
             List[permissions.BasePermission]: List of permissions for the request being done.
         """
-        if not self.request.data.get("user", None) and getattr(
-            self.request.user, "epicuser", False
+        if (
+            isinstance(self.request.data, dict)
+            and not self.request.data.get("user", None)
+            and getattr(self.request.user, "epicuser", False)
         ):
             self.request.data["user"] = self.request.user.epicuser.id
         if self.request.method in ["DELETE", "PUT", "PATCH"]:
@@ -401,7 +659,7 @@ class AnswerViewSet(viewsets.ModelViewSet):
         if not self._get_is_authorized_user(request, pk):
             return HttpResponseForbidden()
         a_subtype = get_submodel_type(Answer, pk)
-        a_serializer_type = epic_serializer.AnswerSerializer.get_concrete_serializer(
+        a_serializer_type = epic_serializer.answer_type_registry.get_serializer(
             a_subtype
         )
         a_serializer = a_serializer_type(
@@ -413,12 +671,13 @@ class AnswerViewSet(viewsets.ModelViewSet):
         if not self._get_is_authorized_user(request, pk):
             return HttpResponseForbidden()
         a_subtype = get_submodel_type(Answer, pk)
-        self.serializer_class = (
-            epic_serializer.AnswerSerializer.get_concrete_serializer(a_subtype)
+        self.serializer_class = epic_serializer.answer_type_registry.get_serializer(
+            a_subtype
         )
         self.queryset = self._filter_queryset(a_subtype).get(pk=pk)
         return request
 
+    @retry_on_database_lock
     def update(self, request, pk: str, *args, **kwargs):
         """
         UPDATE a single `Answer`. It assumes the given data matches the expected subtype.
@@ -427,6 +686,7 @@ class AnswerViewSet(viewsets.ModelViewSet):
             self._get_update_request(request, pk), pk, *args, **kwargs
         )
 
+    @retry_on_database_lock
     def partial_update(self, request, pk: str, *args, **kwargs):
         """
         PATCH a single `Answer`. It assumes the given data matches the expected subtype.
@@ -436,12 +696,43 @@ class AnswerViewSet(viewsets.ModelViewSet):
             self._get_update_request(request, pk), pk, *args, **kwargs
         )
 
+    @retry_on_database_lock
     def create(self, request, *args, **kwargs):
         """
         CREATE a new `Answer` using the subtype associated serializer.
         """
         a_subtype = QuestionViewSet._get_related_answer_type(request.data["question"])
-        self.serializer_class = (
-            epic_serializer.AnswerSerializer.get_concrete_serializer(a_subtype)
+        self.serializer_class = epic_serializer.answer_type_registry.get_serializer(
+            a_subtype
         )
         return super().create(request, *args, **kwargs)
+
+    @action(detail=False, methods=["post"], url_path="bulk", url_name="bulk")
+    @retry_on_database_lock
+    def bulk_upsert(self, request: Request):
+        """
+        CREATE or UPDATE several `Answers` of the requesting `EpicUser` at once.
+        Each answer is identified by its `question`, the response contains the result of each of them in the requested order.
+        When any answer is not valid nothing gets stored and the errors of each answer are returned instead.
+        """
+        epic_user = getattr(request.user, "epicuser", None)
+        if not epic_user:
+            return HttpResponseForbidden()
+        bulk_upsert = epic_serializer.BulkAnswerUpsert(epic_user, request.data)
+        if not bulk_upsert.is_valid():
+            return Response(bulk_upsert.errors, status=status.HTTP_400_BAD_REQUEST)
+        return Response(bulk_upsert.save())
+
+
+class MetricsViewSet(viewsets.ViewSet):
+    """
+    Request metrics of all the server processes in the Prometheus text format, only for staff users.
+    """
+
+    permission_classes = [permissions.IsAdminUser]
+
+    def list(self, request: Request) -> HttpResponse:
+        return HttpResponse(
+            render_prometheus_text(metrics_store.get_samples()),
+            content_type="text/plain; version=0.0.4; charset=utf-8",
+        )
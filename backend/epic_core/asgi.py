@@ -2,6 +2,7 @@
 ASGI config for epic_core project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+The read and render endpoints are handled in bounded thread pools, see `epic_app.epic_async`.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/4.0/howto/deployment/asgi/
@@ -9,8 +10,12 @@ https://docs.djangoproject.com/en/4.0/howto/deployment/asgi/
 
 import os
 
-from django.core.asgi import get_asgi_application
+import django
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "epic_core.settings")
 
-application = get_asgi_application()
+django.setup(set_prefix=False)
+
+from epic_app.epic_async import EpicASGIHandler  # noqa: E402
+
+application = EpicASGIHandler()
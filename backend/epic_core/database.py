@@ -0,0 +1,64 @@
+import os
+from pathlib import Path
+from typing import Any, Dict, Mapping, Optional
+
+_true_values = ("1", "true", "yes", "on")
+
+
+def _get_bool(environ: Mapping[str, str], name: str, default: bool) -> bool:
+    value = environ.get(name, None)
+    if value is None or not value.strip():
+        return default
+    return value.strip().lower() in _true_values
+
+
+def get_default_database(
+    base_dir: Path, environ: Optional[Mapping[str, str]] = None
+) -> Dict[str, Any]:
+    """
+    Gets the `default` entry of `DATABASES` from the environment, SQLite (at `base_dir / "db.sqlite3"`) unless `EPIC_DB_ENGINE=postgresql`.
+
+    PostgreSQL is configured with `EPIC_DB_NAME`, `EPIC_DB_USER`, `EPIC_DB_PASSWORD`, `EPIC_DB_HOST`, `EPIC_DB_PORT` and `EPIC_DB_SSLMODE`.
+    Its connections are kept open for `EPIC_DB_CONN_MAX_AGE` seconds (60 by default, 0 closes them after each request)
+    and checked before being reused in a new request unless `EPIC_DB_HEALTH_CHECKS=false`.
+    With `EPIC_DB_POOLING=pgbouncer` the connections go through a PgBouncer pool in transaction mode, which does not support server-side cursors.
+
+    Args:
+        base_dir (Path): Directory of the SQLite database file.
+        environ (Optional[Mapping[str, str]], optional): Environment variables. Defaults to None (`os.environ`).
+
+    Raises:
+        ValueError: When the engine or the pooling mode are not supported.
+
+    Returns:
+        Dict[str, Any]: Database settings.
+    """
+    if environ is None:
+        environ = os.environ
+    db_engine = environ.get("EPIC_DB_ENGINE", "sqlite").strip().lower()
+    if db_engine == "sqlite":
+        return {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": Path(environ.get("EPIC_DB_NAME", base_dir / "db.sqlite3")),
+        }
+    if db_engine not in ("postgresql", "postgres"):
+        raise ValueError(f"Database engine '{db_engine}' is not supported.")
+
+    db_pooling = environ.get("EPIC_DB_POOLING", "").strip().lower()
+    if db_pooling not in ("", "pgbouncer"):
+        raise ValueError(f"Database pooling mode '{db_pooling}' is not supported.")
+    db_options = {}
+    if environ.get("EPIC_DB_SSLMODE", ""):
+        db_options["sslmode"] = environ["EPIC_DB_SSLMODE"]
+    return {
+        "ENGINE": "django.db.backends.postgresql",
+        "NAME": environ.get("EPIC_DB_NAME", "epic"),
+        "USER": environ.get("EPIC_DB_USER", "epic"),
+        "PASSWORD": environ.get("EPIC_DB_PASSWORD", ""),
+        "HOST": environ.get("EPIC_DB_HOST", "localhost"),
+        "PORT": environ.get("EPIC_DB_PORT", "5432"),
+        "CONN_MAX_AGE": int(environ.get("EPIC_DB_CONN_MAX_AGE", "60")),
+        "CONN_HEALTH_CHECKS": _get_bool(environ, "EPIC_DB_HEALTH_CHECKS", True),
+        "DISABLE_SERVER_SIDE_CURSORS": db_pooling == "pgbouncer",
+        "OPTIONS": db_options,
+    }
@@ -12,6 +12,8 @@ https://docs.djangoproject.com/en/4.0/ref/settings/
 
 from pathlib import Path
 
+from epic_core.database import get_default_database
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -68,6 +70,8 @@ REST_FRAMEWORK = {
 # endregion
 
 MIDDLEWARE = [
+    # First, so the measured latency includes the other middlewares.
+    "epic_app.epic_metrics.EpicMetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -107,14 +111,26 @@ WSGI_APPLICATION = "epic_core.wsgi.application"
 
 # Database
 # https://docs.djangoproject.com/en/4.0/ref/settings/#databases
+# SQLite by default, set `EPIC_DB_ENGINE=postgresql` (and the `EPIC_DB_*` variables described in `epic_core.database`) to use PostgreSQL.
+
+DATABASES = {"default": get_default_database(BASE_DIR)}
+
 
-DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
-    }
+# SQLite tuning
+# PRAGMAs run on every new SQLite connection: with WAL journaling readers do not wait for writers, and writers wait up to `busy_timeout` milliseconds for the lock.
+
+EPIC_SQLITE_PRAGMAS = {
+    "journal_mode": "wal",
+    "busy_timeout": 5000,
+    "synchronous": "normal",
+    "mmap_size": 256 * 1024 * 1024,
 }
 
+# Answer writes failing because the database is locked are retried up to `EPIC_DB_LOCK_RETRIES` times, waiting `EPIC_DB_LOCK_RETRY_DELAY` seconds (doubled on each retry).
+
+EPIC_DB_LOCK_RETRIES = 3
+EPIC_DB_LOCK_RETRY_DELAY = 0.05
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.0/ref/settings/#auth-password-validators
@@ -153,6 +169,47 @@ USE_TZ = True
 STATIC_ROOT = "/var/www/html/ighcrm/static/"
 STATIC_URL = "static/"
 
+# Asynchronous reports
+# Directory where the report worker (`manage.py run_report_worker`) stores the generated PDF reports.
+
+EPIC_REPORTS_DIR = BASE_DIR / "reports"
+
+# Bulk user provisioning
+# Number of processes hashing the passwords of generated users, `None` uses all the available cpus.
+
+EPIC_PASSWORD_HASHING_WORKERS = None
+
+# PDF reports
+# Number of processes laying out the program sections of the PDF reports in `run_report_worker`, `None` uses all the available cpus. The web process always lays them out serially.
+
+EPIC_REPORT_RENDERING_WORKERS = None
+
+# Asynchronous serving
+# Under an ASGI server (`epic_core.asgi`) the read and render endpoints are handled in bounded thread pools, number of threads per pool.
+
+EPIC_ASYNC_THREAD_POOLS = {"read": 16, "render": 2}
+
+# Pagination
+# Default number of entries per page of the cursor paginated endpoints (`page_size` query parameter).
+
+EPIC_PAGE_SIZE = 100
+
+# Report exports
+# Number of answers read per query when streaming the CSV and XLSX reports.
+
+EPIC_EXPORT_CHUNK_SIZE = 2000
+
+# Domain imports
+# Number of rows written per query when applying the changes of an upsert import.
+
+EPIC_IMPORT_BATCH_SIZE = 500
+
+# Request metrics
+# SQLite file where all the server processes aggregate their request metrics (exposed at `/api/metrics/`), and maximum seconds a process keeps them in memory.
+
+EPIC_METRICS_FILE = BASE_DIR / "metrics.sqlite3"
+EPIC_METRICS_FLUSH_SECONDS = 5
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.0/ref/settings/#default-auto-field
 
@@ -0,0 +1,78 @@
+from pathlib import Path
+
+import pytest
+from django.conf import settings
+from django.db import connection
+
+from epic_core.database import get_default_database
+
+
+class TestGetDefaultDatabase:
+    def test_sqlite_by_default(self, tmp_path: Path):
+        assert get_default_database(tmp_path, {}) == {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": tmp_path / "db.sqlite3",
+        }
+
+    def test_postgresql_with_persistent_connections(self, tmp_path: Path):
+        db_settings = get_default_database(
+            tmp_path,
+            {
+                "EPIC_DB_ENGINE": "postgresql",
+                "EPIC_DB_NAME": "epic_db",
+                "EPIC_DB_USER": "epic_user",
+                "EPIC_DB_PASSWORD": "s3cret",
+                "EPIC_DB_HOST": "db.local",
+                "EPIC_DB_SSLMODE": "require",
+            },
+        )
+        assert db_settings == {
+            "ENGINE": "django.db.backends.postgresql",
+            "NAME": "epic_db",
+            "USER": "epic_user",
+            "PASSWORD": "s3cret",
+            "HOST": "db.local",
+            "PORT": "5432",
+            "CONN_MAX_AGE": 60,
+            "CONN_HEALTH_CHECKS": True,
+            "DISABLE_SERVER_SIDE_CURSORS": False,
+            "OPTIONS": {"sslmode": "require"},
+        }
+
+    def test_postgresql_behind_pgbouncer(self, tmp_path: Path):
+        db_settings = get_default_database(
+            tmp_path,
+            {
+                "EPIC_DB_ENGINE": "postgresql",
+                "EPIC_DB_POOLING": "pgbouncer",
+                "EPIC_DB_CONN_MAX_AGE": "0",
+                "EPIC_DB_HEALTH_CHECKS": "false",
+            },
+        )
+        assert db_settings["DISABLE_SERVER_SIDE_CURSORS"]
+        assert db_settings["CONN_MAX_AGE"] == 0
+        assert not db_settings["CONN_HEALTH_CHECKS"]
+
+    @pytest.mark.parametrize(
+        "environ",
+        [
+            pytest.param({"EPIC_DB_ENGINE": "oracle"}, id="Engine"),
+            pytest.param(
+                {"EPIC_DB_ENGINE": "postgresql", "EPIC_DB_POOLING": "pgpool"},
+                id="Pooling",
+            ),
+        ],
+    )
+    def test_unsupported_settings_raise(self, tmp_path: Path, environ: dict):
+        with pytest.raises(ValueError):
+            get_default_database(tmp_path, environ)
+
+
+@pytest.mark.django_db
+class TestEnvironmentDatabase:
+    def test_tests_run_on_the_environment_database(self):
+        env_settings = get_default_database(settings.BASE_DIR)
+        assert connection.settings_dict["ENGINE"] == env_settings["ENGINE"]
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+            assert cursor.fetchone() == (1,)
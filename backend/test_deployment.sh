@@ -6,4 +6,5 @@ python3 -c "from pathlib import Path; Path('.django_debug').write_text('True')"
 poetry install
 poetry run python3 manage.py epic_setup --test
 poetry run python3 manage.py collectstatic --noinput
-poetry run gunicorn epic_core.wsgi &
\ No newline at end of file
+poetry run gunicorn epic_core.wsgi &
+poetry run python3 manage.py run_report_worker &
\ No newline at end of file
@@ -3,7 +3,12 @@
 # Author : Carles S. Soriano Perez (carles.sorianoperez@deltares.nl)
 git pull
 poetry install
+poetry run python3 manage.py check_program_names || exit 1
 poetry run python3 manage.py makemigrations
 poetry run python3 manage.py migrate
+poetry run python3 manage.py backfill_submodel_types
+poetry run python3 manage.py backfill_program_name_keys
+poetry run python3 manage.py rebuild_answer_summaries
 poetry run python3 manage.py collectstatic --noinput
-poetry run gunicorn epic_core.wsgi &
\ No newline at end of file
+poetry run gunicorn epic_core.wsgi &
+poetry run python3 manage.py run_report_worker &
\ No newline at end of file
@@ -52,6 +52,25 @@ export async function loadProgress(programId, token) {
     return progress;
 }
 
+export async function loadProgressList(token) {
+    const options = {
+        method: 'GET',
+        mode: 'cors',
+        headers: {
+            'Accept': 'application/json',
+            'Content-Type': 'application/json',
+            'Authorization': 'Token ' + token,
+        },
+    }
+    let answer = server + '/api/program/progress/?format=json';
+    let response = await fetch(answer, options);
+    if (response.status !== 200) {
+        return [];
+    }
+    const progressList = await response.json();
+    return progressList;
+}
+
 export async function loadAnswer(questionId, token) {
     const options = {
         method: 'GET',
@@ -62,7 +81,7 @@ export async function loadAnswer(questionId, token) {
             'Authorization': 'Token ' + token,
         },
     }
-    let answer = server + '/api/question/' + questionId + '/answers/?format=json';
+    let answer = server + '/api/question/' + questionId + '/answers/?format=json&create_missing=true';
     let response = await fetch(answer, options);
     if (response.status !== 200) {
         return {};
@@ -118,9 +118,16 @@ export default new Vuex.Store({
             let unansweredQuestions = 0;
             let uncompleteGroups = new Set();
             let uncompleteAreas = new Set();
+            const progressList = await util.loadProgressList(context.state.token);
             for (let programId of context.state.programSelection) {
-                const response = await util.loadProgress(programId, context.state.token);
-                if (response.progress === 1) {
+                let response = progressList.find(progress => progress.program === programId);
+                if (response === undefined) {
+                    // Not in the bulk list (or it failed to load), ask for this program only.
+                    response = await util.loadProgress(programId, context.state.token);
+                }
+                const progress = response.progress || 0;
+                const questionsAnswers = response.questions_answers || [];
+                if (progress === 1) {
                     completedPrograms.add(programId);
                 } else {
                     const program = context.state.programs.filter(program => program.id === programId);
@@ -128,8 +135,8 @@ export default new Vuex.Store({
                     uncompleteAreas.add(group[0].area);
                     uncompleteGroups.add(program[0].group);
                 }
-                totalProgress = totalProgress + response.progress;
-                unansweredQuestions = unansweredQuestions + (1 - response.progress) * response.questions_answers.length;
+                totalProgress = totalProgress + progress;
+                unansweredQuestions = unansweredQuestions + (1 - progress) * questionsAnswers.length;
             }
             totalProgress = totalProgress / context.state.programSelection.size;
             context.state.progress = (totalProgress * 100).toFixed(0);